@@ -1,7 +1,11 @@
 from logging import StreamHandler
 from logging.handlers import RotatingFileHandler
+from collections import deque
+from typing import Optional
 import logging
 import os
+import sys
+import threading
 import time
 from enum import IntEnum
 
@@ -10,6 +14,8 @@ MAX_NUM_OF_LOGS = 4000
 MAX_LINE_LENGTH_IN_BYTE = 100
 MAX_DATA_TO_READ = MAX_LINE_LENGTH_IN_BYTE * MAX_NUM_OF_LOGS
 LOG_FILE_LIFETIME_DAYS = 14
+LOG_QUEUE_SIZE = 4096
+LOG_BATCH_INTERVAL_MS = 100
 
 
 class LogLevel(IntEnum):
@@ -39,6 +45,8 @@ def add_log_level(level_num: int, level_name: str):
 
 add_log_level(LogLevel.Measure(), 'MEASURE')
 
+LOG_LEVELS = frozenset(LogLevel)
+
 
 # this class could be used to wrap log information into for example a file format other
 # than the standard (.log) file
@@ -47,7 +55,8 @@ class LogHandler(StreamHandler):
     def __init__(self, formatter, mqtt=None):
         super().__init__()
         self.formatter = formatter
-        self._last_log = []
+        # only the latest logs are kept for applications that never collect them
+        self._last_log = deque(maxlen=MAX_NUM_OF_LOGS)
         self.mqtt = mqtt
 
     def emit(self, record):
@@ -59,9 +68,7 @@ class LogHandler(StreamHandler):
             self.mqtt.send_log(log_data)
 
     def get_log_data(self):
-        log = self._last_log.copy()
-        self._last_log = []
-        return log
+        return [self._last_log.popleft() for _ in range(len(self._last_log))]
 
     def has_log_entries(self):
         return len(self._last_log) > 0
@@ -70,12 +77,89 @@ class LogHandler(StreamHandler):
         self.mqtt = mqtt_client
 
 
+class BatchedLogHandler(LogHandler):
+    '''
+        LogHandler that formats, prints and publishes the records on a
+        background thread, logging only costs appending the record to a
+        bounded ring buffer.
+
+        Every 'batch_interval_ms' the buffered records are written to the
+        'file_handler' and published as one mqtt message (a list of log
+        lines). If the buffer is full the oldest
+        record is dropped, the number of dropped records is reported with a
+        warning in the next batch.
+    '''
+
+    def __init__(self, formatter, mqtt=None, batch_interval_ms: int = LOG_BATCH_INTERVAL_MS, queue_size: int = LOG_QUEUE_SIZE,
+                 file_handler: Optional[logging.Handler] = None):
+        super().__init__(formatter, mqtt)
+        self._file_handler = file_handler
+        self._records = deque(maxlen=queue_size)
+        self._batch_interval = batch_interval_ms / 1000.0
+        self._flush_lock = threading.Lock()
+        self._drops_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._unreported_drops = 0
+        self._thread = threading.Thread(target=self._publish_batches, name='log-batcher', daemon=True)
+        self._thread.start()
+
+    def emit(self, record):
+        if len(self._records) == self._records.maxlen:
+            with self._drops_lock:
+                self._unreported_drops += 1
+        self._records.append(record)
+
+    def flush(self):
+        with self._flush_lock:
+            records = [self._records.popleft() for _ in range(len(self._records))]
+
+            with self._drops_lock:
+                dropped, self._unreported_drops = self._unreported_drops, 0
+
+            if dropped:
+                records.append(self._create_dropped_record(records, dropped))
+
+            if not records:
+                return
+
+            if self._file_handler is not None:
+                for record in records:
+                    self._file_handler.handle(record)
+
+            lines = [self.format(record) for record in records]
+            self._last_log.extend(lines)
+            print('\n'.join(lines))
+
+            if self.mqtt:
+                self.mqtt.send_log(lines)
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        super().close()
+
+    def _publish_batches(self):
+        while not self._stopped.wait(self._batch_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                sys.stderr.write(f'publishing logs failed: {e}\n')
+
+    @staticmethod
+    def _create_dropped_record(records: list, dropped: int) -> logging.LogRecord:
+        name = records[-1].name if records else 'logger'
+        return logging.makeLogRecord({'name': name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                                      'msg': f'{dropped} log messages were dropped, the log buffer was full'})
+
+
 class Logger:
     datefmt = '%d/%m/%Y %I:%M:%S %p'
     filetime_fmt = '%Y%m%d-%H%M%S'
     base_path = "log"
 
-    def __init__(self, logger_name, mqtt=None, abs_path: str = ''):
+    def __init__(self, logger_name, mqtt=None, abs_path: str = '', batch_interval_ms: Optional[int] = None):
         self.active_loggers = {}
         self.logger_name = logger_name
         self.global_log_level = logging.WARNING
@@ -94,8 +178,14 @@ class Logger:
         formatter = logging.Formatter('%(name)-9s|%(asctime)-4s |%(levelname)-7s |%(message)s',
                                       datefmt=self.datefmt)
 
-        self.stream_handler = LogHandler(formatter, mqtt)
         self.file_rotation_handler.setFormatter(formatter)
+        # with a batch interval the logs are written and published from a background thread, see BatchedLogHandler
+        if batch_interval_ms is None:
+            self.stream_handler = LogHandler(formatter, mqtt)
+            self._handlers = [self.stream_handler, self.file_rotation_handler]
+        else:
+            self.stream_handler = BatchedLogHandler(formatter, mqtt, batch_interval_ms, file_handler=self.file_rotation_handler)
+            self._handlers = [self.stream_handler]
         self.logger = self.get_logger_for_component(self.logger_name)
 
         self.set_logger_level(logging.WARNING)
@@ -104,14 +194,15 @@ class Logger:
     def cleanup(self):
         # remove all used handler
         self.logger.handlers = []
+        self.stream_handler.close()
 
     def get_logger_for_component(self, component_name):
         if component_name in self.active_loggers:
             return self.active_loggers[component_name]
 
         new_logger = logging.getLogger(component_name)
-        new_logger.addHandler(self.stream_handler)
-        new_logger.addHandler(self.file_rotation_handler)
+        for handler in self._handlers:
+            new_logger.addHandler(handler)
         new_logger.setLevel(self.global_log_level)
         self.active_loggers[component_name] = new_logger
         return new_logger
@@ -121,16 +212,12 @@ class Logger:
         return logging.getLogger()
 
     def log_message(self, type, message):
-        try:
-            {
-                LogLevel.Info(): lambda: self.logger.info(message),
-                LogLevel.Debug(): lambda: self.logger.debug(message),
-                LogLevel.Warning(): lambda: self.logger.warning(message),
-                LogLevel.Error(): lambda: self.logger.error(message),
-                LogLevel.Measure(): lambda: self.logger.measure(message),
-            }[type]()
-        except Exception as e:
-            raise Exception(f"message type could not be handled: {e}")
+        if type not in LOG_LEVELS:
+            raise Exception(f"message type could not be handled: {type}")
+
+        # the level is checked before the record is created and formatted
+        if self.logger.isEnabledFor(type):
+            self.logger.log(type, message)
 
     def get_logs(self):
         self.clear_logs()
@@ -1,14 +1,28 @@
+from pathlib import Path
+
 from ate_common.pattern.stil_tool_base import StilToolBase
 from stil_tools.sc_loader import SLoader
 
 # stil tool use this path to do the loading work
 OUTPUT_DIR = '/tmp/mem'
+# patterns listed here are in tester memory already, see StilToolBase._load_patterns
+MANIFEST_PATH = f'{OUTPUT_DIR}_manifest.json'
 
 
 class StilTool(StilToolBase):
+    manifest_path = MANIFEST_PATH
+
     def __init__(self):
+        super().__init__()
         self._loader = SLoader()
         self.pattern_withpath = False if not hasattr(self._loader, 'pattern_withpath') else self._loader.pattern_withpath
 
     def _load_patterns_impl(self, compiled_patterns: list):
         self._loader.load(compiled_patterns, OUTPUT_DIR)
+
+    def _read_manifest(self) -> dict:
+        # nothing is loaded if the loader output is gone, e.g. after a reboot of the tester
+        if not Path(OUTPUT_DIR).exists():
+            return {}
+
+        return super()._read_manifest()
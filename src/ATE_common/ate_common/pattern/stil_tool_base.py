@@ -1,10 +1,20 @@
+import hashlib
+import json
+import os
+import time
 from pathlib import Path
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class StilToolBase(ABC):
+    # manifest of the pattern binaries in tester memory (path, size, mtime and hash),
+    # tools that keep loaded patterns across test app starts define where it is kept
+    manifest_path: Optional[str] = None
+
     def __init__(self):
         self._compiled_patterns = None
+        self.load_statistics = {}
 
     def _load_patterns(self, compiled_patterns: dict):
         self._compiled_patterns = compiled_patterns
@@ -21,7 +31,27 @@ class StilToolBase(ABC):
             if not Path(compiled_pattern).exists():
                 raise Exception(f'pattern binary file: \"{compiled_pattern}\" is missing, make sure to compile all required pattern files')
 
-        self._load_patterns_impl(compiled_pattern_list)
+        start = time.perf_counter()
+        manifest = self._read_manifest()
+        entries = {compiled_pattern: self._get_manifest_entry(compiled_pattern, manifest.get(compiled_pattern)) for compiled_pattern in compiled_pattern_list}
+        # patterns loaded by a previous test app start with the same binary stay in memory
+        patterns_to_load = [compiled_pattern for compiled_pattern, entry in entries.items()
+                            if compiled_pattern not in manifest or manifest[compiled_pattern].get('sha256') != entry['sha256']]
+
+        if patterns_to_load:
+            # the manifest is dropped until the load succeeded, a failed load leaves the memory in an unknown state
+            self._write_manifest({})
+            self._load_patterns_impl(patterns_to_load)
+
+        if patterns_to_load or any(manifest.get(compiled_pattern) != entry for compiled_pattern, entry in entries.items()):
+            manifest.update(entries)
+            self._write_manifest(manifest)
+
+        self.load_statistics = {'loaded': len(patterns_to_load),
+                                'skipped': len(compiled_pattern_list) - len(patterns_to_load),
+                                'bytes': sum(entries[compiled_pattern]['size'] for compiled_pattern in patterns_to_load),
+                                'load_ms': round((time.perf_counter() - start) * 1000, 3)}
+        print(f'-------- pattern load: {self.load_statistics} ---------')
 
     @abstractmethod
     def _load_patterns_impl(self, compiled_patterns: list):
@@ -36,3 +66,37 @@ class StilToolBase(ABC):
 
         pattern = Path(self._compiled_patterns[pattern_virtual_name]) if self.pattern_withpath else Path(self._compiled_patterns[pattern_virtual_name]).stem
         return pattern
+
+    @staticmethod
+    def _get_manifest_entry(compiled_pattern: str, previous_entry: Optional[dict]) -> dict:
+        stat = os.stat(compiled_pattern)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        # the hash is only computed for a binary that was touched since it was loaded,
+        # e.g. recompiled with the same result
+        if previous_entry and previous_entry.get('size') == entry['size'] and previous_entry.get('mtime_ns') == entry['mtime_ns']:
+            entry['sha256'] = previous_entry.get('sha256')
+            return entry
+
+        with open(compiled_pattern, 'rb') as f:
+            entry['sha256'] = hashlib.sha256(f.read()).hexdigest()
+
+        return entry
+
+    def _read_manifest(self) -> dict:
+        if self.manifest_path is None:
+            return {}
+
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: dict):
+        if self.manifest_path is None:
+            return
+
+        temp_path = f'{self.manifest_path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
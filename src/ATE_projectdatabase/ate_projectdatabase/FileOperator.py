@@ -1,18 +1,35 @@
-from typing import Callable
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 import json
-import glob
 
 from ate_projectdatabase.Types import Types
 
 CONFIG_DIR_NAME = 'definitions'
 
+# equality filters on these fields (see FileOperator.filter_by) are served by an index
+INDEXED_FIELDS = {
+    Types.Test(): [('name', 'hardware', 'base')],
+    Types.Sequence(): [('prog_name',)],
+    Types.Program(): [('prog_name',), ('owner_name',)],
+}
+
+_MISSING = object()
+
 
 class DBObject:
+    # counts the attribute changes of all objects, the indexes of the
+    # FileOperator are rebuilt if an indexed attribute may have changed
+    modification_count = 0
+
+    def __setattr__(self, name: str, value):
+        DBObject.modification_count += 1
+        self.__dict__[name] = value
+
     def to_dict(self) -> dict:
         return self.__dict__
 
     def write_attribute(self, member_name: str, value):
+        DBObject.modification_count += 1
         self.__dict__[member_name] = value
 
     def read_attribute(self, attribute_name: str):       # Returntype can be just about anything!
@@ -22,21 +39,48 @@ class DBObject:
         return attribute_name in self.__dict__
 
 
+class _CachedFile:
+    __slots__ = ['mtime_ns', 'size', 'items', 'text']
+
+    def __init__(self, mtime_ns: int, size: int, items: list, text: Optional[str]):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.items = items
+        # content as last read or written, files are only written if it changed
+        self.text = text
+
+
 class FileOperator:
+    '''
+        Queries the json files of the project definitions.
+
+        The parsed files of all types are kept and reused as long as their
+        modification time and size do not change, the file listing of a
+        type directory as long as the directory does not change. Equality
+        filters on the fields in INDEXED_FIELDS (see filter_by) are served
+        by an index instead of a scan. A commit only writes the files whose
+        content changed, each one atomically.
+    '''
+
     def __init__(self, project_dir: str):
         self.config_dir = os.path.join(project_dir, CONFIG_DIR_NAME)
         self.data_cache = {}
         self.query_open = False
         self.filter_expression = lambda x: True
+        self.filter_fields = None
         self.sort_expression = None
         self.current_type = None
         self.current_subtypes = []
+        self._files: Dict[str, _CachedFile] = {}
+        self._listings: Dict[str, Tuple[int, List[str]]] = {}
+        self._indexes = {}
+        self._items_cache = None
+        self._version = 0
 
     @staticmethod
     def _make_db_object(json_dict: dict) -> DBObject:
         current_object = DBObject()
-        for k, v in json_dict.items():
-            setattr(current_object, k, v)
+        current_object.__dict__.update(json_dict)
         return current_object
 
     def get_current_target_list_name(self) -> str:
@@ -51,41 +95,32 @@ class FileOperator:
         '''
         file_path = self.generate_path(self.current_type, self.current_subtypes)
 
-        paths = glob.glob(file_path)
+        paths = self._match_files(file_path)
         if len(paths) > 1:
             the_type = self.generate_path_base(self.current_type, self.current_subtypes)
             exact_path = os.path.join(self.config_dir, self.current_type, f'{the_type}.json')
 
-            index = paths.index(exact_path)
-            if index is None:
+            if exact_path not in paths:
                 raise IOError("Tried to add data to multiple files")
 
-            return paths.pop(index)
+            return exact_path
 
-        if len(glob.glob(file_path)) == 1:
-            return glob.glob(file_path).pop(0)
+        if len(paths) == 1:
+            return paths[0]
 
         # Generate new filename, as apparently no file exists...
         the_type = self.generate_path_base(self.current_type, self.current_subtypes)
         file_path = os.path.join(self.config_dir, self.current_type, f'{the_type}.json')
         self.data_cache[file_path] = []
+        self._changed()
         return file_path
 
     def load_configuration(self, type: Types, subtypes: list):
         file_path = self.generate_path(type, subtypes)
         self.data_cache = {}
 
-        import glob
-        for f in glob.glob(file_path):
-            try:
-                with open(f, 'r') as file:
-                    loaded_data = json.load(file)
-                    return_val = []
-                    for item in loaded_data:
-                        return_val.append(self._make_db_object(item))
-                self.data_cache[file.name] = return_val
-            except Exception:
-                self.data_cache[file.name] = []
+        for path in self._match_files(file_path):
+            self.data_cache[path] = self._load_file(path)
 
         # nastyness: if nothing was found in the FS we at least create
         # the file the specifies our filename:
@@ -93,6 +128,8 @@ class FileOperator:
             file_path = file_path.replace("*", "")
             self.data_cache[file_path] = []
 
+        self._changed()
+
     def store_configuration(self):
         # DBObjects are not easily serializable, we serialize
         # them each on their own...
@@ -102,13 +139,80 @@ class FileOperator:
                 data_to_write.append(item.__dict__)
 
             if len(data_to_write) > 0:
-                with open(name, 'w') as f:
-                    json.dump(data_to_write, f, indent=2)
+                text = json.dumps(data_to_write, indent=2)
+                cached = self._files.get(name)
+                if cached is not None and cached.text == text:
+                    continue
+
+                self._write_file(name, text)
+                stat = os.stat(name)
+                self._files[name] = _CachedFile(stat.st_mtime_ns, stat.st_size, itemlist, text)
             else:
                 # delete file if still there,
                 # but no records are available for the file.
+                self._files.pop(name, None)
                 if os.path.exists(name):
                     os.remove(name)
+                    self._listings.pop(os.path.dirname(name), None)
+
+    def _write_file(self, path: str, text: str):
+        # the file is replaced in one step, readers never see a partially written file
+        temp_path = f'{path}.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                f.write(text)
+            is_new_file = not os.path.exists(path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        if is_new_file:
+            self._listings.pop(os.path.dirname(path), None)
+
+    def _load_file(self, path: str) -> list:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return []
+
+        cached = self._files.get(path)
+        if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+            return cached.items
+
+        try:
+            with open(path, 'r') as file:
+                text = file.read()
+            items = [self._make_db_object(item) for item in json.loads(text)]
+        except Exception:
+            text, items = None, []
+
+        self._files[path] = _CachedFile(stat.st_mtime_ns, stat.st_size, items, text)
+        return items
+
+    def _match_files(self, file_path: str) -> List[str]:
+        # same result as glob.glob(file_path) for the '<directory>/<prefix>*.json' patterns of generate_path
+        directory, pattern = os.path.split(file_path)
+        prefix = pattern[:-len('*.json')]
+        return [os.path.join(directory, name) for name in self._list_json_files(directory) if name.startswith(prefix)]
+
+    def _list_json_files(self, directory: str) -> List[str]:
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+
+        listing = self._listings.get(directory)
+        if listing is None or listing[0] != mtime_ns:
+            names = [name for name in os.listdir(directory) if name.endswith('.json') and not name.startswith('.')]
+            listing = (mtime_ns, names)
+            self._listings[directory] = listing
+
+        return listing[1]
+
+    def _changed(self):
+        self._version += 1
+        self._items_cache = None
 
     def generate_path_base(self, type: Types, subtypes: list) -> str:
         the_type = type
@@ -142,6 +246,7 @@ class FileOperator:
 
         self.query_open = True
         self.filter_expression = lambda x: True
+        self.filter_fields = None
         self.sort_expression = None
         return self
 
@@ -149,6 +254,20 @@ class FileOperator:
         if self.query_open is False:
             raise Exception("Cannot apply filter when no query is open.")
         self.filter_expression = filter_expression
+        self.filter_fields = None
+        return self
+
+    def filter_by(self, **fields):
+        '''
+            Selects the items whose fields are equal to the given values,
+            same as filter(lambda x: x.<field> == <value> and ...), but
+            served by an index if INDEXED_FIELDS declares one for the
+            queried type.
+        '''
+        if self.query_open is False:
+            raise Exception("Cannot apply filter when no query is open.")
+        self.filter_expression = lambda x: all(getattr(x, field, _MISSING) == value for field, value in fields.items())
+        self.filter_fields = fields
         return self
 
     def sort(self, sort_expression: Callable):
@@ -160,7 +279,9 @@ class FileOperator:
     def all(self) -> list:
         if self.query_open is False:
             raise Exception("Cannot get 'all' when no query is open.")
-        data = list(x for x in self._items() if self.filter_expression(x))
+        data = self._indexed_items()
+        if data is None:
+            data = list(x for x in self._items() if self.filter_expression(x))
         if self.sort_expression is not None:
             data = sorted(data, key=self.sort_expression)
         return data
@@ -183,10 +304,42 @@ class FileOperator:
         return items[0]
 
     def _items(self):
-        import itertools
-        all_loaded_items = [y for _, y in self.data_cache.items()]
-        all_loaded_items = [x for x in itertools.chain(*all_loaded_items)]
-        return all_loaded_items
+        if self._items_cache is None:
+            import itertools
+            all_loaded_items = [y for _, y in self.data_cache.items()]
+            self._items_cache = [x for x in itertools.chain(*all_loaded_items)]
+        return self._items_cache
+
+    def _indexed_items(self) -> Optional[list]:
+        if not self.filter_fields:
+            return None
+
+        # the largest declared index covered by the filter, the remaining fields are compared on its matches
+        declared = [fields for fields in INDEXED_FIELDS.get(self.current_type, []) if set(fields) <= set(self.filter_fields)]
+        if not declared:
+            return None
+
+        index_fields = max(declared, key=len)
+        index = self._get_index(index_fields)
+        matches = index.get(tuple(self.filter_fields[field] for field in index_fields), [])
+        if len(index_fields) == len(self.filter_fields):
+            return list(matches)
+
+        return [x for x in matches if self.filter_expression(x)]
+
+    def _get_index(self, fields: tuple) -> dict:
+        version = (self._version, DBObject.modification_count)
+        cached = self._indexes.get(fields)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        index = {}
+        for item in self._items():
+            key = tuple(item.__dict__.get(field, _MISSING) for field in fields)
+            index.setdefault(key, []).append(item)
+
+        self._indexes[fields] = (version, index)
+        return index
 
     def delete(self):
         if self.query_open is False:
@@ -194,6 +347,9 @@ class FileOperator:
         for f, items in self.data_cache.items():
             new_list = list(x for x in items if self.filter_expression(x) is False)
             self.data_cache[f] = new_list
+            if f in self._files:
+                self._files[f].items = new_list
+        self._changed()
         return self
 
     def delete_item(self, item: DBObject):
@@ -208,6 +364,7 @@ class FileOperator:
         for item in objects:
             for f, itemlist in self.data_cache.items():
                 itemlist.append(self._make_db_object(item))
+        self._changed()
         return self
 
     def add(self, object: dict):
@@ -215,6 +372,7 @@ class FileOperator:
             raise Exception("Cannot 'insert' when no query is open.")
         list_name = self.get_current_target_list_name()
         self.data_cache[list_name].append(self._make_db_object(object))
+        self._changed()
         return self
 
     def count(self) -> int:
@@ -235,3 +393,8 @@ class FileOperator:
         old_path = os.path.join(base_path, old_name)
         new_path = os.path.join(base_path, new_name)
         os.rename(old_path, new_path)
+
+        renamed = self._files.pop(old_path, None)
+        if renamed is not None:
+            self._files[new_path] = renamed
+        self._listings.pop(base_path, None)
@@ -48,26 +48,26 @@ class Program:
     @staticmethod
     def remove(session: FileOperator, program_name: str, owner_name: str):
         session.query(Types.Program())\
-               .filter(lambda Program: (Program.prog_name == program_name and Program.owner_name == owner_name))\
+               .filter_by(prog_name=program_name, owner_name=owner_name)\
                .delete()
         session.commit()
 
     @staticmethod
     def get(session: FileOperator, name: str) -> DBObject:
         return session.query(Types.Program())\
-                      .filter(lambda Program: Program.prog_name == name)\
+                      .filter_by(prog_name=name)\
                       .one()
 
     @staticmethod
     def get_by_name_and_owner(session: FileOperator, prog_name: str, owner_name: str) -> DBObject:
         return session.query(Types.Program())\
-                      .filter(lambda Program: (Program.prog_name == prog_name and Program.owner_name == owner_name))\
+                      .filter_by(prog_name=prog_name, owner_name=owner_name)\
                       .one()
 
     @staticmethod
     def get_by_order_and_owner(session: FileOperator, prog_order: str, owner_name: str) -> DBObject:
         return session.query(Types.Program())\
-                      .filter(lambda Program: (Program.prog_order == prog_order and Program.owner_name == owner_name))\
+                      .filter_by(prog_order=prog_order, owner_name=owner_name)\
                       .one()
 
     @staticmethod
@@ -88,7 +88,7 @@ class Program:
     @staticmethod
     def _update_program_order(session: FileOperator, owner_name: str, prev_order: int, order: int, new_name: str):
         prog = session.query(Types.Program())\
-                      .filter(lambda Program: (Program.owner_name == owner_name and Program.prog_order == prev_order))\
+                      .filter_by(owner_name=owner_name, prog_order=prev_order)\
                       .one()
         prog.prog_name = new_name
         prog.prog_order = order
@@ -97,7 +97,7 @@ class Program:
     @staticmethod
     def get_programs_for_owner(session: FileOperator, owner_name: str) -> list:
         return session.query(Types.Program())\
-                      .filter(lambda Program: Program.owner_name == owner_name).sort(lambda Program: Program.prog_order)\
+                      .filter_by(owner_name=owner_name).sort(lambda Program: Program.prog_order)\
                       .all()
 
     @staticmethod
@@ -108,7 +108,7 @@ class Program:
     @staticmethod
     def get_program_owner_element_count(session: FileOperator, owner_name: str) -> int:
         return session.query(Types.Program())\
-                      .filter(lambda Program: Program.owner_name == owner_name)\
+                      .filter_by(owner_name=owner_name)\
                       .count()
 
     @staticmethod
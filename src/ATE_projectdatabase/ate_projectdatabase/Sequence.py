@@ -13,7 +13,7 @@ class Sequence:
     @staticmethod
     def get_for_program(session: FileOperator, prog_name: str) -> list:
         return session.query_with_subtype(Types.Sequence(), prog_name)\
-                      .filter(lambda Sequence: Sequence.prog_name == prog_name)\
+                      .filter_by(prog_name=prog_name)\
                       .sort(lambda Sequence: Sequence.test_order)\
                       .all()
 
@@ -33,14 +33,14 @@ class Sequence:
     @staticmethod
     def remove_program_sequence(session: FileOperator, prog_name: str, owner_name: str):
         session.query(Types.Sequence())\
-               .filter(lambda Sequence: (Sequence.prog_name == prog_name and Sequence.owner_name == owner_name))\
+               .filter_by(prog_name=prog_name, owner_name=owner_name)\
                .delete()
         session.commit()
 
     @staticmethod
     def remove_for_program(session: FileOperator, program_name: str):
         session.query_with_subtype(Types.Sequence(), program_name)\
-               .filter(lambda Sequence: Sequence.prog_name == program_name)\
+               .filter_by(prog_name=program_name)\
                .delete()
         session.commit()
 
@@ -77,6 +77,6 @@ class Sequence:
     @staticmethod
     def remove(session: FileOperator, program_name: str, owner_name: str, program_order: str):
         session.query_with_subtype(Types.Sequence(), program_name)\
-               .filter(lambda Sequence: (Sequence.prog_name == program_name and Sequence.owner_name == owner_name))\
+               .filter_by(prog_name=program_name, owner_name=owner_name)\
                .delete()
         session.commit()
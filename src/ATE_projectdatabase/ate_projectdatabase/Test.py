@@ -7,13 +7,13 @@ class Test:
     @staticmethod
     def get(session: FileOperator, name: str, hardware: str, base: str) -> DBObject:
         return session.query(Types.Test())\
-                      .filter(lambda Test: (Test.name == name and Test.hardware == hardware and Test.base == base))\
+                      .filter_by(name=name, hardware=hardware, base=base)\
                       .one()
 
     @staticmethod
     def get_one_or_none(session: FileOperator, name: str, hardware: str, base: str) -> DBObject:
         return session.query(Types.Test())\
-                      .filter(lambda Test: (Test.name == name and Test.hardware == hardware and Test.base == base))\
+                      .filter_by(name=name, hardware=hardware, base=base)\
                       .one_or_none()
 
     @staticmethod
@@ -35,7 +35,7 @@ class Test:
     @staticmethod
     def remove(session: FileOperator, name: str, hardware: str, base: str):
         session.query(Types.Test())\
-               .filter(lambda Test: Test.name == name and Test.hardware == hardware and Test.base == base)\
+               .filter_by(name=name, hardware=hardware, base=base)\
                .delete()
         session.commit()
 
@@ -52,7 +52,7 @@ class Test:
     @staticmethod
     def update(session: FileOperator, name: str, hardware: str, base: str, type: str, definition: dict, is_enabled: bool):
         test = session.query(Types.Test())\
-                      .filter(lambda Test: (Test.name == name and Test.hardware == hardware and Test.base == base))\
+                      .filter_by(name=name, hardware=hardware, base=base)\
                       .one()
         test.definition = definition
         test.is_enabled = is_enabled
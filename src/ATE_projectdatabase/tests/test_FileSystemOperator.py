@@ -1,4 +1,6 @@
+import json
 import os
+from unittest import mock
 from pytest import fixture
 
 from ate_projectdatabase.FileOperator import FileOperator
@@ -120,3 +122,62 @@ def test_can_rename_thingy(fsoperator):
     fsoperator.rename("dummydata2", "test1", "test2")
     items = fsoperator.query_with_subtype("dummydata2", "test2").all()
     assert(len(items) == 1)
+
+
+@fixture
+def tmp_operator(tmp_path):
+    os.makedirs(os.path.join(tmp_path, 'definitions', 'test'))
+    return FileOperator(str(tmp_path))
+
+
+def add_tests(operator, names):
+    for name in names:
+        operator.query_with_subtype('test', name).add({'name': name, 'hardware': 'HW0', 'base': 'FT', 'value': 0}).commit()
+
+
+def test_unchanged_files_are_not_written(tmp_operator):
+    add_tests(tmp_operator, ['a', 'b'])
+    mtimes = {name: os.stat(name).st_mtime_ns for name in tmp_operator.query('test').data_cache}
+
+    item = tmp_operator.query('test').filter_by(name='b').one()
+    item.value = 1
+    with mock.patch('ate_projectdatabase.FileOperator.os.replace', wraps=os.replace) as replace:
+        tmp_operator.commit()
+
+    assert [call.args[1] for call in replace.call_args_list] == [os.path.join(tmp_operator.config_dir, 'test', 'testb.json')]
+    assert os.stat(os.path.join(tmp_operator.config_dir, 'test', 'testa.json')).st_mtime_ns == mtimes[os.path.join(tmp_operator.config_dir, 'test', 'testa.json')]
+
+
+def test_files_are_reloaded_if_changed_on_disk(tmp_operator):
+    add_tests(tmp_operator, ['a'])
+    cached_item = tmp_operator.query('test').one()
+    tmp_operator.query('program')
+    assert tmp_operator.query('test').one() is cached_item
+
+    with open(os.path.join(tmp_operator.config_dir, 'test', 'testa.json'), 'w') as f:
+        json.dump([{'name': 'a', 'hardware': 'HW0', 'base': 'FT', 'value': 42}], f)
+    tmp_operator.query('program')
+
+    assert tmp_operator.query('test').one().value == 42
+
+
+def test_filter_by_uses_the_index(tmp_operator):
+    add_tests(tmp_operator, ['a', 'b', 'c'])
+    tmp_operator.query('test').filter_by(name='b', hardware='HW0', base='FT').one()
+    index = tmp_operator._indexes[('name', 'hardware', 'base')][1]
+    assert len(index) == 3
+
+    item = tmp_operator.query('test').filter_by(name='c', hardware='HW0', base='FT').one()
+    item.name = 'd'
+
+    assert tmp_operator.query('test').filter_by(name='c', hardware='HW0', base='FT').one_or_none() is None
+    assert tmp_operator.query('test').filter_by(name='d', hardware='HW0', base='FT').one() is item
+    assert tmp_operator.query('test').filter_by(name='d', hardware='HW0', base='PR').one_or_none() is None
+
+
+def test_filter_by_deletes_matching_items(tmp_operator):
+    add_tests(tmp_operator, ['a', 'b'])
+    tmp_operator.query('test').filter_by(name='a').delete().commit()
+
+    assert [item.name for item in tmp_operator.query('test').all()] == ['b']
+    assert not os.path.exists(os.path.join(tmp_operator.config_dir, 'test', 'testa.json'))
@@ -1,8 +1,8 @@
 from pathlib import Path
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
 import os
 
+from ate_sammy.coding.generator_utils import get_environment
+
 
 class AutoScriptGenerator:
     def __init__(self, template_dir: str, project_path: str, hardware_definition: dict):
@@ -14,11 +14,7 @@ class AutoScriptGenerator:
             return
 
         template_path = os.path.normpath(template_dir)
-        file_loader = FileSystemLoader(template_path)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        env.rstrip_blocks = True
+        env = get_environment(template_path)
         template_name = 'auto_script_template.jinja2'
         if not os.path.exists(os.path.join(template_path, template_name)):
             raise Exception(f"couldn't find the template : {template_name}")
@@ -1,8 +1,7 @@
 import os
 from pathlib import Path
 
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
+from ate_sammy.coding.generator_utils import get_environment, render_to_file
 
 
 class BaseGenerator:
@@ -10,11 +9,7 @@ class BaseGenerator:
 
     def __init__(self, template_dir, project_path, definition, file_name, template_file_name=None):
         template_path = os.path.normpath(template_dir)
-        file_loader = FileSystemLoader(template_path)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        env.rstrip_blocks = True
+        env = get_environment(template_path)
         template_name = template_file_name
         if template_name is None:
             template_name = str(self.__class__.__name__).split('.')[-1].split(' ')[0]
@@ -32,13 +27,7 @@ class BaseGenerator:
         if not abs_path_to_dir.exists():
             os.makedirs(abs_path_to_dir)
 
-        if abs_path_to_file.exists():
-            os.remove(abs_path_to_file)
-
-        msg = template.render(definition=self.definition)
-
-        with open(abs_path_to_file, 'w', encoding='utf-8') as fd:
-            fd.write(msg)
+        render_to_file(self.project_path, abs_path_to_file, template, {'definition': self.definition})
 
     def _generate_relative_path(self):
         return ''
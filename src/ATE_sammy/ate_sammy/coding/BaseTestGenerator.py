@@ -2,10 +2,7 @@
 import os
 from pathlib import Path
 
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
-
-from ate_sammy.coding.generator_utils import prepare_module_docstring
+from ate_sammy.coding.generator_utils import get_environment, prepare_module_docstring, render_to_file
 from ate_common.parameter import OutputColumnKey
 
 
@@ -49,12 +46,7 @@ class BaseTestGenerator:
     """Generator for the Test Base Class."""
 
     def __init__(self, template_dir, project_path, definition, file_name):
-        template_path = os.path.normpath(template_dir)
-        file_loader = FileSystemLoader(template_path)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        env.rstrip_blocks = True
+        env = get_environment(template_dir)
         template_name = str(self.__class__.__name__).split('.')[-1].split(' ')[0]
         template_name = template_name.replace('generator', 'template') + '.jinja2'
         template = env.get_template(template_name)
@@ -68,14 +60,13 @@ class BaseTestGenerator:
             os.makedirs(abs_path_to_dir)
 
         render_data = self._generate_render_data(abs_path_to_dir)
-        msg = self._render(template, render_data)
-
-        self._generate(self.abs_path_to_file, msg)
+        self._generate(template, render_data)
 
-    @staticmethod
-    def _generate(path, msg):
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(msg)
+    def _generate(self, template, render_data):
+        # the test is only rendered again if its definition or the template changed
+        render_to_file(self.project_path, self.abs_path_to_file, template,
+                       {'render_data': render_data, 'definition': self.definition},
+                       lambda: self._render(template, render_data))
 
     def _generate_relative_path(self):
         return ''
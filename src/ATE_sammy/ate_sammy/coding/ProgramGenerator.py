@@ -1,9 +1,8 @@
 import os
 from pathlib import Path
 from ate_common.parameter import InputColumnKey, OutputColumnKey
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
 from ate_sammy.coding.generators import BaseGenerator
+from ate_sammy.coding.generator_utils import get_environment, render_to_file
 from ate_sammy.coding.utils import collect_compiled_patterns
 
 
@@ -15,12 +14,7 @@ class test_program_generator(BaseGenerator):
     def __init__(self, template_dir, project_path, prog_name, tests_in_program, test_targets, program_configuration):
         self.last_index = 0
         template_path = os.path.normpath(template_dir)
-        file_loader = FileSystemLoader(template_path)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        env.rstrip_blocks = True
-        env.globals.update(idgen=self.indexgen)
+        env = get_environment(template_path)
         template_name = str(self.__class__.__name__).split('.')[-1].split(' ')[0]
         template_name = 'testprogram_template.jinja2'
         if not os.path.exists(os.path.join(template_path, template_name)):
@@ -36,27 +30,23 @@ class test_program_generator(BaseGenerator):
         if not os.path.exists(abs_path_to_dir):
             os.makedirs(abs_path_to_dir)
 
-        if os.path.exists(self.abs_path_to_file):
-            os.remove(self.abs_path_to_file)
-
         test_list, test_imports = self.build_test_entry_list(tests_in_program, test_targets)
 
         protocols_path = os.path.join('protocols', program_configuration.hardware, program_configuration.base, program_configuration.target)
         pattern_output_path = os.path.join('pattern_output', program_configuration.hardware, program_configuration.base)
         compiled_patterns = collect_compiled_patterns(program_configuration.patterns, self.project_path, protocols_path, pattern_output_path)
 
-        output = template.render(
-            project_path=str(self.project_path),
-            project_name=self.project_path.name,
-            test_list=test_list,
-            test_imports=test_imports,
-            program_configuration=program_configuration,
-            compiled_patterns=compiled_patterns,
-            InputColumnKey=InputColumnKey,
-            OutputColumnKey=OutputColumnKey)
-
-        with open(self.abs_path_to_file, 'w', encoding='utf-8') as fd:
-            fd.write(output)
+        # the environment is shared, so the index generator of this program is passed with the render data
+        render_to_file(self.project_path, self.abs_path_to_file, template, {
+            'project_path': str(self.project_path),
+            'project_name': self.project_path.name,
+            'test_list': test_list,
+            'test_imports': test_imports,
+            'program_configuration': program_configuration,
+            'compiled_patterns': compiled_patterns,
+            'InputColumnKey': InputColumnKey,
+            'OutputColumnKey': OutputColumnKey,
+            'idgen': self.indexgen})
 
     def build_test_entry_list(self, tests_in_program, test_targets):
         test_list = []
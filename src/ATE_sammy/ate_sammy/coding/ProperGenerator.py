@@ -3,7 +3,7 @@ import math
 
 from ate_common.parameter import InputColumnKey, InputColumnLabel, OutputColumnKey, OutputColumnLabel
 from ate_sammy.coding.BaseTestGenerator import BaseTestGenerator
-from ate_sammy.coding.generator_utils import prepare_module_docstring
+from ate_sammy.coding.generator_utils import prepare_module_docstring, write_if_changed
 
 
 def prepare_input_parameters_table(ip):
@@ -404,9 +404,7 @@ class test_proper_generator(BaseTestGenerator):
         del content[start:end + 1]
 
         content.insert(start, self._generate_do_not_touch_section())
-        with open(self.abs_path_to_file, 'w', encoding='utf-8') as f:
-            for line in content:
-                f.write(line)
+        write_if_changed(self.abs_path_to_file, ''.join(content))
 
     def _find_do_not_touch_section(self, contents):
         start, end = None, None
@@ -419,8 +417,8 @@ class test_proper_generator(BaseTestGenerator):
 
         return (start, end)
 
-    def _generate(self, path, msg):
+    def _generate(self, template, render_data):
         if not self.do_update:
-            super()._generate(path, msg)
+            super()._generate(template, render_data)
         else:
             self._update_test_file()
@@ -1,9 +1,8 @@
 import json
 import os
 from pathlib import Path
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
 from ate_sammy.coding.generators import BaseGenerator
+from ate_sammy.coding.generator_utils import get_environment, write_if_changed
 from ate_sammy.coding.utils import collect_compiled_patterns
 from ate_common.parameter import InputColumnKey, OutputColumnKey
 from ate_projectdatabase import Test
@@ -12,11 +11,7 @@ from ate_projectdatabase import Test
 class test_runner_generator(BaseGenerator):
     def __init__(self, template_dir: Path, project_path: Path, file_path: Path, test_configuration: Test, hardware_definition: dict):
         self.last_index = 0
-        file_loader = FileSystemLoader(template_dir)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        env.rstrip_blocks = True
+        env = get_environment(template_dir)
         template_name = 'test_runner_main_template.jinja2'
 
         self.project_path = project_path
@@ -29,9 +24,6 @@ class test_runner_generator(BaseGenerator):
         if not file_path.parent.exists():
             os.makedirs(file_path.parent)
 
-        if file_path.exists():
-            os.remove(file_path)
-
         compiled_patterns = collect_compiled_patterns(test_configuration.definition['patterns'], self.project_path)
 
         output = template.render(
@@ -45,8 +37,7 @@ class test_runner_generator(BaseGenerator):
             InputColumnKey=InputColumnKey,
             OutputColumnKey=OutputColumnKey)
 
-        with open(file_path, 'w', encoding='utf-8') as fd:
-            fd.write(output)
+        write_if_changed(file_path, output)
 
         # binning and execution strategy configuration files will be generated
         # thus the test flow could be executed
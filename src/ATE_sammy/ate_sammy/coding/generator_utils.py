@@ -1,5 +1,23 @@
 import getpass
+import hashlib
+import json
 import os
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from jinja2 import Environment
+from jinja2 import FileSystemBytecodeCache
+from jinja2 import FileSystemLoader
+from jinja2 import Template
+
+from ate_sammy import __version__
+
+# hashes of the generated files, relative to the project root
+GENERATION_CACHE_FILE = os.path.join('.sammy', 'generated.json')
+
+_environments: Dict[str, Environment] = {}
+_template_hashes: Dict[tuple, str] = {}
+_generation_caches: Dict[str, 'GenerationCache'] = {}
 
 
 def prepare_module_docstring():
@@ -13,3 +31,165 @@ def prepare_module_docstring():
         line += f" ({user}@{domain})".lower()
     retval.append(line)
     return retval
+
+
+def get_environment(template_dir) -> Environment:
+    # all generators share one environment per template directory, so every
+    # template is compiled once per process (and loaded from the bytecode cache
+    # by later runs)
+    template_path = os.path.normpath(template_dir)
+    env = _environments.get(template_path)
+    if env is None:
+        env = Environment(loader=FileSystemLoader(template_path),
+                          bytecode_cache=FileSystemBytecodeCache(),
+                          trim_blocks=True,
+                          lstrip_blocks=True)
+        _environments[template_path] = env
+
+    return env
+
+
+def write_if_changed(path, content: str) -> bool:
+    """Writes the content to the file unless the file already holds it.
+
+    An unchanged file is not touched and keeps its mtime, so the python
+    bytecode caches and the IDE don't see a change.
+    """
+    # files are written in text mode, i.e. with the newlines of the platform
+    data = content.replace('\n', os.linesep).encode('utf-8')
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+    return True
+
+
+def _hash_default(value):
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if hasattr(value, '__qualname__'):
+        return f'{value.__module__}.{value.__qualname__}'
+    return repr(value)
+
+
+def _hash_template(template: Template) -> str:
+    stat = os.stat(template.filename)
+    key = (template.filename, stat.st_mtime_ns, stat.st_size)
+    template_hash = _template_hashes.get(key)
+    if template_hash is None:
+        with open(template.filename, 'rb') as f:
+            template_hash = hashlib.sha256(f.read()).hexdigest()
+        _template_hashes[key] = template_hash
+
+    return template_hash
+
+
+def hash_render_inputs(template: Template, render_inputs: dict) -> str:
+    inputs = json.dumps(render_inputs, sort_keys=True, default=_hash_default)
+    return hashlib.sha256(f'{__version__}\0{_hash_template(template)}\0{inputs}'.encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    """Hashes of the template and render inputs of the generated files of a project.
+
+    A file is rendered again if its hash changed or if the file was changed
+    since it was generated.
+    """
+
+    def __init__(self, project_path):
+        self.project_path = Path(project_path)
+        self.path = self.project_path.joinpath(GENERATION_CACHE_FILE)
+        self.entries = {}
+        # entries recorded since the last pop_updates, these are handed from the
+        # worker processes to the main process
+        self.updates = {}
+        self._is_changed = False
+
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _key(self, path) -> str:
+        return Path(os.path.relpath(path, self.project_path)).as_posix()
+
+    def is_up_to_date(self, path, inputs_hash: str) -> bool:
+        entry = self.entries.get(self._key(path))
+        if entry is None or entry['hash'] != inputs_hash:
+            return False
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        return entry['stat'] == [stat.st_mtime_ns, stat.st_size]
+
+    def record(self, path, inputs_hash: str):
+        stat = os.stat(path)
+        entry = {'hash': inputs_hash, 'stat': [stat.st_mtime_ns, stat.st_size]}
+        key = self._key(path)
+        self.entries[key] = entry
+        self.updates[key] = entry
+        self._is_changed = True
+
+    def merge(self, updates: dict):
+        self.entries.update(updates)
+        self._is_changed = self._is_changed or bool(updates)
+
+    def pop_updates(self) -> dict:
+        updates, self.updates = self.updates, {}
+        return updates
+
+    def save(self):
+        if not self._is_changed:
+            return
+
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._is_changed = False
+
+
+def get_generation_cache(project_path) -> GenerationCache:
+    key = os.path.normpath(os.path.abspath(project_path))
+    cache = _generation_caches.get(key)
+    if cache is None:
+        cache = GenerationCache(key)
+        _generation_caches[key] = cache
+
+    return cache
+
+
+def save_generation_caches():
+    # the caches are read again by the next run, the project files may
+    # have been changed in between
+    while _generation_caches:
+        _, cache = _generation_caches.popitem()
+        cache.save()
+
+
+def render_to_file(project_path, path, template: Template, render_inputs: dict, render: Optional[Callable[[], str]] = None) -> bool:
+    """Renders the template to the file, unless the template and the render inputs didn't change.
+
+    Returns True if the file was written.
+    """
+    cache = get_generation_cache(project_path)
+    inputs_hash = hash_render_inputs(template, render_inputs)
+    if cache.is_up_to_date(path, inputs_hash):
+        return False
+
+    content = render() if render is not None else template.render(**render_inputs)
+    is_written = write_if_changed(path, content)
+    cache.record(path, inputs_hash)
+    return is_written
@@ -25,10 +25,8 @@ import os
 import shutil
 from pathlib import Path
 
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
-
 from ate_sammy.coding.BaseGenerator import BaseGenerator
+from ate_sammy.coding.generator_utils import get_environment, render_to_file
 from ate_sammy.coding.ProperGenerator import test_proper_generator
 from ate_sammy.coding.BaseTestGenerator import test_base_generator, BaseTestGenerator
 from ate_projectdatabase import latest_semi_ate_project_db_version, Test, Hardware
@@ -228,11 +226,7 @@ class BaseProjectGenerator:
 
     def __init__(self, template_dir: str, project_path: str, file_name: str, template_name: str = ''):
         template_path = os.path.normpath(template_dir)
-        file_loader = FileSystemLoader(template_path)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        env.rstrip_blocks = True
+        env = get_environment(template_path)
         if not template_name:
             template_name = str(self.__class__.__name__).split('.')[-1].split(' ')[0]
             template_name = template_name.replace('generator', 'template') + '.jinja2'
@@ -246,13 +240,10 @@ class BaseProjectGenerator:
         abs_path_to_dir = os.path.join(project_path, rel_path_to_dir)
         abs_path_to_file = os.path.join(abs_path_to_dir, file_name)
 
-        msg = template.render(project_name=project_name)
-
         if not os.path.exists(abs_path_to_dir):
             os.makedirs(abs_path_to_dir)
 
-        with open(abs_path_to_file, 'w', encoding='utf-8') as f:
-            f.write(msg)
+        render_to_file(project_path, abs_path_to_file, template, {'project_name': project_name})
 
     def _generate_relative_path(self):
         return ''
@@ -360,11 +351,7 @@ class BaseCommonGenerator:
     def __init__(self, template_dir: str, project_path: str, definition: dict):
         from pathlib import Path
         template_path = Path(template_dir)
-        file_loader = FileSystemLoader(template_path)
-        env = Environment(loader=file_loader)
-        env.trim_blocks = True
-        env.lstrip_blocks = True
-        env.rstrip_blocks = True
+        env = get_environment(template_path)
         template_name = 'base_common_template.jinja2'
         if not template_path.joinpath(template_name).exists():
             raise Exception(f"couldn't find the template : {template_name}")
@@ -385,17 +372,15 @@ class BaseCommonGenerator:
             module_path = ''
             module_import = ''
         else:
-            module_name = get_plugin_manager().hook.get_tester_type(tester_name=definition['tester'])[0].__name__
-            module_path = get_plugin_manager().hook.get_tester_type(tester_name=definition['tester'])[0].__module__
+            module_name = tester_types[0].__name__
+            module_path = tester_types[0].__module__
             module_import = f'from {module_path} import {module_name}'
 
-        msg = template.render(definition=definition, module_import=module_import, module_name=module_name)
-
         if not abs_path_to_dir.exists():
             os.makedirs(abs_path_to_dir)
 
-        with open(abs_path_to_file, 'w', encoding='utf-8') as f:
-            f.write(msg)
+        render_to_file(project_path, abs_path_to_file, template,
+                       {'definition': definition, 'module_import': module_import, 'module_name': module_name})
 
 
 class FT_common_generator(BaseCommonGenerator):
@@ -20,12 +20,15 @@ def main() -> int:
                                                  > sammy generate test                --> generates tests
                                                  > sammy generate test_target         --> generates test_targets
                                                  > sammy generate new <project name>  --> generates new project
+                                                 > sammy generate all --jobs 8        --> generates with 8 worker processes
                                                  To Migrate to the newest release:
                                                  > sammy migrate
                                                  '''))
     parser.add_argument("verb", type=str)
     parser.add_argument("noun", type=str, nargs="?", default="")
     parser.add_argument("params", nargs="*")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of processes generating programs and tests in parallel")
 
     try:
         allargs = parser.parse_args()
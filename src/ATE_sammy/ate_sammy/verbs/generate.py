@@ -1,15 +1,45 @@
 from ate_projectdatabase.Program import Program
+import copy
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from ate_projectdatabase.FileOperator import FileOperator
 from ate_projectdatabase.Hardware import Hardware
 from ate_projectdatabase.Utils import BaseType
+from ate_sammy.coding.generator_utils import get_generation_cache, save_generation_caches, write_if_changed
 from ate_sammy.verbs.verbbase import VerbBase
 
+# below this number of programs, tests or test targets starting the worker processes takes longer than generating
+PARALLEL_GENERATION_THRESHOLD = 16
+
+
+# the generation of a single program, test or test target, these run in the worker
+# processes and return the generation cache entries of the files they generated
+def _generate_program(template_path, cwd, prog_name, tests_in_program, test_targets, program_configuration):
+    from ate_sammy.coding.ProgramGenerator import test_program_generator
+    test_program_generator(template_path, cwd, prog_name, tests_in_program, test_targets, program_configuration)
+    return get_generation_cache(cwd).pop_updates()
+
+
+def _generate_test(template_path, cwd, definition, do_update):
+    from ate_sammy.coding.generators import test_generator, test_update
+    if do_update:
+        test_update(template_path, cwd, definition)
+    else:
+        test_generator(template_path, cwd, definition)
+    return get_generation_cache(cwd).pop_updates()
+
+
+def _generate_test_target(template_path, cwd, definition, do_update):
+    from ate_sammy.coding.TargetGenerator import test_target_generator
+    test_target_generator(template_path, cwd, definition, do_update=do_update)
+    return get_generation_cache(cwd).pop_updates()
+
 
 class Generate(VerbBase):
     def __init__(self, template_path):
         self.template_path = template_path
+        self.jobs = 1
 
     def run(self, cwd: str, arglist) -> int:
         noun = arglist.noun
@@ -28,8 +58,26 @@ class Generate(VerbBase):
             return -1
 
         self.file_operator = FileOperator(cwd)
-
-        return valid_nouns[noun]()
+        # the spyder plugin runs sammy in its own process, without a number of jobs
+        self.jobs = getattr(arglist, 'jobs', None) or 1
+
+        try:
+            return valid_nouns[noun]()
+        finally:
+            save_generation_caches()
+
+    def _run_jobs(self, cwd: str, generate: callable, jobs: list):
+        # programs and tests are independent of each other, larger numbers are generated in parallel
+        if self.jobs <= 1 or len(jobs) < PARALLEL_GENERATION_THRESHOLD:
+            for args in jobs:
+                generate(*args)
+            return
+
+        cache = get_generation_cache(cwd)
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [executor.submit(generate, *args) for args in jobs]
+            for future in futures:
+                cache.merge(future.result())
 
     def all(self, cwd: str, arglist: list):
         print("    Generate project")
@@ -46,7 +94,6 @@ class Generate(VerbBase):
 
     def sequence(self, cwd: str, arglist: list):
         print("    -> generate sequence(s)")
-        from ate_sammy.coding.ProgramGenerator import test_program_generator
         from ate_projectdatabase.Sequence import Sequence
         from ate_projectdatabase.TestTarget import TestTarget
         from ate_projectdatabase.Program import Program
@@ -57,6 +104,7 @@ class Generate(VerbBase):
         else:
             programs = Program.get_all(self.file_operator)
 
+        jobs = []
         for program in programs:
             tests_in_program = Sequence.get_for_program(self.file_operator, program.prog_name)
             test_targets = TestTarget.get_for_program(self.file_operator, program.prog_name)
@@ -65,8 +113,9 @@ class Generate(VerbBase):
             self._create_layout_file(program.hardware, program.prog_name, BaseType(program.base), cwd)
 
             print(f"        gen {program.prog_name}")
-            test_program_generator(self.template_path, cwd, program.prog_name, tests_in_program, test_targets, program_configuration)
+            jobs.append((self.template_path, cwd, program.prog_name, tests_in_program, test_targets, program_configuration))
 
+        self._run_jobs(cwd, _generate_program, jobs)
         return 0
 
     def _create_layout_file(self, hw_name, program_name, base_type: BaseType, project_base_dir):
@@ -88,12 +137,10 @@ class Generate(VerbBase):
             }
 
         file_path = Path(project_base_dir, Path(project_base_dir).name, hw_name, base_type.value, f'{program_name}_execution_strategy.json')
-        with open(file_path, "w") as file:
-            json.dump(data, file, indent=4)
+        write_if_changed(file_path, json.dumps(data, indent=4))
 
     def gen_tests(self, cwd: str, arglist: list):
         print("    -> generate test(s)")
-        from ate_sammy.coding.generators import test_generator, test_update
         from ate_projectdatabase.Test import Test
         tests = []
 
@@ -103,20 +150,17 @@ class Generate(VerbBase):
         else:
             tests = Test.get_all(self.file_operator)
 
+        jobs = []
         for test in tests:
             print(f"        gen {test.name}")
             project_dir = Path(cwd)
             test_path = project_dir.joinpath(project_dir.name, test.hardware, test.base, test.name)
-            if not test_path.exists():
-                test_generator(self.template_path, cwd, test.definition)
-                continue
-
-            test_update(self.template_path, cwd, test.definition)
+            jobs.append((self.template_path, cwd, test.definition, test_path.exists()))
 
+        self._run_jobs(cwd, _generate_test, jobs)
         return 0
 
     def gen_test_targets(self, cwd: str, arglist: list):
-        from ate_sammy.coding.TargetGenerator import test_target_generator
         from ate_projectdatabase.TestTarget import TestTarget
         from ate_projectdatabase.Test import Test
 
@@ -127,11 +171,13 @@ class Generate(VerbBase):
         else:
             test_targets = TestTarget.get_all(self.file_operator)
 
+        jobs = []
         for test_target in test_targets:
             project_dir = Path(cwd)
             project_dir = Path(cwd)
             test_path = project_dir.joinpath(project_dir.name, test_target.hardware, test_target.base, test_target.name)
-            testdefinition = Test.get(self.file_operator, test_target.test, test_target.hardware, test_target.base).definition
+            # the definition is adapted to the target, the test keeps its own
+            testdefinition = copy.deepcopy(Test.get(self.file_operator, test_target.test, test_target.hardware, test_target.base).definition)
             testdefinition['base'] = test_target.base
             testdefinition['base_class'] = test_target.test
             testdefinition['name'] = test_target.name
@@ -141,11 +187,9 @@ class Generate(VerbBase):
                 continue
 
             print(f"        gen {test_target.name}")
-            if not Path(f'{test_path}.py').exists():
-                test_target_generator(self.template_path, cwd, testdefinition)
-                continue
+            jobs.append((self.template_path, cwd, testdefinition, Path(f'{test_path}.py').exists()))
 
-            test_target_generator(self.template_path, cwd, testdefinition, do_update=True)
+        self._run_jobs(cwd, _generate_test_target, jobs)
 
     def hardware(self, cwd, arglist: list):
         print("    -> generate hardware")
@@ -0,0 +1,93 @@
+"""
+Measures 'sammy generate all' on a copy of an integration test project that
+is extended by generated tests: the first run generates everything, the
+second one runs on the unchanged project and the third one after a single
+test definition changed.
+
+usage: python bench_generate.py [--tests 500] [--jobs 8] [--project path/to/project]
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from argparse import Namespace
+from pathlib import Path
+
+from ate_sammy.sammy import run as run_sammy
+
+DEFAULT_PROJECT = Path(__file__).parents[2].joinpath('integration_tests', 'projects', 'project_version_10')
+
+
+def sammy(project_path: Path, verb: str, noun: str = '', jobs: int = 1):
+    run_sammy(Namespace(verb=verb, noun=noun, params=[], jobs=jobs), str(project_path))
+
+
+def add_tests(project_path: Path, num_tests: int) -> list:
+    test_dir = project_path.joinpath('definitions', 'test')
+    template_file = next(test_dir.glob('test*.json'))
+    with open(template_file, 'r') as f:
+        template = json.load(f)[0]
+
+    test_files = []
+    for index in range(num_tests):
+        name = f'bench{index}'
+        test = json.loads(json.dumps(template))
+        test['name'] = name
+        test['definition']['name'] = name
+        test['definition']['output_parameters'] = {f'{name}_op{op}': dict(parameter) for op in range(10)
+                                                   for parameter in test['definition']['output_parameters'].values()}
+        test_file = test_dir.joinpath(f'test{name}.json')
+        with open(test_file, 'w') as f:
+            json.dump([test], f, indent=4)
+        test_files.append(test_file)
+
+    return test_files
+
+
+def measure(project_path: Path, jobs: int) -> float:
+    start = time.perf_counter()
+    sammy(project_path, 'generate', 'all', jobs)
+    return time.perf_counter() - start
+
+
+def run(source_project: Path, num_tests: int, jobs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        project_path = Path(tmp, source_project.name)
+        shutil.copytree(source_project, project_path)
+        sammy(project_path, 'migrate')
+        test_files = add_tests(project_path, num_tests)
+
+        # the output of sammy itself is not of interest here
+        with open(os.devnull, 'w') as devnull:
+            with contextlib.redirect_stdout(devnull):
+                first = measure(project_path, jobs)
+                unchanged = measure(project_path, jobs)
+
+                with open(test_files[0], 'r') as f:
+                    test = json.load(f)
+                test[0]['definition']['docstring'] = ['changed']
+                with open(test_files[0], 'w') as f:
+                    json.dump(test, f, indent=4)
+                changed = measure(project_path, jobs)
+
+    print(f'tests: {num_tests}, jobs: {jobs}')
+    print(f'    first run:     {first:.2f} s')
+    print(f'    unchanged:     {unchanged:.2f} s')
+    print(f'    one changed:   {changed:.2f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tests', type=int, default=500)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--project', type=Path, default=DEFAULT_PROJECT)
+    args = parser.parse_args()
+
+    run(args.project, args.tests, args.jobs)
+
+
+if __name__ == '__main__':
+    main()
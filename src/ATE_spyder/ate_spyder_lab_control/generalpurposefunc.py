@@ -103,4 +103,4 @@ class Plugin:
         if object_name == "LABML.Setup":
             return ["Network prefix", "working directory", "add path", 'instance name', 'filename']
         elif object_name == "LABML.Registermaster":
-            return ['instance name', 'filename', 'read mod write', 'reset value']
+            return ['instance name', 'filename', 'read mod write', 'reset value', 'force bank', 'cache folder']
@@ -99,7 +99,7 @@ class Gui(Guibase):
             if len(mycmd) == 2 and mycmd[1] in ["read", "write"]:  # special handling from mqtt commands
                 self.regstatus(" ")
                 if mycmd[0] in dir(self.regs):
-                    self.registerframe(self.regs.__dict__[mycmd[0]], msg["payload"])
+                    self.registerframe(getattr(self.regs, mycmd[0]), msg["payload"])
                 else:
                     self.regstatus(f"{mycmd[0]} not found in the registermaster")
             else:
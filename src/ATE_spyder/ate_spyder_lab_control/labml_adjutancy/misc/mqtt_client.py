@@ -18,6 +18,7 @@ import json
 from abc import abstractmethod
 import paho.mqtt.client as mqttc
 import socket
+import threading
 from .singleton import Singleton
 from PyQt5 import QtCore
 from . import common
@@ -33,6 +34,7 @@ TOPIC_PREFIX = "ate"
 TOPIC_CONTROL = "semictrl"
 TOPIC_INSTRUMENT = "instruments"
 TOPIC_INSTNAME = "tcc"
+PUBLISH_INTERVAL = 0.1  # seconds, attribute values are published at most once per interval
 
 
 class mylogger(object):
@@ -119,6 +121,7 @@ class mqtt_init(object, metaclass=Singleton):
         client.on_disconnect = on_disconnect
         self.client = client
         self.instruments = {}
+        self.publisher = mqtt_coalescing_publisher(self)
 
     def init(
         self,
@@ -129,17 +132,20 @@ class mqtt_init(object, metaclass=Singleton):
         userpasswd="",
         qos=0,
         retain=False,
+        publish_interval=PUBLISH_INTERVAL,
     ):
         """
         Normally call from plugin semi-control, you have not to call this function, if you use semi-control.
 
         message_client = None if client the instrument, like e.q. smu, digital-multimeter or thermostreamer.
                        = e.q. 'DT1604092' if control and you want connect from an extern computer to DT1604092 (but is not checked until now!!)
+        publish_interval = seconds between two publishes of the same instrument attribute, see publish_latest
         """
         import socket
 
         self.qos = qos
         self.retain = retain
+        self.publisher.interval = publish_interval
         self.username = username
         self.hostname = socket.gethostname()
         if broker.find(".") > 0:
@@ -289,6 +295,13 @@ class mqtt_init(object, metaclass=Singleton):
             f"{attr}", str(value), qos=qos, retain=retain
         )  # payload must be string,bytearray,int,float or None
 
+    def publish_latest(self, attr, key, value):
+        """Send message to broker from the background publisher.
+
+        Only the latest value with the same attr and key is send per interval.
+        """
+        self.publisher.publish(attr, key, value)
+
     def clearpublish(self, attr):
         """Remove retained publish message from broker."""
         self.client.publish(
@@ -297,6 +310,8 @@ class mqtt_init(object, metaclass=Singleton):
 
     def close(self):
         """Disconnect from broker."""
+        if hasattr(self, "publisher"):
+            self.publisher.close()
         if hasattr(self, "broker") and self.broker is not None:
             self.client.loop_stop()
             self.client.disconnect()
@@ -311,6 +326,54 @@ class mqtt_init(object, metaclass=Singleton):
         pass
 
 
+class mqtt_coalescing_publisher(object):
+    """
+    Publish messages of mqtt_init from a background thread.
+
+    Instruments may read or write an attribute much more often than a gui can display it,
+    per interval only the latest message of an attribute (topic and key) is send.
+    The messages are send in the order their attributes were published first.
+    """
+
+    def __init__(self, client, interval=PUBLISH_INTERVAL):
+        self.client = client
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def publish(self, topic, key, value):
+        with self._lock:
+            self._pending[(topic, key)] = value
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="mqtt_coalescing_publisher", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self):
+        """Send the pending messages now."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for (topic, _), value in pending.items():
+            self.client.publish(topic, value)
+
+    def close(self):
+        """Stop the background thread, the pending messages are send before."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopped.set()
+            thread.join()
+            self._stopped.clear()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+
 class mqtt_deviceattributes(object):
     """
     Handle mqqt messages for the instrument (=devices is 'transmitter').
@@ -321,6 +384,10 @@ class mqtt_deviceattributes(object):
         {"instrumentname": {"type": "set/get", "cmd": "function/attributename", "payload": yourvalues}}
 
       mqtt_all will be overwriten, to uncover attributes for sending mqqt-messages
+      mqtt_list has to be assigned (not changed in place), the published attributes are looked up in a frozenset of it
+
+    - the messages are send by the coalescing publisher of the client, only the latest value
+      of an attribute is send per publish interval (see mqtt_init.publish_latest)
 
     - if you define the function '_mqtt2json(value, attributename)' in your device, than this function will be call if a mqtt message should be send
       With this function you can translate the value, or it the result 'nomqtt' than the message will not be send.
@@ -329,11 +396,23 @@ class mqtt_deviceattributes(object):
     import json
 
     mqtt_enable = False
-    mqtt_list = []
+    _mqtt_list = []
+    _mqtt_published = frozenset()
+    # never published, they are read by the publishing itself
+    _mqtt_unpublished = frozenset(["__class__", "mqtt_list", "mqtt_enable", "INST_FUNCTION"])
     command = {
         "set": {"type": "cmd", "command": "menu", "payload": None},
     }
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # a mqtt_list assigned in the class body hides the property, move it to _mqtt_list
+        mqtt_list = cls.__dict__.get("mqtt_list")
+        if mqtt_list is not None and not isinstance(mqtt_list, property):
+            delattr(cls, "mqtt_list")
+            cls._mqtt_list = mqtt_list
+            cls._mqtt_published = frozenset(mqtt_list) - cls._mqtt_unpublished
+
     def __init__(self):
         _setattr = object.__setattr__.__get__(
             self, self.__class__
@@ -402,6 +481,18 @@ class mqtt_deviceattributes(object):
             self._mqttclient.mqtt_disconnect(self)  # remove from list
         self.mqtt_enable = False
 
+    @property
+    def mqtt_list(self):
+        """The attributes published on get and set."""
+        return self._mqtt_list
+
+    @mqtt_list.setter
+    def mqtt_list(self, value):
+        object.__setattr__(self, "_mqtt_list", value)
+        object.__setattr__(
+            self, "_mqtt_published", frozenset(value) - self._mqtt_unpublished
+        )
+
     def __setattr__(self, attr, value):
         """
         Publish attribute and value, if attribute was set and it is in mqtt_list.
@@ -410,9 +501,7 @@ class mqtt_deviceattributes(object):
         This function will call from _mqtt_message, normally you have not to use this function.
         """
         object.__setattr__(self, attr, value)
-        if (
-            self.mqtt_enable and attr in self.mqtt_list
-        ):  # attr == 'mqtt_status' or
+        if attr in self._mqtt_published and self.mqtt_enable:
             payload = {
                 f"{self.instName}": {
                     "type": "set",
@@ -420,7 +509,7 @@ class mqtt_deviceattributes(object):
                     "payload": value,
                 }
             }
-            self._mqttclient.publish(self.topic, payload)
+            self._mqttclient.publish_latest(self.topic, (self.instName, "set", attr), payload)
             if self.mqtt_debug:
                 print(
                     "{} {} publish: {} {}".format(
@@ -438,14 +527,10 @@ class mqtt_deviceattributes(object):
         pulish mean: send 'hostname/instName/attibute/set value' to the broker
         This function will call from _mqtt_message, normally you have not to use this function.
         """
-        value = super(__class__, self).__getattribute__(attr)
-        if attr == "mqtt_enable":
-            return value
-        if (
-            attr not in ["__class__", "mqtt_list", "INST_FUNCTION"]
-            and attr in self.mqtt_list
-        ):
-            if f"{attr}()" in self.mqtt_list:
+        value = object.__getattribute__(self, attr)
+        # every attribute read of the instrument passes here, the lookup is the only work for unpublished attributes
+        if attr in object.__getattribute__(self, "_mqtt_published"):
+            if f"{attr}()" in self._mqtt_published:
                 # TODO: function-call have to add their own call from self._mqttclient.publish(), because unitl now
                 #    I did'nt know to get the function parameters
                 # payload = {f"{self.instName}": {'type': 'get', 'cmd': attr, 'payload': values}}
@@ -474,7 +559,7 @@ class mqtt_deviceattributes(object):
                 }
             if payload != "nomqtt":
                 if self._mqttclient is not None:
-                    self._mqttclient.publish(self.topic, payload)
+                    self._mqttclient.publish_latest(self.topic, (self.instName, "get", attr), payload)
                 else:
                     print(f" _mqttclient is None: coulnt't publish {attr}, {value}")
                 if self.mqtt_debug:
@@ -517,7 +602,7 @@ class mqtt_deviceattributes(object):
                     f"{self.__class__.__name__}.publish_get: {self.topic} = {payload}"
                 )
             if self._mqttclient is not None:
-                self._mqttclient.publish(self.topic, payload)
+                self._mqttclient.publish_latest(self.topic, (self.instName, "set", function_name), payload)
 
     def publish_set(self, function_name, value):
         """Publish function_name as type='set' with paylad=value."""
@@ -535,7 +620,7 @@ class mqtt_deviceattributes(object):
                     f"{self.__class__.__name__}.publish_set: {self.topic} = {payload}"
                 )
             if self._mqttclient is not None:
-                self._mqttclient.publish(self.topic, payload)
+                self._mqttclient.publish_latest(self.topic, (self.instName, "set", function_name), payload)
 
     @property
     def mqtt_status(self):
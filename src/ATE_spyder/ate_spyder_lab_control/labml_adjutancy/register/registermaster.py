@@ -23,6 +23,10 @@ bitslice is descripted by the following items:
 import re
 import sys
 import os
+import hashlib
+import json
+import weakref
+from bisect import bisect_right
 import pandas as pd
 import ipywidgets as widgets
 
@@ -30,7 +34,9 @@ try:
     from itertools import zip_longest
 except ImportError:
     from itertools import izip_longest as zip_longest
+from itertools import groupby
 from collections import OrderedDict  # , namedtuple
+from collections.abc import Mapping
 from ate_common.logger import LogLevel
 from labml_adjutancy.misc.mqtt_client import mqtt_deviceattributes
 from labml_adjutancy.misc import environment
@@ -42,6 +48,11 @@ __version__ = "0.0.3"
 
 mylogger = None
 
+# parsed register masters, see RegDB.build_database
+# the cache is only used if a folder is configured ('cache folder'), e.g. REGDB_CACHE_FOLDER
+REGDB_CACHE_FOLDER = os.path.join(os.path.expanduser("~"), ".labml_adjutancy", "regdb")
+REGDB_CACHE_VERSION = 1
+
 
 class Logger():
     """Basic Logger, if a real logger not necessary."""
@@ -52,13 +63,21 @@ class Logger():
 
 
 class RegDB(object):
-    def __init__(self, filename=""):
-        import xlrd
-
-        self.bk = xlrd.open_workbook(filename)
-        self.database = None
+    def __init__(self, filename="", cache_folder=None):
+        self.filename = filename
+        self.cache_folder = cache_folder
+        self._bk = None
         self.database = []
 
+    @property
+    def bk(self):
+        """the workbook, only opened if the register master is not in the cache"""
+        if self._bk is None:
+            import xlrd
+
+            self._bk = xlrd.open_workbook(self.filename)
+        return self._bk
+
     def get_row_data(self, bk, sh, rowx, colrange):
         """Utility function to extract a single row out of an Excel sheet"""
         import xlrd
@@ -91,7 +110,46 @@ class RegDB(object):
         return result
 
     def build_database(self):
-        """Fill database with register master fields"""
+        """Fill database with register master fields
+
+        If a cache folder is given, the parsed database is cached with the hash of
+        the workbook as key, the workbook is parsed again only if it has changed."""
+        with open(self.filename, "rb") as f:
+            key = hashlib.sha256(f.read()).hexdigest()
+        if self.cache_folder is not None and self._load_cache(key):
+            return
+        self._parse_workbook()
+        if self.cache_folder is not None:
+            self._save_cache(key)
+
+    def _get_cache_path(self, key):
+        return os.path.join(self.cache_folder, f"{key}.json")
+
+    def _load_cache(self, key):
+        try:
+            with open(self._get_cache_path(key), "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cache.get("version") != REGDB_CACHE_VERSION:
+            return False
+        self.database = cache["database"]
+        # json keys are strings, the cells are indexed by column
+        for block in self.database:
+            block["cells"] = {int(col): cell for col, cell in block["cells"].items()}
+        return True
+
+    def _save_cache(self, key):
+        path = self._get_cache_path(key)
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump({"version": REGDB_CACHE_VERSION, "filename": self.filename, "database": self.database}, f)
+            os.replace(f"{path}.tmp", path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"WARNING: couldn't cache register master {self.filename!r}: {e}")
+
+    def _parse_workbook(self):
         shxrange = range(self.bk.nsheets)
         #
         #  Iterating over all sheets of the file
@@ -466,15 +524,14 @@ class Register:
         return paddr
 
     def writebase(self, bank):
-        if self._rm._forcebank or (bank != self._rm._bank):
-            self._rm._protocol.writebase(bank)
-            self._rm._bank = bank
+        self._rm._select_bank(bank)
 
     def __init__(self, cpuaddr, addr, bank=0, name="", slices={}, description="", rm=None):
         global mylogger
         _setattr = object.__setattr__.__get__(self, self.__class__)
         if bank == "":
-            mylogger.log_message(LogLevel.Warning(), f"Regisermaster {name} entray 'bank' is empty, use 0  instead")
+            if mylogger is not None:
+                mylogger.log_message(LogLevel.Warning(), f"Regisermaster {name} entray 'bank' is empty, use 0  instead")
             bank = 0
         _setattr("_cpuaddr", cpuaddr)
         _setattr("_addr", addr)
@@ -524,9 +581,7 @@ class Register:
 
         shadow register, read/write the true regiser only if None"""
         if self._rm._atomic and self.__cache__ is None:
-            if self._bank is not None and self._bank != "":
-                self.writebase(self._bank)
-            value = self._rm._protocol.readreg(self._get_addr())
+            value = self._rm._readreg(self._get_addr(), self._bank)
             value &= 2 ** self._len_slices() - 1
             self._check_r_err()
         else:
@@ -537,9 +592,7 @@ class Register:
     def value(self, value):
         self._validate(value, len(self))
         if self._rm._atomic and self.__cache__ is None:
-            if self._bank is not None and self._bank != "":
-                self.writebase(self._bank)
-            self._rm._protocol.writereg(self._get_addr(), value)
+            self._rm._writereg(self._get_addr(), value, self._bank)
             self._check_w_err()
         else:
             self._cache = value
@@ -555,9 +608,7 @@ class Register:
         length = msb - lsb + 1
         mask = (2**length - 1) << lsb
         if self._rm._atomic and self.__cache__ is None:
-            if self._bank is not None and self._bank != "":
-                self.writebase(self._bank)
-            value = self._rm._protocol.readreg(self._get_addr())
+            value = self._rm._readreg(self._get_addr(), self._bank)
             value &= 2 ** self._len_slices() - 1
             self._check_r_err()
         else:
@@ -581,9 +632,7 @@ class Register:
                 msg += "use either _cache = <value>, _use_reset(), "
                 msg += "_read() or _write(<value>)"
                 raise ValueError(msg.format(self._name))
-            if self._bank is not None and self._bank != "":
-                self.writebase(self._bank)
-            current = self._rm._protocol.readreg(self._get_addr())
+            current = self._rm._readreg(self._get_addr(), self._bank)
             current &= 2 ** self._len_slices() - 1
             self._check_r_err()
         elif self.__cache__ is None:
@@ -596,7 +645,7 @@ class Register:
         # set value
         current = current | (value << lsb)
         if self._rm._atomic and self.__cache__ is None:
-            self._rm._protocol.writereg(self._get_addr(), current)
+            self._rm._writereg(self._get_addr(), current, self._bank)
             self._check_w_err()
         else:
             self._cache = current
@@ -715,9 +764,10 @@ class Register:
         return valres
 
     def _read(self, protocol=None):
-        if self._bank is not None and self._bank != "":
-            self.writebase(self._bank)
-        value = self._rm._protocol.readreg(self._get_addr())
+        value = self._rm._readreg(self._get_addr(), self._bank)
+        return self._set_read_value(value)
+
+    def _set_read_value(self, value):
         if not self._rm._protocol.board.error:
             value &= 2 ** self._len_slices() - 1
         self._check_r_err()
@@ -731,9 +781,7 @@ class Register:
         else:
             _value = self._validate(value, len(self))
         if _value is not None:
-            if self._bank is not None and self._bank != "":
-                self.writebase(self._bank)
-            self._rm._protocol.writereg(self._get_addr(), _value)
+            self._rm._writereg(self._get_addr(), _value, self._bank)
             self._check_w_err()
         else:
             msg = "nothing to write (neither argument nor _cache value is given)"
@@ -1131,6 +1179,24 @@ class Register:
         return widgets.VBox(boxes)
 
 
+class RegisterDict(Mapping):
+    """The registers of a RegisterMaster by name, a register is created when it is accessed first."""
+
+    def __init__(self, rm):
+        self._rm = rm
+
+    def __getitem__(self, name):
+        if name not in self._rm._register_specs:
+            raise KeyError(name)
+        return getattr(self._rm, name)
+
+    def __iter__(self):
+        return iter(self._rm._register_specs)
+
+    def __len__(self):
+        return len(self._rm._register_specs)
+
+
 class RegisterMaster(mqtt_deviceattributes):
     """Returns a container object for registers imported from registermaster.
 
@@ -1138,8 +1204,15 @@ class RegisterMaster(mqtt_deviceattributes):
     atomic:     enables read-modify-write behavoiur of bit-slices
                 (reset: False)
     interface:  hardware object for STI/BiPhase protocol
+    cache_folder: folder to cache the parsed registermaster in, e.g. REGDB_CACHE_FOLDER
+                (reset: None, the registermaster is parsed at every init)
+
+    With the configuration 'force bank' False, writebase is skipped if the bank is selected already.
     """
 
+    # protocol -> bank selected with writebase, shared by the register masters using the same protocol
+    _selected_banks = weakref.WeakKeyDictionary()
+
     # read-only attributes
     def __setattr__(self, name, value):
         valid = (
@@ -1169,7 +1242,7 @@ class RegisterMaster(mqtt_deviceattributes):
         if hasattr(self, "mqtt_all") and name in self.mqtt_all:
             self.publish_set(name, value)
 
-    def __init__(self, logger=None, filename=None, interface=None, instname="regs", read_mod_write=False):
+    def __init__(self, logger=None, filename=None, interface=None, instname="regs", read_mod_write=False, cache_folder=None):
         global mylogger
         self.gui = "labml_adjutancy.gui.instruments.regs.registermaster"
         _setattr = object.__setattr__.__get__(self, self.__class__)
@@ -1179,18 +1252,23 @@ class RegisterMaster(mqtt_deviceattributes):
         mylogger = logger if logger is not None else Logger()
         _setattr("instName", instname)
         _setattr("filename", filename)
+        _setattr("_cache_folder", cache_folder)  # folder of the parsed register masters, None: no cache
         _setattr("_cached", False)
         _setattr("_debug", False)
         _setattr("_buffer", [])
-        _setattr("_regs", {})
-        _setattr("_cpuregs", {})
+        _setattr("_regs", {})  # addr -> register names
+        _setattr("_cpuregs", {})  # cpuaddr -> register names
+        _setattr("_register_specs", {})  # register name -> arguments of Register
         _setattr("_protocol_typ", None)
         _setattr("_interface", interface)
         _setattr("_protocol", None)
         _setattr("_forcebank", True)
         _setattr("_bank", -1)
+        _setattr("_bank_starts", [])  # sorted banks of mapping
+        _setattr("_round_trips", {})
         _setattr("_atomic", read_mod_write)
         _setattr("_len_reg", 0)
+        self.reset_round_trips()
 
     def __repr__(self):
         args = ["{!r}".format(self.filename)]
@@ -1215,7 +1293,13 @@ class RegisterMaster(mqtt_deviceattributes):
             self.mqtt_add(mqttc, self)
         blocked_regs = tuple(self.__class__.__dict__)
         blocked_slices = tuple(Register.__dict__)
-        db = RegDB(filename)
+        for name in self._register_specs:
+            if isinstance(self.__dict__.get(name), Register):
+                del self.__dict__[name]
+        self._register_specs.clear()
+        self._regs.clear()
+        self._cpuregs.clear()
+        db = RegDB(filename, self._cache_folder)
         db.build_database()
         for item in db.database[0]["registers"]:
             slices = OrderedDict()
@@ -1267,47 +1351,38 @@ class RegisterMaster(mqtt_deviceattributes):
                 if item.get("cpuadr") is not None and item["cpuadr"] != "":
                     cpuaddr = item["cpuadr"]
                 if name != "":
-                    reg = Register(
-                        cpuaddr=cpuaddr,
-                        addr=addr,
-                        bank=item.get("bank"),
-                        name=name,
-                        description=item["des"],
-                        slices=slices,
-                        rm=self,
-                    )
-                    reg = reg._Register__slices2attr()
-                    if not isinstance(reg._addr, int):
+                    if not isinstance(addr, int):
                         msg = f"ERROR: {name} addr is not a integer!  addr= {addr}"
                         print(msg)
                         continue
-                    if reg._addr >= 0:
-                        self._regs.setdefault(reg._addr, []).append(reg)
-                    if reg._cpuaddr >= 0:
-                        self._cpuregs.setdefault(reg._cpuaddr, []).append(reg)
-                    object.__setattr__(self, item["blk"], reg)
-        len_max = max(reg._len_slices() for reg in self)
+                    bank = item.get("bank")
+                    if bank == "":
+                        if mylogger is not None:
+                            mylogger.log_message(LogLevel.Warning(), f"Regisermaster {name} entray 'bank' is empty, use 0  instead")
+                        bank = 0
+                    # the Register is created on first access, see __getattr__
+                    self._register_specs[name] = dict(cpuaddr=cpuaddr, addr=addr, bank=bank, name=name, description=item["des"], slices=slices)
+                    if addr >= 0:
+                        self._regs.setdefault(addr, []).append(name)
+                    if cpuaddr >= 0:
+                        self._cpuregs.setdefault(cpuaddr, []).append(name)
+                    if name in self.__dict__:
+                        # same name as an attribute of the instance, the register replaces it
+                        self._create_register(name)
+        len_max = max(sum(s["msb"] - s["lsb"] + 1 for s in self._register_specs[name]["slices"].values()) for names in self._regs.values() for name in names)
         object.__setattr__(self, "_len_reg", len_max)
-        for reg in self:
-            if reg._len_slices() < len_max:
-                msg = "WARNING: misses some slices ({} {}) in register {!r}"
-                num = len_max - reg._len_slices()
-                unit = "bits" if num > 1 else "bit"
-                msg = msg.format(num, unit, reg._name)
         try:
             self.use = "tin"
         except AttributeError:
             pass
         object.__setattr__(self, "mapping", {})
         object.__setattr__(self, "_len_slices", None)
-        self.register = self.__dict__.copy()  # create attribute register with all registernames
-        for reg in self.__dict__:
-            if reg != "register" and not hasattr(self.register[reg], "_Register__has_reset"):
-                self.register.pop(reg, None)
-            elif reg != "register":
-                bank = self.register[reg]._bank
-                if bank is not None and bank != "":
-                    self.mapping[bank] = self.register[reg]._len_slices()
+        self.register = RegisterDict(self)  # create attribute register with all registernames
+        for spec in self._register_specs.values():
+            bank = spec["bank"]
+            if bank is not None and bank != "":
+                self.mapping[bank] = sum(s["msb"] - s["lsb"] + 1 for s in spec["slices"].values())
+        object.__setattr__(self, "_bank_starts", sorted(self.mapping))
         self.mqtt_list = list(self.register) + self.mqtt_all
         return self
 
@@ -1316,7 +1391,7 @@ class RegisterMaster(mqtt_deviceattributes):
         if self._protocol_typ == "tin":
             for regs in self._cpuregs.values():
                 for reg in regs:
-                    yield reg
+                    yield getattr(self, reg)
         else:
             if not bool(self._regs.values()):
                 mylogger.log_message(LogLevel.Error(), "\n####################################################")
@@ -1324,7 +1399,25 @@ class RegisterMaster(mqtt_deviceattributes):
                 mylogger.log_message(LogLevel.Error(), "####################################################\n")
             for regs in self._regs.values():
                 for reg in regs:
-                    yield reg
+                    yield getattr(self, reg)
+
+    def __getattr__(self, name):
+        # only called for missing attributes: the registers not accessed so far
+        specs = self.__dict__.get("_register_specs")
+        if specs is None or name not in specs:
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {name!r}")
+        return self._create_register(name)
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self.__dict__.get("_register_specs", ())))
+
+    def _create_register(self, name):
+        reg = Register(rm=self, **self._register_specs[name])._Register__slices2attr()
+        object.__setattr__(self, name, reg)
+        return reg
+
+    def _created_registers(self):
+        return [self.__dict__[name] for name in self._register_specs if isinstance(self.__dict__.get(name), Register)]
 
     def __len__(self):
         if self._protocol_typ == "tin":
@@ -1343,9 +1436,9 @@ class RegisterMaster(mqtt_deviceattributes):
     def find(self, addr):
         try:
             if self._protocol_typ == "tin":
-                return self._cpuregs[addr][0]
+                return getattr(self, self._cpuregs[addr][0])
             else:
-                return self._regs[addr][0]._name
+                return self._regs[addr][0]
         except Exception:
             return None
 
@@ -1364,6 +1457,7 @@ class RegisterMaster(mqtt_deviceattributes):
         object.__setattr__(self, "_protocol", interface)
         object.__setattr__(self, "_protocol_typ", typ)
         object.__setattr__(self, "_bank", -1)
+        self._set_selected_bank(None)
         if hasattr(self._protocol, "init"):
             self._protocol.init()
 
@@ -1380,18 +1474,23 @@ class RegisterMaster(mqtt_deviceattributes):
         -------
           adr.
         """
-        if self.mapping != {}:
-            mybank = 0
-            for bank in self.mapping:
-                mybank = bank if adr >= bank else mybank
-            self._bank = mybank
-            self._len_slices = self.mapping[mybank]
-            adr = adr - mybank
-        else:
-            self._bank = None
-            self._len_slices = None
+        mybank, adr, len_slices = self._split_addr(adr)
+        self._bank = mybank
+        self._len_slices = len_slices
         return adr
 
+    def _split_addr(self, adr):
+        """Return bank, address within the bank and the register length of adr."""
+        if self.mapping == {}:
+            return None, adr, None
+
+        if len(self._bank_starts) != len(self.mapping):
+            object.__setattr__(self, "_bank_starts", sorted(self.mapping))
+        # a bank starts at its address, adr belongs to the last bank starting at or below it
+        index = bisect_right(self._bank_starts, adr)
+        mybank = self._bank_starts[index - 1] if index > 0 else 0
+        return mybank, adr - mybank, self.mapping[mybank]
+
     def readreg(self, adr, bank=None, compare=None, onlycheck=True, tolerance=0, mask=None):
         """
         Read Register with selected protokoll.
@@ -1418,9 +1517,7 @@ class RegisterMaster(mqtt_deviceattributes):
             self._bank = bank
         else:
             adr = self.set_bank(adr)
-        if self._bank is not None and self._bank != "":
-            self._protocol.writebase(self._bank)
-        value = self._protocol.readreg(adr)
+        value = self._readreg(adr, self._bank)
         if self._len_slices is not None:
             value &= 2**self._len_slices - 1
         if compare is not None:
@@ -1454,24 +1551,110 @@ class RegisterMaster(mqtt_deviceattributes):
             self._bank = bank
         else:
             adr = self.set_bank(adr)
-        if self._bank is not None and self._bank != "":
-            self._protocol.writebase(self._bank)
+        self._writereg(adr, dat, self._bank)
+
+    def transaction(self):
+        """
+        Queue register reads and writes and send them bank by bank, see RegisterTransaction.
+
+        Returns
+        -------
+        RegisterTransaction, use it as context, the accesses are send at the end of the context.
+        """
+        return RegisterTransaction(self)
+
+    def get_round_trips(self):
+        """
+        Number of calls to the protocol since reset_round_trips.
+
+        Returns
+        -------
+        dict with the calls of writebase, readreg, writereg, read_burst, write_burst,
+        the bank selections which were not send because the bank was selected already
+        ('writebase skipped') and the sum of all calls ('total').
+        """
+        round_trips = dict(self._round_trips)
+        round_trips["total"] = sum(value for key, value in self._round_trips.items() if key != "writebase skipped")
+        return round_trips
+
+    def reset_round_trips(self):
+        for key in ("writebase", "writebase skipped", "readreg", "writereg", "read_burst", "write_burst"):
+            self._round_trips[key] = 0
+
+    def _get_selected_bank(self):
+        """Return the bank selected with writebase on the protocol, that may be used by other register masters."""
+        try:
+            return RegisterMaster._selected_banks.get(self._protocol)
+        except TypeError:
+            return None
+
+    def _set_selected_bank(self, bank):
+        try:
+            if bank is None:
+                RegisterMaster._selected_banks.pop(self._protocol, None)
+            else:
+                RegisterMaster._selected_banks[self._protocol] = bank
+        except TypeError:
+            # protocol without weak reference support, the bank is written at every access
+            pass
+
+    def _select_bank(self, bank):
+        """Write bank to the protocol, if it is not selected already or 'force bank' is configured."""
+        if bank is None or bank == "":
+            return
+        if not self._forcebank and self._get_selected_bank() == bank:
+            self._round_trips["writebase skipped"] += 1
+            return
+
+        self._set_selected_bank(None)
+        self._protocol.writebase(bank)
+        self._round_trips["writebase"] += 1
+        board = getattr(self._protocol, "board", None)
+        if board is None or not board.error:
+            self._set_selected_bank(bank)
+
+    def _readreg(self, adr, bank):
+        self._select_bank(bank)
+        self._round_trips["readreg"] += 1
+        return self._protocol.readreg(adr)
+
+    def _writereg(self, adr, dat, bank):
+        self._select_bank(bank)
+        self._round_trips["writereg"] += 1
         self._protocol.writereg(adr, dat)
 
+    def _readregs(self, adrs, bank):
+        if len(adrs) > 1 and hasattr(self._protocol, "read_burst"):
+            self._select_bank(bank)
+            self._round_trips["read_burst"] += 1
+            return list(self._protocol.read_burst(adrs))
+        return [self._readreg(adr, bank) for adr in adrs]
+
+    def _writeregs(self, adrs, dats, bank):
+        if len(adrs) > 1 and hasattr(self._protocol, "write_burst"):
+            self._select_bank(bank)
+            self._round_trips["write_burst"] += 1
+            self._protocol.write_burst(adrs, dats)
+            return
+        for adr, dat in zip(adrs, dats):
+            self._writereg(adr, dat, bank)
+
     def reset(self):
         self._protocol.reset()
         object.__setattr__(self, "_bank", -1)
-        for reg in self:
+        self._set_selected_bank(None)
+        for reg in self._created_registers():
             object.__setattr__(reg, "__cache__", None)
 
     def reset_internal(self):
         object.__setattr__(self, "_bank", -1)
+        self._set_selected_bank(None)
         try:
             self._protocol.reset_internal()
         except AttributeError:
             msg = "{!r} protocol has no 'reset_internal'."
             raise AttributeError(msg.format(self._protocol.__class__.__name__))
-        for reg in self:
+        for reg in self._created_registers():
             object.__setattr__(reg, "__cache__", None)
 
     def reset_regs(self, default=None):
@@ -1532,11 +1715,113 @@ class RegisterMaster(mqtt_deviceattributes):
         _setattr("_atomic", read_mod_write)
         forcebank = config["force bank"] if "force bank" in config and config["force bank"] != "" else self._forcebank
         _setattr("_forcebank", forcebank)
+        cache_folder = config["cache folder"] if "cache folder" in config and config["cache folder"] != "" else self._cache_folder
+        _setattr("_cache_folder", cache_folder)
         resetvalue = config["reset value"] if "reset value" in config and config["reset value"] != "" else 0
         self.init()
         # self.reset_regs(resetvalue)    # TODO: definition interface is missing
 
 
+class RegisterRead:
+    """Result of a read queued in a RegisterTransaction, value is None until the transaction is flushed."""
+
+    def __init__(self, register=None, len_slices=None):
+        self.register = register
+        self.len_slices = len_slices
+        self.value = None
+
+
+class RegisterTransaction:
+    """Queue register reads and writes of a RegisterMaster and send them bank by bank.
+
+    usage:
+        with regs.transaction() as transaction:
+            transaction.write(regs.CTRL, 0x12)
+            status = transaction.read(regs.STATUS)
+            transaction.write(0x1234, 0x5)      # address including the bank, like RegisterMaster.writereg
+        print(status.value)
+
+    The accesses are sorted by bank, starting with the selected bank, the order of
+    the accesses of a bank is kept. Accesses of different banks must not depend on each other.
+    Consecutive reads (writes) of a bank are send with one call of read_burst(adrs)
+    (write_burst(adrs, dats)), if the protocol has it, otherwise with readreg (writereg).
+    """
+
+    def __init__(self, rm):
+        self._rm = rm
+        self._accesses = []  # (bank, adr, dat, register, RegisterRead or None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._accesses = []
+
+    def read(self, register, bank=None):
+        """Queue a read of a Register or an address, returns the RegisterRead for the value."""
+        bank, adr, len_slices = self._resolve(register, bank)
+        result = RegisterRead(register if isinstance(register, Register) else None, len_slices)
+        self._accesses.append((bank, adr, None, result.register, result))
+        return result
+
+    def write(self, register, dat, bank=None):
+        """Queue a write of dat to a Register or an address."""
+        bank, adr, _ = self._resolve(register, bank)
+        if isinstance(register, Register):
+            dat = register._validate(dat, len(register))
+        else:
+            register = None
+        self._accesses.append((bank, adr, dat, register, None))
+
+    def flush(self):
+        """Send the queued accesses."""
+        rm = self._rm
+        accesses, self._accesses = self._accesses, []
+        if not accesses:
+            return
+
+        round_trips = rm.get_round_trips()["total"]
+        selected = rm._get_selected_bank()
+
+        def bank_order(access):
+            bank = access[0]
+            if bank is None or bank == "":
+                return (0, 0)
+            return (1, 0) if bank == selected else (2, bank)
+
+        for (bank, is_read), run in groupby(sorted(accesses, key=bank_order), key=lambda access: (access[0], access[4] is not None)):
+            run = list(run)
+            adrs = [access[1] for access in run]
+            if is_read:
+                for access, value in zip(run, rm._readregs(adrs, bank)):
+                    result = access[4]
+                    if result.register is not None:
+                        value = result.register._set_read_value(value)
+                    elif result.len_slices is not None:
+                        value &= 2**result.len_slices - 1
+                    result.value = value
+            else:
+                rm._writeregs(adrs, [access[2] for access in run], bank)
+                for access in run:
+                    if access[3] is not None:
+                        access[3]._check_w_err()
+                        access[3]._cache = access[2]
+
+        if mylogger is not None:
+            round_trips = rm.get_round_trips()["total"] - round_trips
+            mylogger.log_message(LogLevel.Measure(), f"{rm.instName}.transaction: {len(accesses)} accesses in {round_trips} round trips")
+
+    def _resolve(self, register, bank):
+        if isinstance(register, Register):
+            return register._bank, register._get_addr(), None
+        if bank is not None:
+            return bank, register, None
+        return self._rm._split_addr(register)
+
+
 if __name__ == "__main__":
     filename = "your_registermaster.xls"
     regs = RegisterMaster(filename=filename)
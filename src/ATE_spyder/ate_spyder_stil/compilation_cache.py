@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Semi-ATE
+# Licensed under the terms of the GPLv2 License
+# (see LICENSE.txt for more details)
+
+"""
+Incremental STIL compilation.
+
+The compiled pattern of a STIL file only depends on the file, the files it
+includes, the signal to channel map and the compiler. The compiler output is
+cached with the hash of these inputs as key, patterns whose key is unchanged
+are taken from the cache instead of being compiled again.
+
+STIL files that include each other are compiled together, the remaining
+groups are independent and are compiled by parallel compiler processes, each
+into its own folder. The results are merged into the pattern output folder.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+import os.path as osp
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+CACHE_FOLDER = '.stil_cache'
+MANIFEST_FILE = '.stil_manifest.json'
+STIL_EXTENSIONS = ('stil', 'wav')
+
+INCLUDE_PATTERN = re.compile(rb'^\s*Include\s+"([^"]+)"', re.MULTILINE)
+
+
+@dataclass
+class PatternGroup:
+    files: List[str]
+    # cache key of each file
+    keys: Dict[str, str]
+    # the folder the group is compiled to, see StilCompilationCache.create_group_folder
+    output_folder: str = ''
+    returncode: Optional[int] = None
+
+
+@dataclass
+class CompilationPlan:
+    output_folder: str
+    # files with a cached compilation result
+    cached: Dict[str, str] = field(default_factory=dict)
+    groups: List[PatternGroup] = field(default_factory=list)
+
+
+def find_stil_files(pattern_folder: str) -> List[str]:
+    stil_files = []
+    for root, _, files in os.walk(pattern_folder):
+        for file in files:
+            _, ext = osp.splitext(file)
+            if ext[1:] in STIL_EXTENSIONS:
+                stil_files.append(osp.join(root, file))
+
+    return sorted(stil_files)
+
+
+def get_compiler_version(compiler: List[str]) -> str:
+    try:
+        result = subprocess.run(compiler + ['--version'], capture_output=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return ''
+
+    return result.stdout.decode('utf-8', errors='replace').strip()
+
+
+def get_compile_args(group: PatternGroup, sig_to_chan_path: Optional[str], port: Optional[int] = None) -> List[str]:
+    args = ['--port', str(port)] if port is not None else []
+    args += ['-c', '-i']
+    args += group.files
+    args += ['-m', sig_to_chan_path]
+    args += ['-o', group.output_folder]
+    return args
+
+
+class StilCompilationCache:
+    """
+    usage:
+        cache = StilCompilationCache(cache_folder)
+        plan = cache.plan(stil_files, sig_to_chan_path, output_folder, compiler_version)
+        cache.restore(plan)
+        for group in plan.groups:
+            cache.create_group_folder(group)
+            <compile group.files to group.output_folder, see get_compile_args>
+            if compiled successfully:
+                cache.store(plan, group)
+            cache.discard(group)
+    """
+
+    def __init__(self, cache_folder: str):
+        self.cache_folder = cache_folder
+        # groups may be stored from parallel threads, they share the manifest of the output folder
+        self._lock = threading.Lock()
+
+    def plan(self, stil_files: List[str], sig_to_chan_path: Optional[str], output_folder: str, compiler_version: str) -> CompilationPlan:
+        base_hash = hashlib.sha256(compiler_version.encode('utf-8'))
+        base_hash.update(_read(sig_to_chan_path) if sig_to_chan_path else b'')
+
+        includes = {stil_file: _get_includes(stil_file) for stil_file in stil_files}
+        plan = CompilationPlan(output_folder)
+        changed = {}
+        for stil_file in stil_files:
+            key_hash = base_hash.copy()
+            key_hash.update(osp.basename(stil_file).encode('utf-8'))
+            for source in [stil_file] + _get_included_files(stil_file, includes):
+                key_hash.update(_read(source))
+            key = key_hash.hexdigest()
+
+            if osp.exists(self._get_entry_folder(key)):
+                plan.cached[stil_file] = key
+            else:
+                changed[stil_file] = key
+
+        for files in _group_by_includes(list(changed), includes):
+            plan.groups.append(PatternGroup(files, {stil_file: changed[stil_file] for stil_file in files}))
+
+        return plan
+
+    def restore(self, plan: CompilationPlan):
+        """copies the cached compilation results of the plan to its output folder"""
+        os.makedirs(plan.output_folder, exist_ok=True)
+        manifest = _load_manifest(plan.output_folder)
+        for stil_file, key in plan.cached.items():
+            name = osp.basename(stil_file)
+            entry_folder = self._get_entry_folder(key)
+            if manifest.get(name) == key and all(osp.exists(osp.join(plan.output_folder, output)) for output in os.listdir(entry_folder)):
+                continue
+
+            _copy_files(entry_folder, plan.output_folder)
+            manifest[name] = key
+
+        _save_manifest(plan.output_folder, manifest)
+
+    def create_group_folder(self, group: PatternGroup):
+        os.makedirs(self.cache_folder, exist_ok=True)
+        group.output_folder = tempfile.mkdtemp(prefix='group_', dir=self.cache_folder)
+
+    def store(self, plan: CompilationPlan, group: PatternGroup):
+        """adds the results of the compiled group to the cache and merges them into the output folder of the plan"""
+        with self._lock:
+            self._store(plan, group)
+
+    def _store(self, plan: CompilationPlan, group: PatternGroup):
+        manifest = _load_manifest(plan.output_folder)
+        outputs = os.listdir(group.output_folder)
+        for stil_file, key in group.keys.items():
+            name = osp.basename(stil_file)
+            entry_folder = self._get_entry_folder(key)
+            temp_entry_folder = f'{entry_folder}.tmp'
+            shutil.rmtree(temp_entry_folder, ignore_errors=True)
+            os.makedirs(temp_entry_folder)
+            for output in outputs:
+                # the compiler names its outputs after the source file, e.g. <file>.stil.hdf5
+                if output.startswith(f'{name}.'):
+                    shutil.copy2(osp.join(group.output_folder, output), temp_entry_folder)
+            shutil.rmtree(entry_folder, ignore_errors=True)
+            os.replace(temp_entry_folder, entry_folder)
+
+            _copy_files(entry_folder, plan.output_folder)
+            manifest[name] = key
+
+        _save_manifest(plan.output_folder, manifest)
+
+    @staticmethod
+    def discard(group: PatternGroup):
+        if group.output_folder:
+            shutil.rmtree(group.output_folder, ignore_errors=True)
+
+    def _get_entry_folder(self, key: str) -> str:
+        return osp.join(self.cache_folder, key)
+
+
+def compile_patterns(compiler: List[str], stil_files: List[str], sig_to_chan_path: Optional[str], output_folder: str,
+                     cache_folder: str, port: Optional[int] = None, max_workers: Optional[int] = None) -> CompilationPlan:
+    """
+    Compiles the changed STIL files with parallel compiler processes, without a GUI (see STILContainer.compile_stil),
+    returns the executed plan with the return code of each compiled group
+    """
+    cache = StilCompilationCache(cache_folder)
+    plan = cache.plan(stil_files, sig_to_chan_path, output_folder, get_compiler_version(compiler))
+    cache.restore(plan)
+
+    def compile_group(group: PatternGroup):
+        cache.create_group_folder(group)
+        try:
+            result = subprocess.run(compiler + get_compile_args(group, sig_to_chan_path, port), capture_output=True)
+            group.returncode = result.returncode
+            if result.returncode == 0:
+                cache.store(plan, group)
+        finally:
+            cache.discard(group)
+
+    if plan.groups:
+        with ThreadPoolExecutor(max_workers or os.cpu_count()) as executor:
+            list(executor.map(compile_group, plan.groups))
+
+    return plan
+
+
+def _read(path: str) -> bytes:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return b''
+
+
+def _get_includes(stil_file: str) -> List[str]:
+    folder = osp.dirname(stil_file)
+    return [osp.normpath(osp.join(folder, include.decode('utf-8', errors='replace')))
+            for include in INCLUDE_PATTERN.findall(_read(stil_file))]
+
+
+def _get_included_files(stil_file: str, includes: Dict[str, List[str]]) -> List[str]:
+    # the includes of included files count as well, the files are visited once
+    included = []
+    pending = list(includes.get(stil_file, []))
+    while pending:
+        include = pending.pop(0)
+        if include in included or include == stil_file:
+            continue
+
+        included.append(include)
+        pending += includes[include] if include in includes else _get_includes(include)
+
+    return sorted(included)
+
+
+def _group_by_includes(stil_files: List[str], includes: Dict[str, List[str]]) -> List[List[str]]:
+    # files that include each other, directly or by a common include, end up in the same group
+    parents = {stil_file: stil_file for stil_file in stil_files}
+
+    def find(stil_file: str) -> str:
+        while parents[stil_file] != stil_file:
+            parents[stil_file] = parents[parents[stil_file]]
+            stil_file = parents[stil_file]
+        return stil_file
+
+    owners = {}
+    for stil_file in stil_files:
+        for source in [osp.normpath(stil_file)] + _get_included_files(stil_file, includes):
+            owner = owners.setdefault(source, stil_file)
+            parents[find(owner)] = find(stil_file)
+
+    groups = {}
+    for stil_file in stil_files:
+        groups.setdefault(find(stil_file), []).append(stil_file)
+
+    return list(groups.values())
+
+
+def _load_manifest(output_folder: str) -> Dict[str, str]:
+    try:
+        with open(osp.join(output_folder, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(output_folder: str, manifest: Dict[str, str]):
+    with open(osp.join(output_folder, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+
+def _copy_files(source_folder: str, destination_folder: str):
+    for name in os.listdir(source_folder):
+        shutil.copy2(osp.join(source_folder, name), osp.join(destination_folder, name))
@@ -9,7 +9,6 @@
 # Standard library imports
 import os
 import sys
-import os.path as osp
 from datetime import datetime
 import logging
 from typing import List, Optional, Union, Literal, Dict
@@ -35,6 +34,8 @@ from spyder.utils.programs import find_program
 
 # Local imports
 from ate_spyder_stil.api import STILActions
+from ate_spyder_stil.compilation_cache import (CACHE_FOLDER, CompilationPlan, PatternGroup, StilCompilationCache, find_stil_files,
+                                               get_compile_args, get_compiler_version)
 from ate_spyder.widgets.navigation import ProjectNavigation
 from spyder.widgets.onecolumntree import OneColumnTree, OneColumnTreeActions
 
@@ -245,8 +246,14 @@ class STILContainer(PluginMainWidget):
 
         # Attributes
         self.project_info: Optional[ProjectNavigation] = None
-        self.stil_process: Optional[QProcess] = None
+        self.stil_processes: List[QProcess] = []
         self.stil_process_running: bool = False
+        self.stil_cache: Optional[StilCompilationCache] = None
+        self.stil_plan: Optional[CompilationPlan] = None
+        self.stil_pending_groups: List[PatternGroup] = []
+        self.stil_sig_to_chan_path: Optional[str] = None
+        self.stil_failed: bool = False
+        self.compiler_versions: Dict[str, str] = {}
 
         self.zmq_context = zmq.Context.instance()
         self.stil_sock: zmq.Socket = self.zmq_context.socket(zmq.PULL)
@@ -305,7 +312,9 @@ class STILContainer(PluginMainWidget):
     def compile_stil(self, stil_files: Optional[List[str]] = None,
                      sig_to_chan_path: str = None):
         if self.stil_process_running:
-            self.stil_process.kill()
+            self.stil_pending_groups = []
+            for stil_process in self.stil_processes:
+                stil_process.kill()
             return
 
         if not self.project_info:
@@ -322,29 +331,13 @@ class STILContainer(PluginMainWidget):
             '-----------------', skip_time=True
         )
 
-        self.stil_process = QProcess(self)
-        self.stil_process.finished.connect(self.stil_process_finished)
-
         # TODO: Determine STIL file location adequately
         project_path = self.project_info.project_directory
         cwd = project_path
-        env = self.stil_process.processEnvironment()
-
-        for var in os.environ:
-            env.insert(var, os.environ[var])
-
-        self.stil_process.setProcessEnvironment(env)
-        self.stil_process.setWorkingDirectory(str(cwd))
 
         # Find STIL files recursively
         if stil_files is None:
-            stil_files = []
-            for root, _, files in os.walk(cwd.joinpath('pattern')):
-                for file in files:
-                    _, ext = osp.splitext(file)
-                    ext = ext[1:]
-                    if ext == 'stil' or ext == 'wav':
-                        stil_files.append(osp.join(root, file))
+            stil_files = find_stil_files(str(cwd.joinpath('pattern')))
 
         sscl_path = find_program('sscl')
         if sscl_path is None:
@@ -363,14 +356,30 @@ class STILContainer(PluginMainWidget):
                     message=err_msg, filename='Global', row=0, col=0))
             self.output_tree.append_file_msg(tree_msg)
 
-        output_folder = str(cwd.joinpath('pattern_output', self.project_info.active_hardware, self.project_info.active_base))
-        args = ['sscl', '--port', str(self.stil_port), '-c', '-i']
-        args += stil_files
-        args += ['-m', sig_to_chan_path]
-        args += ['-o', output_folder]
+        # Only the STIL files whose compilation inputs changed are compiled,
+        # the others are taken from the cache (see compilation_cache)
+        pattern_output = cwd.joinpath('pattern_output')
+        output_folder = str(pattern_output.joinpath(self.project_info.active_hardware, self.project_info.active_base))
+        if sscl_path not in self.compiler_versions:
+            self.compiler_versions[sscl_path] = get_compiler_version([sscl_path])
+
+        self.stil_cache = StilCompilationCache(str(pattern_output.joinpath(CACHE_FOLDER)))
+        self.stil_plan = self.stil_cache.plan(stil_files, sig_to_chan_path, output_folder, self.compiler_versions[sscl_path])
+        self.stil_cache.restore(self.stil_plan)
+
+        num_changed = sum(len(group.files) for group in self.stil_plan.groups)
+        self.publish_to_log(
+            f'{len(self.stil_plan.cached)} STIL files are up to date, '
+            f'{num_changed} are compiled in {len(self.stil_plan.groups)} '
+            'independent groups', level='INFO')
+        if not self.stil_plan.groups:
+            return
 
-        self.stil_process.setProcessChannelMode(QProcess.SeparateChannels)
-        self.stil_process.start(args[0], args[1:])
+        self.stil_sig_to_chan_path = sig_to_chan_path
+        self.stil_pending_groups = list(self.stil_plan.groups)
+        self.stil_failed = False
+        for _ in range(min(os.cpu_count() or 1, len(self.stil_pending_groups))):
+            self._start_stil_group(cwd)
         self.stil_process_running = True
 
         self.run_stil_action.setToolTip(
@@ -378,9 +387,45 @@ class STILContainer(PluginMainWidget):
         self.run_stil_action.setEnabled(True)
         self.run_stil_action.setIcon(self.create_icon('stop'))
 
+    def _start_stil_group(self, cwd):
+        group = self.stil_pending_groups.pop(0)
+        self.stil_cache.create_group_folder(group)
+
+        stil_process = QProcess(self)
+        stil_process.finished.connect(
+            lambda exit_code, exit_status: self.stil_group_finished(
+                stil_process, group, cwd, exit_code, exit_status))
+
+        env = stil_process.processEnvironment()
+        for var in os.environ:
+            env.insert(var, os.environ[var])
+
+        stil_process.setProcessEnvironment(env)
+        stil_process.setWorkingDirectory(str(cwd))
+        stil_process.setProcessChannelMode(QProcess.SeparateChannels)
+        stil_process.start('sscl', get_compile_args(group, self.stil_sig_to_chan_path, self.stil_port))
+        self.stil_processes.append(stil_process)
+
+    def stil_group_finished(self, stil_process, group, cwd, exit_code, exit_status):
+        self.stil_processes.remove(stil_process)
+        if exit_status == QProcess.NormalExit and exit_code == 0:
+            self.stil_cache.store(self.stil_plan, group)
+        else:
+            self.stil_failed = True
+            self.publish_to_log(
+                f'Compilation of {", ".join(group.files)} failed '
+                f'(exit code {exit_code})', level='ERROR')
+        self.stil_cache.discard(group)
+
+        if self.stil_pending_groups:
+            self._start_stil_group(cwd)
+        elif not self.stil_processes:
+            self.stil_process_finished(1 if self.stil_failed else 0, exit_status)
+
     def stil_process_finished(self, exit_code, exit_status):
         self.stil_process_running = False
-        self.stil_process = None
+        self.stil_processes = []
+        self.stil_pending_groups = []
         self.run_stil_action.setToolTip(
             'STIL files Compilation Status: Idle')
         self.run_stil_action.setEnabled(False)
@@ -0,0 +1,48 @@
+import pytest
+
+mqtt_client = pytest.importorskip('labml_adjutancy.misc.mqtt_client')
+
+
+class RecordingClient:
+    def __init__(self):
+        self.published = []
+
+    def publish_latest(self, topic, key, payload):
+        self.published.append(key)
+
+
+class ClassListInstrument(mqtt_client.mqtt_deviceattributes):
+    mqtt_list = ['voltage']
+
+    def __init__(self):
+        super().__init__()
+        object.__setattr__(self, 'instName', 'smu')
+        object.__setattr__(self, 'voltage', 0.0)
+        object.__setattr__(self, 'current', 0.0)
+
+
+@pytest.fixture
+def instrument():
+    instrument = ClassListInstrument()
+    object.__setattr__(instrument, '_mqttclient', RecordingClient())
+    object.__setattr__(instrument, 'mqtt_enable', True)
+    return instrument
+
+
+def test_class_level_mqtt_list_is_published(instrument):
+    assert instrument.mqtt_list == ['voltage']
+
+    instrument.voltage = 1.0
+    instrument.voltage
+    instrument.current = 2.0
+    instrument.current
+    assert instrument._mqttclient.published == [('smu', 'set', 'voltage'), ('smu', 'get', 'voltage')]
+
+
+def test_assigned_mqtt_list_replaces_class_level_list(instrument):
+    instrument.mqtt_list = ['current']
+
+    instrument.voltage = 1.0
+    instrument.current = 2.0
+    assert instrument._mqttclient.published == [('smu', 'set', 'current')]
+    assert ClassListInstrument._mqtt_list == ['voltage']
@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import pytest
+
+registermaster = pytest.importorskip('labml_adjutancy.register.registermaster')
+
+
+def database():
+    slices = [{'id': 0, 'posmin': 0, 'posmax': 3, 'bsn': 'low', 'res': '0', 'dir': 'RW', 'des': ''},
+              {'id': 1, 'posmin': 4, 'posmax': 7, 'bsn': 'high', 'res': '0', 'dir': 'RW', 'des': ''}]
+    registers = [{'blk': 'CTRL', 'adr': 1, 'cpuadr': 1, 'bank': 0x100, 'des': '', 'slices': slices, 'id': 0},
+                 {'blk': 'STATUS', 'adr': 2, 'cpuadr': 2, 'bank': '', 'des': '', 'slices': slices, 'id': 1}]
+    return [{'cells': {0: 'blk'}, 'types': {}, 'checks': {}, 'registers': registers, 'name': 'regs', 'id': 0}]
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    # the workbook is not parsed with xlrd, only its content is hashed for the cache
+    parses = []
+
+    def parse_workbook(self):
+        parses.append(self.filename)
+        self.database = database()
+
+    monkeypatch.setattr(registermaster.RegDB, '_parse_workbook', parse_workbook)
+    return parses
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'regs.xls'
+    path.write_bytes(b'workbook')
+    return path
+
+
+class RecordingProtocol:
+    def __init__(self):
+        self.calls = []
+        self.board = SimpleNamespace(error=False)
+
+    def writebase(self, bank):
+        self.calls.append(('writebase', bank))
+
+    def readreg(self, adr):
+        self.calls.append(('readreg', adr))
+        return 0
+
+    def writereg(self, adr, dat):
+        self.calls.append(('writereg', adr, dat))
+
+
+class Interface:
+    def __init__(self):
+        self.tin = RecordingProtocol()
+
+
+def init_registermaster(workbook, cache_folder=None, interface=None, force_bank=None):
+    regs = registermaster.RegisterMaster(filename=str(workbook), interface=interface, cache_folder=cache_folder)
+    if force_bank is not None:
+        regs.apply_configuration({'force bank': force_bank})
+        return regs
+    return regs.init()
+
+
+def test_parsed_registermaster_is_cached(tmp_path, parses, workbook):
+    cache_folder = str(tmp_path / 'cache')
+    init_registermaster(workbook, cache_folder)
+    regs = init_registermaster(workbook, cache_folder)
+
+    assert len(parses) == 1
+    assert list(regs.register) == ['CTRL', 'STATUS']
+    assert regs.CTRL._slices['high'] == {'lsb': 4, 'msb': 7, 'res': 0, 'dir': 'RW', 'desc': ''}
+
+
+def test_changed_workbook_is_parsed_again(tmp_path, parses, workbook):
+    cache_folder = str(tmp_path / 'cache')
+    init_registermaster(workbook, cache_folder)
+    workbook.write_bytes(b'changed workbook')
+    init_registermaster(workbook, cache_folder)
+
+    assert len(parses) == 2
+
+
+def test_without_cache_folder_workbook_is_parsed_at_every_init(parses, workbook):
+    init_registermaster(workbook)
+    init_registermaster(workbook)
+
+    assert len(parses) == 2
+
+
+def test_registers_are_created_on_first_access(parses, workbook):
+    regs = init_registermaster(workbook)
+    assert 'CTRL' not in vars(regs)
+    assert 'CTRL' in dir(regs)
+
+    ctrl = regs.CTRL
+    assert isinstance(ctrl, registermaster.Register)
+    assert vars(regs)['CTRL'] is ctrl
+    assert regs.CTRL is ctrl
+
+    assert 'STATUS' not in vars(regs)
+    assert regs.register['STATUS'] is regs.STATUS
+    with pytest.raises(AttributeError):
+        regs.UNKNOWN
+    with pytest.raises(KeyError):
+        regs.register['UNKNOWN']
+
+
+def test_selected_bank_is_kept_by_the_protocol(parses, workbook):
+    interface = Interface()
+    regs = init_registermaster(workbook, interface=interface, force_bank=False)
+    other_regs = init_registermaster(workbook, interface=interface, force_bank=False)
+
+    regs.writereg(1, 0x12, bank=0x100)
+    regs.readreg(2, bank=0x100)
+    other_regs.writereg(1, 0x34, bank=0x200)
+    regs.readreg(2, bank=0x100)
+
+    assert interface.tin.calls == [('writebase', 0x100), ('writereg', 1, 0x12), ('readreg', 2),
+                                   ('writebase', 0x200), ('writereg', 1, 0x34),
+                                   ('writebase', 0x100), ('readreg', 2)]
+    assert regs.get_round_trips()['writebase skipped'] == 1
+
+
+def test_bank_is_written_at_every_access_by_default(parses, workbook):
+    interface = Interface()
+    regs = init_registermaster(workbook, interface=interface)
+
+    regs.writereg(1, 0x12, bank=0x100)
+    regs.writereg(1, 0x34, bank=0x100)
+
+    assert [call for call in interface.tin.calls if call[0] == 'writebase'] == [('writebase', 0x100)] * 2
+    assert regs.get_round_trips()['writebase skipped'] == 0
+
+
+def test_empty_bank_selects_bank_0(parses, workbook):
+    interface = Interface()
+    regs = init_registermaster(workbook, interface=interface)
+    regs.CTRL.read()
+    regs.STATUS.read()
+
+    assert regs.STATUS._bank == 0
+    assert regs.mapping == {0x100: 8, 0: 8}
+    assert interface.tin.calls == [('writebase', 0x100), ('readreg', 1), ('writebase', 0), ('readreg', 2)]
@@ -0,0 +1,57 @@
+"""
+Stand-in for the STIL compiler (sscl), accepts the same arguments:
+
+    fake_sscl.py --version
+    fake_sscl.py [--port <port>] -c -i <stil files> -m <signal to channel map> -o <output folder>
+
+Writes <output folder>/<stil file name>.hdf5 with the content of the STIL file and the map.
+A STIL file that contains 'Syntax error' fails the compilation. Each compilation is
+appended to the file named by the environment variable FAKE_SSCL_LOG.
+"""
+import argparse
+import json
+import os
+import sys
+
+VERSION = 'sscl 0.0.0 (fake)'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--version', action='store_true')
+    parser.add_argument('--port')
+    parser.add_argument('-c', action='store_true')
+    parser.add_argument('-i', nargs='+', default=[])
+    parser.add_argument('-m')
+    parser.add_argument('-o')
+    args = parser.parse_args()
+
+    if args.version:
+        print(VERSION)
+        return 0
+
+    log = os.environ.get('FAKE_SSCL_LOG')
+    if log:
+        with open(log, 'a') as f:
+            f.write(json.dumps([os.path.basename(stil_file) for stil_file in args.i]) + '\n')
+
+    with open(args.m, 'rb') as f:
+        sig_to_chan = f.read()
+
+    os.makedirs(args.o, exist_ok=True)
+    for stil_file in args.i:
+        with open(stil_file, 'rb') as f:
+            source = f.read()
+
+        if b'Syntax error' in source:
+            print(f'{stil_file}: syntax error', file=sys.stderr)
+            return 1
+
+        with open(os.path.join(args.o, f'{os.path.basename(stil_file)}.hdf5'), 'wb') as f:
+            f.write(source + sig_to_chan)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
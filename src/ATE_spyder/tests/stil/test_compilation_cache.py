@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from ate_spyder_stil.compilation_cache import CACHE_FOLDER, StilCompilationCache, compile_patterns, find_stil_files
+
+FAKE_SSCL = [sys.executable, str(Path(__file__).parent.joinpath('fake_sscl.py'))]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_SSCL_LOG', str(tmp_path / 'sscl.log'))
+    pattern = tmp_path / 'pattern'
+    pattern.mkdir()
+    pattern.joinpath('a.stil').write_text('Pattern a { V { all = 0; } }\n')
+    pattern.joinpath('b.stil').write_text('Include "timing.stil";\nPattern b { V { all = 1; } }\n')
+    pattern.joinpath('timing.stil').write_text('Timing { }\n')
+    tmp_path.joinpath('sig2chan.yaml').write_text('a: 1\n')
+    return tmp_path
+
+
+def compile_project(project: Path):
+    return compile_patterns(FAKE_SSCL, find_stil_files(str(project / 'pattern')), str(project / 'sig2chan.yaml'),
+                            str(project / 'pattern_output' / 'HW0' / 'PR'), str(project / 'pattern_output' / CACHE_FOLDER))
+
+
+def compiler_runs(project: Path):
+    log = project / 'sscl.log'
+    if not log.exists():
+        return []
+
+    runs = [sorted(json.loads(line)) for line in log.read_text().splitlines()]
+    log.unlink()
+    return sorted(runs)
+
+
+def test_only_changed_patterns_are_compiled(project):
+    plan = compile_project(project)
+
+    # b includes timing, they are compiled together, a in parallel to them
+    assert compiler_runs(project) == [['a.stil'], ['b.stil', 'timing.stil']]
+    assert [group.returncode for group in plan.groups] == [0, 0]
+    output = project / 'pattern_output' / 'HW0' / 'PR'
+    assert sorted(name for name in os.listdir(output) if name.endswith('.hdf5')) == ['a.stil.hdf5', 'b.stil.hdf5', 'timing.stil.hdf5']
+
+    compile_project(project)
+    assert compiler_runs(project) == []
+
+    project.joinpath('pattern', 'a.stil').write_text('Pattern a { V { all = 1; } }\n')
+    compile_project(project)
+    assert compiler_runs(project) == [['a.stil']]
+    assert output.joinpath('a.stil.hdf5').read_text() == 'Pattern a { V { all = 1; } }\na: 1\n'
+
+    # a changed include invalidates the files that include it
+    project.joinpath('pattern', 'timing.stil').write_text('Timing { WaveformTable w { } }\n')
+    compile_project(project)
+    assert compiler_runs(project) == [['b.stil', 'timing.stil']]
+
+
+def test_changed_signal_to_channel_map_invalidates_all_patterns(project):
+    compile_project(project)
+    compiler_runs(project)
+
+    project.joinpath('sig2chan.yaml').write_text('a: 2\n')
+    compile_project(project)
+    assert compiler_runs(project) == [['a.stil'], ['b.stil', 'timing.stil']]
+
+
+def test_previous_versions_are_restored_from_the_cache(project):
+    output = project / 'pattern_output' / 'HW0' / 'PR'
+    compile_project(project)
+    project.joinpath('pattern', 'a.stil').write_text('Pattern a { V { all = 1; } }\n')
+    compile_project(project)
+    compiler_runs(project)
+
+    project.joinpath('pattern', 'a.stil').write_text('Pattern a { V { all = 0; } }\n')
+    output.joinpath('b.stil.hdf5').unlink()
+    plan = compile_project(project)
+
+    assert compiler_runs(project) == []
+    assert plan.groups == []
+    assert output.joinpath('a.stil.hdf5').read_text() == 'Pattern a { V { all = 0; } }\na: 1\n'
+    assert output.joinpath('b.stil.hdf5').exists()
+
+
+def test_failed_compilation_is_not_cached(project):
+    project.joinpath('pattern', 'a.stil').write_text('Syntax error\n')
+    plan = compile_project(project)
+
+    assert sorted(group.returncode for group in plan.groups) == [0, 1]
+    assert not (project / 'pattern_output' / 'HW0' / 'PR' / 'a.stil.hdf5').exists()
+
+    compiler_runs(project)
+    compile_project(project)
+    assert compiler_runs(project) == [['a.stil']]
+    # the compiler folders of the groups are removed
+    assert [name for name in os.listdir(project / 'pattern_output' / CACHE_FOLDER) if name.startswith('group_')] == []
+
+
+def test_groups_and_keys_of_the_plan(project):
+    cache = StilCompilationCache(str(project / 'cache'))
+    stil_files = find_stil_files(str(project / 'pattern'))
+    plan = cache.plan(stil_files, str(project / 'sig2chan.yaml'), str(project / 'output'), 'sscl 1')
+
+    assert plan.cached == {}
+    assert [group.files for group in plan.groups] == [[stil_files[0]], [stil_files[1], stil_files[2]]]
+    assert cache.plan(stil_files, str(project / 'sig2chan.yaml'), str(project / 'output'), 'sscl 2').groups[0].keys != plan.groups[0].keys
@@ -3,8 +3,16 @@ import asyncio
 import json
 
 from ate_apps_common.mqtt_router import MqttRouter
+from ate_apps_common.request_response import PendingRequests, add_request_id, new_request_id
 from ate_common.logger import LogLevel, Logger
 
+RESPONSE_TIMEOUT = 5.0
+
+
+def _set_response(response: asyncio.Future, data):
+    if not response.done():
+        response.set_result(data)
+
 
 class MqttConnection:
     def __init__(self, host: str, port: int, mqtt_client_id: str, logger: Logger):
@@ -18,10 +26,14 @@ class MqttConnection:
         self.host = host
         self.port = port
         self.router = MqttRouter()
-        self.response_event = asyncio.Event()
+        # response topics stay subscribed, requests in flight are resolved by their id
+        self._response_topics = set()
+        self._pending_requests = PendingRequests()
+        self._on_connect = None
 
     def init_mqtt_client_callbacks(self, on_connect, on_disconnect):
-        self.mqtt_client.on_connect = on_connect
+        self._on_connect = on_connect
+        self.mqtt_client.on_connect = self._on_connect_handler
         self.mqtt_client.on_disconnect = on_disconnect
         self.mqtt_client.on_message = self._on_message_handler
 
@@ -59,6 +71,9 @@ class MqttConnection:
     def register_route(self, route, callback):
         self.router.register_route(route, callback)
 
+    def register_filter(self, topic_filter, callback):
+        self.router.register_filter(topic_filter, callback)
+
     def subscribe_and_register(self, route, callback):
         self.subscribe(route)
         self.router.register_route(route, callback)
@@ -72,22 +87,34 @@ class MqttConnection:
     def _on_message_handler(self, client, userdata, msg):
         self.router.inject_message(msg.topic, msg.payload)
 
+    def _on_connect_handler(self, client, userdata, flags, rc):
+        # subscriptions don't survive a reconnect
+        for response_topic in self._response_topics:
+            self.subscribe(response_topic)
+
+        self._on_connect(client, userdata, flags, rc)
+
     @staticmethod
     def send_log(_):
         pass
 
     def response_received(self, topic, data):
-        self.response_data = data
-        self.response_event.set()
+        self._pending_requests.resolve(topic, self.decode_payload(data))
 
-    async def publish_with_response(self, topic_base, data):
+    async def publish_with_response(self, topic_base, data, timeout: float = RESPONSE_TIMEOUT):
+        # any number of requests may be in flight, each one waits for the response carrying its id
         response_topic = f"{topic_base}/response"
         request_topic = f"{topic_base}/request"
-        self.response_data = None
-        self.response_event.clear()
-        self.subscribe_and_register(response_topic, lambda topic, resp: self.response_received(topic, resp))
-        self.mqtt_client.publish(request_topic, data)
-        await asyncio.wait_for(self.response_event.wait(), 5.0)
-        self.unsubscribe(response_topic)
-        self.unregister_route(response_topic)
-        return self.response_data
+        if response_topic not in self._response_topics:
+            self._response_topics.add(response_topic)
+            self.subscribe_and_register(response_topic, self.response_received)
+
+        loop = asyncio.get_running_loop()
+        response = loop.create_future()
+        request_id = new_request_id()
+        self._pending_requests.add(request_id, response_topic, lambda data: loop.call_soon_threadsafe(_set_response, response, data))
+        try:
+            self.mqtt_client.publish(request_topic, add_request_id(data, request_id))
+            return await asyncio.wait_for(response, timeout)
+        finally:
+            self._pending_requests.remove(request_id)
@@ -1,22 +1,183 @@
 import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+TOPIC_CACHE_SIZE = 4096
+
+SINGLE_LEVEL_WILDCARD = '+'
+MULTI_LEVEL_WILDCARD = '#'
+
+
+class _TopicNode:
+    __slots__ = ['children', 'route']
 
-class MqttRouter:
     def __init__(self):
+        self.children: Dict[str, '_TopicNode'] = {}
+        self.route = None
+
+
+class _Route:
+    __slots__ = ['order', 'callbacks']
+
+    def __init__(self, order: int):
+        self.order = order
+        self.callbacks = []
+
+
+class MqttRouter:
+    '''
+        Dispatches the received messages to the callbacks of the routes
+        matching their topic.
+
+        Routes registered with register_route are regular expressions
+        searched in the topic. Routes registered with register_filter are
+        MQTT topic filters ('+' matches one topic level, '#' the remaining
+        levels) stored in a topic trie, a topic is matched in O(topic depth)
+        regardless of the number of filters. The callbacks resolved for a
+        topic are kept in an LRU cache that is cleared whenever the routes
+        change. Callbacks are called in the order their routes were
+        registered.
+    '''
+
+    def __init__(self, cache_size: int = TOPIC_CACHE_SIZE):
         self.routes = {}
+        self.filters = {}
+        self._root = _TopicNode()
+        self._patterns = {}
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._order = 0
+        self._lock = threading.Lock()
 
     def register_route(self, topic_regex: str, callback: callable):
-        if topic_regex not in self.routes:
-            self.routes[topic_regex] = []
-        self.routes[topic_regex].append(callback)
+        with self._lock:
+            route = self.routes.get(topic_regex)
+            if route is None:
+                route = self._add_route(topic_regex)
 
-    def unregister_route(self, topic_regex: str):
-        if topic_regex not in self.routes:
-            return
-        self.routes.pop(topic_regex)
+            route.callbacks.append(callback)
+            self._cache.clear()
+
+    def register_filter(self, topic_filter: str, callback: callable):
+        with self._lock:
+            route = self.filters.get(topic_filter)
+            if route is None:
+                route = self._add_filter(topic_filter)
+
+            route.callbacks.append(callback)
+            self._cache.clear()
+
+    def unregister_route(self, topic_regex: str, callback: callable = None):
+        with self._lock:
+            route = self.routes.get(topic_regex)
+            if route is None:
+                return
+
+            if self._remove_callback(route, callback):
+                self.routes.pop(topic_regex)
+                self._patterns.pop(topic_regex)
+
+            self._cache.clear()
+
+    def unregister_filter(self, topic_filter: str, callback: callable = None):
+        with self._lock:
+            route = self.filters.get(topic_filter)
+            if route is None:
+                return
+
+            if self._remove_callback(route, callback):
+                self._remove_filter(topic_filter)
+
+            self._cache.clear()
 
     def inject_message(self, topic, message):
-        for route in self.routes:
-            result = re.search(route, topic)
-            if result is not None:
-                for callback in self.routes[route]:
-                    callback(topic, message)
+        for callback in self.get_callbacks(topic):
+            callback(topic, message)
+
+    def get_callbacks(self, topic: str) -> List[callable]:
+        with self._lock:
+            callbacks = self._cache.get(topic)
+            if callbacks is not None:
+                self._cache.move_to_end(topic)
+                return callbacks
+
+            callbacks = self._resolve_callbacks(topic)
+            self._cache[topic] = callbacks
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+            return callbacks
+
+    @staticmethod
+    def _remove_callback(route: _Route, callback: callable) -> bool:
+        # returns True if the route is left without callbacks
+        if callback is not None and callback in route.callbacks:
+            route.callbacks.remove(callback)
+        return callback is None or not route.callbacks
+
+    def _new_route(self) -> _Route:
+        route = _Route(self._order)
+        self._order += 1
+        return route
+
+    def _add_route(self, topic_regex: str) -> _Route:
+        pattern = re.compile(topic_regex)
+        route = self._new_route()
+        self.routes[topic_regex] = route
+        self._patterns[topic_regex] = pattern
+        return route
+
+    def _add_filter(self, topic_filter: str) -> _Route:
+        route = self._new_route()
+        self.filters[topic_filter] = route
+
+        node = self._root
+        for level in topic_filter.split('/'):
+            node = node.children.setdefault(level, _TopicNode())
+        node.route = route
+        return route
+
+    def _remove_filter(self, topic_filter: str):
+        self.filters.pop(topic_filter)
+
+        # the nodes left without route and children are removed bottom up
+        path = [self._root]
+        levels = topic_filter.split('/')
+        for level in levels:
+            path.append(path[-1].children[level])
+        path[-1].route = None
+
+        for level, node, parent in zip(reversed(levels), reversed(path[1:]), reversed(path[:-1])):
+            if node.route is not None or node.children:
+                break
+            del parent.children[level]
+
+    def _resolve_callbacks(self, topic: str) -> List[callable]:
+        routes = []
+        self._match(self._root, topic.split('/'), 0, routes)
+        routes.extend(self.routes[name] for name, pattern in self._patterns.items() if pattern.search(topic))
+
+        callbacks = []
+        for route in sorted(routes, key=lambda route: route.order):
+            callbacks.extend(route.callbacks)
+        return callbacks
+
+    def _match(self, node: _TopicNode, levels: List[str], index: int, routes: list):
+        # '#' also matches the parent level ('a/#' matches 'a')
+        multi_level = node.children.get(MULTI_LEVEL_WILDCARD)
+        if multi_level is not None and multi_level.route is not None:
+            routes.append(multi_level.route)
+
+        if index == len(levels):
+            if node.route is not None:
+                routes.append(node.route)
+            return
+
+        child = node.children.get(levels[index])
+        if child is not None:
+            self._match(child, levels, index + 1, routes)
+
+        single_level = node.children.get(SINGLE_LEVEL_WILDCARD)
+        if single_level is not None:
+            self._match(single_level, levels, index + 1, routes)
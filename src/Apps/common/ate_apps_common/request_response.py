@@ -0,0 +1,105 @@
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# correlation id of an io-control request, the response carries the id of
+# its request or the list of the ids it answers (the master answers the
+# synchronized request of several sites with one response)
+REQUEST_ID = 'request_id'
+REQUEST_IDS = 'request_ids'
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def add_request_id(payload, request_id: str):
+    # io-control payloads are sent as json strings
+    if isinstance(payload, (str, bytes)):
+        return json.dumps(dict(json.loads(payload), **{REQUEST_ID: request_id}))
+
+    return dict(payload, **{REQUEST_ID: request_id})
+
+
+def without_request_id(request: dict) -> dict:
+    return {key: value for key, value in request.items() if key not in (REQUEST_ID, REQUEST_IDS)}
+
+
+def get_request_ids(response) -> Optional[list]:
+    if not isinstance(response, dict):
+        return None
+    if REQUEST_IDS in response:
+        return list(response[REQUEST_IDS])
+    if REQUEST_ID in response:
+        return [response[REQUEST_ID]]
+    return None
+
+
+class LatencyStatistics:
+    '''
+        Counts the requests of a peripheral and their round trip times.
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.timeouts = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, latency: float):
+        self.count += 1
+        self.total += latency
+        self.min = latency if self.min is None else min(self.min, latency)
+        self.max = latency if self.max is None else max(self.max, latency)
+
+    def add_timeout(self):
+        self.timeouts += 1
+
+    def to_dict(self) -> dict:
+        return {'count': self.count,
+                'timeouts': self.timeouts,
+                'min_ms': self.min * 1000 if self.min is not None else None,
+                'mean_ms': self.total / self.count * 1000 if self.count else None,
+                'max_ms': self.max * 1000 if self.max is not None else None}
+
+
+class PendingRequests:
+    '''
+        Requests waiting for their response, keyed by their correlation id.
+
+        A response is passed to the callback of the requests whose ids it
+        carries, responses of other clients are ignored. Responses without
+        an id (from peripherals that don't send the id back) go to the
+        oldest request waiting on their topic.
+    '''
+
+    def __init__(self):
+        self._requests: Dict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def add(self, request_id: str, response_topic: str, callback: Callable[[object], None]):
+        with self._lock:
+            self._requests[request_id] = (response_topic, callback)
+
+    def remove(self, request_id: str):
+        with self._lock:
+            self._requests.pop(request_id, None)
+
+    def resolve(self, response_topic: str, response) -> int:
+        request_ids = get_request_ids(response)
+        with self._lock:
+            if request_ids is None:
+                request_ids = [next((request_id for request_id, (topic, _) in self._requests.items() if topic == response_topic), None)]
+
+            callbacks = [self._requests.pop(request_id)[1] for request_id in request_ids if request_id in self._requests]
+
+        for callback in callbacks:
+            callback(response)
+
+        return len(callbacks)
@@ -4,13 +4,11 @@ import itertools
 import os
 
 from Semi_ATE.STDF import MIR, STDR
-from ate_apps_common.stdf_utils import (generate_FTR, generate_PIR,
-                                        generate_PRR, generate_PTR, generate_SDR,
-                                        generate_TSR, generate_HBR,
+from ate_apps_common.stdf_encoder import encode_record, encode_records, encode_TSR
+from ate_apps_common.stdf_utils import (generate_SDR, generate_HBR,
                                         generate_SBR, generate_MRR,
                                         generate_MIR, generate_PCR,
-                                        generate_FAR, generate_MPR,
-                                        generate_FTR_with_test_flag)
+                                        generate_FAR, PtrDefaults)
 
 
 class StdfPartTestContext:
@@ -20,11 +18,27 @@ class StdfPartTestContext:
 
 STDF_PATH = 'temp_final_stdf_file_on_unload.stdf'
 
+# buffered: one file handle per lot, records are collected in memory and
+#           written on PRR or when the buffer size/flush interval is exceeded,
+#           the file is fsynced once when the footer records are written
+# paranoid: the file is opened, appended and closed for every record batch
+WRITE_MODE_BUFFERED = 'buffered'
+WRITE_MODE_PARANOID = 'paranoid'
+WRITE_MODES = (WRITE_MODE_BUFFERED, WRITE_MODE_PARANOID)
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+
 
 class StdfTestResultAggregator:
     completed_part_records: List[List[STDR]]
 
-    def __init__(self, node_name: str, sites: list, lot_id: str = '', job_name: str = '' , file_path: str = ''):
+    def __init__(self, node_name: str, sites: list, lot_id: str = '', job_name: str = '' , file_path: str = '',
+                 write_mode: str = WRITE_MODE_BUFFERED, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, ptr_compression: bool = False):
+        if write_mode not in WRITE_MODES:
+            raise ValueError(f'unsupported stdf write mode: {write_mode}, expected one of {WRITE_MODES}')
+
         self.version = 'V4'
         self.endian = '<'
         self.completed_part_records = []
@@ -46,6 +60,17 @@ class StdfTestResultAggregator:
         self.package_id = ''
         self.sublot_id = ''
 
+        self.write_mode = write_mode
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._file = None
+        self._buffer = bytearray()
+        self._last_flush = time.monotonic()
+
+        # only the first PTR of a test per site is written with the static fields (limits, units, ...)
+        self.ptr_compression = ptr_compression
+        self._ptr_defaults = PtrDefaults()
+
         self._clean_up()
 
     def _clean_up(self):
@@ -63,8 +88,40 @@ class StdfTestResultAggregator:
             f.write(self.serialize_records(full_file_records))
 
     def write_records_to_file(self, record):
-        with open(self.path, "ab") as f:
-            f.write(self.serialize_records(record))
+        self.write_bytes_to_file(self.serialize_records(record), any(rec.id == 'PRR' for rec in record))
+
+    def write_bytes_to_file(self, data: bytes, part_completed: bool = False):
+        if self.write_mode == WRITE_MODE_PARANOID:
+            with open(self.path, "ab") as f:
+                f.write(data)
+            return
+
+        self._buffer += data
+        if part_completed \
+           or len(self._buffer) >= self.buffer_size \
+           or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        if self._file is None:
+            self._file = open(self.path, "ab")
+
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self._file is None:
+            return
+
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
 
     def write_header_records(self):
         self.set_first_part_test_time()
@@ -72,6 +129,7 @@ class StdfTestResultAggregator:
 
     def write_footer_records(self):
         self.write_records_to_file(self._stdf_footer_records())
+        self.close()
 
     def _stdf_header_records(self) -> list:
         return [generate_FAR(2, 4),
@@ -105,81 +163,35 @@ class StdfTestResultAggregator:
         self.start_timestamp = int(time.time())
 
     def append_test_results(self, test_results):
-        for test_result in test_results:
-            rec = {
-                'PIR': lambda test_result: self._generate_PIR(test_result),
-                'PTR': lambda test_result: self._generate_PTR(test_result),
-                'PRR': lambda test_result: self._generate_PRR(test_result),
-                'FTR': lambda test_result: self._generate_FTR(test_result),
-                'MPR': lambda test_result: self._generate_MPR(test_result),
-            }[test_result['type']](test_result)
+        if self.ptr_compression:
+            test_results = [self._ptr_defaults.compact(test_result) if test_result['type'] == 'PTR' else test_result
+                            for test_result in test_results]
 
-            self.write_records_to_file([rec])
-
-    @staticmethod
-    def _generate_PRR(prr_record: dict):
-        part_fix = [0] * 8
-        rec = generate_PRR(prr_record['HEAD_NUM'], prr_record['SITE_NUM'], False, prr_record['NUM_TEST'],
-                           prr_record['HARD_BIN'], prr_record['SOFT_BIN'], prr_record['X_COORD'],
-                           prr_record['Y_COORD'], prr_record['TEST_T'], prr_record['PART_ID'],
-                           prr_record['PART_TXT'], part_fix)
+        if self.write_mode == WRITE_MODE_PARANOID:
+            for test_result in test_results:
+                self.write_bytes_to_file(encode_record(test_result))
+            return
 
-        # TODO: there should not be a is_pass in generate_prr function
-        rec.set_value('PART_FLG', prr_record['PART_FLG'])
-        return rec
+        self.write_bytes_to_file(encode_records(test_results),
+                                 any(test_result['type'] == 'PRR' for test_result in test_results))
 
-    @staticmethod
-    def _generate_PTR(ptr_record: dict) -> dict:
-        return generate_PTR(
-            test_num=ptr_record['TEST_NUM'],
-            head_num=ptr_record['HEAD_NUM'],
-            site_num=ptr_record['SITE_NUM'],
-            is_pass=ptr_record['TEST_FLG'] == 0,
-            param_flag=ptr_record['PARM_FLG'],
-            measurement=ptr_record['RESULT'],
-            test_txt=ptr_record['TEST_TXT'],
-            alarm_id=ptr_record['ALARM_ID'],
-            l_limit=ptr_record['LO_LIMIT'],
-            u_limit=ptr_record['HI_LIMIT'],
-            unit=ptr_record['UNITS'],
-            fmt=ptr_record['C_RESFMT'],
-            exponent=ptr_record['RES_SCAL'],
-            ls_limit=ptr_record['LO_SPEC'],
-            us_limit=ptr_record['HI_SPEC'],
-            opt_flag=ptr_record['OPT_FLAG'])
+    def append_stdf_part(self, data: bytes, test_results: list):
+        # data are the encoded test_results as published by the test app, they are written as is
+        if self.ptr_compression:
+            # learn the static fields of the complete PTRs, so the compact ones can be restored
+            for test_result in test_results:
+                if test_result['type'] == 'PTR':
+                    self._ptr_defaults.compact(test_result)
 
-    @staticmethod
-    def _generate_FTR(ftr_record: dict) -> dict:
-        return generate_FTR_with_test_flag(ftr_record['TEST_NUM'], ftr_record['HEAD_NUM'], ftr_record['SITE_NUM'], ftr_record['TEST_FLG'])
+        self.write_bytes_to_file(data, True)
 
-    @staticmethod
-    def _generate_MPR(mpr_record: dict) -> dict:
-        return generate_MPR(
-            test_num=mpr_record['TEST_NUM'],
-            head_num=mpr_record['HEAD_NUM'],
-            site_num=mpr_record['SITE_NUM'],
-            is_pass=mpr_record['TEST_FLG'] == 0,
-            param_flag=mpr_record['PARM_FLG'],
-            measurements=mpr_record['RTN_RSLT'],
-            test_txt=mpr_record['TEST_TXT'],
-            alarm_id=mpr_record['ALARM_ID'],
-            l_limit=mpr_record['LO_LIMIT'],
-            u_limit=mpr_record['HI_LIMIT'],
-            unit=mpr_record['UNITS'],
-            fmt=mpr_record['C_RESFMT'],
-            exponent=mpr_record['RES_SCAL'],
-            ls_limit=mpr_record['LO_SPEC'],
-            us_limit=mpr_record['HI_SPEC'],
-            opt_flag=mpr_record['OPT_FLAG'])
-
-    @staticmethod
-    def _generate_PIR(pir_record: dict) -> dict:
-        return generate_PIR(pir_record['HEAD_NUM'], pir_record['SITE_NUM'])
+    def restore_ptr_defaults(self, test_results):
+        for test_result in test_results:
+            if test_result['type'] == 'PTR':
+                self._ptr_defaults.restore(test_result)
 
     def append_test_summary(self, tests_summary: list):
-        for test_summary in tests_summary:
-            rec = self._generate_TSR(test_summary)
-            self.write_records_to_file([rec])
+        self.write_bytes_to_file(b''.join(encode_TSR(test_summary) for test_summary in tests_summary))
 
     def append_soft_and_hard_bin_record(self, bin_informations: dict):
         self.write_bin_info(bin_informations,
@@ -222,15 +234,6 @@ class StdfTestResultAggregator:
 
         self.write_records_to_file(pcr_recs)
 
-    @staticmethod
-    def _generate_TSR(test_summary: dict) -> dict:
-        return generate_TSR(test_summary['HEAD_NUM'], test_summary['SITE_NUM'], test_summary['TEST_TYP'],
-                            test_summary['TEST_NUM'], test_summary['EXEC_CNT'], test_summary['FAIL_CNT'],
-                            test_summary['ALRM_CNT'], test_summary['TEST_NAM'], test_summary['SEQ_NAME'],
-                            test_summary['TEST_LBL'], test_summary['OPT_FLAG'], test_summary['TEST_TIM'],
-                            test_summary['TEST_MIN'], test_summary['TEST_MAX'], test_summary['TST_SUMS'],
-                            test_summary['TST_SQRS'])
-
     @staticmethod
     def serialize_records(records) -> bytes:
         return bytes(itertools.chain.from_iterable(rec.__repr__() for rec in records))
@@ -0,0 +1,335 @@
+"""
+Direct STDF V4 (little endian) encoder for the record dicts exchanged between
+test app and master (see the generate_*_dict functions in stdf_utils).
+
+The records are packed with precompiled struct layouts instead of rebuilding
+Semi_ATE.STDF record objects field by field. The produced bytes are identical
+to the ones the aggregator wrote by building the record objects with the
+generate_* functions from stdf_utils and serializing them with __repr__.
+
+decode_records is the inverse for the part records (PIR, PTR, MPR, FTR, PRR),
+it is used by the master to read the stdf parts test apps publish when the
+'stdf' result transport is negotiated.
+"""
+import struct
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from ate_apps_common.stdf_utils import is_compact_PTR_dict
+
+HEADER = struct.Struct('<HBB')                      # REC_LEN, REC_TYP, REC_SUB
+
+PIR_BODY = struct.Struct('<BB')                     # HEAD_NUM, SITE_NUM
+PRR_FIXED = struct.Struct('<BBBHHHhhI')             # HEAD_NUM .. TEST_T
+PTR_FIXED = struct.Struct('<IBBBBf')                # TEST_NUM .. RESULT
+PTR_OPT = struct.Struct('<Bbbbff')                  # OPT_FLAG .. HI_LIMIT
+SPEC = struct.Struct('<ff')                         # LO_SPEC, HI_SPEC
+MPR_FIXED = struct.Struct('<IBBBBHH')               # TEST_NUM .. RSLT_CNT
+MPR_OPT = struct.Struct('<Bbbbffff')                # OPT_FLAG .. INCR_IN
+FTR_FIXED = struct.Struct('<IBBBB')                 # TEST_NUM .. OPT_FLAG
+TSR_FIXED = struct.Struct('<BBcIIII')               # HEAD_NUM .. ALRM_CNT
+TSR_OPT = struct.Struct('<Bfffff')                  # OPT_FLAG .. TST_SQRS
+
+PIR_TYPE = (5, 10)
+PRR_TYPE = (5, 20)
+PTR_TYPE = (15, 10)
+MPR_TYPE = (15, 15)
+FTR_TYPE = (15, 20)
+TSR_TYPE = (10, 30)
+
+EMPTY_Cn = b'\x00'
+
+# PART_FIX is always written as 8 cleared bytes
+PRR_PART_FIX = bytes([8]) + bytes(8)
+
+# MPR: RTN_STAT (empty, RTN_ICNT is 0) is located between RSLT_CNT and RTN_RSLT,
+#      START_IN/INCR_IN are not set and written with their missing values,
+#      RTN_INDX (empty) and UNITS_IN ('') follow the limits
+MPR_OPT_FLAG = 2
+MPR_START_IN = 0.0
+MPR_INCR_IN = -1.0
+MPR_UNITS_IN = EMPTY_Cn
+
+# FTR: everything after OPT_FLAG is written with the missing values:
+#      CYCL_CNT .. VECT_OFF, RTN_ICNT = PGM_ICNT = 0, FAIL_PIN = [],
+#      VECT_NAM .. RSLT_TXT = '', PATG_NUM = 0xFF, SPIN_MAP = []
+FTR_OPT_FLAG = 255
+FTR_TAIL = struct.pack('<IIIIiihHHH', 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) + bytes(7) + struct.pack('<BH', 0xFF, 0)
+
+FAILED_TEST_FLAG = 0b10000000
+
+# result transport between test app and master, negotiated with the next command:
+# json: list of record dicts on the testresult topic
+# stdf: the encoded part records on the stdf topic
+RESULT_TRANSPORT_JSON = 'json'
+RESULT_TRANSPORT_STDF = 'stdf'
+RESULT_TRANSPORTS = (RESULT_TRANSPORT_JSON, RESULT_TRANSPORT_STDF)
+
+
+def _sanitize(value: str) -> str:
+    # same transformation as Semi_ATE.STDF applies to C*n fields: STDF is ASCII only
+    if not value.isascii():
+        value = ''.join(c if ord(c) <= 127 else ' ' for c in value)
+    return value.strip()[:255]
+
+
+def encode_Cn(value: str) -> bytes:
+    value = _sanitize(value).encode()
+    return bytes((len(value),)) + value
+
+
+def _format(fmt: str) -> bytes:
+    return encode_Cn(f'%7{fmt}' if '%7' not in fmt else fmt)
+
+
+def _units(unit: str) -> bytes:
+    return encode_Cn(' ' if '˽' == unit else unit)
+
+
+def _test_flag(test_flag: int) -> int:
+    return 0b00000000 if test_flag == 0 else FAILED_TEST_FLAG
+
+
+def _floats(values) -> bytes:
+    # numpy arrays (see MultiMeasurement) are packed from their buffer,
+    # without converting every value to a python float
+    astype = getattr(values, 'astype', None)
+    if astype is not None:
+        return astype('<f4').tobytes()
+
+    return struct.pack(f'<{len(values)}f', *values)
+
+
+def _record(rec_type: tuple, body: bytes) -> bytes:
+    return HEADER.pack(len(body), *rec_type) + body
+
+
+def encode_PIR(pir_record: dict) -> bytes:
+    return _record(PIR_TYPE, PIR_BODY.pack(pir_record['HEAD_NUM'], pir_record['SITE_NUM']))
+
+
+def encode_PRR(prr_record: dict) -> bytes:
+    soft_bin = prr_record['SOFT_BIN']
+    # keep in sync with generate_PRR: force sbin to 1 if it was not set by the user
+    if soft_bin < 0:
+        soft_bin = 1
+
+    body = b''.join((PRR_FIXED.pack(prr_record['HEAD_NUM'], prr_record['SITE_NUM'], prr_record['PART_FLG'],
+                                    prr_record['NUM_TEST'], prr_record['HARD_BIN'], soft_bin,
+                                    prr_record['X_COORD'], prr_record['Y_COORD'], prr_record['TEST_T']),
+                     encode_Cn(prr_record['PART_ID']),
+                     encode_Cn(prr_record['PART_TXT']),
+                     PRR_PART_FIX))
+    return _record(PRR_TYPE, body)
+
+
+def encode_compact_PTR(ptr_record: dict) -> bytes:
+    # the static fields (TEST_TXT and everything after OPT_FLAG) are omitted,
+    # readers take them from the first PTR of the test
+    result = ptr_record['RESULT']
+    body = b''.join((PTR_FIXED.pack(ptr_record['TEST_NUM'], ptr_record['HEAD_NUM'], ptr_record['SITE_NUM'],
+                                    _test_flag(ptr_record['TEST_FLG']), ptr_record['PARM_FLG'],
+                                    result if result is not None else 0.0),
+                     EMPTY_Cn,
+                     encode_Cn(ptr_record['ALARM_ID']),
+                     bytes((ptr_record['OPT_FLAG'],))))
+    return _record(PTR_TYPE, body)
+
+
+def encode_PTR(ptr_record: dict) -> bytes:
+    if is_compact_PTR_dict(ptr_record):
+        return encode_compact_PTR(ptr_record)
+
+    result = ptr_record['RESULT']
+    exponent = ptr_record['RES_SCAL']
+    fmt = _format(ptr_record['C_RESFMT'])
+
+    body = b''.join((PTR_FIXED.pack(ptr_record['TEST_NUM'], ptr_record['HEAD_NUM'], ptr_record['SITE_NUM'],
+                                    _test_flag(ptr_record['TEST_FLG']), ptr_record['PARM_FLG'],
+                                    result if result is not None else ptr_record['LO_SPEC']),
+                     encode_Cn(ptr_record['TEST_TXT']),
+                     encode_Cn(ptr_record['ALARM_ID']),
+                     PTR_OPT.pack(ptr_record['OPT_FLAG'], exponent, exponent, exponent,
+                                  ptr_record['LO_LIMIT'], ptr_record['HI_LIMIT']),
+                     _units(ptr_record['UNITS']),
+                     fmt, fmt, fmt,
+                     SPEC.pack(ptr_record['LO_SPEC'], ptr_record['HI_SPEC'])))
+    return _record(PTR_TYPE, body)
+
+
+def encode_MPR(mpr_record: dict) -> bytes:
+    results = mpr_record['RTN_RSLT']
+    exponent = mpr_record['RES_SCAL']
+    fmt = _format(mpr_record['C_RESFMT'])
+
+    body = b''.join((MPR_FIXED.pack(mpr_record['TEST_NUM'], mpr_record['HEAD_NUM'], mpr_record['SITE_NUM'],
+                                    _test_flag(mpr_record['TEST_FLG']), mpr_record['PARM_FLG'],
+                                    0, len(results)),
+                     _floats(results),
+                     encode_Cn(mpr_record['TEST_TXT']),
+                     encode_Cn(mpr_record['ALARM_ID']),
+                     MPR_OPT.pack(MPR_OPT_FLAG, exponent, exponent, exponent,
+                                  mpr_record['LO_LIMIT'], mpr_record['HI_LIMIT'],
+                                  MPR_START_IN, MPR_INCR_IN),
+                     _units(mpr_record['UNITS']),
+                     MPR_UNITS_IN,
+                     fmt, fmt, fmt,
+                     SPEC.pack(mpr_record['LO_SPEC'], mpr_record['HI_SPEC'])))
+    return _record(MPR_TYPE, body)
+
+
+def encode_FTR(ftr_record: dict) -> bytes:
+    body = FTR_FIXED.pack(ftr_record['TEST_NUM'], ftr_record['HEAD_NUM'], ftr_record['SITE_NUM'],
+                          ftr_record['TEST_FLG'], FTR_OPT_FLAG) + FTR_TAIL
+    return _record(FTR_TYPE, body)
+
+
+def encode_TSR(tsr_record: dict) -> bytes:
+    test_typ = tsr_record['TEST_TYP'].strip()[:1].ljust(1, ' ')
+
+    body = b''.join((TSR_FIXED.pack(tsr_record['HEAD_NUM'], tsr_record['SITE_NUM'], test_typ.encode(),
+                                    tsr_record['TEST_NUM'], tsr_record['EXEC_CNT'], tsr_record['FAIL_CNT'],
+                                    tsr_record['ALRM_CNT']),
+                     encode_Cn(tsr_record['TEST_NAM']),
+                     encode_Cn(tsr_record['SEQ_NAME']),
+                     encode_Cn(tsr_record['TEST_LBL']),
+                     TSR_OPT.pack(tsr_record['OPT_FLAG'], tsr_record['TEST_TIM'], tsr_record['TEST_MIN'],
+                                  tsr_record['TEST_MAX'], tsr_record['TST_SUMS'], tsr_record['TST_SQRS'])))
+    return _record(TSR_TYPE, body)
+
+
+ENCODERS: Dict[str, Callable[[dict], bytes]] = {
+    'PIR': encode_PIR,
+    'PRR': encode_PRR,
+    'PTR': encode_PTR,
+    'MPR': encode_MPR,
+    'FTR': encode_FTR,
+    'TSR': encode_TSR,
+}
+
+
+def encode_record(record: dict) -> bytes:
+    return ENCODERS[record['type']](record)
+
+
+def encode_records(records: Iterable[dict]) -> bytes:
+    return b''.join(ENCODERS[record['type']](record) for record in records)
+
+
+def decode_Cn(data: bytes, offset: int) -> Tuple[str, int]:
+    end = offset + 1 + data[offset]
+    return data[offset + 1:end].decode('ascii'), end
+
+
+def decode_PIR(data: bytes, offset: int, end: int) -> dict:
+    head_num, site_num = PIR_BODY.unpack_from(data, offset)
+    return {'type': 'PIR', 'REC_LEN': None, 'REC_TYP': PIR_TYPE[0], 'REC_SUB': PIR_TYPE[1],
+            'HEAD_NUM': head_num, 'SITE_NUM': site_num, 'rec_id': 'PIR'}
+
+
+def decode_PRR(data: bytes, offset: int, end: int) -> dict:
+    head_num, site_num, part_flg, num_test, hard_bin, soft_bin, x_coord, y_coord, test_t = PRR_FIXED.unpack_from(data, offset)
+    part_id, offset = decode_Cn(data, offset + PRR_FIXED.size)
+    part_txt, offset = decode_Cn(data, offset)
+    part_fix = int.from_bytes(data[offset + 1:offset + 1 + data[offset]], 'little')
+    return {'type': 'PRR', 'REC_LEN': None, 'REC_TYP': PRR_TYPE[0], 'REC_SUB': PRR_TYPE[1],
+            'HEAD_NUM': head_num, 'SITE_NUM': site_num, 'PART_FLG': part_flg, 'NUM_TEST': num_test,
+            'HARD_BIN': hard_bin, 'SOFT_BIN': soft_bin, 'X_COORD': x_coord, 'Y_COORD': y_coord,
+            'TEST_T': test_t, 'PART_ID': part_id, 'PART_TXT': part_txt, 'PART_FIX': part_fix, 'rec_id': 'PRR'}
+
+
+def decode_PTR(data: bytes, offset: int, end: int) -> dict:
+    test_num, head_num, site_num, test_flg, parm_flg, result = PTR_FIXED.unpack_from(data, offset)
+    test_txt, offset = decode_Cn(data, offset + PTR_FIXED.size)
+    alarm_id, offset = decode_Cn(data, offset)
+    record = {'type': 'PTR', 'REC_LEN': None, 'REC_TYP': PTR_TYPE[0], 'REC_SUB': PTR_TYPE[1],
+              'TEST_NUM': test_num, 'HEAD_NUM': head_num, 'SITE_NUM': site_num, 'TEST_FLG': test_flg,
+              'PARM_FLG': parm_flg, 'RESULT': result, 'TEST_TXT': test_txt, 'ALARM_ID': alarm_id,
+              'OPT_FLAG': data[offset]}
+
+    # compact PTR: the static fields are taken from the first PTR of the test
+    if offset + 1 == end:
+        del record['TEST_TXT']
+        record['rec_id'] = 'PTR'
+        return record
+
+    _, res_scal, llm_scal, hlm_scal, lo_limit, hi_limit = PTR_OPT.unpack_from(data, offset)
+    units, offset = decode_Cn(data, offset + PTR_OPT.size)
+    c_resfmt, offset = decode_Cn(data, offset)
+    c_llmfmt, offset = decode_Cn(data, offset)
+    c_hlmfmt, offset = decode_Cn(data, offset)
+    lo_spec, hi_spec = SPEC.unpack_from(data, offset)
+    record.update({'RES_SCAL': res_scal, 'LLM_SCAL': llm_scal, 'HLM_SCAL': hlm_scal,
+                   'LO_LIMIT': lo_limit, 'HI_LIMIT': hi_limit, 'UNITS': units,
+                   'C_RESFMT': c_resfmt, 'C_LLMFMT': c_llmfmt, 'C_HLMFMT': c_hlmfmt,
+                   'LO_SPEC': lo_spec, 'HI_SPEC': hi_spec, 'rec_id': 'PTR'})
+    return record
+
+
+def decode_MPR(data: bytes, offset: int, end: int) -> dict:
+    test_num, head_num, site_num, test_flg, parm_flg, rtn_icnt, rslt_cnt = MPR_FIXED.unpack_from(data, offset)
+    # RTN_STAT: one nibble per RTN_ICNT
+    offset += MPR_FIXED.size + (rtn_icnt + 1) // 2
+    rtn_rslt = list(struct.unpack_from(f'<{rslt_cnt}f', data, offset))
+    test_txt, offset = decode_Cn(data, offset + 4 * rslt_cnt)
+    alarm_id, offset = decode_Cn(data, offset)
+    opt_flag, res_scal, llm_scal, hlm_scal, lo_limit, hi_limit, _, _ = MPR_OPT.unpack_from(data, offset)
+    # RTN_INDX: one U*2 per RTN_ICNT
+    units, offset = decode_Cn(data, offset + MPR_OPT.size + 2 * rtn_icnt)
+    _, offset = decode_Cn(data, offset)
+    c_resfmt, offset = decode_Cn(data, offset)
+    c_llmfmt, offset = decode_Cn(data, offset)
+    c_hlmfmt, offset = decode_Cn(data, offset)
+    lo_spec, hi_spec = SPEC.unpack_from(data, offset)
+    return {'type': 'MPR', 'REC_LEN': None, 'REC_TYP': MPR_TYPE[0], 'REC_SUB': MPR_TYPE[1],
+            'TEST_NUM': test_num, 'HEAD_NUM': head_num, 'SITE_NUM': site_num, 'TEST_FLG': test_flg,
+            'PARM_FLG': parm_flg, 'RTN_ICNT': rtn_icnt, 'RSLT_CNT': rslt_cnt, 'RTN_STAT': None,
+            'RTN_RSLT': rtn_rslt, 'TEST_TXT': test_txt, 'ALARM_ID': alarm_id, 'OPT_FLAG': opt_flag,
+            'RES_SCAL': res_scal, 'LLM_SCAL': llm_scal, 'HLM_SCAL': hlm_scal,
+            'LO_LIMIT': lo_limit, 'HI_LIMIT': hi_limit, 'START_IN': None, 'INCR_IN': None,
+            'RTN_INDX': None, 'UNITS': units, 'UNITS_IN': None,
+            'C_RESFMT': c_resfmt, 'C_LLMFMT': c_llmfmt, 'C_HLMFMT': c_hlmfmt,
+            'LO_SPEC': lo_spec, 'HI_SPEC': hi_spec, 'rec_id': 'MPR'}
+
+
+FTR_OPTIONAL_FIELDS = ('CYCL_CNT', 'REL_VADR', 'REPT_CNT', 'NUM_FAIL', 'XFAIL_AD', 'YFAIL_AD', 'VECT_OFF',
+                       'RTN_ICNT', 'PGM_ICNT', 'RTN_INDX', 'RTN_STAT', 'PGM_INDX', 'PGM_STAT', 'FAIL_PIN',
+                       'VECT_NAM', 'TIME_SET', 'OP_CODE', 'TEST_TXT', 'ALARM_ID', 'PROG_TXT', 'RSLT_TXT',
+                       'PATG_NUM', 'SPIN_MAP')
+
+
+def decode_FTR(data: bytes, offset: int, end: int) -> dict:
+    # the test app only sends FTRs with the missing values after OPT_FLAG (see encode_FTR)
+    test_num, head_num, site_num, test_flg, opt_flag = FTR_FIXED.unpack_from(data, offset)
+    record = {'type': 'FTR', 'REC_LEN': None, 'REC_TYP': FTR_TYPE[0], 'REC_SUB': FTR_TYPE[1],
+              'TEST_NUM': test_num, 'HEAD_NUM': head_num, 'SITE_NUM': site_num, 'TEST_FLG': test_flg,
+              'OPT_FLAG': opt_flag}
+    record.update(dict.fromkeys(FTR_OPTIONAL_FIELDS))
+    record['RTN_ICNT'] = 0
+    record['PGM_ICNT'] = 0
+    record['rec_id'] = 'FTR'
+    return record
+
+
+DECODERS: Dict[tuple, Callable[[bytes, int, int], dict]] = {
+    PIR_TYPE: decode_PIR,
+    PRR_TYPE: decode_PRR,
+    PTR_TYPE: decode_PTR,
+    MPR_TYPE: decode_MPR,
+    FTR_TYPE: decode_FTR,
+}
+
+
+def decode_records(data: bytes) -> List[dict]:
+    records = []
+    offset = 0
+    while offset < len(data):
+        rec_len, rec_typ, rec_sub = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        decoder = DECODERS.get((rec_typ, rec_sub))
+        if decoder is None:
+            raise ValueError(f'unsupported stdf record type: ({rec_typ}, {rec_sub})')
+
+        records.append(decoder(data, offset, offset + rec_len))
+        offset += rec_len
+
+    return records
@@ -3,6 +3,11 @@ from Semi_ATE.STDF import (PTR, PRR, PIR, TSR, SBR, HBR, MRR, MIR, PCR, FAR, FTR
 
 ENDIAN = '<'
 
+# PTR fields that only have to be written with the first PTR of a test (number) per site,
+# all following PTRs of the same test use these values as defaults (see STDF V4 spec)
+PTR_STATIC_FIELDS = ('TEST_TXT', 'RES_SCAL', 'LLM_SCAL', 'HLM_SCAL', 'LO_LIMIT', 'HI_LIMIT',
+                     'UNITS', 'C_RESFMT', 'C_LLMFMT', 'C_HLMFMT', 'LO_SPEC', 'HI_SPEC')
+
 
 def flag_array_to_int(flags):
     counter = -1
@@ -76,6 +81,63 @@ def generate_PTR(test_num, head_num, site_num,
     return rec
 
 
+def compact_PTR_dict(ptr_record: dict) -> dict:
+    return {key: value for key, value in ptr_record.items() if key not in PTR_STATIC_FIELDS}
+
+
+def is_compact_PTR_dict(ptr_record: dict) -> bool:
+    return 'LO_LIMIT' not in ptr_record
+
+
+def json_default(value):
+    # json.dumps default for record values that are arrays, e.g. the numpy RTN_RSLT of an MPR
+    tolist = getattr(value, 'tolist', None)
+    if tolist is None:
+        raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+    return tolist()
+
+
+class PtrDefaults:
+    """
+    Keeps track of the static PTR fields that were already written for
+    a (test_num, site_num) pair, so following PTRs of the same test can
+    be written without them.
+    """
+    def __init__(self):
+        self._defaults = {}
+
+    def clear(self):
+        self._defaults.clear()
+
+    def compact(self, ptr_record: dict) -> dict:
+        if is_compact_PTR_dict(ptr_record):
+            return ptr_record
+
+        key = (ptr_record['TEST_NUM'], ptr_record['SITE_NUM'])
+        static_fields = {field: ptr_record[field] for field in PTR_STATIC_FIELDS}
+        defaults = self._defaults.get(key)
+        if defaults is None:
+            self._defaults[key] = static_fields
+            return ptr_record
+
+        # limits may be changed during the lot (e.g. setparameter), in that case the full record is kept
+        if defaults != static_fields:
+            return ptr_record
+
+        return compact_PTR_dict(ptr_record)
+
+    def restore(self, ptr_record: dict) -> dict:
+        if not is_compact_PTR_dict(ptr_record):
+            return ptr_record
+
+        defaults = self._defaults.get((ptr_record['TEST_NUM'], ptr_record['SITE_NUM']))
+        if defaults is not None:
+            ptr_record.update(defaults)
+
+        return ptr_record
+
+
 def generate_PIR_dict(head_num, site_num):
     record = {'type': 'PIR'}
     record.update(generate_PIR(head_num, site_num).to_dict())
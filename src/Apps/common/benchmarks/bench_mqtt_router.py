@@ -0,0 +1,83 @@
+"""
+Measures the dispatch cost of the MqttRouter for the routes of a master
+driving many sites, compared with the former regex router that searched
+every route in every topic.
+
+usage: python bench_mqtt_router.py [--sites 64] [--routes 20] [--messages 200000]
+"""
+import argparse
+import random
+import re
+import time
+
+from ate_apps_common.mqtt_router import MqttRouter
+
+DEVICE_ID = 'sct01'
+TOPIC_KINDS = ['status', 'testresult', 'stdf', 'log', 'testsummary', 'execution_strategy', 'peripherystate', 'io-control']
+
+
+class RegexRouter:
+    # the router as it was before the topic trie
+    def __init__(self):
+        self.routes = {}
+
+    def register_route(self, topic_regex: str, callback: callable):
+        self.routes.setdefault(topic_regex, []).append(callback)
+
+    def inject_message(self, topic, message):
+        for route in self.routes:
+            if re.search(route, topic) is not None:
+                for callback in self.routes[route]:
+                    callback(topic, message)
+
+
+def generate_routes(num_sites: int, num_routes: int) -> list:
+    routes = [f'ate/{DEVICE_ID}/Control/#', f'ate/{DEVICE_ID}/TestApp/#', f'ate/{DEVICE_ID}/Master/cmd/#', 'ate/handler/Handler/#']
+    for site in range(num_sites):
+        for index in range(num_routes):
+            routes.append(f'ate/{DEVICE_ID}/Site{site}/route{index}/response')
+    return routes
+
+
+def generate_topics(num_sites: int, num_messages: int, seed: int = 0) -> list:
+    rand = random.Random(seed)
+    apps = ['TestApp', 'Control']
+    return [f'ate/{DEVICE_ID}/{rand.choice(apps)}/{rand.choice(TOPIC_KINDS)}/site{rand.randrange(num_sites)}'
+            for _ in range(num_messages)]
+
+
+def measure(router, topics: list) -> float:
+    start = time.perf_counter()
+    for topic in topics:
+        router.inject_message(topic, b'')
+    return time.perf_counter() - start
+
+
+def run(num_sites: int, num_routes: int, num_messages: int):
+    routes = generate_routes(num_sites, num_routes)
+    topics = generate_topics(num_sites, num_messages)
+    received = []
+
+    for name, router in (('trie', MqttRouter()), ('regex', RegexRouter())):
+        register = router.register_filter if isinstance(router, MqttRouter) else router.register_route
+        for route in routes:
+            register(route, lambda topic, message: received.append(topic))
+
+        # the regex router is too slow for the full message count (more routes than the re module caches)
+        messages = topics if name == 'trie' else topics[:max(num_messages // 1000, 1)]
+        duration = measure(router, messages)
+        print(f'{name:>5}: routes: {len(routes)}, messages: {len(messages)}, per message: {duration / len(messages) * 1e6:.2f} us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=64)
+    parser.add_argument('--routes', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=200000)
+    args = parser.parse_args()
+
+    run(args.sites, args.routes, args.messages)
+
+
+if __name__ == '__main__':
+    main()
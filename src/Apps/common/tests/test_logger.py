@@ -0,0 +1,76 @@
+import logging
+
+import pytest
+
+from ate_common.logger import BatchedLogHandler, Logger, LogLevel
+
+
+class DummyMqtt:
+    def __init__(self):
+        self.logs = []
+
+    def send_log(self, log):
+        self.logs.append(log)
+
+
+@pytest.fixture
+def formatter():
+    return logging.Formatter('%(name)-9s|%(asctime)-4s |%(levelname)-7s |%(message)s')
+
+
+def create_record(message):
+    return logging.makeLogRecord({'name': 'test', 'levelno': logging.INFO, 'levelname': 'INFO', 'msg': message})
+
+
+def test_records_are_published_in_one_batch(formatter):
+    mqtt = DummyMqtt()
+    handler = BatchedLogHandler(formatter, mqtt, batch_interval_ms=60000)
+    for index in range(3):
+        handler.handle(create_record(f'message {index}'))
+    assert mqtt.logs == []
+
+    handler.close()
+
+    assert len(mqtt.logs) == 1
+    assert [line.split('|')[3] for line in mqtt.logs[0]] == ['message 0', 'message 1', 'message 2']
+
+
+def test_oldest_records_are_dropped_if_the_buffer_is_full(formatter):
+    mqtt = DummyMqtt()
+    handler = BatchedLogHandler(formatter, mqtt, batch_interval_ms=60000, queue_size=2)
+    for index in range(5):
+        handler.handle(create_record(f'message {index}'))
+    handler.close()
+
+    lines = mqtt.logs[0]
+    assert [line.split('|')[3] for line in lines[:2]] == ['message 3', 'message 4']
+    assert len(lines) == 3
+    assert 'WARNING' in lines[2] and '3 log messages were dropped' in lines[2]
+
+
+def test_batches_are_published_in_the_background(formatter):
+    mqtt = DummyMqtt()
+    handler = BatchedLogHandler(formatter, mqtt, batch_interval_ms=10)
+    handler.handle(create_record('message'))
+    for _ in range(100):
+        if mqtt.logs:
+            break
+        handler._stopped.wait(0.05)
+    handler.close()
+
+    assert len(mqtt.logs) == 1
+
+
+def test_logger_checks_the_level_before_logging(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mqtt = DummyMqtt()
+    logger = Logger('batched', mqtt, batch_interval_ms=60000)
+    logger.set_logger_level(LogLevel.Measure())
+    logger.log_message(LogLevel.Debug(), 'filtered')
+    logger.log_message(LogLevel.Measure(), 'measured')
+    logger.log_message(LogLevel.Info(), 'info')
+    with pytest.raises(Exception):
+        logger.log_message(42, 'unknown level')
+    logger.cleanup()
+
+    assert [line.split('|')[2].strip() for line in mqtt.logs[0]] == ['MEASURE', 'INFO']
@@ -0,0 +1,122 @@
+import pytest
+
+from ate_apps_common.mqtt_router import MqttRouter
+
+
+@pytest.fixture
+def router():
+    return MqttRouter()
+
+
+def register(router, route, received, name=None):
+    router.register_filter(route, lambda topic, message: received.append(name or route))
+
+
+def register_regex(router, route, received, name=None):
+    router.register_route(route, lambda topic, message: received.append(name or route))
+
+
+class TestMqttRouter:
+
+    @pytest.mark.parametrize('topic_filter, topic, matches', [
+        ('ate/dev/TestApp/status/site0', 'ate/dev/TestApp/status/site0', True),
+        ('ate/dev/TestApp/status/site0', 'ate/dev/TestApp/status/site1', False),
+        ('ate/dev/TestApp/status/site0', 'ate/dev/TestApp/status', False),
+        ('ate/dev/TestApp/+/site0', 'ate/dev/TestApp/status/site0', True),
+        ('ate/dev/TestApp/+/site0', 'ate/dev/TestApp/status/x/site0', False),
+        ('ate/dev/TestApp/#', 'ate/dev/TestApp/status/site0', True),
+        ('ate/dev/TestApp/#', 'ate/dev/TestApp', True),
+        ('ate/dev/TestApp/#', 'ate/dev/Control/status/site0', False),
+        ('ate/+/+/log/#', 'ate/dev/Control/log/site3', True),
+        ('#', 'ate/dev/Control/log/site3', True),
+        ('TestApp', 'ate/dev/TestApp/status/site0', False),
+    ])
+    def test_filter_matching(self, router, topic_filter, topic, matches):
+        received = []
+        register(router, topic_filter, received)
+        router.inject_message(topic, None)
+
+        assert (received == [topic_filter]) == matches
+
+    @pytest.mark.parametrize('route, topic, matches', [
+        ('TestApp', 'ate/dev/TestApp/status/site0', True),
+        ('TestApp', 'ate/dev/Control/status/site0', False),
+        ('ate/.*/TestApp', 'ate/dev/TestApp/status/site0', True),
+        ('Master/cmd', 'ate/dev/Master/cmd', True),
+        ('ate/dev/TestApp/#', 'ate/dev/TestApp/status/site0', False),
+    ])
+    def test_route_is_searched_as_regular_expression(self, router, route, topic, matches):
+        received = []
+        register_regex(router, route, received)
+        router.inject_message(topic, None)
+
+        assert (received == [route]) == matches
+
+    def test_callbacks_are_called_in_registration_order(self, router):
+        received = []
+        register(router, 'ate/dev/#', received)
+        register_regex(router, 'TestApp', received)
+        register(router, 'ate/dev/TestApp/status/site0', received)
+        register(router, 'ate/+/TestApp/status/+', received)
+        register(router, 'ate/dev/#', received, 'second')
+
+        router.inject_message('ate/dev/TestApp/status/site0', None)
+
+        assert received == ['ate/dev/#', 'second', 'TestApp', 'ate/dev/TestApp/status/site0', 'ate/+/TestApp/status/+']
+
+    def test_unregister_filter_removes_all_callbacks(self, router):
+        received = []
+        register(router, 'ate/dev/Master/response', received)
+        register(router, 'ate/dev/Master/response', received)
+        router.inject_message('ate/dev/Master/response', None)
+        router.unregister_filter('ate/dev/Master/response')
+        router.inject_message('ate/dev/Master/response', None)
+
+        assert len(received) == 2
+        assert router._root.children == {}
+
+    def test_unregister_filter_keeps_other_routes(self, router):
+        received = []
+        register(router, 'ate/dev/Master/#', received)
+        register(router, 'ate/dev/Master/response', received)
+        router.unregister_filter('ate/dev/Master/response')
+        router.unregister_filter('unknown')
+        router.unregister_route('unknown')
+        router.inject_message('ate/dev/Master/response', None)
+
+        assert received == ['ate/dev/Master/#']
+
+    def test_unregister_single_callback(self, router):
+        received = []
+
+        def callback(topic, message):
+            received.append('removed')
+
+        router.register_filter('ate/dev/Master/#', callback)
+        register(router, 'ate/dev/Master/#', received)
+        router.unregister_filter('ate/dev/Master/#', callback)
+        router.inject_message('ate/dev/Master/status', None)
+
+        assert received == ['ate/dev/Master/#']
+
+    def test_topic_cache_is_bounded_and_invalidated(self):
+        router = MqttRouter(cache_size=2)
+        received = []
+        register(router, 'ate/dev/TestApp/#', received)
+        for site in range(5):
+            router.inject_message(f'ate/dev/TestApp/status/site{site}', None)
+        assert len(router._cache) == 2
+
+        register(router, 'ate/dev/TestApp/status/site4', received, 'new')
+        router.inject_message('ate/dev/TestApp/status/site4', None)
+
+        assert received[-2:] == ['ate/dev/TestApp/#', 'new']
+
+    def test_unregister_route_keeps_the_filter_of_the_same_name(self, router):
+        received = []
+        register(router, 'ate/dev/Master/response', received, 'filter')
+        register_regex(router, 'ate/dev/Master/response', received, 'regex')
+        router.unregister_route('ate/dev/Master/response')
+        router.inject_message('ate/dev/Master/response', None)
+
+        assert received == ['filter']
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+from ate_apps_common.mqtt_connection import MqttConnection
+from ate_apps_common.request_response import (REQUEST_ID, REQUEST_IDS, LatencyStatistics, PendingRequests, add_request_id,
+                                              without_request_id)
+
+
+class FakeMqttClient:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload))
+
+    def subscribe(self, topic):
+        self.published.append(('subscribe', topic))
+
+    def unsubscribe(self, topic):
+        self.published.append(('unsubscribe', topic))
+
+
+class LoggerStub:
+    def log_message(self, level, message):
+        pass
+
+
+class TestPendingRequests:
+
+    def test_response_resolves_request_by_id(self):
+        pending = PendingRequests()
+        received = []
+        pending.add('a', 'topic', lambda response: received.append(('a', response)))
+        pending.add('b', 'topic', lambda response: received.append(('b', response)))
+
+        assert pending.resolve('topic', {REQUEST_ID: 'b'}) == 1
+        assert received == [('b', {REQUEST_ID: 'b'})]
+        assert len(pending) == 1
+
+    def test_response_resolves_all_requests_it_carries(self):
+        pending = PendingRequests()
+        received = []
+        for request_id in ('a', 'b', 'c'):
+            pending.add(request_id, 'topic', lambda response, request_id=request_id: received.append(request_id))
+
+        assert pending.resolve('other', {REQUEST_IDS: ['a', 'c']}) == 2
+        assert received == ['a', 'c']
+
+    def test_response_of_other_client_is_ignored(self):
+        pending = PendingRequests()
+        received = []
+        pending.add('a', 'topic', received.append)
+
+        assert pending.resolve('topic', {REQUEST_ID: 'unknown'}) == 0
+        assert received == []
+
+    def test_response_without_id_resolves_oldest_request_of_topic(self):
+        pending = PendingRequests()
+        received = []
+        pending.add('a', 'other', lambda response: received.append('a'))
+        pending.add('b', 'topic', lambda response: received.append('b'))
+        pending.add('c', 'topic', lambda response: received.append('c'))
+
+        pending.resolve('topic', {'result': 'ok'})
+        pending.resolve('topic', None)
+
+        assert received == ['b', 'c']
+        assert pending.resolve('topic', None) == 0
+
+
+def test_request_id_is_added_to_json_payload():
+    payload = add_request_id(json.dumps({'ioctl_name': 'set_temperature'}), 'id0')
+
+    assert json.loads(payload) == {'ioctl_name': 'set_temperature', REQUEST_ID: 'id0'}
+    assert without_request_id(json.loads(payload)) == {'ioctl_name': 'set_temperature'}
+
+
+def test_latency_statistics():
+    statistics = LatencyStatistics()
+    statistics.add(0.002)
+    statistics.add(0.004)
+    statistics.add_timeout()
+
+    assert statistics.to_dict() == pytest.approx({'count': 2, 'timeouts': 1, 'min_ms': 2.0, 'mean_ms': 3.0, 'max_ms': 4.0})
+    assert LatencyStatistics().to_dict()['mean_ms'] is None
+
+
+class TestPublishWithResponse:
+
+    @staticmethod
+    def create_connection():
+        # the mqtt client is created on the running loop
+        connection = MqttConnection('localhost', 1883, 'test', LoggerStub())
+        connection.mqtt_client = FakeMqttClient()
+        return connection
+
+    def respond(self, connection, topic, payload):
+        request = json.loads(payload)
+        response = {'type': 'io-control-response', 'ioctl_name': request['ioctl_name'], REQUEST_ID: request[REQUEST_ID]}
+        connection.router.inject_message(topic.replace('/request', '/response'), json.dumps(response).encode('utf-8'))
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_get_their_own_responses(self):
+        connection = self.create_connection()
+        topics = [f'ate/dev/{peripheral}/io-control' for peripheral in ('Temperature', 'Position', 'Light')]
+        requests = [asyncio.ensure_future(connection.publish_with_response(topic, json.dumps({'ioctl_name': f'ioctl{index}'})))
+                    for index in range(3) for topic in topics]
+        await asyncio.sleep(0)
+
+        published = [(topic, payload) for topic, payload in connection.mqtt_client.published if topic != 'subscribe']
+        assert len(published) == 9
+        # the response topics are subscribed once and stay subscribed
+        assert [payload for topic, payload in connection.mqtt_client.published if topic == 'subscribe'] == [f'{topic}/response' for topic in topics]
+
+        for topic, payload in reversed(published):
+            self.respond(connection, topic, payload)
+
+        responses = await asyncio.gather(*requests)
+        assert [response['ioctl_name'] for response in responses] == [f'ioctl{index}' for index in range(3) for _ in topics]
+        assert len(connection._pending_requests) == 0
+
+    @pytest.mark.asyncio
+    async def test_request_times_out_on_its_own(self):
+        connection = self.create_connection()
+        topic = 'ate/dev/Temperature/io-control'
+        slow = asyncio.ensure_future(connection.publish_with_response(topic, json.dumps({'ioctl_name': 'slow'}), 0.05))
+        fast = asyncio.ensure_future(connection.publish_with_response(topic, json.dumps({'ioctl_name': 'fast'}), 1.0))
+        await asyncio.sleep(0)
+
+        self.respond(connection, *connection.mqtt_client.published[-1])
+
+        assert (await fast)['ioctl_name'] == 'fast'
+        with pytest.raises(asyncio.TimeoutError):
+            await slow
+        assert len(connection._pending_requests) == 0
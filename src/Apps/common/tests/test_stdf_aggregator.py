@@ -0,0 +1,111 @@
+import pytest
+
+from ate_apps_common.stdf_aggregator import (StdfTestResultAggregator, WRITE_MODE_BUFFERED,
+                                             WRITE_MODE_PARANOID)
+from ate_apps_common.stdf_encoder import encode_records
+from ate_apps_common.stdf_utils import generate_PIR_dict, generate_PTR_dict, generate_PRR_dict, compact_PTR_dict
+
+
+def generate_part(site_num: int = 0, num_ptrs: int = 3) -> list:
+    records = [generate_PIR_dict(0, site_num)]
+    for test_num in range(num_ptrs):
+        records.append(generate_PTR_dict(test_num, 0, site_num, True, 0, 1.5, f'test_{test_num}', '', 0.0, 3.0,
+                                         'f', 0, 'V', 0.0, 3.0))
+    records.append(generate_PRR_dict(0, site_num, True, num_ptrs, 1, 1, 0, 0, 10, '1', '', [0] * 8))
+    return records
+
+
+def write_lot(path, write_mode: str, **kwargs):
+    aggregator = StdfTestResultAggregator('node', ['0'], 'lot', 'job', str(path), write_mode=write_mode, **kwargs)
+    aggregator.write_header_records()
+    for _ in range(5):
+        aggregator.append_test_results(generate_part())
+    aggregator.write_footer_records()
+
+
+class TestStdfTestResultAggregator:
+
+    def test_buffered_and_paranoid_output_is_identical(self, tmp_path, mocker):
+        mocker.patch('time.time', return_value=1000)
+        write_lot(tmp_path / 'buffered.stdf', WRITE_MODE_BUFFERED)
+        write_lot(tmp_path / 'paranoid.stdf', WRITE_MODE_PARANOID)
+
+        assert (tmp_path / 'buffered.stdf').read_bytes() == (tmp_path / 'paranoid.stdf').read_bytes()
+
+    def test_buffered_mode_keeps_a_single_file_handle(self, tmp_path, mocker):
+        flush_spy = mocker.spy(StdfTestResultAggregator, 'flush')
+        mocked_open = mocker.patch('builtins.open', wraps=open)
+        write_lot(tmp_path / 'buffered.stdf', WRITE_MODE_BUFFERED)
+
+        assert mocked_open.call_count == 1
+        assert flush_spy.call_count > 1
+
+    def test_paranoid_mode_opens_file_per_record(self, tmp_path, mocker):
+        mocked_open = mocker.patch('builtins.open', wraps=open)
+        write_lot(tmp_path / 'paranoid.stdf', WRITE_MODE_PARANOID)
+
+        assert mocked_open.call_count > 5 * 5
+
+    def test_buffered_mode_flushes_on_prr(self, tmp_path):
+        path = tmp_path / 'buffered.stdf'
+        aggregator = StdfTestResultAggregator('node', ['0'], 'lot', 'job', str(path), flush_interval=3600)
+        aggregator.write_header_records()
+        assert not path.exists()
+
+        aggregator.append_test_results(generate_part()[:-1])
+        assert not path.exists()
+
+        aggregator.append_test_results(generate_part()[-1:])
+        size = path.stat().st_size
+        assert size > 0
+
+        aggregator.write_footer_records()
+        assert path.stat().st_size > size
+
+    def test_buffered_mode_flushes_on_buffer_size(self, tmp_path):
+        path = tmp_path / 'buffered.stdf'
+        aggregator = StdfTestResultAggregator('node', ['0'], 'lot', 'job', str(path), buffer_size=1, flush_interval=3600)
+        aggregator.write_header_records()
+
+        assert path.stat().st_size > 0
+        aggregator.close()
+
+    def test_unsupported_write_mode_raises(self, tmp_path):
+        with pytest.raises(ValueError):
+            StdfTestResultAggregator('node', ['0'], 'lot', 'job', str(tmp_path / 'x.stdf'), write_mode='unknown')
+
+    def test_ptr_compression_writes_static_fields_once(self, tmp_path):
+        write_lot(tmp_path / 'full.stdf', WRITE_MODE_BUFFERED)
+        write_lot(tmp_path / 'compressed.stdf', WRITE_MODE_BUFFERED, ptr_compression=True)
+
+        full = (tmp_path / 'full.stdf').read_bytes()
+        compressed = (tmp_path / 'compressed.stdf').read_bytes()
+        assert len(compressed) < len(full)
+        assert compressed.count(b'test_1') == 1
+        assert full.count(b'test_1') == 5
+
+    def test_ptr_compression_restores_compact_records(self, tmp_path):
+        aggregator = StdfTestResultAggregator('node', ['0'], 'lot', 'job', str(tmp_path / 'x.stdf'), ptr_compression=True)
+        first_part = generate_part()
+        second_part = [compact_PTR_dict(rec) if rec['type'] == 'PTR' else rec for rec in generate_part()]
+
+        aggregator.append_test_results(first_part)
+        aggregator.append_test_results(second_part)
+        aggregator.restore_ptr_defaults(second_part)
+        aggregator.close()
+
+        assert second_part[1]['TEST_TXT'] == 'test_0'
+        assert second_part[1]['LO_LIMIT'] == first_part[1]['LO_LIMIT']
+
+    def test_append_stdf_part_writes_the_encoded_records(self, tmp_path, mocker):
+        mocker.patch('time.time', return_value=1000)
+        write_lot(tmp_path / 'dicts.stdf', WRITE_MODE_BUFFERED)
+
+        aggregator = StdfTestResultAggregator('node', ['0'], 'lot', 'job', str(tmp_path / 'parts.stdf'))
+        aggregator.write_header_records()
+        for _ in range(5):
+            part = generate_part()
+            aggregator.append_stdf_part(encode_records(part), part)
+        aggregator.write_footer_records()
+
+        assert (tmp_path / 'parts.stdf').read_bytes() == (tmp_path / 'dicts.stdf').read_bytes()
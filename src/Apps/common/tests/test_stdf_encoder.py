@@ -0,0 +1,199 @@
+import math
+import pytest
+
+from Semi_ATE.STDF import PTR, MPR, PRR, TSR
+from ate_apps_common.stdf_encoder import (decode_records, encode_FTR, encode_MPR, encode_PIR, encode_PRR,
+                                          encode_PTR, encode_TSR, encode_records)
+from ate_apps_common.stdf_utils import (PtrDefaults, compact_PTR_dict, generate_FTR_dict,
+                                        generate_FTR_with_test_flag, generate_MPR, generate_MPR_dict, generate_PIR, generate_PIR_dict, generate_PRR,
+                                        generate_PRR_dict, generate_PTR, generate_PTR_dict, generate_TSR,
+                                        generate_TSR_dict)
+
+
+def ptr_dict(**kwargs):
+    args = dict(test_num=12, head_num=0, site_num=3, is_pass=True, param_flag=0, measurement=1.25,
+                test_txt='my_test.my_output', alarm_id='', l_limit=-1.5, u_limit=2.5, fmt='.3f',
+                exponent=-3, unit='V', ls_limit=-float('inf'), us_limit=float('inf'))
+    args.update(kwargs)
+    return generate_PTR_dict(**args)
+
+
+def mpr_dict(**kwargs):
+    args = dict(test_num=13, head_num=0, site_num=1, is_pass=False, param_flag=0, measurements=[1.0, 2.5, -3.75],
+                test_txt='my_test.multi', alarm_id='', l_limit=0.0, u_limit=2.0, fmt='.3f',
+                exponent=0, unit='A', ls_limit=-float('inf'), us_limit=float('inf'))
+    args.update(kwargs)
+    return generate_MPR_dict(**args)
+
+
+def prr_dict(**kwargs):
+    args = dict(head_num=0, site_num=2, is_pass=False, num_tests=3, hard_bin=2, soft_bin=12,
+                x_coord=-1, y_coord=7, test_time=42, part_id='1234', part_txt='', part_fix=[0] * 8)
+    args.update(kwargs)
+    return generate_PRR_dict(**args)
+
+
+def tsr_dict(**kwargs):
+    args = dict(head_num=0, site_num=1, test_typ='P', test_num=12, exec_cnt=100, fail_cnt=3, alarm_cnt=0,
+                test_nam='my_test.my_output', seq_name='', test_lbl='', opt_flag=0, test_tim=0.1,
+                test_min=-1.0, test_max=2.0, tst_sums=50.5, tst_sqrs=75.25)
+    args.update(kwargs)
+    return generate_TSR_dict(**args)
+
+
+# reference serialization: the record objects the aggregator used to build for each dict
+def reference_PTR(rec: dict) -> bytes:
+    return generate_PTR(rec['TEST_NUM'], rec['HEAD_NUM'], rec['SITE_NUM'], rec['TEST_FLG'] == 0, rec['PARM_FLG'],
+                        rec['RESULT'], rec['TEST_TXT'], rec['ALARM_ID'], rec['LO_LIMIT'], rec['HI_LIMIT'],
+                        rec['UNITS'], rec['C_RESFMT'], rec['RES_SCAL'], rec['LO_SPEC'], rec['HI_SPEC'],
+                        rec['OPT_FLAG']).__repr__()
+
+
+def reference_MPR(rec: dict) -> bytes:
+    return generate_MPR(rec['TEST_NUM'], rec['HEAD_NUM'], rec['SITE_NUM'], rec['TEST_FLG'] == 0, rec['PARM_FLG'],
+                        rec['RTN_RSLT'], rec['TEST_TXT'], rec['ALARM_ID'], rec['LO_LIMIT'], rec['HI_LIMIT'],
+                        rec['UNITS'], rec['C_RESFMT'], rec['RES_SCAL'], rec['LO_SPEC'], rec['HI_SPEC'],
+                        rec['OPT_FLAG']).__repr__()
+
+
+def reference_PRR(rec: dict) -> bytes:
+    prr = generate_PRR(rec['HEAD_NUM'], rec['SITE_NUM'], False, rec['NUM_TEST'], rec['HARD_BIN'], rec['SOFT_BIN'],
+                       rec['X_COORD'], rec['Y_COORD'], rec['TEST_T'], rec['PART_ID'], rec['PART_TXT'], [0] * 8)
+    prr.set_value('PART_FLG', rec['PART_FLG'])
+    return prr.__repr__()
+
+
+def reference_TSR(rec: dict) -> bytes:
+    return generate_TSR(rec['HEAD_NUM'], rec['SITE_NUM'], rec['TEST_TYP'], rec['TEST_NUM'], rec['EXEC_CNT'],
+                        rec['FAIL_CNT'], rec['ALRM_CNT'], rec['TEST_NAM'], rec['SEQ_NAME'], rec['TEST_LBL'],
+                        rec['OPT_FLAG'], rec['TEST_TIM'], rec['TEST_MIN'], rec['TEST_MAX'], rec['TST_SUMS'],
+                        rec['TST_SQRS']).__repr__()
+
+
+class TestStdfEncoder:
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'is_pass': False, 'measurement': 3.0},
+        {'measurement': None, 'ls_limit': -2.0},
+        {'unit': '˽', 'fmt': '%7.2f'},
+        {'test_txt': '  spaced ünicode text  ', 'alarm_id': 'alarm'},
+        {'test_txt': 'x' * 300},
+        {'measurement': float('nan'), 'l_limit': -float('inf'), 'u_limit': float('inf')},
+    ])
+    def test_ptr_is_byte_identical(self, kwargs):
+        rec = ptr_dict(**kwargs)
+        assert encode_PTR(rec) == reference_PTR(rec)
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'is_pass': True, 'measurements': []},
+        {'measurements': [float(i) for i in range(1000)], 'unit': '˽'},
+    ])
+    def test_mpr_is_byte_identical(self, kwargs):
+        rec = mpr_dict(**kwargs)
+        assert encode_MPR(rec) == reference_MPR(rec)
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'is_pass': True, 'soft_bin': -1},
+        {'part_id': '', 'part_txt': 'some text'},
+    ])
+    def test_prr_is_byte_identical(self, kwargs):
+        rec = prr_dict(**kwargs)
+        assert encode_PRR(rec) == reference_PRR(rec)
+
+    @pytest.mark.parametrize('exception, is_pass', [(False, True), (False, False), (True, False)])
+    def test_ftr_is_byte_identical(self, exception, is_pass):
+        rec = generate_FTR_dict(7, 0, 1, exception, is_pass)
+        reference = generate_FTR_with_test_flag(rec['TEST_NUM'], rec['HEAD_NUM'], rec['SITE_NUM'], rec['TEST_FLG']).__repr__()
+        assert encode_FTR(rec) == reference
+
+    def test_pir_is_byte_identical(self):
+        rec = generate_PIR_dict(0, 5)
+        assert encode_PIR(rec) == generate_PIR(0, 5).__repr__()
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'test_typ': ' P ', 'seq_name': 'seq', 'test_lbl': 'label'},
+        {'test_min': float('inf'), 'test_max': -float('inf')},
+    ])
+    def test_tsr_is_byte_identical(self, kwargs):
+        rec = tsr_dict(**kwargs)
+        assert encode_TSR(rec) == reference_TSR(rec)
+
+    def test_encode_records_concatenates_part(self):
+        records = [generate_PIR_dict(0, 2), ptr_dict(site_num=2), mpr_dict(site_num=2),
+                   generate_FTR_dict(7, 0, 2, False, True), prr_dict()]
+        reference = b''.join((generate_PIR(0, 2).__repr__(), reference_PTR(records[1]), reference_MPR(records[2]),
+                              encode_FTR(records[3]), reference_PRR(records[4])))
+        assert encode_records(records) == reference
+
+    def test_ptr_round_trip(self):
+        rec = ptr_dict(measurement=0.5)
+        decoded = PTR('V4', '<', encode_PTR(rec))
+
+        assert decoded.get_value('TEST_NUM') == rec['TEST_NUM']
+        assert decoded.get_value('SITE_NUM') == rec['SITE_NUM']
+        assert decoded.get_value('RESULT') == rec['RESULT']
+        assert decoded.get_value('TEST_TXT') == rec['TEST_TXT']
+        assert decoded.get_value('C_RESFMT') == '%7.3f'
+        assert decoded.get_value('RES_SCAL') == rec['RES_SCAL']
+        assert math.isinf(decoded.get_value('LO_SPEC')) and decoded.get_value('LO_SPEC') < 0
+
+    def test_mpr_round_trip(self):
+        rec = mpr_dict()
+        decoded = MPR('V4', '<', encode_MPR(rec))
+
+        assert decoded.get_value('RSLT_CNT') == len(rec['RTN_RSLT'])
+        assert decoded.to_dict()['RTN_RSLT'] == rec['RTN_RSLT']
+        assert decoded.get_value('UNITS') == rec['UNITS']
+
+    def test_prr_round_trip(self):
+        rec = prr_dict()
+        decoded = PRR('V4', '<', encode_PRR(rec))
+
+        assert decoded.get_value('PART_ID') == rec['PART_ID']
+        assert decoded.get_value('HARD_BIN') == rec['HARD_BIN']
+        assert decoded.get_value('SOFT_BIN') == rec['SOFT_BIN']
+        assert decoded.get_value('X_COORD') == rec['X_COORD']
+
+    def test_tsr_round_trip(self):
+        rec = tsr_dict()
+        decoded = TSR('V4', '<', encode_TSR(rec))
+
+        assert decoded.get_value('EXEC_CNT') == rec['EXEC_CNT']
+        assert decoded.get_value('TEST_NAM') == rec['TEST_NAM']
+        assert decoded.get_value('TST_SUMS') == pytest.approx(rec['TST_SUMS'])
+
+    def test_compact_ptr_round_trip(self):
+        rec = ptr_dict(measurement=0.5)
+        compact = encode_PTR(compact_PTR_dict(rec))
+        decoded = PTR('V4', '<', compact)
+
+        assert len(compact) < len(encode_PTR(rec))
+        assert decoded.get_value('RESULT') == rec['RESULT']
+        assert decoded.get_value('TEST_TXT') == ''
+
+    def test_ptr_defaults_compacts_repeated_tests(self):
+        defaults = PtrDefaults()
+        assert 'LO_LIMIT' in defaults.compact(ptr_dict())
+        assert 'LO_LIMIT' not in defaults.compact(ptr_dict())
+        assert 'LO_LIMIT' in defaults.compact(ptr_dict(site_num=4))
+        assert 'LO_LIMIT' in defaults.compact(ptr_dict(l_limit=-1.0))
+
+    def test_decode_records_restores_part_dicts(self):
+        records = [generate_PIR_dict(0, 3), ptr_dict(), compact_PTR_dict(ptr_dict()), mpr_dict(site_num=3),
+                   generate_FTR_dict(7, 0, 3, False, True), prr_dict(site_num=3)]
+        assert decode_records(encode_records(records)) == records
+
+    def test_decode_records_keeps_inf_and_nan(self):
+        decoded = decode_records(encode_PTR(ptr_dict(measurement=float('nan'))))[0]
+
+        assert math.isnan(decoded['RESULT'])
+        assert decoded['LO_SPEC'] == -float('inf')
+        assert decoded['HI_SPEC'] == float('inf')
+
+    def test_decode_records_rejects_unsupported_records(self):
+        with pytest.raises(ValueError):
+            decode_records(encode_TSR(tsr_dict()))
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from ate_common.pattern.stil_tool_base import StilToolBase
+
+
+class RecordingStilTool(StilToolBase):
+    def __init__(self, manifest_path):
+        super().__init__()
+        self.manifest_path = manifest_path
+        self.loads = []
+
+    def _load_patterns_impl(self, compiled_patterns: list):
+        self.loads.append(sorted(os.path.basename(compiled_pattern) for compiled_pattern in compiled_patterns))
+
+
+class FailingStilTool(RecordingStilTool):
+    def _load_patterns_impl(self, compiled_patterns: list):
+        raise Exception('loader failed')
+
+
+@pytest.fixture
+def patterns(tmp_path):
+    patterns = {}
+    for name in ('a', 'b'):
+        path = tmp_path / f'{name}.stil.hdf5'
+        path.write_bytes(name.encode() * 100)
+        patterns[name] = str(path)
+
+    # the same binary may be assigned to several tests
+    patterns['b_again'] = patterns['b']
+    return patterns
+
+
+def test_unchanged_patterns_are_not_loaded_again(tmp_path, patterns):
+    manifest_path = str(tmp_path / 'manifest.json')
+    tool = RecordingStilTool(manifest_path)
+    tool._load_patterns(patterns)
+    assert tool.loads == [['a.stil.hdf5', 'b.stil.hdf5']]
+    assert tool.load_statistics['bytes'] == 200
+
+    # next test app start, e.g. after a lot change
+    tool = RecordingStilTool(manifest_path)
+    tool._load_patterns(patterns)
+    assert tool.loads == []
+    assert tool.load_statistics['skipped'] == 2
+    assert tool.load_statistics['bytes'] == 0
+
+    with open(patterns['a'], 'wb') as f:
+        f.write(b'c' * 50)
+    tool._load_patterns(patterns)
+    assert tool.loads == [['a.stil.hdf5']]
+    assert tool.load_statistics == {'loaded': 1, 'skipped': 1, 'bytes': 50, 'load_ms': tool.load_statistics['load_ms']}
+
+
+def test_touched_pattern_with_same_content_is_not_loaded(tmp_path, patterns):
+    manifest_path = str(tmp_path / 'manifest.json')
+    RecordingStilTool(manifest_path)._load_patterns(patterns)
+
+    stat = os.stat(patterns['a'])
+    os.utime(patterns['a'], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    tool = RecordingStilTool(manifest_path)
+    tool._load_patterns(patterns)
+    assert tool.loads == []
+
+
+def test_failed_load_invalidates_the_manifest(tmp_path, patterns):
+    manifest_path = str(tmp_path / 'manifest.json')
+    RecordingStilTool(manifest_path)._load_patterns({'a': patterns['a']})
+
+    with pytest.raises(Exception):
+        FailingStilTool(manifest_path)._load_patterns(patterns)
+
+    tool = RecordingStilTool(manifest_path)
+    tool._load_patterns(patterns)
+    assert tool.loads == [['a.stil.hdf5', 'b.stil.hdf5']]
+
+
+def test_without_manifest_all_patterns_are_loaded(patterns):
+    tool = RecordingStilTool(None)
+    tool._load_patterns(patterns)
+    tool._load_patterns(patterns)
+    assert tool.loads == [['a.stil.hdf5', 'b.stil.hdf5']] * 2
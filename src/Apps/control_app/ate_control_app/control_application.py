@@ -36,7 +36,8 @@ class ControlApplication:
             self.broker_port,
             self.site_id,
             self.device_id,
-            self.log)
+            self.log,
+            self.configuration.get('testapp_pool_size', 0))
         self.connection_handler.start()
         try:
             while True:
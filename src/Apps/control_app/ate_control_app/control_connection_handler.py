@@ -2,11 +2,13 @@ import asyncio
 import os
 from pathlib import Path
 import sys
+import time
 from transitions import Machine
 import json
 
 from ate_apps_common.mqtt_connection import MqttConnection
 from ate_common.logger import LogLevel
+from ate_control_app.testapp_pool import WarmTestAppPool
 
 
 SOFTWARE_VERSION = 1
@@ -40,6 +42,9 @@ class ControlAppMachine:
         self.process = None
         self.stderr = None
         self.do_reset = False
+        self._pool = conhandler.testapp_pool
+        self._load_start = None
+        self._startup_metrics = {}
 
         self.machine = Machine(model=self, states=self.states, transitions=self.transitions, initial='idle', after_state_change=self.publish_current_state)
 
@@ -68,13 +73,25 @@ class ControlAppMachine:
                     # '--ptvsd-wait-for-attach',  # uncomment this to enable attaching the remote debugger AND waiting for an remote debugger to be attached before initialization
                     *testapp_params.get('testapp_script_args', [])]
 
-            os.environ[testapp_params['testapp_script_path'].split('.')[0]] = f"{testapp_params['bin_table']}"
-            self.process = await asyncio.create_subprocess_exec(*args,
-                                                                cwd=testapp_params.get('cwd'),
-                                                                stdout=asyncio.subprocess.PIPE,
-                                                                stderr=asyncio.subprocess.PIPE)
+            env = {testapp_params['testapp_script_path'].split('.')[0]: f"{testapp_params['bin_table']}"}
+            os.environ.update(env)
+
+            start = time.perf_counter()
+            worker = await self._pool.acquire() if self._pool is not None else None
+            request = None
+            if worker is None:
+                self.process = await asyncio.create_subprocess_exec(*args,
+                                                                    cwd=testapp_params.get('cwd'),
+                                                                    stdout=asyncio.subprocess.PIPE,
+                                                                    stderr=asyncio.subprocess.PIPE)
+            else:
+                # the worker runs the test program in place of the interpreter
+                self.process = worker
+                request = WarmTestAppPool.create_request(args[1:], testapp_params.get('cwd'), env)
+
+            self._startup_metrics = {'warm': worker is not None, 'spawn_ms': (time.perf_counter() - start) * 1000.0}
             self.testapp_active(self.process.pid)
-            _, self.stderr = await self.process.communicate()
+            _, self.stderr = await self.process.communicate(request)
             self.testapp_exit(self.process.returncode)
         except asyncio.CancelledError:
             self._terminate()
@@ -89,8 +106,28 @@ class ControlAppMachine:
             self.load_error(f'Test program could not be found: {testapp_params["cwd"]}/{testapp_params["testapp_script_path"]}')
             return
 
+        # the startup of the test app ends with its first idle state
+        self._load_start = time.perf_counter()
+        self._conhandler.subscribe_testapp_status()
         _ = asyncio.create_task(self._run_testapp_task(testapp_params))
 
+    def on_testapp_status_changed(self, state: str):
+        if self._load_start is None or state != 'idle':
+            return
+
+        self._startup_metrics['startup_ms'] = (time.perf_counter() - self._load_start) * 1000.0
+        self.log.log_message(LogLevel.Info(), f'test app startup: {self._startup_metrics}')
+        self._end_startup()
+
+    def _end_startup(self):
+        if self._load_start is not None:
+            self._load_start = None
+            self._conhandler.unsubscribe_testapp_status()
+
+        # warm up the next worker once the test app does not need the cpu to start anymore
+        if self._pool is not None:
+            self._pool.refill()
+
     @staticmethod
     def _does_test_program_exist(testapp_params: dict):
         path = Path(testapp_params.get('cwd'))
@@ -101,6 +138,7 @@ class ControlAppMachine:
 
     def on_test_app_exit(self, return_code: int):
         self.process = None
+        self._end_startup()
 
         # ignore testprogram cancellation if reset is required
         if self.do_reset:
@@ -133,12 +171,14 @@ class ControlConnectionHandler:
 
     """ handle connection """
 
-    def __init__(self, host, port, site_id, device_id, logger):
+    def __init__(self, host, port, site_id, device_id, logger, testapp_pool_size: int = 0):
         self.broker_host = host
         self.broker_port = port
         self.site_id = site_id
         self.device_id = device_id
         self.log = logger
+        # test app workers with the framework imported ahead of the load command (see WarmTestAppPool)
+        self.testapp_pool = WarmTestAppPool(testapp_pool_size, logger) if testapp_pool_size > 0 else None
         mqtt_client_id = f'controlapp.{device_id}.{site_id}'
         self.mqtt = MqttConnection(host, port, mqtt_client_id, self.log)
         self.log.set_mqtt_client(self)
@@ -147,6 +187,7 @@ class ControlConnectionHandler:
 
         self.mqtt.register_route(self._generate_base_topic_cmd(), lambda topic, payload: self.on_message_handler(topic, payload))
         self.mqtt.register_route(self._generate_base_topic_status_master(), lambda topic, payload: self.on_message_handler(topic, payload))
+        self.mqtt.register_route(self._generate_testapp_topic_status(), lambda topic, payload: self.on_message_handler(topic, payload))
 
         self.commands = {
             "loadTest": self.__load_test_program,
@@ -161,10 +202,20 @@ class ControlConnectionHandler:
             self.mqtt.create_message(
                 self._generate_status_message('crash', '')))
         self.mqtt.start_loop()
+        if self.testapp_pool is not None:
+            self.testapp_pool.refill()
 
     async def stop(self):
+        if self.testapp_pool is not None:
+            await self.testapp_pool.stop()
         await self.mqtt.stop_loop()
 
+    def subscribe_testapp_status(self):
+        self.mqtt.subscribe(self._generate_testapp_topic_status())
+
+    def unsubscribe_testapp_status(self):
+        self.mqtt.unsubscribe(self._generate_testapp_topic_status())
+
     def publish_state(self, state, error_message, statedict=None):
         self.mqtt.publish(self._generate_base_topic_status(),
                           self.mqtt.create_message(
@@ -224,8 +275,12 @@ class ControlConnectionHandler:
             self._statemachine.error(str(e))
 
     def on_status_message(self, message):
-        # TODO: handle status messages
-        return
+        # the test app status is only subscribed while the test app starts
+        try:
+            data = json.loads(message.decode('utf-8'))
+            self._statemachine.on_testapp_status_changed(data['payload']['state'])
+        except (ValueError, KeyError, TypeError) as e:
+            self.log.log_message(LogLevel.Warning(), f'invalid test app status: {e}')
 
     def _on_connect_handler(self, client, userdata, flags, conect_res):
         self.log.log_message(LogLevel.Info(), 'mqtt connected')
@@ -271,6 +326,9 @@ class ControlConnectionHandler:
     def _generate_base_topic_status_master(self) -> str:
         return "ate/" + self.device_id + "/Master/status"
 
+    def _generate_testapp_topic_status(self) -> str:
+        return "ate/" + self.device_id + "/TestApp/status/site" + self.site_id
+
     @staticmethod
     def log_payload(log_info):
         return {
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import sys
+from typing import List, Optional
+
+from ate_common.logger import LogLevel
+
+
+class WarmTestAppPool:
+    """
+    Keeps 'size' test app workers (see testapp_worker) started ahead of the
+    load command, a load hands the test program to one of them instead of
+    starting a new interpreter. The pool is refilled with refill once the
+    test app started (or failed to), so warming up a worker does not compete
+    with the start of the test program.
+
+    usage:
+        pool = WarmTestAppPool(2, log)
+        await pool.start()
+        process = await pool.acquire()
+        _, stderr = await process.communicate(WarmTestAppPool.create_request(args, cwd, env))
+        ...
+        await pool.stop()
+    """
+
+    def __init__(self, size: int, log):
+        self.size = size
+        self.log = log
+        self._workers: List[asyncio.subprocess.Process] = []
+        self._fill_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self._fill()
+
+    def refill(self):
+        if self._fill_task is None or self._fill_task.done():
+            self._fill_task = asyncio.create_task(self._fill())
+
+    async def acquire(self) -> Optional[asyncio.subprocess.Process]:
+        # workers that died while waiting (e.g. killed from outside) are dropped
+        while self._workers:
+            worker = self._workers.pop(0)
+            if worker.returncode is None:
+                return worker
+
+        return None
+
+    async def stop(self):
+        if self._fill_task is not None:
+            self._fill_task.cancel()
+
+        for worker in self._workers:
+            if worker.returncode is None:
+                worker.kill()
+            await worker.wait()
+        self._workers.clear()
+
+    @staticmethod
+    def create_request(args: List[str], cwd: Optional[str], env: dict) -> bytes:
+        # args start with the script path, the interpreter is the one of the worker
+        return json.dumps({'args': args, 'cwd': cwd, 'env': env}).encode('utf-8') + b'\n'
+
+    async def _fill(self):
+        while len(self._workers) < self.size:
+            try:
+                worker = await asyncio.create_subprocess_exec(sys.executable, '-m', 'ate_control_app.testapp_worker',
+                                                              stdin=asyncio.subprocess.PIPE,
+                                                              stdout=asyncio.subprocess.PIPE,
+                                                              stderr=asyncio.subprocess.PIPE)
+            except OSError as e:
+                self.log.log_message(LogLevel.Error(), f'could not start test app worker: {e}')
+                return
+
+            self._workers.append(worker)
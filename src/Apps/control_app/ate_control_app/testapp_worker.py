@@ -0,0 +1,74 @@
+""" warm test app worker
+
+Started ahead of time by the WarmTestAppPool of the control app. The worker imports
+the test app framework and the tester plugins, then waits for the test program
+to run on stdin (one json line, see WarmTestAppPool.create_request) and runs it in
+place of 'python <testapp_script_path> <args>'. Only the modules of the test
+program itself are imported after the load command.
+
+The worker ends without running a test program if stdin is closed.
+"""
+import importlib
+import json
+import os
+import runpy
+import sys
+
+# the modules imported by every test program (see testprogram_template.jinja2 of sammy)
+PRELOADED_MODULES = [
+    'paho.mqtt.client',
+    'pydantic',
+    'transitions',
+    'ate_test_app.sequencers.SequencerBase',
+    'ate_test_app.sequencers.Sequencer',
+    'ate_test_app.sequencers.CommandLineParser',
+    'ate_test_app.sequencers.binning.BinStrategyFactory',
+    'ate_test_app.sequencers.harness.HarnessFactory',
+    'ate_test_app.sequencers.mqtt.MqttConnection',
+    'ate_test_app.stages_sequence_generator.stages_sequence_generator',
+    'ate_common.pattern.tool_factory',
+]
+
+
+def preload():
+    for module in PRELOADED_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            # the test program reports missing packages itself
+            pass
+
+    try:
+        from ate_semiateplugins.pluginmanager import get_plugin_manager
+    except ImportError:
+        return
+
+    # imports the modules of all installed plugins (testers, instruments, ...)
+    get_plugin_manager()
+
+
+def run_test_program(request: dict):
+    if request.get('cwd'):
+        os.chdir(request['cwd'])
+    os.environ.update(request.get('env', {}))
+
+    script_path = request['args'][0]
+    sys.argv = list(request['args'])
+    # same as running 'python <script>': the directory of the script comes first on the path
+    sys.path[0] = os.path.dirname(os.path.abspath(script_path))
+
+    runpy.run_path(script_path, run_name='__main__')
+
+
+def main():
+    preload()
+
+    line = sys.stdin.readline()
+    if not line:
+        return
+
+    run_test_program(json.loads(line))
+
+
+if __name__ == '__main__':
+    main()
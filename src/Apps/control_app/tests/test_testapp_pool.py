@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from ate_common.logger import Logger
+from ate_control_app.control_connection_handler import ControlAppMachine
+from ate_control_app.testapp_pool import WarmTestAppPool
+
+TEST_PROGRAM = '''
+import os
+import sys
+import paho.mqtt.client
+
+print(sys.argv[1:], os.environ['test_program'], os.path.basename(os.getcwd()), sys.path[0] == os.getcwd(),
+      'paho.mqtt.client' in sys.modules, __name__)
+sys.exit(int(sys.argv[-1]))
+'''
+
+
+class ConnectionHandlerStub:
+    device_id = 'dev'
+    site_id = '0'
+    broker_host = '127.0.0.1'
+    broker_port = 1883
+
+    def __init__(self, testapp_pool):
+        self.log = Logger('control test')
+        self.testapp_pool = testapp_pool
+        self.states = []
+        self.subscribed = False
+
+    def publish_state(self, state, error_message, statedict=None):
+        self.states.append(state)
+
+    def subscribe_testapp_status(self):
+        self.subscribed = True
+
+    def unsubscribe_testapp_status(self):
+        self.subscribed = False
+
+
+@pytest.fixture
+def program_dir(tmp_path):
+    program_dir = tmp_path / 'program'
+    program_dir.mkdir()
+    program_dir.joinpath('test_program.py').write_text(TEST_PROGRAM)
+    return program_dir
+
+
+async def wait_for(condition, timeout=30.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_the_test_program_like_the_interpreter(program_dir):
+    pool = WarmTestAppPool(1, Logger('control test'))
+    await pool.start()
+    try:
+        worker = await pool.acquire()
+        assert await pool.acquire() is None
+
+        request = WarmTestAppPool.create_request(['test_program.py', '--site_id', '0', '3'], str(program_dir), {'test_program': 'bins.json'})
+        stdout, stderr = await worker.communicate(request)
+
+        assert stderr == b''
+        assert stdout.decode().strip() == "['--site_id', '0', '3'] bins.json program True True __main__"
+        assert worker.returncode == 3
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_is_refilled_after_the_test_app_started(program_dir):
+    conhandler = ConnectionHandlerStub(WarmTestAppPool(1, Logger('control test')))
+    await conhandler.testapp_pool.start()
+    machine = ControlAppMachine(conhandler)
+    try:
+        machine.load({'testapp_script_path': 'test_program.py', 'cwd': str(program_dir), 'testapp_script_args': ['0'], 'bin_table': ''})
+        assert conhandler.subscribed
+
+        await wait_for(lambda: machine.state == 'busy')
+        machine.on_testapp_status_changed('idle')
+        assert not conhandler.subscribed
+        assert machine._startup_metrics['warm'] is True
+        assert machine._startup_metrics['startup_ms'] > 0
+
+        await wait_for(lambda: machine.state == 'idle')
+        await wait_for(lambda: len(conhandler.testapp_pool._workers) == 1)
+    finally:
+        await conhandler.testapp_pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_load_without_pool_starts_the_interpreter(program_dir):
+    conhandler = ConnectionHandlerStub(None)
+    machine = ControlAppMachine(conhandler)
+
+    machine.load({'testapp_script_path': 'test_program.py', 'cwd': str(program_dir), 'testapp_script_args': ['0'], 'bin_table': ''})
+    await wait_for(lambda: conhandler.states[-1:] == ['idle'] and machine.process is None)
+
+    assert machine._startup_metrics['warm'] is False
@@ -5,10 +5,13 @@ from transitions.core import MachineError
 from transitions.extensions import HierarchicalMachine as Machine
 from queue import Empty, Full, Queue
 import asyncio
+import json
+import math
 import mimetypes
+import os
 import sys
 
-from typing import Callable, List
+from typing import Callable, List, Optional
 
 from ate_common.logger import Logger, LogLevel
 from ate_apps_common.sequence_container import SequenceContainer
@@ -153,6 +156,7 @@ class MasterApplication(MultiSiteTestingModel):
         self.loglevel = master_configuration.loglevel
         self.log.set_logger_level(self.loglevel)
         self.develop_mode = master_configuration.develop_mode
+        self.multi_site_testapp = master_configuration.multi_site_testapp
 
         self.connectionHandler = MasterConnectionHandler(self.broker_host, self.broker_port, self.configuredSites, self.device_id, self.handler_id, self)
         self.peripheral_controller = PeripheralController(self.connectionHandler.mqtt, self.device_id)
@@ -166,9 +170,11 @@ class MasterApplication(MultiSiteTestingModel):
         self.last_published_state = ''
         self.summary_counter = 0
         self.tsr_messages = []
+        self.testapp_timing = {}
 
         self.command_queue = Queue(maxsize=50)
         self._result_info_handler = ResultInformationHandler(self.sites)
+        self._sent_result_info_version = self._result_info_handler.version
 
         self.test_results = []
 
@@ -361,17 +367,28 @@ class MasterApplication(MultiSiteTestingModel):
             self.load_error()
             return
 
-        self._stdf_aggregator = StdfTestResultAggregator(self.device_id + ".Master", self.sites, self.loaded_lot_number, self.loaded_lot_number)
+        if self._stdf_aggregator:
+            self._stdf_aggregator.close()
+
+        self._stdf_aggregator = StdfTestResultAggregator(self.device_id + ".Master", self.sites, self.loaded_lot_number, self.loaded_lot_number,
+                                                         write_mode=self.configuration.stdf_write_mode,
+                                                         buffer_size=self.configuration.stdf_buffer_size,
+                                                         flush_interval=self.configuration.stdf_flush_interval,
+                                                         ptr_compression=self.configuration.stdf_ptr_compression)
         self._stdf_aggregator.set_test_program_data(test_program_data)
 
         self.arm_timeout(LOAD_TIMEOUT, lambda: self.timeout("not all sites loaded the testprogram"))
-        self.pendingTransitionsControl = SequenceContainer([ControlState.Loading, ControlState.Busy], self.configuredSites, lambda: None,
+        self.pendingTransitionsControl = SequenceContainer([ControlState.Loading, ControlState.Busy], self._get_testapp_control_sites(), lambda: None,
                                                            lambda site, state: self.on_error(f"Bad statetransition of control {site} during load to {state}"))
         self.pendingTransitionsTest = SequenceContainer([TestState.Idle], self.configuredSites, lambda: self.all_siteloads_complete(),
                                                         lambda site, state: self.on_error(f"Bad statetransition of testapp {site} during load to {state}"))
         self.error_message = ''
 
-        self.connectionHandler.send_load_test_to_all_sites(self.get_test_parameters(test_program_data))
+        testapp_params = self.get_test_parameters(test_program_data)
+        if self.multi_site_testapp:
+            # the test app publishes its state, results and summary on the topics of each site
+            testapp_params['testapp_script_args'] = [*testapp_params['testapp_script_args'], '--site_ids', ','.join(self.configuredSites)]
+        self.connectionHandler.send_load_test_to_all_sites(testapp_params, self._get_testapp_control_sites())
         self._store_user_settings(UserSettings.get_defaults())
 
         self.command_queue.put_nowait(GetBinTable(lambda: self._generate_bin_table_message()))
@@ -413,6 +430,20 @@ class MasterApplication(MultiSiteTestingModel):
             'bin_table': data['BINTABLE']                                                           # optional/unused for now
         }
 
+    def _get_testapp_control_sites(self) -> List[str]:
+        # the controls that start a test app, with multi_site_testapp the other controls stay idle
+        if self.multi_site_testapp:
+            return self.configuredSites[:1]
+
+        return self.configuredSites
+
+    def _get_testapp_sites(self, siteid: str) -> List[str]:
+        # a test app testing several sites sends its io-control requests on the topic of the first site only
+        if self.multi_site_testapp and siteid == self.configuredSites[0]:
+            return list(self._released_sites) or [siteid]
+
+        return [siteid]
+
     def on_allsiteloads_complete(self, _paramData=None):
         self.error_message = ''
         self.disarm_timeout()
@@ -476,6 +507,10 @@ class MasterApplication(MultiSiteTestingModel):
             self.on_error(f'not all testing sites "{self.testing_sites}" are in the configured site list "{self.sites}"')
 
         settings.update(self._extract_sites_information(param_data))
+        # the test apps only send the static PTR fields with the first PTR of each test
+        settings['ptr_compression'] = self._stdf_aggregator.ptr_compression
+        settings['result_transport'] = self.configuration.stdf_result_transport
+        settings['timing'] = self.configuration.testapp_timing
         self.connectionHandler.send_next_to_all_sites(settings)
 
     def on_test_app_response_to_next_command(self):
@@ -519,7 +554,7 @@ class MasterApplication(MultiSiteTestingModel):
 
     def on_unload_command_issued(self, param_data: dict):
         self.arm_timeout(UNLOAD_TIMEOUT, lambda: self.timeout("not all sites unloaded the testprogram"))
-        self.pendingTransitionsControl = SequenceContainer([ControlState.Idle], self.configuredSites, lambda: self.all_siteunloads_complete(),
+        self.pendingTransitionsControl = SequenceContainer([ControlState.Idle], self._get_testapp_control_sites(), lambda: self.all_siteunloads_complete(),
                                                            lambda site, state: self.on_error(f"Bad statetransition of control {site} during unload to {state}"))
         self.pendingTransitionsTest = SequenceContainer([TestState.Terminated], self.configuredSites, lambda: None, lambda site, state: None)
         self.error_message = ''
@@ -541,6 +576,8 @@ class MasterApplication(MultiSiteTestingModel):
 
     def on_allsiteunloadscomplete(self):
         self.disarm_timeout()
+        if self.peripheral_controller.statistics:
+            self.log.log_message(LogLevel.Debug(), f'io-control statistics: {self.peripheral_controller.get_statistics()}')
 
         self.received_sites_test_results.clear()
         self.loaded_lot_number = ''
@@ -570,16 +607,22 @@ class MasterApplication(MultiSiteTestingModel):
     def _send_test_results(self):
         self.connectionHandler.send_test_results(self.test_results)
 
-    def on_site_test_result_received(self, site_id, param_data):
+    def on_site_test_result_received(self, site_id, param_data, stdf_part: Optional[bytes] = None):
         self.test_num = 0
         payload = param_data['payload']
-        self._write_stdf_data(payload)
+        if stdf_part is None:
+            self._write_stdf_data(payload)
+        else:
+            # the test app already encoded the records, they are written as received
+            self._stdf_aggregator.append_stdf_part(stdf_part, payload)
+        if self._stdf_aggregator.ptr_compression:
+            self._stdf_aggregator.restore_ptr_defaults(payload)
 
         prr_record = None
         # hack: (-)inf could not be parsed into a json object, so we cast it to string
         for index, rec in enumerate(payload):
             for key, value in rec.items():
-                if str(value) in ('inf', '-inf'):
+                if isinstance(value, float) and math.isinf(value):
                     payload[index][key] = str(value)
 
             if rec['type'] == 'PRR':
@@ -629,11 +672,17 @@ class MasterApplication(MultiSiteTestingModel):
             self.pendingTransitionsTest.trigger_transition(siteid, newstatus)
 
     def on_log_message(self, siteid: str, log_msg: dict):
-        self.log.append_log(log_msg['payload'])
+        # batched loggers (see ate_common.logger.BatchedLogHandler) send a list of log lines
+        logs = log_msg['payload']
+        if isinstance(logs, str):
+            logs = [logs]
 
-    def on_testapp_testresult_changed(self, siteid: str, status_msg: dict):
+        for log in logs:
+            self.log.append_log(log)
+
+    def on_testapp_testresult_changed(self, siteid: str, status_msg: dict, stdf_part: Optional[bytes] = None):
         if self.is_testing(allow_substates=True):
-            self.on_site_test_result_received(siteid, status_msg)
+            self.on_site_test_result_received(siteid, status_msg, stdf_part)
             self.handle_testresult(siteid, status_msg)
         else:
             self.on_error(f"Received unexpected testresult from site {siteid}")
@@ -642,6 +691,9 @@ class MasterApplication(MultiSiteTestingModel):
         if self.handle_execution_strategy_message(siteid, execution_strategy):
             self.set_execution_strategy_configuration(execution_strategy)
 
+    def on_testapp_timing_changed(self, siteid: str, timing: dict):
+        self.testapp_timing[siteid] = timing
+
     def on_testapp_testsummary_changed(self, message: dict):
         self.summary_counter += 1
         self.tsr_messages.extend(message['payload'])
@@ -654,19 +706,25 @@ class MasterApplication(MultiSiteTestingModel):
             self._stdf_aggregator.append_part_count_infos(self._result_info_handler.get_part_count_infos())
 
             self._stdf_aggregator.write_footer_records()
+            if self.testapp_timing:
+                self._write_testapp_timing(f'{os.path.splitext(self._stdf_aggregator.path)[0]}.timing.json')
             self._stdf_aggregator = None
             self.summary_counter = 0
             self.tsr_messages.clear()
 
+    def _write_testapp_timing(self, path: str):
+        # the sites send their timing ahead of their summary (see configuration testapp_timing)
+        with open(path, 'w') as f:
+            json.dump({'lot_number': self.loaded_lot_number, 'sites': self.testapp_timing}, f, indent=4)
+        self.testapp_timing = {}
+
     def on_testapp_resource_changed(self, siteid: str, resource_request_msg: dict):
-        self.handle_resource_request(siteid, resource_request_msg)
+        for site_id in self._get_testapp_sites(siteid):
+            self.handle_resource_request(site_id, resource_request_msg)
 
     def on_testapp_test_request_changed(self, siteid: str):
         self.handle_test_request(siteid)
 
-    def on_peripheral_response_received(self, response):
-        self.peripheral_controller.on_response_received(response)
-
     def on_handler_status_changed(self, msg: dict):
         if self.external_state == 'softerror':
             return
@@ -836,13 +894,15 @@ class MasterApplication(MultiSiteTestingModel):
         await ws_comm_handler.send_status_to_all(self.external_state, self.error_message)
 
         # TODO: ATE-227, sync with UI Team
-        for test_result in self.received_site_test_results:
-            await ws_comm_handler.send_testresults_to_all(test_result)
+        site_test_results, self.received_site_test_results = self.received_site_test_results, []
+        await ws_comm_handler.send_site_testresults_to_all(site_test_results)
+
+        # yield and bin table are only sent if one of their counters changed
+        if self._sent_result_info_version != self._result_info_handler.version:
+            self._sent_result_info_version = self._result_info_handler.version
             await ws_comm_handler.send_yields(self._generate_yield_message())
             await ws_comm_handler.send_bin_table(self._generate_bin_table_message())
 
-        self.received_site_test_results = []
-
         await self._execute_commands(ws_comm_handler)
 
         available_logs = self.log.get_current_logs()
@@ -1,7 +1,10 @@
 from ate_apps_common.mqtt_connection import MqttConnection
+from ate_apps_common.request_response import REQUEST_IDS, without_request_id
+from ate_apps_common.stdf_encoder import decode_records
 from ate_common.logger import LogLevel
 import json
 import re
+import struct
 from typing import List, Optional
 
 TOPIC_CONTROLSTATUS = "Control/status"
@@ -27,10 +30,10 @@ class MasterConnectionHandler:
         self.connected_flag = False
         self.handler_id = handler_id
 
-        self.mqtt.register_route("Control", lambda topic, payload: self.dispatch_control_message(topic, self.mqtt.decode_payload(payload)))
-        self.mqtt.register_route("TestApp", lambda topic, payload: self.dispatch_testapp_message(topic, self.mqtt.decode_payload(payload)))
-        self.mqtt.register_route("Master/cmd", lambda topic, payload: self.dispatch_handler_message(topic, self.mqtt.decode_payload(payload)))
-        self.mqtt.register_route("Handler", lambda topic, payload: self.dispatch_handler_message(topic, self.mqtt.decode_payload(payload)))
+        self.mqtt.register_filter(f"ate/{device_id}/Control/#", lambda topic, payload: self.dispatch_control_message(topic, self.mqtt.decode_payload(payload)))
+        self.mqtt.register_filter(f"ate/{device_id}/TestApp/#", lambda topic, payload: self._on_testapp_message(topic, payload))
+        self.mqtt.register_filter(f"ate/{device_id}/Master/cmd/#", lambda topic, payload: self.dispatch_handler_message(topic, self.mqtt.decode_payload(payload)))
+        self.mqtt.register_filter(f"ate/{handler_id}/Handler/#", lambda topic, payload: self.dispatch_handler_message(topic, self.mqtt.decode_payload(payload)))
 
     def start(self):
         self.mqtt.set_last_will(
@@ -48,13 +51,13 @@ class MasterConnectionHandler:
                           qos=2,
                           retain=False)
 
-    def send_load_test_to_all_sites(self, testapp_params):
+    def send_load_test_to_all_sites(self, testapp_params, sites: Optional[List[str]] = None):
         topic = f'ate/{self.device_id}/Control/cmd'
         params = {
             'type': 'cmd',
             'command': 'loadTest',
             'testapp_params': testapp_params,
-            'sites': self.sites,
+            'sites': self.sites if sites is None else sites,
         }
         self.log.log_message(LogLevel.Info(), 'Send LoadLot to sites...')
         self.mqtt.publish(topic, json.dumps(params), 2, False)
@@ -191,7 +194,9 @@ class MasterConnectionHandler:
 
     def publish_ioctl_response(self, resource_request, result):
         response_topic = self.__generate_ioctl_response_topic(resource_request)
-        self.mqtt.publish(response_topic, result, 2)
+        # the id of the peripheral response is replaced by the ids of the testapp requests
+        message = without_request_id(result) if isinstance(result, dict) else result
+        self.mqtt.publish(response_topic, json.dumps(self._add_request_ids(message, resource_request)), 2)
 
     def publish_ioctl_timeout(self, resource_request):
         response_topic = self.__generate_ioctl_response_topic(resource_request)
@@ -200,7 +205,14 @@ class MasterConnectionHandler:
             "ioctl_name": resource_request["ioctl_name"],
             "result": "Timeout"
         }
-        self.mqtt.publish(response_topic, json.dumps(message), 2)
+        self.mqtt.publish(response_topic, json.dumps(self._add_request_ids(message, resource_request)), 2)
+
+    @staticmethod
+    def _add_request_ids(message, resource_request: dict):
+        if REQUEST_IDS not in resource_request or not isinstance(message, dict):
+            return message
+
+        return dict(message, **{REQUEST_IDS: resource_request[REQUEST_IDS]})
 
     def _generate_usersettings_message(self, usersettings: dict):
         message = {
@@ -219,8 +231,8 @@ class MasterConnectionHandler:
                 return m.group(1)
 
     def __extract_siteid_from_testapp_topic(self, topic):
-        patterns = [rf'ate/{self.device_id}/TestApp/(?:status|testresult)/site(.+)$',
-                    rf'ate/{self.device_id}/TestApp/(?:status|testsummary|log|execution_strategy)/site(.+)$',
+        patterns = [rf'ate/{self.device_id}/TestApp/(?:status|testresult|stdf)/site(.+)$',
+                    rf'ate/{self.device_id}/TestApp/(?:status|testsummary|log|execution_strategy|timing)/site(.+)$',
                     rf'ate/{self.device_id}/TestApp/io-control/site(.+)/request$',
                     rf'ate/{self.device_id}/TestApp/binsettings/site(.+)$']
         for pattern in patterns:
@@ -246,6 +258,28 @@ class MasterConnectionHandler:
         else:
             assert False
 
+    def _on_testapp_message(self, topic, payload):
+        # test results published on the stdf topic are raw STDF records, all other messages are json
+        if f'ate/{self.device_id}/TestApp/stdf/' in topic:
+            self.dispatch_testapp_stdf_message(topic, payload)
+            return
+
+        self.dispatch_testapp_message(topic, self.mqtt.decode_payload(payload))
+
+    def dispatch_testapp_stdf_message(self, topic, stdf_part: bytes):
+        siteid = self.__extract_siteid_from_testapp_topic(topic)
+        if siteid is None:
+            self.log.log_message(LogLevel.Warning(), f'unexpected message on testapp topic {topic}: extracting siteid failed')
+            return
+
+        try:
+            records = decode_records(stdf_part)
+        except (ValueError, IndexError, struct.error) as error:
+            self.log.log_message(LogLevel.Error(), f'invalid stdf part received from site {siteid}: {error}')
+            return
+
+        self.status_consumer.on_testapp_testresult_changed(siteid, {'type': 'testresult', 'payload': records}, stdf_part)
+
     def dispatch_testapp_message(self, topic, msg):
         siteid = self.__extract_siteid_from_testapp_topic(topic)
         if siteid is None:
@@ -261,6 +295,8 @@ class MasterConnectionHandler:
             self.status_consumer.on_testapp_testresult_changed(siteid, msg)
         elif "testsummary" in topic:
             self.status_consumer.on_testapp_testsummary_changed(msg)
+        elif "timing" in topic:
+            self.status_consumer.on_testapp_timing_changed(siteid, msg['payload'])
         elif "io-control" in topic:
             assert 'type' in msg
             assert msg['type'] == 'io-control-request'
@@ -1,6 +1,8 @@
 from ate_common.logger import LogLevel
 from aiohttp import web, WSMsgType, WSCloseCode
+from collections import OrderedDict
 from pathlib import Path
+import asyncio
 import json
 import time
 import os
@@ -24,6 +26,69 @@ class MessageTypes(Enum):
         return self.value
 
 
+CLIENT_QUEUE_SIZE = 256
+
+# messages holding a complete state, a pending one is replaced by a newer message of its type
+STATE_MESSAGE_TYPES = {MessageTypes.Status(), MessageTypes.UserSettings(), MessageTypes.Yield(), MessageTypes.LotData(),
+                       MessageTypes.BinTable(), MessageTypes.Configuration()}
+
+
+class ClientSendQueue:
+    '''
+        Bounded queue of the serialized messages waiting to be sent to one
+        websocket client.
+
+        A pending state message (see STATE_MESSAGE_TYPES) is replaced by a
+        newer message of the same type. If the queue is full the oldest
+        pending update (test results, logs, ...) is dropped, so a slow
+        client never delays the other clients or the master.
+    '''
+
+    def __init__(self, maxsize: int = CLIENT_QUEUE_SIZE):
+        self._messages = OrderedDict()
+        self._maxsize = maxsize
+        self._sequence = 0
+        self._event = asyncio.Event()
+        self.merged = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def put(self, message_type: str, message: str):
+        if message_type in STATE_MESSAGE_TYPES:
+            key = message_type
+            if self._messages.pop(key, None) is not None:
+                self.merged += 1
+        else:
+            key = self._sequence
+            self._sequence += 1
+
+        if len(self._messages) >= self._maxsize:
+            self._drop_oldest_update()
+
+        self._messages[key] = message
+        self._event.set()
+
+    def get_nowait(self) -> str:
+        _, message = self._messages.popitem(last=False)
+        return message
+
+    async def get(self) -> str:
+        while not self._messages:
+            self._event.clear()
+            await self._event.wait()
+
+        return self.get_nowait()
+
+    def _drop_oldest_update(self):
+        for key in self._messages:
+            if key not in STATE_MESSAGE_TYPES:
+                del self._messages[key]
+                self.dropped += 1
+                return
+
+
 class WebsocketCommunicationHandler:
     def __init__(self, app):
         self._app = app
@@ -43,15 +108,20 @@ class WebsocketCommunicationHandler:
         return self._app['mqtt_handler']
 
     async def send_message_to_all(self, data):
+        # the message is serialized once and queued for each client, see ClientSendQueue
         self._discard_ws_connection_if_needed()
+        if not self._websockets:
+            return
+
+        message = json.dumps(data)
         for ws in self._websockets:
-            await ws.send_json(data)
+            ws.enqueue(data['type'], message)
 
     async def send_message_to_client(self, client_id, data):
         self._discard_ws_connection_if_needed()
         for ws in self._websockets:
             if ws.get_connection_id() == client_id:
-                await ws.send_json(data)
+                ws.enqueue(data['type'], json.dumps(data))
 
     async def send_status_to_all(self, state, description):
         status_message = self._create_status_message(state, description)
@@ -64,6 +134,12 @@ class WebsocketCommunicationHandler:
     async def send_testresults_to_all(self, site_test_result):
         await self.send_message_to_all(site_test_result)
 
+    async def send_site_testresults_to_all(self, site_test_results: list):
+        # the results received since the last push are sent in one go, one testresult message per site result,
+        # 'testresults' is the complete list requested by a client
+        for site_test_result in site_test_results:
+            await self.send_message_to_all(site_test_result)
+
     async def send_testresults_to_client(self, testresults, connection_id):
         testresults_message = self._create_testresults_message(testresults)
         await self.send_message_to_client(connection_id, testresults_message)
@@ -164,10 +240,11 @@ class WebsocketCommunicationHandler:
 
         connection_id = str(uuid.uuid1())
         ws_connection = WebSocketConnection(ws, connection_id)
-        self._websockets.add(ws_connection)
-
         await self._send_connection_id_to_ws(ws, connection_id)
 
+        ws_connection.start()
+        self._websockets.add(ws_connection)
+
         # master should propagate the available settings each time a page reloaded
         # or new websocket connection is required
         self.handle_new_connection(connection_id)
@@ -182,8 +259,11 @@ class WebsocketCommunicationHandler:
                 elif msg.type == WSMsgType.ERROR:
                     self._log.log_message(LogLevel.Error(), f'ws connection closed with exception: {ws.exception()}')
         finally:
-            pass
+            ws_connection.stop()
 
+        if ws_connection.send_queue.merged or ws_connection.send_queue.dropped:
+            self._log.log_message(LogLevel.Debug(), f'websocket connection {connection_id}: merged {ws_connection.send_queue.merged}, '
+                                                    f'dropped {ws_connection.send_queue.dropped} messages')
         self._discard_ws_connection_if_needed()
 
     def _discard_ws_connection_if_needed(self):
@@ -253,18 +333,40 @@ def webservice_setup_app(app: web.Application, static_file_path: str):
 
 
 class WebSocketConnection:
-    def __init__(self, ws_connection, connection_id):
+    def __init__(self, ws_connection, connection_id, queue_size: int = CLIENT_QUEUE_SIZE):
         self.ws_connection = ws_connection
         self.connection_id = connection_id
+        self.send_queue = ClientSendQueue(queue_size)
+        self._sender = None
 
     def is_alive(self):
         return not (self.ws_connection.closed or self.ws_connection.close_code is not None)
 
-    def close(self, code, message):
-        self.ws_connection.close(code=code, message=message)
+    async def close(self, code, message):
+        self.stop()
+        await self.ws_connection.close(code=code, message=message)
 
     def get_connection_id(self):
         return self.connection_id
 
+    def start(self):
+        self._sender = asyncio.ensure_future(self._send_queued_messages())
+
+    def stop(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+
+    def enqueue(self, message_type: str, message: str):
+        self.send_queue.put(message_type, message)
+
     async def send_json(self, data):
         await self.ws_connection.send_json(data)
+
+    async def _send_queued_messages(self):
+        while True:
+            message = await self.send_queue.get()
+            try:
+                await self.ws_connection.send_str(message)
+            except ConnectionError:
+                return
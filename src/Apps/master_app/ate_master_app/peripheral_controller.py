@@ -1,23 +1,35 @@
 import json
 import asyncio
+import time
+from typing import Dict
+
+from ate_apps_common.mqtt_connection import RESPONSE_TIMEOUT
+from ate_apps_common.request_response import LatencyStatistics
 
 
 class PeripheralController:
     def __init__(self, mqtt_client, device_id):
         self.mqtt_client = mqtt_client
         self.device_id = device_id
-        self.ioctl_response_event = asyncio.Event()
+        self.statistics: Dict[str, LatencyStatistics] = {}
 
-    async def device_io_control(self, peripheral_name, ioctl_code, parameters):
+    async def device_io_control(self, peripheral_name, ioctl_code, parameters, timeout: float = RESPONSE_TIMEOUT):
         message = {"type": "io-control-request",
                    "ioctl_name": ioctl_code,
                    "parameters": parameters
                    }
 
         request_topic = f"ate/{self.device_id}/{peripheral_name}/io-control"
-        self.ioctl_response_event.clear()
-        return await self.mqtt_client.publish_with_response(request_topic, json.dumps(message))
+        statistics = self.statistics.setdefault(peripheral_name, LatencyStatistics())
+        start = time.perf_counter()
+        try:
+            response = await self.mqtt_client.publish_with_response(request_topic, json.dumps(message), timeout)
+        except asyncio.TimeoutError:
+            statistics.add_timeout()
+            raise
+
+        statistics.add(time.perf_counter() - start)
+        return response
 
-    def on_response_received(self, response):
-        self.received_response = response
-        self.ioctl_response_event.set()
+    def get_statistics(self) -> dict:
+        return {peripheral_name: statistics.to_dict() for peripheral_name, statistics in self.statistics.items()}
@@ -1,5 +1,6 @@
 from transitions.extensions import HierarchicalMachine as Machine
 
+from ate_apps_common.request_response import REQUEST_ID, REQUEST_IDS, without_request_id
 from ate_master_app.statemachines.TestingSiteMachine import (TestingSiteModel, TestingSiteMachine)
 
 from typing import List
@@ -36,8 +37,9 @@ class MultiSiteTestingModel:
     def handle_resource_request(self, site_id: str, resource_request: dict):
         self._site_models[site_id].resource_requested(resource_request=resource_request)
 
+        # each site sends its request with its own correlation id
         for site in self._site_models.values():
-            if site.resource_request is not None and site.resource_request != resource_request:
+            if site.resource_request is not None and without_request_id(site.resource_request) != without_request_id(resource_request):
                 raise RuntimeError(f'mismatch in resource request from site "{site_id}": previous request of site "{site.site_id}" differs')
 
         self._handle_resource_release()
@@ -52,7 +54,12 @@ class MultiSiteTestingModel:
         if not self._check_for_all_remaining_sites_waiting_for_resource():
             return
 
-        resource_request = self._site_models[self._released_sites[0]].resource_request  # all sites have same request
+        resource_request = without_request_id(self._site_models[self._released_sites[0]].resource_request)  # all sites have same request
+        request_ids = [self._site_models[site_id].resource_request[REQUEST_ID] for site_id in self._released_sites
+                       if REQUEST_ID in self._site_models[site_id].resource_request]
+        if request_ids:
+            # the response answers the requests of all sites at once, a test app testing several sites sends one request for them
+            resource_request[REQUEST_IDS] = list(dict.fromkeys(request_ids))
         self._resource_required(resource_request)
 
     def handle_testresult(self, site_id: str, testresult: dict):
@@ -55,4 +55,5 @@ class TaskHandler:
         self.app.cleanup_ctx.append(self._create_task_callback(lambda app: self._request_handler(app)))
         host = self._configuration.webui_host
         port = self._configuration.webui_port
-        web.run_app(self.app, host=host, port=port)
+        # the mqtt client of the connection handler is bound to this loop, aiohttp would start a new one
+        web.run_app(self.app, host=host, port=port, loop=asyncio.get_event_loop())
@@ -23,3 +23,11 @@ class MasterConfiguration(BaseModel):
     tester_type: str
     loglevel: int = LogLevel.Warning()
     develop_mode: bool = False
+    stdf_write_mode: str = 'buffered'
+    stdf_buffer_size: int = 64 * 1024
+    stdf_flush_interval: float = 1.0
+    stdf_ptr_compression: bool = False
+    stdf_result_transport: str = 'json'
+    testapp_timing: bool = False
+    # one test app process tests all sites, it is started by the control of the first site
+    multi_site_testapp: bool = False
@@ -14,12 +14,15 @@ class ResultInformationHandler:
         self._site_info_handler = BinInformationHandler(sites_id)
         self._bin_table_info_handler = BinTableInformationHandler(sites_id)
         self.prr_rec_information = {}
+        # incremented on every change of the yield and bin table counters
+        self.version = 0
 
     def handle_result(self, prr_record: dict):
         part_id = self._get_part_id(prr_record)
         site_num = str(prr_record['SITE_NUM'])
         soft_bin = str(prr_record['SOFT_BIN'])
         message_handle_result = (True, '')
+        self.version += 1
 
         # add 'PART_RETEST' field to count part retest commands
         if not self.prr_rec_information.get(part_id):
@@ -31,9 +34,13 @@ class ResultInformationHandler:
             old_prr_rec = self.prr_rec_information[part_id]
             part_count = old_prr_rec['PART_RETEST']
             prr_record['PART_RETEST'] = part_count + 1
-            self.prr_rec_information.update({part_id: prr_record})
-            message_handle_result = self._yield_info_handler.reaccumulate_bin_info(self.prr_rec_information)
-            self._bin_table_info_handler.reaccumulate_bin_table_info(self.prr_rec_information)
+            self.prr_rec_information.update({part_id: self._extract_needed_fields(prr_record)})
+
+            # only the contribution of the replaced result is updated, instead of recounting the whole lot
+            old_site_num = str(old_prr_rec['SITE_NUM'])
+            old_soft_bin = str(old_prr_rec['SOFT_BIN'])
+            message_handle_result = self._yield_info_handler.replace_site_bin_info(old_site_num, old_soft_bin, site_num, soft_bin)
+            self._bin_table_info_handler.replace_bin_table_info(old_site_num, old_soft_bin, site_num, soft_bin)
 
         return message_handle_result
 
@@ -57,6 +64,7 @@ class ResultInformationHandler:
 
     def set_bin_settings(self, bin_table: dict):
         bin_settings = self.get_bin_settings(bin_table)
+        self.version += 1
 
         self._site_info_handler.set_sites_information(bin_table)
         self._yield_info_handler.set_bin_settings(bin_settings)
@@ -64,6 +72,7 @@ class ResultInformationHandler:
         self._bin_table_info_handler.set_bin_table(bin_table)
 
     def update_hbin_number(self, sbin: str, hbin: str):
+        self.version += 1
         self._bin_table_info_handler._update_hbin_num(sbin, hbin)
 
     @staticmethod
@@ -82,6 +91,7 @@ class ResultInformationHandler:
         self._site_info_handler.clear_site_information()
         self._bin_table_info_handler.clear_bin_table()
         self.prr_rec_information.clear()
+        self.version += 1
 
     def get_site_result_response(self, prr_record: dict) -> dict:
         return self._yield_info_handler.get_site_result(prr_record)
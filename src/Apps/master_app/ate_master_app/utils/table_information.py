@@ -26,12 +26,16 @@ class BinTableInformationHandler:
     def accumulate_bin_table_info(self, site_id: str, sbin: int):
         return self._update_site_count(site_id, sbin)
 
-    def _update_site_count(self, site_id: str, sbin: int):
+    def replace_bin_table_info(self, old_site_id: str, old_sbin: int, site_id: str, sbin: int):
+        self._update_site_count(old_site_id, old_sbin, -1)
+        self._update_site_count(site_id, sbin)
+
+    def _update_site_count(self, site_id: str, sbin: int, count: int = 1):
         for site_count in self._bin_table[str(sbin)]['siteCounts']:
             if site_count['siteId'] != site_id:
                 continue
 
-            site_count['count'] += 1
+            site_count['count'] += count
 
     def reaccumulate_bin_table_info(self, prrs: list):
         self._reset_site_count()
@@ -1,24 +1,36 @@
 from ate_common.program_utils import BinTableFieldName
 
+ALL_SITES_ID = '-1'
+
 
 class YieldInformation:
     def __init__(self, types, site_id):
         self._site_id = site_id
         self._yield_info = {}
+        self._max_count = 0
+        # the yield values are only calculated when they are requested
+        self._outdated = False
         self._init_yield_info(types)
 
     def _init_yield_info(self, types):
         for t in types:
             self._yield_info[t] = {"count": 0, "value": 0}
 
-    def update_yield_info(self, type):
-        self._yield_info[type]["count"] += 1
-        self._calculate_yield()
+    def update_yield_info(self, type, count=1):
+        self._yield_info[type]["count"] += count
+        self._max_count += count
+        self._outdated = True
+
+    def remove_yield_info(self, type):
+        self.update_yield_info(type, -1)
 
     def max_count(self):
-        return sum([values["count"] for _, values in self._yield_info.items()])
+        return self._max_count
 
     def get_yield_info(self):
+        if self._outdated:
+            self._calculate_yield()
+
         return self._yield_info
 
     def _calculate_yield(self):
@@ -26,13 +38,18 @@ class YieldInformation:
         for _, t in self._yield_info.items():
             t["value"] = self._calculate_value(t["count"], max_count)
 
+        self._outdated = False
+
     @staticmethod
     def _calculate_value(count, max):
+        if max == 0:
+            return 0
+
         return (count / max) * 100
 
     def generate_yield_messages(self):
         messages = [self._yield_message(name, values["value"], values["count"])
-                    for name, values in self._yield_info.items()]
+                    for name, values in self.get_yield_info().items()]
 
         messages.append(self._yield_message('sum', 100.0, self.max_count()))
         return messages
@@ -44,6 +61,7 @@ class YieldInformation:
 class YieldInformationHandler:
     def __init__(self):
         self._bin_settings = None
+        self._sbin_types = {}
         self.prr_rec_information = {}
         self.sites_yield_information = {}
 
@@ -69,32 +87,46 @@ class YieldInformationHandler:
         return {'siteid': siteid, 'partid': part_id, 'binning': hard_bin, 'logflag': 0, 'additionalinfo': 0}
 
     def accumulate_site_bin_info(self, site_num, soft_bin):
+        return self._update_site_bin_info(site_num, soft_bin, 1)
+
+    def replace_site_bin_info(self, old_site_num, old_soft_bin, site_num, soft_bin):
+        # a retested part only counts with its latest result
+        result = self._update_site_bin_info(site_num, soft_bin, 1)
+        if old_soft_bin in self._sbin_types:
+            self._update_site_bin_info(old_site_num, old_soft_bin, -1)
+
+        return result
+
+    def _update_site_bin_info(self, site_num, soft_bin, count):
         if not self._bin_settings:
             return False, "bin settings are not received yet"
 
-        for typ, setting in self._bin_settings.items():
-            if soft_bin not in setting['sbins']:
-                continue
+        typ = self._sbin_types.get(soft_bin)
+        if typ is None:
+            return False, f"soft bin: '{soft_bin}' could not be mapped to any of the setting's bins"
 
-            if not self.sites_yield_information.get(site_num):
-                self.sites_yield_information[site_num] = YieldInformation(list(self._bin_settings.keys()), site_num)
+        for site_id in (site_num, ALL_SITES_ID):
+            if not self.sites_yield_information.get(site_id):
+                self.sites_yield_information[site_id] = YieldInformation(list(self._bin_settings.keys()), site_id)
 
-            self.sites_yield_information[site_num].update_yield_info(typ)
-            return self._accumulate_all_bin_info()
+            self.sites_yield_information[site_id].update_yield_info(typ, count)
+
+        # sites without any (remaining) part are not reported
+        if self.sites_yield_information[site_num].max_count() == 0:
+            self.sites_yield_information.pop(site_num)
 
-        return False, f"soft bin: '{soft_bin}' could not be mapped to any of the setting's bins"
+        return True, ''
 
     def _accumulate_all_bin_info(self):
-        all_id = '-1'
+        all_id = ALL_SITES_ID
         all_yield_info = YieldInformation(list(self._bin_settings.keys()), all_id)
         for site_id, info in self.sites_yield_information.items():
             if site_id == all_id:
                 continue
 
             for typ, values in info.get_yield_info().items():
-                all_yield_info._yield_info[typ]["count"] += values["count"]
+                all_yield_info.update_yield_info(typ, values["count"])
 
-        all_yield_info._calculate_yield()
         self.sites_yield_information[all_id] = all_yield_info
         return True, ''
 
@@ -115,6 +147,10 @@ class YieldInformationHandler:
 
     def set_bin_settings(self, bin_settings: dict):
         self._bin_settings = bin_settings
+        self._sbin_types = {}
+        for typ, setting in bin_settings.items():
+            for sbin in setting['sbins']:
+                self._sbin_types.setdefault(sbin, typ)
 
     @staticmethod
     def get_bin_settings(bin_table: list) -> dict:
@@ -0,0 +1,75 @@
+"""
+Replays a synthetic lot through the ResultInformationHandler and reports the
+time spent per part, including retests and the UI yield requests.
+
+usage: python bench_result_information.py [--parts 100000] [--retest 0.05] [--sites 4]
+"""
+import argparse
+import random
+import time
+
+from ate_master_app.utils.result_Information_handler import ResultInformationHandler
+
+BIN_TABLE = [{'SBIN': '1', 'HBIN': '1', 'SBINNAME': 'SB_GOOD1', 'GROUP': 'BT_PASS', 'DESCRIPTION': ''},
+             {'SBIN': '12', 'HBIN': '2', 'SBINNAME': 'SB_CONT_OPEN', 'GROUP': 'BT_FAIL_CONT', 'DESCRIPTION': ''},
+             {'SBIN': '22', 'HBIN': '42', 'SBINNAME': 'SB_THD', 'GROUP': 'BT_FAIL_ELECTRIC', 'DESCRIPTION': ''},
+             {'SBIN': '60000', 'HBIN': '0', 'SBINNAME': 'SB_SMU_ALARM1', 'GROUP': 'BT_ALARM', 'DESCRIPTION': ''}]
+
+SOFT_BINS = [1] * 90 + [12] * 5 + [22] * 4 + [60000]
+YIELD_REQUEST_INTERVAL = 100
+
+
+def generate_prr(part_id: str, site_num: int, soft_bin: int) -> dict:
+    return {'type': 'PRR', 'REC_LEN': None, 'REC_TYP': 5, 'REC_SUB': 20,
+            'HEAD_NUM': 0, 'SITE_NUM': site_num, 'PART_FLG': 0 if soft_bin == 1 else 8, 'NUM_TEST': 1,
+            'HARD_BIN': 1, 'SOFT_BIN': soft_bin, 'X_COORD': 1, 'Y_COORD': 1,
+            'TEST_T': 0, 'PART_ID': part_id, 'PART_TXT': '1', 'PART_FIX': 0}
+
+
+def generate_lot(num_parts: int, retest_ratio: float, num_sites: int, seed: int = 0) -> list:
+    rand = random.Random(seed)
+    lot = []
+    for part_num in range(num_parts):
+        if part_num and rand.random() < retest_ratio:
+            part_id = f'part{rand.randrange(part_num)}'
+        else:
+            part_id = f'part{part_num}'
+
+        lot.append(generate_prr(part_id, part_num % num_sites, rand.choice(SOFT_BINS)))
+
+    return lot
+
+
+def run(num_parts: int, retest_ratio: float, num_sites: int):
+    sites = [str(site) for site in range(num_sites)]
+    handler = ResultInformationHandler(sites)
+    handler.set_bin_settings(BIN_TABLE)
+    lot = generate_lot(num_parts, retest_ratio, num_sites)
+
+    slowest = 0.0
+    start = time.perf_counter()
+    for part_num, prr in enumerate(lot):
+        part_start = time.perf_counter()
+        handler.handle_result(prr)
+        if part_num % YIELD_REQUEST_INTERVAL == 0:
+            handler.get_yield_messages()
+        slowest = max(slowest, time.perf_counter() - part_start)
+
+    duration = time.perf_counter() - start
+    retests = sum(part_info['retest_count'] for part_info in handler.get_part_count_infos()[:-1])
+    print(f'parts: {num_parts}, retests: {retests}, sites: {num_sites}')
+    print(f'total: {duration:.3f} s, per part: {duration / num_parts * 1e6:.1f} us, slowest part: {slowest * 1e3:.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--parts', type=int, default=100000)
+    parser.add_argument('--retest', type=float, default=0.05)
+    parser.add_argument('--sites', type=int, default=4)
+    args = parser.parse_args()
+
+    run(args.parts, args.retest, args.sites)
+
+
+if __name__ == '__main__':
+    main()
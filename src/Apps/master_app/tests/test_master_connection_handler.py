@@ -1,5 +1,7 @@
 from ate_master_app.master_connection_handler import MasterConnectionHandler
 from ate_apps_common.mqtt_connection import MqttConnection
+from ate_apps_common.stdf_encoder import encode_records
+from ate_apps_common.stdf_utils import generate_PIR_dict, generate_PRR_dict
 from ate_common.logger import Logger
 
 PORT = 1883
@@ -31,8 +33,14 @@ class TestApplication:
         self.testappsite = siteid
         self.testappmsg = msg
 
-    def on_testapp_testresult_changed(self, siteid, msg):
-        pass
+    def on_testapp_testresult_changed(self, siteid, msg, stdf_part=None):
+        self.testresultsite = siteid
+        self.testresultmsg = msg
+        self.stdf_part = stdf_part
+
+    def on_testapp_timing_changed(self, siteid, timing):
+        self.timingsite = siteid
+        self.timing = timing
 
     def on_handler_command_message(self, message):
         self.handler_command = message
@@ -58,6 +66,17 @@ class TestApplication:
         self.testappmsg = None
         self.handler_command = None
 
+    def test_masterconnhandler_testapp_stdf_part_is_decoded(self):
+        records = [generate_PIR_dict(0, 1), generate_PRR_dict(0, 1, True, 0, 1, 1, 1, 1, 10, '1', '1', [0])]
+        msg = Msg()
+
+        msg.topic = "ate/sct01/TestApp/stdf/site1"
+        msg.payload = encode_records(records)
+        self.connection_handler.mqtt._on_message_handler(None, None, msg)
+        assert(self.testresultsite == "1")
+        assert(self.testresultmsg['payload'] == records)
+        assert(self.stdf_part == msg.payload)
+
     def test_masterconnhandler_control_status_event_is_dispatched(self):
         msg = Msg()
 
@@ -74,6 +93,15 @@ class TestApplication:
         self.connection_handler.mqtt._on_message_handler(None, None, msg)
         assert(self.testappsite == "1")
 
+    def test_masterconnhandler_testapp_timing_is_dispatched(self):
+        msg = Msg()
+
+        msg.topic = "ate/sct01/TestApp/timing/site1"
+        msg.payload = "{\"type\": \"timing\", \"payload\": {\"tests\": {}, \"part\": {}}}"
+        self.connection_handler.mqtt._on_message_handler(None, None, msg)
+        assert(self.timingsite == "1")
+        assert(self.timing == {'tests': {}, 'part': {}})
+
 # ToDo: Implement me!
 
     # def test_masterconnhandler_sendnext_sends_correct_data(self, mocker):
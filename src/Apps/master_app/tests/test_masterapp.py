@@ -1,4 +1,5 @@
 from typing import List
+import json
 import pytest
 import mock
 import os
@@ -6,6 +7,7 @@ from utils import (create_xml_file, DEVICE_ID)
 from ate_master_app import master_application
 from ate_master_app import master_connection_handler
 from ate_master_app.utils.master_configuration import MasterConfiguration
+from ate_apps_common.stdf_aggregator import StdfTestResultAggregator
 
 LOT_NUMBER = '306426.001'
 WRONG_LOT_NUMBER = '000000.000'
@@ -387,6 +389,58 @@ class TestApplication:
         self.trigger_test_result_change(self.app, "1")
         assert (self.app.state == "ready")
 
+    def test_masterapp_testing_resource_requests_with_request_ids_are_answered_together(self, mocker):
+        self._common_setup_for_testing_with_resource_synchronization(self.app, mocker)
+
+        self.set_testing_sites_strategy([[['0', '1']]])
+        self.trigger_next_test()
+
+        # the requests only differ in their correlation id
+        for site, request_id in (("0", "id0"), ("1", "id1")):
+            self.app.on_testapp_resource_changed(site, {'periphery_type': 'Temperature', 'ioctl_name': 'set_temperature',
+                                                        'parameters': {'temperature': 25}, 'request_id': request_id})
+        assert (self.app.state == "testing_waiting_for_resource")
+
+        resource_request = self.app.apply_resource_config.call_args[0][0]
+        assert resource_request == {'periphery_type': 'Temperature', 'ioctl_name': 'set_temperature',
+                                    'parameters': {'temperature': 25}, 'request_ids': ['id0', 'id1']}
+
+    @mock.patch.object(master_application.MasterApplication, 'get_test_parameters', return_value={
+        'testapp_script_path': './thetest_application.py',
+        'cwd': 'src/ATE/apps/testApp',
+        'testapp_script_args': ['--verbose'],
+        'bin_table': ''
+    })
+    @mock.patch.object(master_connection_handler.MasterConnectionHandler, "send_load_test_to_all_sites")
+    def test_masterapp_multi_site_testapp_is_loaded_by_first_control(self, mock1, mock2):
+        self.app.multi_site_testapp = True
+        self.app.startup_done()
+        self.app.all_sites_detected()
+        self.app.load_command({'command': 'load', 'lot_number': LOT_NUMBER})
+
+        testapp_params, sites = master_connection_handler.MasterConnectionHandler.send_load_test_to_all_sites.call_args[0]
+        assert (testapp_params['testapp_script_args'] == ['--verbose', '--site_ids', '0,1'])
+        assert (sites == ['0'])
+
+        # the control of the other site stays idle, the test app reports the state of both sites
+        self.trigger_control_state_change(self.app, "0", "loading")
+        self.trigger_control_state_change(self.app, "0", "busy")
+        self.trigger_test_state_change(self.app, "0", "idle")
+        self.trigger_test_state_change(self.app, "1", "idle")
+        assert (self.app.state == "ready")
+
+    def test_masterapp_multi_site_testapp_resource_request_stands_for_all_sites(self, mocker):
+        self.app.multi_site_testapp = True
+        self._common_setup_for_testing_with_resource_synchronization(self.app, mocker)
+
+        self.set_testing_sites_strategy([[['0', '1']]])
+        self.trigger_next_test()
+
+        self.app.on_testapp_resource_changed("0", {'periphery_type': 'Temperature', 'ioctl_name': 'set_temperature',
+                                                   'parameters': {'temperature': 25}, 'request_id': 'id0'})
+        assert (self.app.state == "testing_waiting_for_resource")
+        assert (self.app.apply_resource_config.call_args[0][0]['request_ids'] == ['id0'])
+
     def test_masterapp_testing_both_sites_request_resources_separately(self, mocker):
         self._common_setup_for_testing_with_resource_synchronization(self.app, mocker)
 
@@ -604,3 +658,17 @@ class TestApplication:
                                    {'name': 'type2', 'value': 100.00, 'count': 1, 'siteid': site_num},
                                    {'name': 'sum', 'value': 100.00, 'count': 1, 'siteid': site_num},
                                    ]
+
+    def test_masterapp_testapp_timing_is_written_along_with_the_stdf_file(self, tmp_path):
+        stdf_path = tmp_path / 'lot.stdf'
+        self.app._stdf_aggregator = StdfTestResultAggregator(DEVICE_ID + ".Master", self.app.sites, LOT_NUMBER, LOT_NUMBER, file_path=str(stdf_path))
+        timing = {'tests': {'t1': {'do': {'count': 1, 'mean_us': 2.0, 'p50_us': 2.0, 'p95_us': 2.0, 'p99_us': 2.0, 'max_us': 2.0}}}, 'part': {}}
+
+        for site in self.app.configuredSites:
+            self.app.on_testapp_timing_changed(site, timing)
+            self.app.on_testapp_testsummary_changed({'type': 'testsummary', 'payload': []})
+
+        with open(tmp_path / 'lot.timing.json') as f:
+            assert json.load(f)['sites'] == {site: timing for site in self.app.configuredSites}
+        assert stdf_path.exists()
+        assert self.app.testapp_timing == {}
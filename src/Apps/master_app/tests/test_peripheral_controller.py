@@ -1,6 +1,7 @@
 # These tests are probably redundant by now!
 
 from ate_master_app.peripheral_controller import PeripheralController
+import asyncio
 import pytest
 import json
 
@@ -12,9 +13,11 @@ class DummyMqtt:
         tup = (topic, payload)
         self.sent_data.append(tup)
 
-    async def publish_with_response(self, request_topic, message):
+    async def publish_with_response(self, request_topic, message, timeout=None):
         self.sent_data.append((request_topic + "/request", message))
-        pass
+        if "Timeout" in request_topic:
+            raise asyncio.TimeoutError()
+        return {"type": "io-control-response"}
 
 
 class TestPeripheralController:
@@ -37,3 +40,17 @@ class TestPeripheralController:
             assert (params["type"] == "io-control-request")
             assert (params["ioctl_name"] == "foo_ioctl")
             assert (params["parameters"]["foo"] == "bar")
+
+    @pytest.mark.asyncio
+    async def test_latency_statistics_per_peripheral(self):
+        ctrl = PeripheralController(DummyMqtt(), 4711)
+        await ctrl.device_io_control("Temperature", "set_temperature", {})
+        await ctrl.device_io_control("Temperature", "set_temperature", {})
+        with pytest.raises(asyncio.TimeoutError):
+            await ctrl.device_io_control("TimeoutPeriphery", "foo_ioctl", {})
+
+        statistics = ctrl.get_statistics()
+        assert statistics["Temperature"]["count"] == 2
+        assert statistics["Temperature"]["timeouts"] == 0
+        assert statistics["TimeoutPeriphery"]["count"] == 0
+        assert statistics["TimeoutPeriphery"]["timeouts"] == 1
@@ -1,3 +1,4 @@
+import random
 from pytest import fixture
 from ate_master_app.utils.result_Information_handler import ResultInformationHandler
 
@@ -42,3 +43,22 @@ def test_handle_part_result_information_with_retest(result_info_handler: ResultI
     # part 2, site 1 is tested twice
     assert part_result[1]['retest_count'] == 1
     assert len(part_result) == 3
+
+
+def test_retest_updates_counts_incrementally(result_info_handler: ResultInformationHandler):
+    rand = random.Random(0)
+    for part_num in range(500):
+        # every 10th part is a retest of an already tested part, possibly on another site with another bin
+        part_id = f'p{rand.randrange(part_num)}' if part_num and part_num % 10 == 0 else f'p{part_num}'
+        prr = dict(PRR_RECORD_SITE0, PART_ID=part_id, SITE_NUM=rand.choice([0, 1]), SOFT_BIN=rand.choice([1, 22, 60000]))
+        result_info_handler.handle_result(prr)
+
+    yield_messages = result_info_handler.get_yield_messages()
+    bin_table = result_info_handler.get_bin_table()
+    counts = {(row['sBin'], site_count['siteId']): site_count['count'] for row in bin_table for site_count in row['siteCounts']}
+
+    result_info_handler._yield_info_handler.reaccumulate_bin_info(result_info_handler.prr_rec_information)
+    result_info_handler._bin_table_info_handler.reaccumulate_bin_table_info(result_info_handler.prr_rec_information)
+
+    assert sorted(yield_messages, key=str) == sorted(result_info_handler.get_yield_messages(), key=str)
+    assert counts == {(row['sBin'], site_count['siteId']): site_count['count'] for row in bin_table for site_count in row['siteCounts']}
@@ -1,8 +1,10 @@
 from ate_master_app.utils.master_configuration import MasterConfiguration
+import asyncio
+import json
 import pytest
 import mock
 from ate_master_app.master_application import MasterApplication
-from ate_master_app.master_webservice import WebsocketCommunicationHandler
+from ate_master_app.master_webservice import ClientSendQueue, MessageTypes, WebsocketCommunicationHandler
 from tests.test_masterapp import default_configuration
 
 
@@ -28,3 +30,78 @@ class TestWebsocketCommunicationHandler:
         data = "{\"type\" : \"cmd\", \"command\" : \"load\" }"
         self.webservice.handle_client_message(data)
         MasterApplication.dispatch_command.assert_called_once()
+
+
+class DummyConnection:
+    def __init__(self, connection_id):
+        self.connection_id = connection_id
+        self.send_queue = ClientSendQueue(4)
+
+    def is_alive(self):
+        return True
+
+    def get_connection_id(self):
+        return self.connection_id
+
+    def enqueue(self, message_type, message):
+        self.send_queue.put(message_type, message)
+
+    def messages(self):
+        return [json.loads(self.send_queue.get_nowait()) for _ in range(len(self.send_queue))]
+
+
+class TestClientSendQueue:
+
+    def test_state_messages_are_merged(self):
+        queue = ClientSendQueue()
+        queue.put(MessageTypes.Yield(), 'yield1')
+        queue.put(MessageTypes.TestResult(), 'result')
+        queue.put(MessageTypes.Yield(), 'yield2')
+
+        assert [queue.get_nowait() for _ in range(len(queue))] == ['result', 'yield2']
+        assert queue.merged == 1
+
+    def test_oldest_update_is_dropped_if_full(self):
+        queue = ClientSendQueue(3)
+        queue.put(MessageTypes.BinTable(), 'bintable')
+        for index in range(4):
+            queue.put(MessageTypes.Logs(), f'logs{index}')
+
+        assert [queue.get_nowait() for _ in range(len(queue))] == ['bintable', 'logs2', 'logs3']
+        assert queue.dropped == 2
+
+    @pytest.mark.asyncio
+    async def test_get_waits_for_messages(self):
+        queue = ClientSendQueue()
+        asyncio.get_running_loop().call_soon(queue.put, MessageTypes.Logs(), 'logs')
+
+        assert await asyncio.wait_for(queue.get(), 1) == 'logs'
+
+
+class TestWebsocketPush:
+
+    @pytest.fixture
+    def handler(self):
+        handler = WebsocketCommunicationHandler({'mqtt_handler': None, 'master_app': mock.Mock()})
+        handler._websockets = {DummyConnection('a'), DummyConnection('b')}
+        return handler
+
+    @pytest.mark.asyncio
+    async def test_message_is_serialized_once_for_all_clients(self, handler):
+        with mock.patch('ate_master_app.master_webservice.json.dumps', wraps=json.dumps) as dumps:
+            await handler.send_yields([{'name': 'Sum', 'siteid': '-1', 'count': 1}])
+
+        assert dumps.call_count == 1
+        for connection in handler._websockets:
+            assert connection.messages() == [{'type': 'yield', 'payload': [{'name': 'Sum', 'siteid': '-1', 'count': 1}]}]
+
+    @pytest.mark.asyncio
+    async def test_site_results_are_sent_as_testresult_messages(self, handler):
+        site_test_results = [{'type': 'testresult', 'payload': [{'type': 'PIR', 'SITE_NUM': site}, {'type': 'PRR', 'SITE_NUM': site}]}
+                             for site in (0, 1)]
+        await handler.send_site_testresults_to_all(site_test_results)
+        await handler.send_site_testresults_to_all([])
+
+        for connection in handler._websockets:
+            messages = connection.messages()
+            assert messages == site_test_results
@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+COMMAND_LANE = 'command'
+NEXT_LANE = 'next'
+
+DEFAULT_QUEUE_SIZE = 64
+
+_SHUTDOWN = object()
+
+
+class LaneMetrics:
+    '''
+        Queue depth and latency of the callbacks executed by one lane,
+        wait time is the time a callback spent in the queue and run time
+        the time it took to execute.
+    '''
+    __slots__ = ['submitted', 'completed', 'max_queue_depth', 'total_wait_time', 'max_wait_time',
+                 'total_run_time', 'max_run_time']
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.max_queue_depth = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.total_run_time = 0.0
+        self.max_run_time = 0.0
+
+    def to_dict(self) -> dict:
+        completed = max(self.completed, 1)
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'max_queue_depth': self.max_queue_depth,
+            'avg_wait_time': self.total_wait_time / completed,
+            'max_wait_time': self.max_wait_time,
+            'avg_run_time': self.total_run_time / completed,
+            'max_run_time': self.max_run_time,
+        }
+
+
+class _Lane:
+    def __init__(self, name: str, queue_size: int, on_error: Callable[[Exception], None]):
+        self.name = name
+        self.metrics = LaneMetrics()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._on_error = on_error
+        self._thread = threading.Thread(target=self._work, name=f'{name}-lane', daemon=True)
+        self._thread.start()
+
+    def submit(self, callback: Callable[[], None]):
+        if self._queue.full():
+            logger.warning(f'{self.name} lane is full ({self._queue.maxsize} callbacks), waiting for a free slot')
+
+        self._queue.put((time.perf_counter(), callback))
+        with self._lock:
+            self.metrics.submitted += 1
+            self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self._queue.qsize())
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return self.metrics.to_dict()
+
+    def shutdown(self, wait: bool):
+        self._queue.put((time.perf_counter(), _SHUTDOWN))
+        if wait and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _work(self):
+        while True:
+            submitted, callback = self._queue.get()
+            if callback is _SHUTDOWN:
+                return
+
+            start = time.perf_counter()
+            try:
+                callback()
+            except Exception as e:
+                self._on_error(e)
+
+            end = time.perf_counter()
+            with self._lock:
+                metrics = self.metrics
+                metrics.completed += 1
+                metrics.total_wait_time += start - submitted
+                metrics.max_wait_time = max(metrics.max_wait_time, start - submitted)
+                metrics.total_run_time += end - start
+                metrics.max_run_time = max(metrics.max_run_time, end - start)
+
+
+class CommandExecutor:
+    '''
+        Long-lived executor for the mqtt callbacks of the test app.
+
+        Every lane is a single worker thread with a bounded queue, so the
+        callbacks of a lane are executed one after the other in the order
+        they were submitted. 'next' commands get their own lane, a running
+        test does not delay the remaining commands and callbacks.
+        Submitting to a full lane blocks until the lane has a free slot.
+    '''
+
+    def __init__(self, on_error: Callable[[Exception], None], queue_size: int = DEFAULT_QUEUE_SIZE):
+        self._lanes: Dict[str, _Lane] = {
+            lane: _Lane(lane, queue_size, on_error) for lane in (COMMAND_LANE, NEXT_LANE)
+        }
+        self._is_shutdown = False
+
+    def submit(self, callback: Callable[[], None], lane: str = COMMAND_LANE):
+        if self._is_shutdown:
+            raise RuntimeError('cannot submit callbacks after shutdown')
+
+        self._lanes[lane].submit(callback)
+
+    def shutdown(self, wait: bool = True):
+        if self._is_shutdown:
+            return
+
+        self._is_shutdown = True
+        for lane in self._lanes.values():
+            lane.shutdown(wait)
+
+    def get_metrics(self, lane: Optional[str] = None) -> dict:
+        if lane is not None:
+            return self._lanes[lane].get_metrics()
+
+        return {name: lane.get_metrics() for name, lane in self._lanes.items()}
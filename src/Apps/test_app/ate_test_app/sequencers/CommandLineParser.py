@@ -3,17 +3,25 @@ import json
 
 
 class CommandLineParser:
-    __slots__ = ["broker_host", "broker_port", "device_id", "site_id", "bin_strategytype", "harness_strategytype"]
+    __slots__ = ["broker_host", "broker_port", "device_id", "site_id", "site_ids", "bin_strategytype", "harness_strategytype"]
 
     def __init__(self, argv=None):
         self.broker_host = "127.0.0.1"
         self.broker_port = 1883
         self.device_id = "developmode"
         self.site_id = "0"
+        self.site_ids = None
         self.bin_strategytype = "file"
         self.harness_strategytype = "mixed"
         self.init_from_command_line(argv)
 
+    def get_site_ids(self) -> list:
+        # one process may test several sites (--site_ids 0,1,2,3), site_id is the first one
+        if not self.site_ids:
+            return [self.site_id]
+
+        return [site_id.strip() for site_id in self.site_ids.split(',')]
+
     def to_json(self):
         return {key: getattr(self, key, None) for key in self.__slots__}
 
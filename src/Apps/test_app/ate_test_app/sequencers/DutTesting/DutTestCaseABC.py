@@ -1,17 +1,27 @@
 from ate_test_app.sequencers.DutTesting.Result import Result
+from ate_test_app.sequencers.DutTesting.TestParameters import OutputParameter
 from ate_common.logger import LogLevel
 from abc import ABC, abstractmethod
 import time
 
 
 class DutTestCaseABC(ABC):
+    # durations of the last run, recorded by the execution policies (see TimingStatistics)
+    do_time_ns = 0
+    aggregate_time_ns = 0
+
     def __init__(self, context):
         self.context = context
         self.logger = self.context.logger
+        self.site_num = None
 
     def run(self, site_num: int):
-        start = time.time()
+        start = time.perf_counter_ns()
         exception = False
+        # the site under test, a process may test several sites (see MultiSiteExecutionPolicy)
+        if site_num != self.site_num:
+            self.site_num = site_num
+            self.select_site(site_num)
         try:
             self.do()
         except (NameError, AttributeError) as e:
@@ -22,11 +32,18 @@ class DutTestCaseABC(ABC):
             self.logger.log_message(LogLevel.Warning(), e)
             exception = True
 
-        end = time.time()
-        self._execution_time += end - start
+        end = time.perf_counter_ns()
+        self.do_time_ns = end - start
+        self._execution_time += self.do_time_ns / 1e9
         self._test_executions += 1
 
-        return self.aggregate_test_result(site_num, exception), exception
+        result = self.aggregate_test_result(site_num, exception)
+        self.aggregate_time_ns = time.perf_counter_ns() - end
+
+        return result, exception
+
+    def select_site(self, site_num: int):
+        pass
 
     def set_instance_number(self, instance_number: int):
         self.instance_number = instance_number
@@ -81,6 +98,13 @@ class DutTestCaseBase(DutTestCaseABC):
     def do(self):
         pass
 
+    def select_site(self, site_num: int):
+        # the output parameters keep their statistics per site
+        output_parameters = vars(self.op).values() if hasattr(self, 'op') else ()
+        for output_parameter in output_parameters:
+            if isinstance(output_parameter, OutputParameter):
+                output_parameter.select_site(int(site_num))
+
     @staticmethod
     def _select_bin(current_bin: int, test_result_tuple: tuple):
         '''
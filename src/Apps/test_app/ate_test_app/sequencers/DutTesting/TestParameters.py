@@ -2,12 +2,12 @@
 
 from abc import ABC, abstractmethod
 from typing import Dict
-from ate_apps_common.stdf_utils import (generate_MPR_dict, generate_PTR_dict, generate_TSR_dict)
+from ate_apps_common.stdf_utils import (compact_PTR_dict, generate_MPR_dict, generate_PTR_dict, generate_TSR_dict)
 from ate_test_app.sequencers.DutTesting.Result import Result
 
 import math
-
-INITIAL_MEASUREMENT_NUMBER = 5000
+import random
+import numpy as np
 
 
 class InputParameter:
@@ -69,18 +69,44 @@ class Measurement(ABC):
 
 
 class MultiMeasurement(Measurement):
+    '''
+        Arrays written by the tester driver (numpy arrays, array('d'), ...)
+        are referenced without copying, so they must not be modified before
+        the record of the part was generated. Single values are collected
+        and all chunks are joined to one numpy array on read.
+    '''
     def __init__(self):
         super().__init__()
         self._measurement = []
+        self._values = []
 
     def write_impl(self, measurement):
-        self._measurement.append(measurement)
+        if isinstance(measurement, (int, float)):
+            self._values.append(measurement)
+            return
+
+        self._join_values()
+        self._measurement.append(np.ravel(np.asarray(measurement, dtype=np.float64)))
+
+    def read(self):
+        return self.read_impl()
 
     def read_impl(self):
-        return self._measurement
+        self._join_values()
+        if len(self._measurement) != 1:
+            self._measurement[:] = [np.concatenate(self._measurement) if self._measurement else np.empty(0)]
+
+        return self._measurement[0]
 
     def reset_impl(self):
         self._measurement.clear()
+        self._values.clear()
+
+    def _join_values(self):
+        # keeps the order of single values and arrays
+        if self._values:
+            self._measurement.append(np.array(self._values, dtype=np.float64))
+            self._values.clear()
 
 
 class SingleMeasurement(Measurement):
@@ -98,11 +124,109 @@ class SingleMeasurement(Measurement):
         self._measurement = math.inf
 
 
+class RunningStatistics:
+    '''
+        Online (Welford) accumulator of all measurements of an output
+        parameter, every update and the TSR values are O(1) regardless
+        of the number of tested parts.
+
+        A bounded uniform sample of the measurements (reservoir) can be
+        kept for histogram display, it is disabled by default.
+    '''
+    __slots__ = ['count', 'min', 'max', 'sum', '_mean', '_m2', '_reservoir', '_reservoir_size', '_random']
+
+    def __init__(self, reservoir_size: int = 0):
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._reservoir = []
+        self._reservoir_size = reservoir_size
+        self._random = random.Random() if reservoir_size else None
+
+    def update(self, value: float):
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.sum += value
+
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+        if self._reservoir_size:
+            self._sample(value, self.count)
+
+    def update_array(self, values: np.ndarray):
+        # the moments of the array are merged into the running ones (Chan et al.)
+        values = np.ravel(np.asarray(values, dtype=np.float64))
+        count = values.size
+        if count == 0:
+            return
+
+        with np.errstate(invalid='ignore'):
+            mean = float(values.mean())
+            m2 = float(np.square(values - mean).sum())
+
+        # fmin/fmax ignore NaN the same way the comparisons in update do
+        minimum = float(np.fmin.reduce(values))
+        maximum = float(np.fmax.reduce(values))
+        if minimum < self.min:
+            self.min = minimum
+        if maximum > self.max:
+            self.max = maximum
+        self.sum += float(values.sum())
+
+        total = self.count + count
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+
+        if self._reservoir_size:
+            for index, value in enumerate(values.tolist(), self.count + 1):
+                self._sample(value, index)
+
+        self.count = total
+
+    def _sample(self, value: float, count: int):
+        if len(self._reservoir) < self._reservoir_size:
+            self._reservoir.append(value)
+            return
+
+        index = self._random.randrange(count)
+        if index < self._reservoir_size:
+            self._reservoir[index] = value
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def sum_of_squared_deviations(self) -> float:
+        return self._m2
+
+    def set_reservoir_size(self, size: int):
+        self._reservoir_size = size
+        del self._reservoir[size:]
+        if self._random is None:
+            self._random = random.Random()
+
+    @property
+    def reservoir(self) -> list:
+        return self._reservoir
+
+
 class OutputParameter:
     __slots__ = [
         '_name', '_lsl', '_ltl', '_nom', '_utl', '_usl', '_exponent', '_fmt', '_unit',
-        '_mpr', '_measurements', '_measurement', '_id', 'bin', 'bin_result', '_test_executions',
-        '_test_failures', '_alarmed_tests', '_test_description'
+        '_mpr', '_statistics', '_measurement', '_id', 'bin', 'bin_result', '_test_executions',
+        '_test_failures', '_alarmed_tests', '_test_description', '_ptr_compression', '_ptr_defaults_sent',
+        '_limits', '_scale', '_scaled_limits', '_scaled_spec_limits', '_ptr_template', '_mpr_template',
+        '_site_num', '_site_statistics'
     ]
 
     def __init__(self, name: str, lsl: float, ltl: float, nom: float, utl: float, usl: float, exponent: int, mpr: bool = False):
@@ -117,7 +241,7 @@ class OutputParameter:
         self._unit = None
         self._mpr = mpr
 
-        self._measurements = [] * INITIAL_MEASUREMENT_NUMBER
+        self._statistics = RunningStatistics()
         self._measurement = SingleMeasurement() if not mpr else MultiMeasurement()
         self._id = 0
         self.bin = 0
@@ -126,15 +250,46 @@ class OutputParameter:
         self._test_failures = 0
         self._alarmed_tests = 0
         self._test_description = ''
+        self._ptr_compression = False
+        self._ptr_defaults_sent = set()
+        self._ptr_template = None
+        self._mpr_template = None
+        self._site_num = None
+        self._site_statistics = {}
+        self._update_limits()
 
     def set_format(self, fmt: str):
         self._fmt = fmt
+        self._static_fields_changed()
 
     def set_unit(self, unit: str):
         self._unit = unit
+        self._static_fields_changed()
 
     def set_test_description(self, test_description: str):
         self._test_description = test_description
+        self._static_fields_changed()
+
+    def set_ptr_compression(self, enabled: bool):
+        # the static PTR fields (limits, units, formats, ...) are only sent with the first PTR per site
+        self._ptr_compression = enabled
+        self._ptr_defaults_sent.clear()
+
+    def _static_fields_changed(self):
+        self._ptr_template = None
+        self._mpr_template = None
+
+        # readers take the omitted fields from the first PTR of the test, once that
+        # one is outdated every following PTR has to be sent complete
+        if self._ptr_defaults_sent:
+            self._ptr_compression = False
+
+    def _update_limits(self):
+        # the effective and scaled limits only change with set_limits, they are not recalculated per part
+        self._limits = self._calculate_limits()
+        self._scale = 10**self._exponent
+        self._scaled_limits = (self._limits[0] * self._scale, self._limits[1] * self._scale)
+        self._scaled_spec_limits = (self._lsl * self._scale, self._usl * self._scale)
 
     def generate_stdf_result_record(self, is_pass: bool, site_num: int) -> Dict[str, str]:
         if self._mpr is True:
@@ -153,7 +308,34 @@ class OutputParameter:
 
     def write(self, measurement: float):
         self._measurement.write(measurement)
-        self._measurements.append(measurement)
+        if isinstance(measurement, (int, float)):
+            self._statistics.update(measurement)
+        else:
+            self._statistics.update_array(measurement)
+
+    def select_site(self, site_num: int):
+        '''
+            Switches the statistics (measurements, executions and failures) the
+            parameter collects to the ones of site_num, a process may test several
+            sites with the same test instances (see MultiSiteExecutionPolicy)
+        '''
+        if site_num == self._site_num:
+            return
+
+        if self._site_num is not None:
+            self._site_statistics[self._site_num] = (self._statistics, self._test_executions, self._test_failures)
+            self._statistics, self._test_executions, self._test_failures = \
+                self._site_statistics.pop(site_num, None) or (RunningStatistics(self._statistics._reservoir_size), 0, 0)
+
+        self._site_num = site_num
+
+    def set_reservoir_size(self, size: int):
+        self._statistics.set_reservoir_size(size)
+        for statistics, _, _ in self._site_statistics.values():
+            statistics.set_reservoir_size(size)
+
+    def get_reservoir(self) -> list:
+        return self._statistics.reservoir
 
     def default(self):
         if math.isnan(self._ltl):
@@ -185,28 +367,23 @@ class OutputParameter:
 
         self._ltl = ltl
         self._utl = utl
+        self._update_limits()
+        self._static_fields_changed()
 
     def set_bin(self, bin: int, bin_result: int):
         self.bin = bin
         self.bin_result = bin_result
 
-    def _generate_ptr_record(self, is_pass: bool, site_num: int) -> Dict[str, str]:
-        l_limit, u_limit = self._get_limits()
-        l_limit = l_limit * (10**self._exponent)
-        u_limit = u_limit * (10**self._exponent)
-        lsl = self._lsl * (10**self._exponent)
-        usl = self._usl * (10**self._exponent)
-
-        is_pass = self._measurement.read() >= l_limit and self._measurement.read() <= u_limit and self._measurement.is_set
-
-        measurement = lsl if self._measurement is None else self._measurement.read() * (10**self._exponent)
+    def _generate_ptr_template(self) -> Dict[str, str]:
+        l_limit, u_limit = self._scaled_limits
+        lsl, usl = self._scaled_spec_limits
         return generate_PTR_dict(
             test_num=self._id,
             head_num=0,
-            site_num=int(site_num),
-            is_pass=is_pass,
+            site_num=0,
+            is_pass=True,
             param_flag=0,
-            measurement=measurement,
+            measurement=0.0,
             test_txt=self._get_output_parameter_name(),
             alarm_id='',
             l_limit=l_limit,
@@ -217,19 +394,39 @@ class OutputParameter:
             ls_limit=lsl,
             us_limit=usl)
 
-    def _generate_mpr_record(self, is_pass: bool, site_num: int) -> Dict[str, str]:
-        l_limit, u_limit = self._get_limits()
-        l_limit = l_limit * (10**self._exponent)
-        u_limit = u_limit * (10**self._exponent)
-        lsl = self._lsl * (10**self._exponent)
-        usl = self._usl * (10**self._exponent)
-        record = generate_MPR_dict(
+    def _generate_ptr_record(self, is_pass: bool, site_num: int) -> Dict[str, str]:
+        l_limit, u_limit = self._scaled_limits
+        measurement = self._measurement.read()
+        is_pass = measurement >= l_limit and measurement <= u_limit and self._measurement.is_set
+
+        # only the per part fields are set, the static ones are taken from the template record
+        if self._ptr_template is None:
+            self._ptr_template = self._generate_ptr_template()
+
+        record = self._ptr_template.copy()
+        record['SITE_NUM'] = int(site_num)
+        record['TEST_FLG'] = 0b00000000 if is_pass else 0b10000000
+        record['RESULT'] = float(measurement * self._scale)
+
+        if not self._ptr_compression:
+            return record
+
+        if site_num in self._ptr_defaults_sent:
+            return compact_PTR_dict(record)
+
+        self._ptr_defaults_sent.add(site_num)
+        return record
+
+    def _generate_mpr_template(self) -> Dict[str, str]:
+        l_limit, u_limit = self._scaled_limits
+        lsl, usl = self._scaled_spec_limits
+        return generate_MPR_dict(
             test_num=self._id,
             head_num=0,
-            site_num=int(site_num),
-            is_pass=is_pass == Result.Pass(),
+            site_num=0,
+            is_pass=True,
             param_flag=0,
-            measurements=[measurement * (10**self._exponent) for measurement in self._measurement.read()],
+            measurements=[],
             test_txt=self._get_output_parameter_name(),
             alarm_id='',
             l_limit=l_limit,
@@ -240,6 +437,18 @@ class OutputParameter:
             ls_limit=lsl,
             us_limit=usl)
 
+    def _generate_mpr_record(self, is_pass: bool, site_num: int) -> Dict[str, str]:
+        if self._mpr_template is None:
+            self._mpr_template = self._generate_mpr_template()
+
+        # the results stay a numpy array, the encoder packs them from its buffer
+        measurements = self._measurement.read() * self._scale
+        record = self._mpr_template.copy()
+        record['SITE_NUM'] = int(site_num)
+        record['TEST_FLG'] = 0b00000000 if is_pass == Result.Pass() else 0b10000000
+        record['RSLT_CNT'] = len(measurements)
+        record['RTN_RSLT'] = measurements
+
         self._measurement.reset()
         return record
 
@@ -287,7 +496,9 @@ class OutputParameter:
         if self.bin_result == Result.Pass():
             pass_result = self.bin
 
-        any_fail = any(m < ll or m > ul for m in self._measurements)
+        # only the values of the current part are judged
+        measurements = self._measurement.read()
+        any_fail = bool(np.any((measurements < ll) | (measurements > ul)))
 
         if any_fail is True:
             self._test_failures += 1
@@ -296,6 +507,9 @@ class OutputParameter:
             return (Result.Pass(), pass_result)
 
     def _get_limits(self):
+        return self._limits
+
+    def _calculate_limits(self):
         ll, ul = -math.inf, math.inf
         lls = [self._ltl, self._lsl]
         uls = [self._utl, self._usl]
@@ -312,26 +526,35 @@ class OutputParameter:
         return ll, ul
 
     def generate_tsr_record(self, head_num: int, site_num: int, execution_time: float):
-        if execution_time > 0 and len(self._measurements) != 0:
-            return self._generate_valid_tsr_record(head_num, site_num, execution_time)
+        statistics, test_executions, test_failures = self._get_site_statistics(site_num)
+        if execution_time > 0 and statistics.count != 0:
+            return self._generate_valid_tsr_record(head_num, site_num, execution_time, statistics, test_executions, test_failures)
         else:
-            return self._generate_empty_tsr_record(head_num, site_num, execution_time)
+            return self._generate_empty_tsr_record(head_num, site_num, execution_time, test_executions, test_failures)
+
+    def _get_site_statistics(self, site_num: int):
+        # the statistics of the selected site are the current ones, as they are with a single site
+        if self._site_num is None or int(site_num) == self._site_num:
+            return self._statistics, self._test_executions, self._test_failures
+
+        return self._site_statistics.get(int(site_num)) or (RunningStatistics(), 0, 0)
 
-    def _generate_valid_tsr_record(self, head_num: int, site_num: int, execution_time: float):
+    def _generate_valid_tsr_record(self, head_num: int, site_num: int, execution_time: float,
+                                   statistics: RunningStatistics, test_executions: int, test_failures: int):
         return generate_TSR_dict(head_num=head_num, site_num=site_num, test_typ='P',
-                                 test_num=self._id, exec_cnt=self._test_executions, fail_cnt=self._test_failures,
+                                 test_num=self._id, exec_cnt=test_executions, fail_cnt=test_failures,
                                  alarm_cnt=1, test_nam=self._test_description, seq_name='seq_name',
                                  test_lbl=self._get_output_parameter_name(),
                                  opt_flag=['0', '0', '0', '1', '0', '0', '0', '0'],
                                  test_tim=execution_time,
-                                 test_min=self._get_lowest_test_result(),
-                                 test_max=self._get_highest_test_result(),
-                                 tst_sums=self._sum_of_test_result_values(),
-                                 tst_sqrs=self._sum_of_squares_of_test_result_values())
+                                 test_min=statistics.min,
+                                 test_max=statistics.max,
+                                 tst_sums=statistics.sum,
+                                 tst_sqrs=statistics.sum_of_squared_deviations)
 
-    def _generate_empty_tsr_record(self, head_num: int, site_num: int, execution_time: float):
+    def _generate_empty_tsr_record(self, head_num: int, site_num: int, execution_time: float, test_executions: int, test_failures: int):
         return generate_TSR_dict(head_num=head_num, site_num=site_num, test_typ='P',
-                                 test_num=self._id, exec_cnt=self._test_executions, fail_cnt=self._test_failures,
+                                 test_num=self._id, exec_cnt=test_executions, fail_cnt=test_failures,
                                  alarm_cnt=1, test_nam=self._test_description, seq_name='seq_name',
                                  test_lbl=self._get_output_parameter_name(),
                                  opt_flag=['1', '1', '1', '1', '1', '1', '1', '1'],
@@ -342,18 +565,13 @@ class OutputParameter:
                                  tst_sqrs=0.0)
 
     def _get_highest_test_result(self):
-        return max(self._measurements)
+        return self._statistics.max
 
     def _get_lowest_test_result(self):
-        return min(self._measurements)
+        return self._statistics.min
 
     def _sum_of_test_result_values(self):
-        return sum(self._measurements)
+        return self._statistics.sum
 
     def _sum_of_squares_of_test_result_values(self):
-        try:
-            average = sum(self._measurements) / len(self._measurements)
-        except ZeroDivisionError:
-            return 0.0
-
-        return sum([pow((result - average), 2) for result in self._measurements])
+        return self._statistics.sum_of_squared_deviations
@@ -1,11 +1,19 @@
 from ate_test_app.sequencers.DutTesting.Result import Result
+from ate_test_app.sequencers.TimingStatistics import AFTER_CYCLE, AFTER_TEST, AGGREGATE, CYCLE, DO, REQUEST
 from abc import ABC, abstractmethod
+from typing import List
 import time
 from enum import Enum
 
 
 TIMEOUT = 100
 
+NO_RESPONSE_MESSAGE = """No response: This exception could be raised as the 'tester' used in the test program
+is not compatible with the tester handled by the master application. To verify this
+check that the set tester from the test program (file: 'definitions/hardware/hardware.json')
+is compatible to the tester_type of file 'master_config_file.json'.
+"""
+
 
 class ExecutionType(Enum):
     SingleShot = 'singleShot'
@@ -37,31 +45,35 @@ class LoopCycleExecutionPolicy(ExecutionPolicyABC):
         self.num_cycles = num_cycles
 
     def run(self, sequencer_instance: object):
+        timing = sequencer_instance.timing
         for _ in range(self.num_cycles):
             test_index = 0
             num_written_op = 0
             start = time.time()
             sequencer_instance.pre_cycle_cb()       # ToDo: This will kill all records generated up to now, which is probably not what we want if num_cycles > 1
+            cycle_start_ns = time.perf_counter_ns()
             test_result = Result.Inconclusive()
-            for test_case in sequencer_instance.test_cases:
+            for row, test_case in enumerate(sequencer_instance.test_cases):
                 if sequencer_instance.test_sequence and (test_case.instance_name not in sequencer_instance.test_sequence):
                     continue
 
+                phase_start_ns = time.perf_counter_ns()
                 if not sequencer_instance.tester_instance.do_request(int(sequencer_instance.site_id), TIMEOUT):
-                    raise Exception("""No response: This exception could be raised as the 'tester' used in the test program
-is not compatible with the tester handled by the master application. To verify this
-check that the set tester from the test program (file: 'definitions/hardware/hardware.json')
-is compatible to the tester_type of file 'master_config_file.json'.
-""")
+                    raise Exception(NO_RESPONSE_MESSAGE)
 
                 sequencer_instance.tester_instance.test_in_progress(int(sequencer_instance.site_id))
+                timing.record(row, REQUEST, time.perf_counter_ns() - phase_start_ns)
 
                 sequencer_instance.pre_test_cb(test_index)
                 result, exception = test_case.run(sequencer_instance.site_id)
+                _record_test_case_timing(timing, row, test_case)
 
                 # Push result back to sequencer, abort testing if sequencer
                 # returns false
-                if not sequencer_instance.after_test_cb(test_index, result, test_case.get_test_num(), exception):
+                phase_start_ns = time.perf_counter_ns()
+                proceed = sequencer_instance.after_test_cb(test_index, result, test_case.get_test_num(), exception)
+                timing.record(row, AFTER_TEST, time.perf_counter_ns() - phase_start_ns)
+                if not proceed:
                     end = time.time()
                     break
 
@@ -73,11 +85,126 @@ is compatible to the tester_type of file 'master_config_file.json'.
                 else:
                     test_result = Result.Fail()
 
+            timing.record(timing.part_row, CYCLE, time.perf_counter_ns() - cycle_start_ns)
             end = time.time()
             execution_time = int((end - start) * 1000.0)
+            phase_start_ns = time.perf_counter_ns()
             sequencer_instance.after_cycle_cb(execution_time, num_written_op, test_result)
+            timing.record(timing.part_row, AFTER_CYCLE, time.perf_counter_ns() - phase_start_ns)
 
 
 class SingleShotExecutionPolicy(LoopCycleExecutionPolicy):
     def __init__(self):
         super().__init__(1)
+
+
+class MultiSiteExecutionPolicy(LoopCycleExecutionPolicy):
+    '''
+        Tests all sites of the sequencer (see SequencerBase.set_site_ids)
+        from one test app process. The sites run in lockstep: a test is
+        executed for every site before the next test starts, and the tester
+        handshake of a test step is issued once for all sites, so drivers
+        can serve it with a single broadcast operation.
+
+        The sequencer callbacks are called per site after selecting the
+        site, this way the records are collected in the stdf data of the
+        site they belong to. A site that stops on fail is left out of the
+        remaining test steps.
+    '''
+
+    def __init__(self, num_cycles: int = 1):
+        super().__init__(num_cycles)
+
+    def run(self, sequencer_instance: object):
+        if sequencer_instance.cache_policy != "disable":
+            raise Exception("caching is not supported when testing multiple sites in one process")
+
+        for _ in range(self.num_cycles):
+            self._run_cycle(sequencer_instance)
+
+        sequencer_instance.select_site(sequencer_instance.site_ids[0])
+
+    @staticmethod
+    def _run_cycle(sequencer_instance: object):
+        tester = sequencer_instance.tester_instance
+        timing = sequencer_instance.timing
+        site_ids = sequencer_instance.get_tested_site_ids()
+        test_results = {site_id: Result.Inconclusive() for site_id in site_ids}
+        num_written_ops = {site_id: 0 for site_id in site_ids}
+        active_site_ids = list(site_ids)
+        test_index = 0
+        start = time.time()
+
+        for site_id in site_ids:
+            sequencer_instance.select_site(site_id)
+            sequencer_instance.pre_cycle_cb()
+
+        cycle_start_ns = time.perf_counter_ns()
+        for row, test_case in enumerate(sequencer_instance.test_cases):
+            if not active_site_ids:
+                break
+
+            if sequencer_instance.test_sequence and (test_case.instance_name not in sequencer_instance.test_sequence):
+                continue
+
+            phase_start_ns = time.perf_counter_ns()
+            site_nums = [int(site_id) for site_id in active_site_ids]
+            if not _request_sites(tester, site_nums, TIMEOUT):
+                raise Exception(NO_RESPONSE_MESSAGE)
+
+            _set_sites_in_progress(tester, site_nums)
+            timing.record(row, REQUEST, time.perf_counter_ns() - phase_start_ns)
+
+            for site_id in list(active_site_ids):
+                sequencer_instance.select_site(site_id)
+                sequencer_instance.pre_test_cb(test_index)
+                result, exception = test_case.run(site_id)
+                _record_test_case_timing(timing, row, test_case)
+
+                phase_start_ns = time.perf_counter_ns()
+                proceed = sequencer_instance.after_test_cb(test_index, result, test_case.get_test_num(), exception)
+                timing.record(row, AFTER_TEST, time.perf_counter_ns() - phase_start_ns)
+                if not proceed:
+                    active_site_ids.remove(site_id)
+                    continue
+
+                num_written_ops[site_id] += test_case.get_test_nums()
+                if not exception:
+                    test_results[site_id] = test_case._select_testresult(test_results[site_id], result)
+                else:
+                    test_results[site_id] = Result.Fail()
+
+            test_index += 1
+
+        timing.record(timing.part_row, CYCLE, time.perf_counter_ns() - cycle_start_ns)
+        execution_time = int((time.time() - start) * 1000.0)
+        for site_id in site_ids:
+            sequencer_instance.select_site(site_id)
+            phase_start_ns = time.perf_counter_ns()
+            sequencer_instance.after_cycle_cb(execution_time, num_written_ops[site_id], test_results[site_id])
+            timing.record(timing.part_row, AFTER_CYCLE, time.perf_counter_ns() - phase_start_ns)
+
+
+def _record_test_case_timing(timing: object, row: int, test_case: object):
+    # the test case measures its own phases (see DutTestCaseABC.run)
+    timing.record(row, DO, test_case.do_time_ns)
+    timing.record(row, AGGREGATE, test_case.aggregate_time_ns)
+
+
+def _request_sites(tester: object, site_nums: List[int], timeout: int) -> bool:
+    # testers may serve the handshake of all sites with one call (see TesterInterface.do_request_sites)
+    request_sites = getattr(tester, 'do_request_sites', None)
+    if request_sites is not None:
+        return request_sites(site_nums, timeout)
+
+    return all(tester.do_request(site_num, timeout) for site_num in site_nums)
+
+
+def _set_sites_in_progress(tester: object, site_nums: List[int]):
+    in_progress_sites = getattr(tester, 'test_in_progress_sites', None)
+    if in_progress_sites is not None:
+        in_progress_sites(site_nums)
+        return
+
+    for site_num in site_nums:
+        tester.test_in_progress(site_num)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractclassmethod
+from typing import Dict, Optional
 
 
 class Harness(ABC):
@@ -23,9 +24,17 @@ class Harness(ABC):
         pass
 
     @abstractclassmethod
-    def send_testresult(self, stdf_data: dict):
+    def send_testresult(self, stdf_data: dict, site_id: Optional[str] = None):
         pass
 
     @abstractclassmethod
-    def send_summary(self, summary: dict):
+    def send_summary(self, summary: dict, site_id: Optional[str] = None):
+        pass
+
+    def send_summaries(self, summaries: Dict[str, list]):
+        # a process testing several sites sends the summary of each site
+        for site_id, summary in summaries.items():
+            self.send_summary(summary, site_id)
+
+    def set_result_transport(self, result_transport: str):
         pass
@@ -1,13 +1,16 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 import paho.mqtt.client as mqtt
 import json
 import queue
 import threading
 import logging
+import time
 
 from ate_test_app.sequencers.TopicFactory import TopicFactory
 from ate_test_app.sequencers.TheTestAppStatusAlive import TheTestAppStatusAlive
 from ate_apps_common.mqtt_router import MqttRouter
+from ate_apps_common.request_response import LatencyStatistics, PendingRequests, add_request_id, new_request_id
+from ate_apps_common.stdf_utils import json_default
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +35,11 @@ class MqttClient():
 
         # queue to process resource messages anywhere (without callbacks)
         self._resource_msg_queue = queue.Queue()
-        self.event = threading.Event()
+
+        # io-control requests in flight, keyed by their correlation id
+        self._pending_requests = PendingRequests()
+        self._request_statistics: Dict[str, LatencyStatistics] = {}
+        self._statistics_lock = threading.Lock()
 
     def loop_forever(self):
         self._client.loop_forever()
@@ -43,18 +50,20 @@ class MqttClient():
         self._client.disconnect()
 
     def publish_status(self, alive: TheTestAppStatusAlive, statedict: dict) -> mqtt.MQTTMessageInfo:
-        payload = self._topic_factory.test_status_payload(alive)
-        payload.update(statedict)
-        return self._publish(self._topic_factory.test_status_topic(), json.dumps(payload))
+        payload = json.dumps({**self._topic_factory.test_status_payload(alive), **statedict})
+        # the state of the process is the state of each site it tests, the messages are delivered in order
+        for site_id in self._topic_factory.site_ids:
+            msginfo = self._publish(self._topic_factory.test_status_topic(site_id), payload)
+        return msginfo
 
-    def publish_result(self, testdata: object) -> mqtt.MQTTMessageInfo:
-        return self._publish(self._topic_factory.test_result_topic(), json.dumps(self._topic_factory.test_result_payload(testdata)))
+    def publish_result(self, testdata: object, site_id: Optional[str] = None) -> mqtt.MQTTMessageInfo:
+        return self._publish(self._topic_factory.test_result_topic(site_id), json.dumps(self._topic_factory.test_result_payload(testdata), default=json_default))
 
-    def publish_tests_summary(self, tests_summary: object) -> mqtt.MQTTMessageInfo:
-        return self._publish(self._topic_factory.tests_summary_topic(), json.dumps(self._topic_factory.test_result_payload(tests_summary)))
+    def publish_tests_summary(self, tests_summary: object, site_id: Optional[str] = None) -> mqtt.MQTTMessageInfo:
+        return self._publish(self._topic_factory.tests_summary_topic(site_id), json.dumps(self._topic_factory.test_result_payload(tests_summary)))
 
-    def publish_stdf_part(self, blob: bytes) -> mqtt.MQTTMessageInfo:
-        return self._publish(self._topic_factory.test_stdf_topic(), blob)
+    def publish_stdf_part(self, blob: bytes, site_id: Optional[str] = None) -> mqtt.MQTTMessageInfo:
+        return self._publish(self._topic_factory.test_stdf_topic(site_id), blob)
 
     def publish_resource_request(self, resource_id: str, config: dict) -> mqtt.MQTTMessageInfo:
         return self._publish(self._topic_factory.test_resource_topic(resource_id), self._topic_factory.test_resource_payload(resource_id, config))
@@ -63,7 +72,14 @@ class MqttClient():
         return self._publish(self._topic_factory.test_log_topic(), json.dumps(self._topic_factory.test_log_payload(log)))
 
     def publish_execution_strategy(self, execution_strategy: List[List[str]]) -> mqtt.MQTTMessageInfo:
-        return self._publish(self._topic_factory.test_execution_strategy_topic(), json.dumps(self._topic_factory.test_execution_strategy_payload(execution_strategy)))
+        # the master expects the strategy from every site
+        payload = json.dumps(self._topic_factory.test_execution_strategy_payload(execution_strategy))
+        for site_id in self._topic_factory.site_ids:
+            msginfo = self._publish(self._topic_factory.test_execution_strategy_topic(site_id), payload)
+        return msginfo
+
+    def publish_timing(self, timing: dict) -> mqtt.MQTTMessageInfo:
+        return self._publish(self._topic_factory.test_timing_topic(), json.dumps(self._topic_factory.test_timing_payload(timing)))
 
     def _publish(self, topic: str, payload: Dict[str, str]):
         return self._client.publish(
@@ -138,24 +154,55 @@ class MqttClient():
         cmd = data['command']
         sites = data['sites']
 
-        if self._topic_factory.site_id not in sites:
-            logger.warning(f'ignoring TestApp cmd for other sites {sites} (current site_id is {self._topic_factory.site_id})')
+        if not any(site_id in sites for site_id in self._topic_factory.site_ids):
+            logger.warning(f'ignoring TestApp cmd for other sites {sites} (current site_ids are {self._topic_factory.site_ids})')
             return
 
         self.submit_callback(self.on_command, cmd, data)
 
     def _on_message_resource_callback(self, client, userdata, message: mqtt.MQTTMessage):
         data = json.loads(message.payload.decode('utf-8'))
-        self.response_data = data
-        self.response_topic = message.topic
-        self.event.set()
+        self._pending_requests.resolve(message.topic, data)
 
     def do_request_response(self, request_topic: str, response_topic: str, payload: dict, timeout: int):
-        self.event.clear()
-        self._client.publish(request_topic, payload, 2)
-
-        while (self.event.wait(timeout)):
-            if self.response_topic == response_topic:
-                return False, self.response_data
-
-        return True, None
+        # requests of several actuators (or threads) may be in flight at the same time,
+        # each one waits for the response carrying its own id
+        request_id = new_request_id()
+        payload = add_request_id(payload, request_id)
+        response = {}
+        received = threading.Event()
+
+        def on_response(data):
+            response['data'] = data
+            received.set()
+
+        self._pending_requests.add(request_id, response_topic, on_response)
+        start = time.perf_counter()
+        try:
+            self._client.publish(request_topic, payload, 2)
+            has_timed_out = not received.wait(timeout)
+        finally:
+            self._pending_requests.remove(request_id)
+
+        self._add_request_statistics(self._get_periphery_type(payload, response_topic), None if has_timed_out else time.perf_counter() - start)
+        if has_timed_out:
+            return True, None
+
+        return False, response['data']
+
+    @staticmethod
+    def _get_periphery_type(payload, response_topic: str) -> str:
+        message = json.loads(payload) if isinstance(payload, (str, bytes)) else payload
+        return message.get('periphery_type', response_topic)
+
+    def _add_request_statistics(self, periphery_type: str, latency: Optional[float]):
+        with self._statistics_lock:
+            statistics = self._request_statistics.setdefault(periphery_type, LatencyStatistics())
+            if latency is None:
+                statistics.add_timeout()
+            else:
+                statistics.add(latency)
+
+    def get_request_statistics(self) -> dict:
+        with self._statistics_lock:
+            return {periphery_type: statistics.to_dict() for periphery_type, statistics in self._request_statistics.items()}
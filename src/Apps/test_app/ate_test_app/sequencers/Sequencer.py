@@ -1,19 +1,21 @@
-import concurrent.futures
-
 import logging
 import os
 import sys
 import threading
+import time
 
 from typing import Dict, List, Optional, Tuple
 
 from ate_common.logger import LogLevel, Logger
+from ate_apps_common.stdf_encoder import RESULT_TRANSPORT_JSON
 from ate_test_app.sequencers.SequencerBase import SequencerBase
 from ate_test_app.sequencers import Harness
 from ate_test_app.sequencers.CommandLineParser import CommandLineParser
-from ate_test_app.sequencers.ExecutionPolicy import get_execution_policy, ExecutionType
+from ate_test_app.sequencers.CommandExecutor import COMMAND_LANE, NEXT_LANE, CommandExecutor
+from ate_test_app.sequencers.ExecutionPolicy import get_execution_policy, ExecutionType, MultiSiteExecutionPolicy
 from ate_test_app.sequencers.TheTestAppMachine import TheTestAppMachine
 from ate_test_app.sequencers.TheTestAppStatusAlive import TheTestAppStatusAlive
+from ate_test_app.sequencers.TimingStatistics import PUBLISH
 from ate_test_app.stages_sequence_generator.stages_sequence_generator import StagesSequenceGenerator
 from ate_test_app.sequencers.mqtt.MqttConnection import MqttConnection
 
@@ -92,8 +94,16 @@ class Sequencer:
         self._harness = harness
 
         self._execution_policy = get_execution_policy(ExecutionType.SingleShot())
+
+        # one process may test several sites (--site_ids 0,1,2,3), they run in lockstep
+        site_ids = self.params.get_site_ids()
+        if len(site_ids) > 1:
+            self._sequencer_instance.set_site_ids(site_ids)
+            self._execution_policy = MultiSiteExecutionPolicy()
+
         self.logger = None
         self.after_terminate_callback = None
+        self.executor = CommandExecutor(self._handle_uncaught_exceptions_from_executor)
 
         self._mqtt_connection = mqtt_connection
         self._mqtt = self._mqtt_connection.get_mqtt_client()
@@ -106,7 +116,6 @@ class Sequencer:
         self._mqtt_connection.set_logger(logger)
 
     def submit_callback(self, cb, *args, **kwargs):
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
         # ignore unbound callbacks
         if cb is None:
             return
@@ -123,20 +132,17 @@ class Sequencer:
                 else:
                     raise
 
-        # this is called in any thread, not necessarily in the executor
-        def handle_uncaught_exceptions_from_executor(f):
-            try:
-                f.result()
-            except Exception:
-                self.logger.log_message(LogLevel.Error(), "executor exception")
-                # TODO: we probably don't want to keep running if any
-                #       exception escaped. using os._exit may not be
-                #       the best way to do this (because no cleanup/io
-                #       flushing at all)
-                os._exit(1)
-
-        f = self.executor.submit(wrapped_callback)
-        f.add_done_callback(handle_uncaught_exceptions_from_executor)
+        # tests are executed in their own lane, so they don't delay the remaining callbacks
+        lane = NEXT_LANE if cb == self._execute_command and args and args[0] == 'next' else COMMAND_LANE
+        self.executor.submit(wrapped_callback, lane)
+
+    def _handle_uncaught_exceptions_from_executor(self, exception: Exception):
+        self.logger.log_message(LogLevel.Error(), f"executor exception: {exception}")
+        # TODO: we probably don't want to keep running if any
+        #       exception escaped. using os._exit may not be
+        #       the best way to do this (because no cleanup/io
+        #       flushing at all)
+        os._exit(1)
 
     def run(self):
         try:
@@ -144,6 +150,8 @@ class Sequencer:
         except KeyboardInterrupt:
             pass
         self.executor.shutdown(wait=True)
+        self.logger.log_message(LogLevel.Debug(), f'command executor metrics: {self.executor.get_metrics()}')
+        self.logger.log_message(LogLevel.Debug(), f'io-control statistics: {self._mqtt.get_request_statistics()}')
 
     def _on_connect(self):
         # transition to idle state on first connect
@@ -181,6 +189,8 @@ class Sequencer:
             self._execute_cmd_set_hbin(payload['sbin'], payload['hbin'])
         elif cmd == 'setparameter':
             self._execute_cmd_set_parameter(payload['parameters'])
+        elif cmd == 'gettiming':
+            self._execute_cmd_get_timing()
         else:
             raise Exception(f'invalid command: "{cmd}"')
 
@@ -211,7 +221,17 @@ class Sequencer:
         result = self._sequencer_instance.run(self._execution_policy, job_data)
         self._statemachine.cmd_done()
 
-        self._harness.send_testresult(result)
+        if job_data:
+            self._harness.set_result_transport(job_data.get('result_transport', RESULT_TRANSPORT_JSON))
+
+        timing = self._sequencer_instance.timing
+        start = time.perf_counter_ns()
+        if len(self._sequencer_instance.site_ids) == 1:
+            self._harness.send_testresult(result)
+        else:
+            for site_id, stdf_data in self._sequencer_instance.get_sites_stdf_data().items():
+                self._harness.send_testresult(stdf_data, site_id)
+        timing.record(timing.part_row, PUBLISH, time.perf_counter_ns() - start)
 
     def _execute_cmd_setloglevel(self, level: LogLevel):
         self._sequencer_instance.set_logger_level(level)
@@ -219,6 +239,9 @@ class Sequencer:
     def _execute_cmd_get_execution_strategy(self, layout: Dict[str, Tuple[int, int]]):
         self._mqtt.publish_execution_strategy(self._execution_strategy.get_execution_strategy(layout))
 
+    def _execute_cmd_get_timing(self):
+        self._mqtt.publish_timing(self._sequencer_instance.timing.to_dict())
+
     def send_log(self, log: object):
         self._mqtt.publish_log_information(log)
 
@@ -227,9 +250,17 @@ class Sequencer:
 
     def _execute_cmd_terminate(self):
         self.logger.log_message(LogLevel.Debug(), "COMMAND: terminate")
-        result = self._sequencer_instance.aggregate_tests_summary()
+        self._sequencer_instance.close_cache()
 
-        self._harness.send_summary(result)
+        # the timing is sent ahead of the summary, the master writes it along with the stdf file once all summaries arrived
+        if self._sequencer_instance.timing.enabled:
+            self._execute_cmd_get_timing()
+
+        if len(self._sequencer_instance.site_ids) == 1:
+            self._harness.send_summary(self._sequencer_instance.aggregate_tests_summary())
+        else:
+            self._harness.send_summaries({site_id: self._sequencer_instance.aggregate_tests_summary(site_id)
+                                          for site_id in self._sequencer_instance.site_ids})
 
         self.after_terminate_callback()
 
@@ -5,6 +5,8 @@ from ate_test_app.sequencers.ExecutionPolicy import ExecutionPolicyABC
 from ate_test_app.sequencers.DutTesting.DutTestCaseABC import (DutTestCaseABC, DutTestCaseBase)
 from ate_apps_common.stdf_utils import (generate_FTR_dict, generate_PIR_dict, generate_PRR_dict)
 from ate_test_app.sequencers.DutTesting.Result import Result
+from ate_test_app.sequencers.DutTesting.TestParameters import OutputParameter
+from ate_test_app.sequencers.TimingStatistics import TimingStatistics
 
 from ate_test_app.sequencers.constants import Trigger_Out_Pulse_Width
 
@@ -26,6 +28,7 @@ class SequencerBase:
         self.tester_instance = None
         self.soft_bin = 0
         self.site_id = '0'
+        self.site_ids = [self.site_id]
         self.part_id = None
         self.binning = None
         self.logger = None
@@ -34,6 +37,10 @@ class SequencerBase:
         self.cache_policy = "disable"
         self.program_name = program_name
         self.test_sequence = []
+        self.ptr_compression = False
+        self.timing = TimingStatistics()
+        self._sites_info = {}
+        self._site_records = {}
 
     def set_caching_policy(self, policy: str):
         if policy not in ["disable", "store", "drop"]:
@@ -42,6 +49,41 @@ class SequencerBase:
 
     def set_site_id(self, site_id: int):
         self.site_id = site_id
+        self.site_ids = [site_id]
+
+    def set_site_ids(self, site_ids: list):
+        # more than one site is only tested by the MultiSiteExecutionPolicy, the first one is the site of the process
+        self.site_ids = [str(site_id) for site_id in site_ids]
+        self.site_id = self.site_ids[0]
+
+    def select_site(self, site_id: str):
+        '''
+            Switches the per site state (part, bin, records) the callbacks work on
+        '''
+        if site_id == self.site_id:
+            return
+
+        self._site_records[self.site_id] = (self.part_id, self.binning, self.soft_bin, self.stdf_data)
+        self.site_id = site_id
+        self.part_id, self.binning, self.soft_bin, self.stdf_data = self._site_records.pop(site_id, (None, None, 0, []))
+        self._select_site_information()
+
+    def get_tested_site_ids(self) -> list:
+        # without test settings all sites are tested
+        if not self._sites_info:
+            return list(self.site_ids)
+
+        return [site_id for site_id in self.site_ids if site_id in self._sites_info]
+
+    def get_sites_stdf_data(self) -> dict:
+        sites_stdf_data = {}
+        for site_id in self.get_tested_site_ids():
+            if site_id == self.site_id:
+                sites_stdf_data[site_id] = self.stdf_data
+            elif site_id in self._site_records:
+                sites_stdf_data[site_id] = self._site_records[site_id][-1]
+
+        return sites_stdf_data
 
     def __get_instance_count(self, test_class_name: str):
         if test_class_name not in self.instance_counts.keys():
@@ -71,7 +113,8 @@ class SequencerBase:
 
     def set_tester_instance(self, tester_instance):
         self.tester_instance = tester_instance
-        self.tester_instance.do_init_state(int(self.site_id))
+        for site_id in self.site_ids:
+            self.tester_instance.do_init_state(int(site_id))
 
     def set_cache_instance(self, cache_instance):
         self.cache_instance = cache_instance
@@ -102,12 +145,29 @@ class SequencerBase:
 
         self.cache_instance.do_fetch(self.part_id)
 
+    def prefetch_parts(self):
+        # caches that fetch in the background get the parts of all tested sites announced in sites_info in one go
+        if self.cache_policy == "disable" or self.cache_instance is None:
+            return
+
+        prefetch = getattr(self.cache_instance, 'prefetch', None)
+        if prefetch is not None:
+            prefetch([self._sites_info[site_id]['partid'] for site_id in self.get_tested_site_ids() if site_id in self._sites_info])
+
+    def close_cache(self):
+        # caches may send the published parts in batches and fetch in the background (see Flatcache.close)
+        close = getattr(self.cache_instance, 'close', None)
+        if close is not None:
+            close()
+
     def run(self, execution_policy: ExecutionPolicyABC, test_settings: dict = {}):
         # TODO: raise an exception if test_settings is None !?
         if test_settings:
             self.test_sequence = []
             self.test_settings = test_settings
             self._extract_test_information(test_settings)
+            self.set_ptr_compression(test_settings.get('ptr_compression', False))
+            self.set_timing(test_settings.get('timing', False))
 
         if execution_policy is None:
             raise Exception("No Execution Policy set")
@@ -123,13 +183,12 @@ class SequencerBase:
         return self.stdf_data
 
     def _extract_test_information(self, test_settings: dict):
+        self._sites_info = {}
         for site in test_settings['sites_info']:
-            if site['siteid'] != self.site_id:
-                continue
+            self._sites_info.setdefault(site['siteid'], site)
 
-            self.part_id = site['partid']
-            self.binning = site['binning']
-            break
+        self._select_site_information()
+        self.prefetch_parts()
 
         if test_settings.get('test_sequence'):
             test_sequence = set([test.instance_name for test in self.test_cases])
@@ -140,6 +199,40 @@ class SequencerBase:
 
             self.test_sequence = test_settings['test_sequence']
 
+    def _select_site_information(self):
+        site = self._sites_info.get(self.site_id)
+        if site is None:
+            return
+
+        self.part_id = site['partid']
+        self.binning = site['binning']
+
+    def set_ptr_compression(self, enabled: bool):
+        # the cached stdf data is used to resolve parameters by TEST_TXT, so the records must stay complete
+        enabled = enabled and self.cache_policy == "disable"
+        if enabled == self.ptr_compression:
+            return
+
+        self.ptr_compression = enabled
+        for test_case in self.test_cases:
+            output_parameters = getattr(test_case, 'op', None)
+            if output_parameters is None:
+                continue
+
+            for output_parameter in vars(output_parameters).values():
+                if isinstance(output_parameter, OutputParameter):
+                    output_parameter.set_ptr_compression(enabled)
+
+    def set_timing(self, enabled: bool):
+        # the histograms are allocated once, they are kept until timing is disabled again
+        if enabled == self.timing.enabled:
+            return
+
+        if enabled:
+            self.timing.enable([test_case.instance_name for test_case in self.test_cases])
+        else:
+            self.timing.disable()
+
     def pre_cycle_cb(self):
         self.stdf_data = []
         self.soft_bin = 1
@@ -230,10 +323,12 @@ class SequencerBase:
 
         self.after_cycle_callback()
 
-    def aggregate_tests_summary(self):
+    def aggregate_tests_summary(self, site_id: str = None):
+        # the output parameters keep their statistics per site, a process testing several sites sends one summary per site
+        site_num = int(self.site_id if site_id is None else site_id)
         tests_summary = []
         for test_case in self.test_cases:
-            tests_summary += test_case.aggregate_tests_summary(head_num=0, site_num=int(self.site_id))
+            tests_summary += test_case.aggregate_tests_summary(head_num=0, site_num=site_num)
 
         return tests_summary
 
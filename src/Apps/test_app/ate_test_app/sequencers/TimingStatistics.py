@@ -0,0 +1,136 @@
+from array import array
+from typing import List
+
+# phases of a test, measured per test
+REQUEST = 0         # tester handshake (do_request, test_in_progress)
+DO = 1              # DutTestCaseABC.do
+AGGREGATE = 2       # DutTestCaseABC.aggregate_test_result (limit checks and PTR records)
+AFTER_TEST = 3      # SequencerBase.after_test_cb (FTR record, harness collect)
+# phases of a part, measured on the part row
+CYCLE = 4           # all tests of the part, pre and after cycle callbacks excluded
+AFTER_CYCLE = 5     # SequencerBase.after_cycle_cb (PRR record, auto script teardown)
+PUBLISH = 6         # sending the test result to the master
+
+PHASES = ['request', 'do', 'aggregate', 'after_test', 'cycle', 'after_cycle', 'publish']
+
+# log-linear buckets: 2 ** SUB_BUCKET_BITS buckets per power of two, this bounds the
+# relative error of the reported percentiles to 1 / 2 ** SUB_BUCKET_BITS
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_EXPONENT = 40   # ~18 minutes, longer durations are counted in the last bucket
+NUM_BUCKETS = (MAX_EXPONENT - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+PERCENTILES = [50, 95, 99]
+
+
+def bucket_index(duration_ns: int) -> int:
+    if duration_ns < SUB_BUCKETS:
+        return max(duration_ns, 0)
+
+    exponent = duration_ns.bit_length() - 1
+    if exponent >= MAX_EXPONENT:
+        return NUM_BUCKETS - 1
+
+    shift = exponent - SUB_BUCKET_BITS
+    return (shift + 1) * SUB_BUCKETS + ((duration_ns >> shift) & (SUB_BUCKETS - 1))
+
+
+def bucket_value(index: int) -> int:
+    # center of the bucket, buckets below SUB_BUCKETS hold a single value
+    if index < SUB_BUCKETS:
+        return index
+
+    shift = index // SUB_BUCKETS - 1
+    lower = (SUB_BUCKETS + index % SUB_BUCKETS) << shift
+    return lower + ((1 << shift) >> 1)
+
+
+class TimingStatistics:
+    '''
+        Duration histograms per test and phase, recorded by the execution
+        policies (see PHASES). The storage is allocated once when timing is
+        enabled, recording a duration only updates the preallocated arrays,
+        so the instrumentation does not allocate per part.
+
+        Row i holds the phases of the i-th registered test, the last row the
+        phases of the part.
+    '''
+
+    def __init__(self):
+        self.disable()
+
+    @property
+    def part_row(self) -> int:
+        return len(self._names)
+
+    def enable(self, test_names: List[str]):
+        self._names = list(test_names)
+        num_series = (len(self._names) + 1) * len(PHASES)
+        self._histograms = array('Q', bytes(8 * num_series * NUM_BUCKETS))
+        self._counts = array('Q', bytes(8 * num_series))
+        self._totals = array('Q', bytes(8 * num_series))
+        self._maxima = array('Q', bytes(8 * num_series))
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self._names = []
+        self._histograms = array('Q')
+        self._counts = array('Q')
+        self._totals = array('Q')
+        self._maxima = array('Q')
+
+    def record(self, row: int, phase: int, duration_ns: int):
+        if not self.enabled:
+            return
+
+        series = row * len(PHASES) + phase
+        self._histograms[series * NUM_BUCKETS + bucket_index(duration_ns)] += 1
+        self._counts[series] += 1
+        self._totals[series] += duration_ns
+        if duration_ns > self._maxima[series]:
+            self._maxima[series] = duration_ns
+
+    def get_percentile(self, row: int, phase: int, percentile: float) -> int:
+        series = row * len(PHASES) + phase
+        count = self._counts[series]
+        if not count:
+            return 0
+
+        # rank of the percentile, the smallest value with at least percentile % of the samples below or equal
+        rank = max(1, -(-count * percentile // 100))
+        offset = series * NUM_BUCKETS
+        seen = 0
+        for index in range(NUM_BUCKETS):
+            seen += self._histograms[offset + index]
+            if seen >= rank:
+                return min(bucket_value(index), self._maxima[series])
+
+        return self._maxima[series]
+
+    def to_dict(self) -> dict:
+        '''
+            {'tests': {instance_name: {phase: statistics}}, 'part': {phase: statistics}},
+            statistics are count, mean, p50, p95, p99 and max in microseconds, phases without samples are left out
+        '''
+        if not self.enabled:
+            return {'tests': {}, 'part': {}}
+
+        return {'tests': {name: self._get_row_statistics(row) for row, name in enumerate(self._names)},
+                'part': self._get_row_statistics(self.part_row)}
+
+    def _get_row_statistics(self, row: int) -> dict:
+        statistics = {}
+        for phase, phase_name in enumerate(PHASES):
+            series = row * len(PHASES) + phase
+            count = self._counts[series]
+            if not count:
+                continue
+
+            phase_statistics = {'count': count, 'mean_us': self._totals[series] / count / 1000.0}
+            for percentile in PERCENTILES:
+                phase_statistics[f'p{percentile}_us'] = self.get_percentile(row, phase, percentile) / 1000.0
+            phase_statistics['max_us'] = self._maxima[series] / 1000.0
+            statistics[phase_name] = phase_statistics
+
+        return statistics
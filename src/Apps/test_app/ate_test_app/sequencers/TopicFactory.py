@@ -6,9 +6,11 @@ FRAMEWORK_VERSION = 1
 
 class TopicFactory:
 
-    def __init__(self, device_id: str, site_id: str):
+    def __init__(self, device_id: str, site_id: str, site_ids: Optional[List[str]] = None):
         self._device_id = device_id
         self._site_id = site_id
+        # all sites tested by the process (see MultiSiteExecutionPolicy), site_id is the first one
+        self._site_ids = list(site_ids) if site_ids else [site_id]
 
     def master_status_topic(self):
         return f'ate/{self._device_id}/Master/status'
@@ -25,20 +27,20 @@ class TopicFactory:
     def control_status_topic(self):
         return f'ate/{self._device_id}/ControlApp/status/site{self._site_id}'
 
-    def test_status_topic(self):
-        return f'ate/{self._device_id}/TestApp/status/site{self._site_id}'
+    def test_status_topic(self, site_id: Optional[str] = None):
+        return f'ate/{self._device_id}/TestApp/status/site{self._site_id if site_id is None else site_id}'
 
     def test_cmd_topic(self):
         return f'ate/{self._device_id}/TestApp/cmd'
 
-    def test_result_topic(self):
-        return f'ate/{self._device_id}/TestApp/testresult/site{self._site_id}'
+    def test_result_topic(self, site_id: Optional[str] = None):
+        return f'ate/{self._device_id}/TestApp/testresult/site{self._site_id if site_id is None else site_id}'
 
-    def tests_summary_topic(self):
-        return f'ate/{self._device_id}/TestApp/testsummary/site{self._site_id}'
+    def tests_summary_topic(self, site_id: Optional[str] = None):
+        return f'ate/{self._device_id}/TestApp/testsummary/site{self._site_id if site_id is None else site_id}'
 
-    def test_stdf_topic(self):
-        return f'ate/{self._device_id}/TestApp/stdf/site{self._site_id}'
+    def test_stdf_topic(self, site_id: Optional[str] = None):
+        return f'ate/{self._device_id}/TestApp/stdf/site{self._site_id if site_id is None else site_id}'
 
     def test_resource_topic(self, resource_id: str):
         return f'ate/{self._device_id}/TestApp/peripherystate/{resource_id}/site{self._site_id}/request'
@@ -46,8 +48,11 @@ class TopicFactory:
     def test_log_topic(self):
         return f'ate/{self._device_id}/TestApp/log/site{self._site_id}'
 
-    def test_execution_strategy_topic(self):
-        return f'ate/{self._device_id}/TestApp/execution_strategy/site{self._site_id}'
+    def test_execution_strategy_topic(self, site_id: Optional[str] = None):
+        return f'ate/{self._device_id}/TestApp/execution_strategy/site{self._site_id if site_id is None else site_id}'
+
+    def test_timing_topic(self):
+        return f'ate/{self._device_id}/TestApp/timing/site{self._site_id}'
 
     @staticmethod
     def test_execution_strategy_payload(execution_strategy: List[List[str]]):
@@ -56,6 +61,13 @@ class TopicFactory:
             "payload": execution_strategy
         }
 
+    @staticmethod
+    def test_timing_payload(timing: dict):
+        return {
+            "type": "timing",
+            "payload": timing
+        }
+
     @staticmethod
     def test_status_payload(alive: TheTestAppStatusAlive):
         return {
@@ -91,6 +103,10 @@ class TopicFactory:
     def site_id(self):
         return self._site_id
 
+    @property
+    def site_ids(self):
+        return self._site_ids
+
     @property
     def mqtt_client_id(self):
         return f'testapp.{self._device_id}.{self._site_id}'
@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from ate_test_app.sequencers.Harness import Harness
 from ate_apps_common.stdf_aggregator import StdfTestResultAggregator
 
@@ -32,10 +34,14 @@ class LocalHarness(Harness):
 
         return test_information
 
-    def send_summary(self, summary: dict):
+    def send_summary(self, summary: dict, site_id: Optional[str] = None):
         self._stdf_aggregator.append_test_summary(summary)
         self._stdf_aggregator.finalize()
         self._stdf_aggregator.write_footer_records()
 
-    def send_testresult(self, stdf_data: dict):
+    def send_summaries(self, summaries: Dict[str, list]):
+        # all sites are written to the one local file, its footer is written once
+        self.send_summary([record for summary in summaries.values() for record in summary])
+
+    def send_testresult(self, stdf_data: dict, site_id: Optional[str] = None):
         self._stdf_aggregator.append_test_results(stdf_data)
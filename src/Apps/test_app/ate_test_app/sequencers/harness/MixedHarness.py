@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from ate_test_app.sequencers.MqttClient import MqttClient
 from ate_test_app.sequencers.Harness import Harness
 from ate_test_app.sequencers.harness.LocalHarness import LocalHarness
@@ -9,13 +11,20 @@ class MixedHarness(Harness):
         self.local_harness = local_harness
         self.mqtt_harness = mqtt_harness
 
-    def send_summary(self, summary: dict):
-        self.local_harness.send_summary(summary)
-        self.mqtt_harness.send_summary(summary)
+    def send_summary(self, summary: dict, site_id: Optional[str] = None):
+        self.local_harness.send_summary(summary, site_id)
+        self.mqtt_harness.send_summary(summary, site_id)
+
+    def send_summaries(self, summaries: Dict[str, list]):
+        self.local_harness.send_summaries(summaries)
+        self.mqtt_harness.send_summaries(summaries)
+
+    def send_testresult(self, stdf_data: dict, site_id: Optional[str] = None):
+        self.local_harness.send_testresult(stdf_data, site_id)
+        self.mqtt_harness.send_testresult(stdf_data, site_id)
 
-    def send_testresult(self, stdf_data: dict):
-        self.local_harness.send_testresult(stdf_data)
-        self.mqtt_harness.send_testresult(stdf_data)
+    def set_result_transport(self, result_transport: str):
+        self.mqtt_harness.set_result_transport(result_transport)
 
     def next(self):
         self.local_harness.next()
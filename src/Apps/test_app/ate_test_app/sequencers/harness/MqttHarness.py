@@ -1,16 +1,28 @@
+from typing import Optional
+
 from ate_test_app.sequencers.MqttClient import MqttClient
 from ate_test_app.sequencers.Harness import Harness
+from ate_apps_common.stdf_encoder import RESULT_TRANSPORT_JSON, RESULT_TRANSPORT_STDF, encode_records
 
 
 class MqttHarness(Harness):
     def __init__(self, mqtt: MqttClient):
         self._mqtt = mqtt
+        self._result_transport = RESULT_TRANSPORT_JSON
+
+    def set_result_transport(self, result_transport: str):
+        self._result_transport = result_transport
+
+    def send_summary(self, summary: dict, site_id: Optional[str] = None):
+        self._mqtt.publish_tests_summary(summary, site_id)
 
-    def send_summary(self, summary: dict):
-        self._mqtt.publish_tests_summary(summary)
+    def send_testresult(self, stdf_data: dict, site_id: Optional[str] = None):
+        # site_id is set if the process tests several sites, the results are published on the topic of their site
+        if self._result_transport == RESULT_TRANSPORT_STDF:
+            self._mqtt.publish_stdf_part(encode_records(stdf_data), site_id)
+            return
 
-    def send_testresult(self, stdf_data: dict):
-        self._mqtt.publish_result(stdf_data)
+        self._mqtt.publish_result(stdf_data, site_id)
 
     def next(self):
         pass
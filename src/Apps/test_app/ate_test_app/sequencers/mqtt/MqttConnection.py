@@ -25,7 +25,8 @@ class MqttConnection:
 
     def _init_app_components(self):
         topic_factory = TopicFactory(self._params.device_id,
-                                     self._params.site_id)
+                                     self._params.site_id,
+                                     self._params.get_site_ids())
         self._mqtt = MqttClient(self._params.broker_host,
                                 self._params.broker_port,
                                 topic_factory)
@@ -0,0 +1,62 @@
+"""
+Measures the per part overhead of multi result (MPR) output parameters: every
+parameter gets the array of one capture, is judged, turned into its MPR and
+encoded the way the 'stdf' result transport publishes it.
+
+usage: python bench_mpr_output_parameters.py [--parameters 200] [--points 4096] [--parts 20] [--scalar]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ate_apps_common.stdf_encoder import encode_MPR
+from ate_test_app.sequencers.DutTesting.TestParameters import OutputParameter
+
+
+def generate_output_parameters(num_parameters: int) -> list:
+    output_parameters = []
+    for index in range(num_parameters):
+        output_parameter = OutputParameter(f'op_{index}', -10, -5, 0, 5, 10, -3, mpr=True)
+        output_parameter.set_format('.3f')
+        output_parameter.set_unit('V')
+        output_parameter.set_test_description(f'test_{index // 10}')
+        output_parameter.set_limits(index, -5, 5)
+        output_parameters.append(output_parameter)
+
+    return output_parameters
+
+
+def run(num_parameters: int, num_points: int, num_parts: int, scalar: bool):
+    output_parameters = generate_output_parameters(num_parameters)
+    capture = np.sin(np.linspace(0, 10, num_points)) * 4
+
+    start = time.perf_counter()
+    for _ in range(num_parts):
+        for output_parameter in output_parameters:
+            if scalar:
+                for value in capture.tolist():
+                    output_parameter.write(value)
+            else:
+                output_parameter.write(capture)
+            result = output_parameter.get_testresult()
+            encode_MPR(output_parameter.generate_stdf_result_record(result[0], 0))
+
+    duration = time.perf_counter() - start
+    print(f'parameters: {num_parameters}, points: {num_points}, parts: {num_parts}, scalar writes: {scalar}')
+    print(f'per part: {duration / num_parts * 1e3:.2f} ms, per parameter: {duration / (num_parts * num_parameters) * 1e6:.2f} us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--parameters', type=int, default=200)
+    parser.add_argument('--points', type=int, default=4096)
+    parser.add_argument('--parts', type=int, default=20)
+    parser.add_argument('--scalar', action='store_true', help='write the capture value by value')
+    args = parser.parse_args()
+
+    run(args.parameters, args.points, args.parts, args.scalar)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures the per part overhead of the output parameters of a large test
+program: every parameter is written, judged and turned into its PTR, the
+same way the generated test code does it (see test_base_template.jinja2).
+
+usage: python bench_output_parameters.py [--parameters 5000] [--parts 20]
+"""
+import argparse
+import time
+
+from ate_test_app.sequencers.DutTesting.TestParameters import OutputParameter
+
+
+def generate_output_parameters(num_parameters: int) -> list:
+    output_parameters = []
+    for index in range(num_parameters):
+        output_parameter = OutputParameter(f'op_{index}', -10, -5, 0, 5, 10, -3)
+        output_parameter.set_format('.3f')
+        output_parameter.set_unit('V')
+        output_parameter.set_test_description(f'test_{index // 10}')
+        output_parameter.set_limits(index, -5, 5)
+        output_parameters.append(output_parameter)
+
+    return output_parameters
+
+
+def run(num_parameters: int, num_parts: int):
+    output_parameters = generate_output_parameters(num_parameters)
+
+    start = time.perf_counter()
+    for part in range(num_parts):
+        for index, output_parameter in enumerate(output_parameters):
+            output_parameter.write((index + part) % 12 - 6.0)
+            result = output_parameter.get_testresult()
+            output_parameter.generate_stdf_result_record(result[0], 0)
+
+    duration = time.perf_counter() - start
+    print(f'parameters: {num_parameters}, parts: {num_parts}')
+    print(f'per part: {duration / num_parts * 1e3:.2f} ms, per parameter: {duration / (num_parts * num_parameters) * 1e6:.2f} us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--parameters', type=int, default=5000)
+    parser.add_argument('--parts', type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.parameters, args.parts)
+
+
+if __name__ == '__main__':
+    main()
@@ -97,6 +97,21 @@ class dummy_cache():
         self.read_called = True
 
 
+class prefetching_cache(dummy_cache):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def prefetch(self, part_ids):
+        self.calls.append(('prefetch', part_ids))
+
+    def do_fetch(self, part_id):
+        self.calls.append(('do_fetch', part_id))
+
+    def close(self):
+        self.calls.append(('close',))
+
+
 def mock_hbin(self, sbin: int):
     return 0
 
@@ -359,6 +374,24 @@ def test_sequencer_will_ignore_cache(sequencer):
     assert(cache.publish_called is False)
 
 
+def test_sequencer_prefetches_the_parts_of_sites_info(sequencer):
+    cache = prefetching_cache()
+    sequencer.register_test(dummy_test_case())
+    sequencer.set_caching_policy("store")
+    sequencer.set_cache_instance(cache)
+    sequencer.run(SingleShotExecutionPolicy(), SITE_INFO)
+    sequencer.close_cache()
+    assert cache.calls == [('prefetch', ['1']), ('do_fetch', '1'), ('close',)]
+
+
+def test_sequencer_will_not_prefetch_if_caching_is_disabled(sequencer):
+    cache = prefetching_cache()
+    sequencer.register_test(dummy_test_case())
+    sequencer.set_cache_instance(cache)
+    sequencer.run(SingleShotExecutionPolicy(), SITE_INFO)
+    assert cache.calls == []
+
+
 def test_sequencer_will_throw_if_invalid_caching_policy_was_set(sequencer):
     t2 = dummy_test_case()
     sequencer.register_test(t2)
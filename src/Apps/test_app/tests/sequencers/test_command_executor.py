@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from ate_test_app.sequencers.CommandExecutor import COMMAND_LANE, NEXT_LANE, CommandExecutor
+
+
+@pytest.fixture
+def errors():
+    return []
+
+
+@pytest.fixture
+def executor(errors):
+    executor = CommandExecutor(errors.append)
+    yield executor
+    executor.shutdown()
+
+
+def test_lane_executes_callbacks_in_order(executor):
+    executed = []
+    for index in range(100):
+        executor.submit(lambda index=index: executed.append(index))
+    executor.shutdown()
+
+    assert executed == list(range(100))
+    assert executor.get_metrics(COMMAND_LANE)['completed'] == 100
+
+
+def test_running_next_does_not_block_commands(executor):
+    release = threading.Event()
+    command_done = threading.Event()
+    executor.submit(lambda: release.wait(5), NEXT_LANE)
+    executor.submit(command_done.set)
+
+    assert command_done.wait(5)
+    release.set()
+
+
+def test_uses_one_thread_per_lane(executor):
+    threads = set()
+    done = threading.Event()
+    for _ in range(10):
+        executor.submit(lambda: threads.add(threading.current_thread().name))
+        executor.submit(lambda: threads.add(threading.current_thread().name), NEXT_LANE)
+    executor.submit(done.set)
+
+    assert done.wait(5)
+    executor.shutdown()
+    assert threads == {'command-lane', 'next-lane'}
+
+
+def test_exceptions_are_reported(executor, errors):
+    def fail():
+        raise ValueError('failed')
+
+    executor.submit(fail)
+    executor.submit(lambda: None)
+    executor.shutdown()
+
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    assert executor.get_metrics(COMMAND_LANE)['completed'] == 2
+
+
+def test_metrics_track_queue_depth(executor):
+    release = threading.Event()
+    executor.submit(lambda: release.wait(5), NEXT_LANE)
+    for _ in range(3):
+        executor.submit(lambda: None, NEXT_LANE)
+    release.set()
+    executor.shutdown()
+
+    metrics = executor.get_metrics()[NEXT_LANE]
+    assert metrics['submitted'] == 4
+    assert metrics['max_queue_depth'] >= 3
+    assert metrics['max_wait_time'] > 0
+
+
+def test_submit_after_shutdown_raises(executor):
+    executor.shutdown()
+
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: None)
@@ -1,7 +1,10 @@
 import pytest
+from types import SimpleNamespace
 from ate_test_app.sequencers.SequencerBase import SequencerBase
 from ate_test_app.sequencers.DutTesting.DutTestCaseABC import DutTestCaseBase
-from ate_test_app.sequencers.ExecutionPolicy import SingleShotExecutionPolicy
+from ate_test_app.sequencers.ExecutionPolicy import MultiSiteExecutionPolicy, SingleShotExecutionPolicy
+from ate_test_app.sequencers.DutTesting.Result import Result
+from ate_test_app.sequencers.DutTesting.TestParameters import OutputParameter
 from tests.sequencers.Loggerstub import LoggerStub
 from tests.sequencers.utils import DummyTester
 
@@ -77,3 +80,131 @@ def test_sequencer_aborts_execution_if_after_test_cb_yields_False(sequencer):
     sequencer.run(SingleShotExecutionPolicy())
     assert(test1.ran is False)
     assert(sequencer.aftertest_calls == 1)
+
+
+class SiteTest(DutTestCaseBase):
+    def __init__(self, instance_name, executions, fail_sites=()):
+        self.instance_name = instance_name
+        self.executions = executions
+        self.fail_sites = fail_sites
+
+    def run(self, site_num):
+        self.executions.append((self.instance_name, site_num))
+        result = Result.Fail() if site_num in self.fail_sites else Result.Pass()
+        return (result, 1, [{'type': 'PTR', 'SITE_NUM': int(site_num), 'TEST_TXT': self.instance_name}]), False
+
+    def get_test_num(self):
+        return 1
+
+    def get_test_nums(self) -> int:
+        return 1
+
+
+class BroadcastTester(DummyTester):
+    def __init__(self):
+        self.requests = []
+
+    def do_request_sites(self, site_ids, timeout):
+        self.requests.append(site_ids)
+        return True
+
+
+class HarnessStub:
+    def collect(self, stdf_data):
+        pass
+
+
+class MultiSiteSequencer(SequencerBase):
+    def __init__(self, site_ids, tester):
+        super().__init__("Testprog", None)
+        self.set_logger(LoggerStub())
+        self.set_harness(HarnessStub())
+        self.set_site_ids(site_ids)
+        self.set_tester_instance(tester)
+
+    def after_cycle_cb(self, execution_time, num_tests, test_result):
+        self.stdf_data.append({'type': 'PRR', 'SITE_NUM': int(self.site_id), 'NUM_TEST': num_tests, 'result': test_result})
+
+
+def run_multi_site(test_cases, settings={}):
+    sequencer = MultiSiteSequencer(['0', '1'], BroadcastTester())
+    for test_case in test_cases:
+        sequencer.register_test(test_case)
+    sequencer.run(MultiSiteExecutionPolicy(), settings)
+    return sequencer
+
+
+def test_multi_site_runs_sites_in_lockstep():
+    executions = []
+    sequencer = run_multi_site([SiteTest('t1', executions), SiteTest('t2', executions)])
+
+    assert (executions == [('t1', '0'), ('t1', '1'), ('t2', '0'), ('t2', '1')])
+    assert (sequencer.tester_instance.requests == [[0, 1], [0, 1]])
+    assert (sequencer.site_id == '0')
+
+
+def test_multi_site_collects_records_per_site():
+    sequencer = run_multi_site([SiteTest('t1', []), SiteTest('t2', [])])
+
+    for site_id, stdf_data in sequencer.get_sites_stdf_data().items():
+        assert ([record['type'] for record in stdf_data] == ['PIR', 'PTR', 'FTR', 'PTR', 'FTR', 'PRR'])
+        assert (all(record['SITE_NUM'] == int(site_id) for record in stdf_data))
+
+
+def test_multi_site_stops_failing_site_only():
+    executions = []
+    settings = {'sites_info': [{'siteid': '0', 'partid': '1', 'binning': -1}, {'siteid': '1', 'partid': '2', 'binning': -1}],
+                'stop_on_fail': {'active': True}}
+    sequencer = run_multi_site([SiteTest('t1', executions, fail_sites=('1',)), SiteTest('t2', executions)], settings)
+
+    assert (executions == [('t1', '0'), ('t1', '1'), ('t2', '0')])
+    prrs = {site_id: stdf_data[-1] for site_id, stdf_data in sequencer.get_sites_stdf_data().items()}
+    assert (prrs['0']['NUM_TEST'] == 2 and prrs['0']['result'] == Result.Pass())
+    assert (prrs['1']['NUM_TEST'] == 0)
+
+
+def test_multi_site_only_tests_sites_with_parts():
+    executions = []
+    settings = {'sites_info': [{'siteid': '1', 'partid': '2', 'binning': -1}]}
+    sequencer = run_multi_site([SiteTest('t1', executions)], settings)
+
+    assert (executions == [('t1', '1')])
+    assert (list(sequencer.get_sites_stdf_data()) == ['1'])
+    assert (sequencer.part_id is None)
+
+
+class MeasuringTest(DutTestCaseBase):
+    def __init__(self, measurements):
+        super().__init__(None, None, 'measure', 12, 1, SimpleNamespace(logger=LoggerStub()))
+        self.op = SimpleNamespace(voltage=OutputParameter('voltage', -10, -5, 0, 5, 10, 0), num_outputs=1)
+        self.op.voltage.set_limits(1, -5, 5)
+        self.op.voltage.set_bin(12, Result.Fail())
+        self.op.voltage.set_format('.3f')
+        self.op.voltage.set_unit('V')
+        self.measurements = measurements
+
+    def do(self):
+        self.op.voltage.write(self.measurements[self.site_num].pop(0))
+
+    def aggregate_test_result(self, site_num, exception):
+        result = self.op.voltage.get_testresult()
+        return (result[0], result[1], [self.op.voltage.generate_stdf_result_record(result[0], site_num)])
+
+    def aggregate_tests_summary(self, head_num, site_num):
+        return [self.op.voltage.generate_tsr_record(head_num, site_num, 1.0)]
+
+    def get_test_nums(self) -> int:
+        return 1
+
+
+def test_multi_site_summary_is_kept_per_site():
+    measurements = {'0': [1.0, 2.0], '1': [-4.0, 6.0]}
+    sequencer = MultiSiteSequencer(['0', '1'], BroadcastTester())
+    sequencer.register_test(MeasuringTest(measurements))
+    for _ in range(2):
+        sequencer.run(MultiSiteExecutionPolicy())
+
+    summaries = {site_id: sequencer.aggregate_tests_summary(site_id)[0] for site_id in sequencer.site_ids}
+    assert ({site_id: tsr['SITE_NUM'] for site_id, tsr in summaries.items()} == {'0': 0, '1': 1})
+    assert ((summaries['0']['EXEC_CNT'], summaries['0']['FAIL_CNT'], summaries['0']['TEST_MAX']) == (2, 0, 2.0))
+    assert ((summaries['1']['EXEC_CNT'], summaries['1']['FAIL_CNT'], summaries['1']['TEST_MIN']) == (2, 1, -4.0))
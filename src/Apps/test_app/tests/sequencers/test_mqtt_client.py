@@ -0,0 +1,100 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from ate_apps_common.request_response import REQUEST_ID, REQUEST_IDS
+from ate_test_app.sequencers.MqttClient import MqttClient
+from ate_test_app.sequencers.TheTestAppStatusAlive import TheTestAppStatusAlive
+from ate_test_app.sequencers.TopicFactory import TopicFactory
+
+DEVICE_ID = 'dev'
+
+
+class FakePahoClient:
+    def __init__(self):
+        self.requests = []
+        self.published = threading.Condition()
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        with self.published:
+            self.requests.append((topic, json.loads(payload)))
+            self.published.notify_all()
+
+    def wait_for_requests(self, count: int):
+        with self.published:
+            assert self.published.wait_for(lambda: len(self.requests) >= count, 5)
+
+
+@pytest.fixture
+def client():
+    client = MqttClient('localhost', '1883', TopicFactory(DEVICE_ID, '0'))
+    client._client = FakePahoClient()
+    return client
+
+
+def respond(client, periphery_type, response):
+    message = SimpleNamespace(topic=f'ate/{DEVICE_ID}/Master/{periphery_type}/response', payload=json.dumps(response).encode('utf-8'))
+    client._on_message_resource_callback(None, None, message)
+
+
+def request(client, periphery_type, ioctl_name, timeout=5):
+    message = {'type': 'io-control-request', 'periphery_type': periphery_type, 'ioctl_name': ioctl_name, 'parameters': {}}
+    return client.do_request_response(f'ate/{DEVICE_ID}/TestApp/io-control/site0/request',
+                                      f'ate/{DEVICE_ID}/Master/{periphery_type}/response',
+                                      json.dumps(message), timeout)
+
+
+def test_concurrent_requests_get_their_own_responses(client):
+    peripherals = ['Temperature', 'Position', 'Light'] * 3
+    with ThreadPoolExecutor(len(peripherals)) as pool:
+        results = [pool.submit(request, client, periphery_type, f'ioctl{index}') for index, periphery_type in enumerate(peripherals)]
+        client._client.wait_for_requests(len(peripherals))
+
+        for _, message in reversed(client._client.requests):
+            respond(client, message['periphery_type'], {'ioctl_name': message['ioctl_name'], REQUEST_IDS: [message[REQUEST_ID]]})
+
+        responses = [result.result() for result in results]
+
+    assert [response for has_timed_out, response in responses if has_timed_out] == []
+    assert [response['ioctl_name'] for _, response in responses] == [f'ioctl{index}' for index in range(len(peripherals))]
+    assert client.get_request_statistics()['Temperature']['count'] == 3
+
+
+def test_response_of_other_site_is_ignored(client):
+    with ThreadPoolExecutor(1) as pool:
+        result = pool.submit(request, client, 'Temperature', 'set_temperature', 0.2)
+        client._client.wait_for_requests(1)
+        respond(client, 'Temperature', {'ioctl_name': 'set_temperature', REQUEST_IDS: ['other site']})
+
+        assert result.result() == (True, None)
+
+    assert client.get_request_statistics()['Temperature']['timeouts'] == 1
+
+
+@pytest.fixture
+def multi_site_client():
+    client = MqttClient('localhost', '1883', TopicFactory(DEVICE_ID, '0', ['0', '1']))
+    client._client = FakePahoClient()
+    return client
+
+
+def test_status_and_summary_are_published_per_site(multi_site_client):
+    multi_site_client.publish_status(TheTestAppStatusAlive.ALIVE, {'state': 'idle'})
+    multi_site_client.publish_tests_summary([{'type': 'TSR', 'SITE_NUM': 1}], '1')
+
+    assert [topic for topic, _ in multi_site_client._client.requests] == [f'ate/{DEVICE_ID}/TestApp/status/site0',
+                                                                          f'ate/{DEVICE_ID}/TestApp/status/site1',
+                                                                          f'ate/{DEVICE_ID}/TestApp/testsummary/site1']
+
+
+def test_commands_for_any_tested_site_are_executed(multi_site_client):
+    commands = []
+    multi_site_client.submit_callback = lambda callback, cmd, data: commands.append(cmd)
+    for sites in (['1'], ['2']):
+        message = SimpleNamespace(topic=f'ate/{DEVICE_ID}/TestApp/cmd', payload=json.dumps({'type': 'cmd', 'command': 'next', 'sites': sites}).encode('utf-8'))
+        multi_site_client._on_message_cmd_callback(None, None, message)
+
+    assert commands == ['next']
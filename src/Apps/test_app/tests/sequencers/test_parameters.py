@@ -1,5 +1,11 @@
+import json
+from array import array
+
+import numpy as np
 import pytest
 
+from ate_apps_common.stdf_encoder import encode_MPR
+from ate_apps_common.stdf_utils import generate_MPR_dict, generate_PTR_dict, json_default
 from ate_test_app.sequencers.DutTesting.TestParameters import InputParameter, OutputParameter
 from ate_test_app.sequencers.DutTesting.Result import Result
 
@@ -164,3 +170,187 @@ def test_generate_tsr():
 
     assert (record['EXEC_CNT'] == 2)
     assert (record['TEST_TIM'] == 2.0)
+
+
+def test_generate_tsr_statistics():
+    measurements = [1.0, 2.5, -3.0, 4.25, 0.5]
+    op = OutputParameter("Op", -10, -5, 0, 5, 10, 0)
+    for measurement in measurements:
+        op.write(measurement)
+        op.get_testresult()
+    record = op.generate_tsr_record(1, 1, 2.0)
+
+    average = sum(measurements) / len(measurements)
+    assert (record['TEST_MIN'] == -3.0)
+    assert (record['TEST_MAX'] == 4.25)
+    assert (record['TST_SUMS'] == pytest.approx(sum(measurements)))
+    assert (record['TST_SQRS'] == pytest.approx(sum((m - average) ** 2 for m in measurements)))
+
+
+def test_tsr_statistics_are_kept_per_site():
+    op = OutputParameter("Op", -10, -5, 0, 5, 10, 0)
+    for site_num, measurement in [(0, 1.0), (1, -4.0), (0, 2.0), (1, 6.0)]:
+        op.select_site(site_num)
+        op.write(measurement)
+        op.get_testresult()
+
+    site0 = op.generate_tsr_record(0, 0, 1.0)
+    site1 = op.generate_tsr_record(0, 1, 1.0)
+    assert ((site0['EXEC_CNT'], site0['FAIL_CNT'], site0['TEST_MIN'], site0['TEST_MAX']) == (2, 0, 1.0, 2.0))
+    assert ((site1['EXEC_CNT'], site1['FAIL_CNT'], site1['TEST_MIN'], site1['TEST_MAX']) == (2, 1, -4.0, 6.0))
+    assert (op.generate_tsr_record(0, 2, 1.0)['EXEC_CNT'] == 0)
+
+
+def test_mpr_result_only_depends_on_current_part():
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, 1, mpr=True)
+    op.set_format('.3f')
+    op.set_unit('V')
+    op.write(5)
+    assert (op.get_testresult()[0] is Result.Fail())
+    op.generate_stdf_result_record(Result.Fail(), 0)
+
+    op.write(15)
+    op.write(25)
+    assert (op.get_testresult()[0] is Result.Pass())
+
+
+def test_reservoir_is_bounded():
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, 1)
+    assert (op.get_reservoir() == [])
+
+    op.set_reservoir_size(10)
+    for measurement in range(1000):
+        op.write(measurement)
+
+    assert (len(op.get_reservoir()) == 10)
+    assert (set(op.get_reservoir()) <= set(range(1000)))
+
+
+@pytest.mark.parametrize('measurement, site_num', [(25, 0), (35.5, 3), (-1.0, 1)])
+def test_ptr_record_matches_generated_record(measurement, site_num):
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, -3)
+    op.set_format('.3f')
+    op.set_unit('V')
+    op.set_test_description('test_1')
+    op.write(measurement)
+
+    scale = 10**-3
+    expected = generate_PTR_dict(test_num=0, head_num=0, site_num=site_num, is_pass=10 * scale <= measurement <= 30 * scale,
+                                 param_flag=0, measurement=measurement * scale, test_txt='test_1.Op', alarm_id='',
+                                 l_limit=10 * scale, u_limit=30 * scale, unit='V', fmt='.3f', exponent=3,
+                                 ls_limit=0.0, us_limit=40 * scale)
+    assert (op.generate_stdf_result_record(Result.Pass(), site_num) == expected)
+
+
+def test_ptr_record_follows_limit_and_unit_changes():
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, 0)
+    op.set_format('.3f')
+    op.set_unit('V')
+    _generate_ptr(op)
+
+    op.set_limits(7, 15, 20)
+    op.set_unit('A')
+    record = _generate_ptr(op)
+
+    assert (record['TEST_NUM'] == 7)
+    assert (record['LO_LIMIT'] == 15 and record['HI_LIMIT'] == 20)
+    assert (record['UNITS'] == 'A')
+    assert (record['TEST_FLG'] == 0b10000000)
+    assert (op.get_testresult()[0] is Result.Fail())
+
+
+def _generate_ptr(op: OutputParameter, site_num: int = 0):
+    op.write(25)
+    return op.generate_stdf_result_record(Result.Pass(), site_num)
+
+
+def test_ptr_compression_sends_static_fields_once_per_site():
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, 1)
+    op.set_format('.3f')
+    op.set_unit('V')
+    op.set_ptr_compression(True)
+
+    first = _generate_ptr(op)
+    second = _generate_ptr(op)
+    other_site = _generate_ptr(op, 1)
+
+    assert (first['LO_LIMIT'] == 100.0)
+    assert (first['TEST_TXT'] == '.Op')
+    assert ('LO_LIMIT' not in second and 'TEST_TXT' not in second and 'UNITS' not in second)
+    assert (second['RESULT'] == first['RESULT'])
+    assert ('LO_LIMIT' in other_site)
+
+
+def test_ptr_compression_sends_complete_records_after_limit_change():
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, 1)
+    op.set_format('.3f')
+    op.set_unit('V')
+    op.set_ptr_compression(True)
+
+    _generate_ptr(op)
+    op.set_limits(1, 15, 25)
+
+    assert (_generate_ptr(op)['LO_LIMIT'] == 150.0)
+    assert (_generate_ptr(op)['LO_LIMIT'] == 150.0)
+
+
+def test_ptr_compression_is_disabled_by_default():
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, 1)
+    op.set_format('.3f')
+    op.set_unit('V')
+
+    _generate_ptr(op)
+    assert ('LO_LIMIT' in _generate_ptr(op))
+
+
+def _mpr_output_parameter() -> OutputParameter:
+    op = OutputParameter("Op", 0, 10, 20, 30, 40, 0, mpr=True)
+    op.set_format('.3f')
+    op.set_unit('V')
+    op.set_test_description('test_1')
+    return op
+
+
+@pytest.mark.parametrize('measurements', [np.array([12.0, 25.5]), array('d', [12.0, 25.5]), [12.0, 25.5]])
+def test_mpr_accepts_arrays(measurements):
+    op = _mpr_output_parameter()
+    op.write(measurements)
+    op.write(15)
+
+    assert (op.get_measurement().tolist() == [12.0, 25.5, 15.0])
+    assert (op.get_testresult()[0] is Result.Pass())
+
+    op.write(np.array([5.0, 15.0]))
+    assert (op.get_testresult()[0] is Result.Fail())
+
+
+def test_mpr_record_matches_generated_record():
+    op = _mpr_output_parameter()
+    measurements = [12.0, 25.5, 31.25]
+    op.write(np.array(measurements[:2]))
+    op.write(measurements[2])
+
+    record = op.generate_stdf_result_record(Result.Fail(), 2)
+    expected = generate_MPR_dict(test_num=0, head_num=0, site_num=2, is_pass=False, param_flag=0, measurements=measurements,
+                                 test_txt='test_1.Op', alarm_id='', l_limit=10, u_limit=30, unit='V', fmt='.3f',
+                                 exponent=0, ls_limit=0, us_limit=40)
+
+    assert (isinstance(record['RTN_RSLT'], np.ndarray))
+    assert (encode_MPR(record) == encode_MPR(expected))
+    assert (json.loads(json.dumps(record, default=json_default)) == expected)
+    assert (op.get_measurement().size == 0)
+
+
+def test_statistics_of_arrays_match_single_values():
+    measurements = np.linspace(-3.0, 7.5, 1001)
+    single = OutputParameter("Op", 0, 10, 20, 30, 40, 0, mpr=True)
+    arrays = OutputParameter("Op", 0, 10, 20, 30, 40, 0, mpr=True)
+    for measurement in measurements.tolist():
+        single.write(measurement)
+    for chunk in np.array_split(measurements, 7):
+        arrays.write(chunk)
+
+    single_tsr = single.generate_tsr_record(0, 0, 1.0)
+    arrays_tsr = arrays.generate_tsr_record(0, 0, 1.0)
+    for field in ('TEST_MIN', 'TEST_MAX', 'TST_SUMS', 'TST_SQRS'):
+        assert (arrays_tsr[field] == pytest.approx(single_tsr[field]))
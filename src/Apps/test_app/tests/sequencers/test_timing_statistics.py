@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ate_test_app.sequencers.DutTesting.DutTestCaseABC import DutTestCaseBase
+from ate_test_app.sequencers.DutTesting.Result import Result
+from ate_test_app.sequencers.ExecutionPolicy import SingleShotExecutionPolicy
+from ate_test_app.sequencers.SequencerBase import SequencerBase
+from ate_test_app.sequencers.TimingStatistics import (AGGREGATE, CYCLE, DO, NUM_BUCKETS, PHASES, SUB_BUCKETS, TimingStatistics,
+                                                      bucket_index, bucket_value)
+from tests.sequencers.Loggerstub import LoggerStub
+from tests.sequencers.utils import DummyTester
+
+
+class PassingTest(DutTestCaseBase):
+    def __init__(self, instance_name):
+        super().__init__([], '', instance_name, 1, 1, SimpleNamespace(logger=LoggerStub()))
+
+    def aggregate_test_result(self, site_num, exception):
+        return (Result.Pass(), 1, [])
+
+    def get_test_nums(self) -> int:
+        return 1
+
+
+class TimedSequencer(SequencerBase):
+    def __init__(self):
+        super().__init__("Testprog", None)
+        self.set_logger(LoggerStub())
+        self.set_tester_instance(DummyTester())
+
+    def after_test_cb(self, test_index, test_result, test_num, exception):
+        return True
+
+    def after_cycle_cb(self, execution_time, num_tests, test_result):
+        pass
+
+
+def test_bucket_value_is_within_the_relative_error_of_the_duration():
+    for duration_ns in [0, 1, SUB_BUCKETS - 1, SUB_BUCKETS, 100, 12345, 10 ** 6, 987654321]:
+        value = bucket_value(bucket_index(duration_ns))
+        assert abs(value - duration_ns) <= duration_ns / SUB_BUCKETS
+
+    assert bucket_index(10 ** 15) == NUM_BUCKETS - 1
+
+
+def test_percentiles():
+    timing = TimingStatistics()
+    timing.enable(['t1'])
+    for duration_us in range(1, 101):
+        timing.record(0, DO, duration_us * 1000)
+
+    statistics = timing.to_dict()
+    assert list(statistics['tests']['t1']) == ['do']
+    assert statistics['tests']['t1']['do']['count'] == 100
+    assert statistics['tests']['t1']['do']['mean_us'] == pytest.approx(50.5)
+    assert statistics['tests']['t1']['do']['p50_us'] == pytest.approx(50, rel=1 / SUB_BUCKETS)
+    assert statistics['tests']['t1']['do']['p95_us'] == pytest.approx(95, rel=1 / SUB_BUCKETS)
+    assert statistics['tests']['t1']['do']['p99_us'] == pytest.approx(99, rel=1 / SUB_BUCKETS)
+    assert statistics['tests']['t1']['do']['max_us'] == 100
+    assert statistics['part'] == {}
+
+
+def test_disabled_timing_records_nothing():
+    timing = TimingStatistics()
+    timing.record(0, DO, 1000)
+
+    assert timing.to_dict() == {'tests': {}, 'part': {}}
+
+
+def test_execution_policy_records_phases_if_enabled():
+    sequencer = TimedSequencer()
+    sequencer.register_test(PassingTest('t1'))
+    sequencer.register_test(PassingTest('t2'))
+
+    sequencer.run(SingleShotExecutionPolicy())
+    assert sequencer.timing.to_dict() == {'tests': {}, 'part': {}}
+
+    settings = {'sites_info': [], 'timing': True}
+    for _ in range(3):
+        sequencer.run(SingleShotExecutionPolicy(), settings)
+
+    histograms = sequencer.timing._histograms
+    assert len(histograms) == 3 * len(PHASES) * NUM_BUCKETS
+    statistics = sequencer.timing.to_dict()
+    assert list(statistics['tests']) == ['t1', 't2']
+    assert list(statistics['tests']['t1']) == ['request', 'do', 'aggregate', 'after_test']
+    assert statistics['tests']['t2']['aggregate']['count'] == 3
+    assert list(statistics['part']) == ['cycle', 'after_cycle']
+    assert sequencer.timing.get_percentile(sequencer.timing.part_row, CYCLE, 50) > 0
+    assert sequencer.timing.get_percentile(0, AGGREGATE, 50) >= 0
+
+    # the storage is allocated once
+    sequencer.run(SingleShotExecutionPolicy(), settings)
+    assert sequencer.timing._histograms is histograms
+    assert sequencer.timing.to_dict()['tests']['t1']['do']['count'] == 4
+    assert sequencer.timing.get_percentile(0, DO, 99) <= sequencer.timing.to_dict()['tests']['t1']['do']['max_us'] * 1000
@@ -0,0 +1,92 @@
+"""
+Measures the flatcache round trip of a part (fetch, resolve the remote
+parameters, publish) against the in-process flatcache stand-in, compared
+with the former client that opened a connection per request and searched
+the records linearly.
+
+usage: python bench_flatcache.py [--parts 200] [--records 500] [--lookups 100]
+"""
+import argparse
+import json
+import time
+
+import requests
+
+from semi_ate_testers.Flatcache.Flatcache import Flatcache
+from semi_ate_testers.Flatcache.FlatcacheServer import FlatcacheServer
+
+PROGRAM_NAME = 'prog'
+
+
+class LegacyFlatcache(Flatcache):
+    # the client as it was before the session pool and the record index
+    def get_value(self, part_id: str, value_name: str) -> dict:
+        if self.last_part_id != part_id:
+            self.do_fetch(part_id)
+
+        subdocid, normalized_value_name = value_name.split(".", 1)
+        for record in self.fetched_data.get(subdocid, []):
+            if record["type"] == "PTR" and record["TEST_TXT"] == normalized_value_name:
+                return record
+
+    def do_fetch(self, part_id):
+        r = requests.get(self.url(part_id))
+        self.last_part_id = part_id
+        self.fetched_data = {entry["subdocid"]: json.loads(entry["contents"]) for entry in json.loads(r.content)["contents"]}
+
+    def publish(self, part_id: str, program_name: str, data):
+        requests.put(self.url(part_id), json={"subdocid": str(program_name), "contents": json.dumps(data)})
+
+
+def generate_records(num_records: int) -> list:
+    return [{"type": "PTR", "TEST_TXT": f"test{index}.param", "RESULT": float(index)} for index in range(num_records)]
+
+
+def run_client(client: Flatcache, server: FlatcacheServer, num_parts: int, records: list, num_lookups: int) -> float:
+    client.apply_configuration(server.configuration)
+    value_names = [f"{PROGRAM_NAME}.{record['TEST_TXT']}" for record in records[-num_lookups:]]
+    part_ids = [str(part) for part in range(num_parts)]
+    for part_id in part_ids:
+        server.put_document(part_id, {"upstream": json.dumps(records), PROGRAM_NAME: json.dumps(records)})
+
+    start = time.perf_counter()
+    for index, part_id in enumerate(part_ids):
+        client.do_fetch(part_id)
+        # the part of the next run is announced while testing the current one
+        if hasattr(client, 'prefetch') and not isinstance(client, LegacyFlatcache):
+            client.prefetch(part_ids[index + 1:index + 2])
+
+        for value_name in value_names:
+            assert client.get_cached_value(value_name) is not None
+
+        client.publish(part_id, PROGRAM_NAME, records)
+
+    client.flush()
+    return time.perf_counter() - start
+
+
+def run(num_parts: int, num_records: int, num_lookups: int):
+    records = generate_records(num_records)
+    for name, client in (('indexed', Flatcache()), ('legacy', LegacyFlatcache())):
+        server = FlatcacheServer().start()
+        try:
+            duration = run_client(client, server, num_parts, records, num_lookups)
+        finally:
+            server.stop()
+
+        print(f'{name:>8}: parts: {num_parts}, per part: {duration / num_parts * 1e3:.3f} ms, '
+              f'connections: {server.connection_count}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--parts', type=int, default=200)
+    parser.add_argument('--records', type=int, default=500)
+    parser.add_argument('--lookups', type=int, default=100)
+    args = parser.parse_args()
+
+    run(args.parts, args.records, args.lookups)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,87 @@
-import requests
+import atexit
 import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from ate_common.logger import Logger, LogLevel
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+
+# records that are resolved by their type instead of their TEST_TXT
+INDEXED_RECORD_TYPES = ('PIR', 'PRR')
+
+PREFETCH_LIMIT = 16
+
+
+def _json_default(value):
+    # arrays in the stdf records (e.g. the numpy results of an MPR) are stored as lists
+    return value.tolist()
+
+
+def build_index(records: List[dict]) -> Dict[Tuple[str, Optional[str]], dict]:
+    # PTRs are keyed by their TEST_TXT, the first record wins as with a linear search
+    index = {}
+    for record in records:
+        record_type = record.get("type")
+        if record_type == "PTR":
+            index.setdefault(("PTR", record.get("TEST_TXT")), record)
+        elif record_type in INDEXED_RECORD_TYPES:
+            index.setdefault((record_type, None), record)
+
+    return index
 
 
 class FlatcacheConfig(BaseModel):
     ip: str
     port: int
+    # number of published parts sent together, see Flatcache.flush
+    batch_size: int = 1
+    prefetch_workers: int = 4
+    pool_size: int = 4
 
 
 class Flatcache:
-    def __init__(self):
+    '''
+        Client of the flatcache (catflache) service, the document of a part
+        holds one subdoc per test program with its stdf records.
+
+        - the requests of a thread share one keep-alive session
+        - fetched subdocs are indexed once, values are looked up by
+          TEST_TXT (PTR) or record type (PIR, PRR)
+        - parts can be prefetched in the background (see prefetch)
+        - published subdocs are sent with one put per subdoc, the service
+          keeps the subdocs of the other programs, parts are sent in
+          batches of 'batch_size' parts (see flush), pending parts are
+          sent at close, at the latest when the process exits
+    '''
+
+    def __init__(self, logger: Logger = None):
+        self.logger = logger
         self.config: FlatcacheConfig = None
         self.target_ip = ""
         self.target_port = ""
         self.last_part_id = ""
         self.fetched_data = {}
         self.subdoc_cache = {}
+        self._index = {}
+        self._raw_document = {}
+        self._pending: Dict[str, Dict[str, str]] = OrderedDict()
+        self._prefetched: Dict[str, Future] = OrderedDict()
+        self._prefetch_pool: Optional[ThreadPoolExecutor] = None
+        self._sessions = threading.local()
+        self._lock = threading.Lock()
+        atexit.register(self._close_at_exit)
 
     def apply_configuration(self, data: dict):
         self.config = FlatcacheConfig(**data)
 
         # Canary request -> check if service is available (i.e. requests succeeds)
         # and if it reports the correct API version.
-        r = requests.get(self.url('api'))
+        r = self._session().get(self.url('api'))
         api_version = json.loads(r.content)
         version = api_version["version"]
         if version != 1:
@@ -35,53 +94,135 @@ class Flatcache:
         # The valuename is composed of <programname>.<testinstancename>.<paramname>
         # the programname is used as catflache subdoc id, so we split that off to
         # get the right subdoc:
-        value_parts = value_name.split(".", 1)
-        subdocid = value_parts[0]
-        normalized_value_name = value_parts[1]
-
-        found_subdoc = self.fetched_data.get(subdocid)
+        subdocid, _, normalized_value_name = value_name.partition(".")
 
-        if found_subdoc is None:
+        index = self._index.get(subdocid)
+        if index is None:
             return None
 
-        for record in found_subdoc:
-            record_type = record["type"]
-            if record_type == "PTR":
-                if record["TEST_TXT"] == normalized_value_name:
-                    return record
-
-            if record_type == "PIR" and value_name == "PIR":
-                return record
+        record = index.get(("PTR", normalized_value_name))
+        if record is None and normalized_value_name in INDEXED_RECORD_TYPES:
+            record = index.get((normalized_value_name, None))
 
-            if record_type == "PRR" and value_name == "PRR":
-                return record
+        return record
 
     def get_cached_value(self, value_name: str) -> dict:
         return self.get_value(self.last_part_id, value_name)
 
+    def prefetch(self, part_ids: Iterable[str]):
+        # parts are fetched concurrently in the background and picked up by do_fetch
+        if self._prefetch_pool is None:
+            self._prefetch_pool = ThreadPoolExecutor(max_workers=self.config.prefetch_workers,
+                                                     thread_name_prefix='flatcache-prefetch')
+
+        with self._lock:
+            for part_id in part_ids:
+                if part_id in self._prefetched or part_id in self._pending:
+                    continue
+
+                self._prefetched[part_id] = self._prefetch_pool.submit(self._fetch_document, part_id)
+                if len(self._prefetched) > PREFETCH_LIMIT:
+                    self._prefetched.popitem(last=False)
+
     def do_fetch(self, part_id):
-        r = requests.get(self.url(part_id))
-        try:
-            values = json.loads(r.content)
-            self.last_part_id = part_id
-            self.fetched_data = {}
-            for entry in values["contents"]:
-                fetched_data = json.loads(entry["contents"])
-                subdoc_id = entry["subdocid"]
-                self.fetched_data[subdoc_id] = fetched_data
+        # pending writes of the part must be visible to the fetch
+        if part_id in self._pending:
+            self.flush()
 
+        with self._lock:
+            prefetched = self._prefetched.pop(part_id, None)
+
+        try:
+            document = prefetched.result() if prefetched is not None else self._fetch_document(part_id)
+            fetched_data = {subdoc_id: json.loads(contents) for subdoc_id, contents in document.items()}
         except Exception as e:
-            print(e)
-            print(r.content)
+            self._log(LogLevel.Error(), f"flatcache: fetch of part '{part_id}' failed: {e}")
+            return
+
+        self.last_part_id = part_id
+        self._raw_document = document
+        self.fetched_data = fetched_data
+        self._index = {subdoc_id: build_index(records) for subdoc_id, records in fetched_data.items()}
 
     def publish(self, part_id: str, program_name: str, data):
-        # Trouble: This will completely replace the date stored in the cache
-        #  with "data" -> we don't want that.
-        requests.put(self.url(part_id), json={"subdocid": str(program_name), "contents": json.dumps(data)})
+        subdoc_id = str(program_name)
+        contents = json.dumps(data, default=_json_default)
+
+        if part_id == self.last_part_id:
+            self._raw_document[subdoc_id] = contents
+            self.fetched_data[subdoc_id] = data
+            self._index[subdoc_id] = build_index(data)
+
+        with self._lock:
+            self._prefetched.pop(part_id, None)
+            self._pending.setdefault(part_id, {})[subdoc_id] = contents
+            is_batch_complete = len(self._pending) >= self.config.batch_size
+
+        if is_batch_complete:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+
+        if not pending:
+            return
+
+        session = self._session()
+        for part_id, subdocs in pending.items():
+            for subdoc_id, contents in subdocs.items():
+                session.put(self.url(part_id), json={"subdocid": subdoc_id, "contents": contents})
 
     def drop_part(self, part_id: str):
-        requests.delete(self.url(part_id))
+        with self._lock:
+            self._pending.pop(part_id, None)
+            self._prefetched.pop(part_id, None)
 
-    def utl(self, part_id: str):
+        if part_id == self.last_part_id:
+            self.last_part_id = ""
+            self._raw_document = {}
+            self.fetched_data = {}
+            self._index = {}
+
+        self._session().delete(self.url(part_id))
+
+    def close(self):
+        self.flush()
+        if self._prefetch_pool is not None:
+            self._prefetch_pool.shutdown(wait=True)
+            self._prefetch_pool = None
+
+    def _close_at_exit(self):
+        try:
+            self.close()
+        except Exception as e:
+            self._log(LogLevel.Error(), f"flatcache: pending parts could not be sent: {e}")
+
+    def url(self, part_id: str):
         return f"http://{self.config.ip}:{self.config.port}/{part_id}"
 
+    def _fetch_document(self, part_id: str) -> Dict[str, str]:
+        r = self._session().get(self.url(part_id))
+        try:
+            values = json.loads(r.content)
+            return {entry["subdocid"]: entry["contents"] for entry in values["contents"]}
+        except Exception:
+            self._log(LogLevel.Error(), f"flatcache: unexpected response for part '{part_id}': {r.content}")
+            raise
+
+    def _log(self, level: int, message: str):
+        if self.logger is None:
+            logging.getLogger(__name__).log(level, message)
+            return
+
+        self.logger.log_message(level, message)
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._sessions, 'session', None)
+        if session is None:
+            pool_size = self.config.pool_size if self.config is not None else 1
+            session = requests.Session()
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            self._sessions.session = session
+
+        return session
@@ -0,0 +1,101 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class _FlatcacheRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive connections, as served by the flatcache service
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        part_id = self._part_id()
+        if part_id == 'api':
+            self._respond({"version": 1})
+            return
+
+        document = self.server.get_document(part_id)
+        self._respond({"contents": [{"subdocid": subdoc_id, "contents": contents} for subdoc_id, contents in document.items()]})
+
+    def do_PUT(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length))
+        self.server.put_subdoc(self._part_id(), request["subdocid"], request["contents"])
+        self._respond({})
+
+    def do_DELETE(self):
+        self.server.delete_document(self._part_id())
+        self._respond({})
+
+    def log_message(self, format, *args):
+        pass
+
+    def _part_id(self) -> str:
+        self.server.count_request(self.command)
+        return self.path.strip('/')
+
+    def _respond(self, data: dict):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FlatcacheServer(ThreadingHTTPServer):
+    '''
+        In-process stand-in of the flatcache service for tests and
+        benchmarks. A put stores one subdoc of the part, the other subdocs
+        are kept, like the service does.
+    '''
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), _FlatcacheRequestHandler)
+        self.documents: Dict[str, Dict[str, str]] = {}
+        self.request_counts: Dict[str, int] = {}
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def configuration(self) -> dict:
+        host, port = self.server_address[:2]
+        return {"ip": host, "port": port}
+
+    def start(self) -> 'FlatcacheServer':
+        self._thread = threading.Thread(target=self.serve_forever, name='flatcache-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def get_document(self, part_id: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self.documents.get(part_id, {}))
+
+    def put_document(self, part_id: str, document: Dict[str, str]):
+        with self._lock:
+            self.documents[part_id] = document
+
+    def put_subdoc(self, part_id: str, subdoc_id: str, contents: str):
+        with self._lock:
+            self.documents.setdefault(part_id, {})[subdoc_id] = contents
+
+    def delete_document(self, part_id: str):
+        with self._lock:
+            self.documents.pop(part_id, None)
+
+    def count_request(self, method: str):
+        with self._lock:
+            self.request_counts[method] = self.request_counts.get(method, 0) + 1
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connection_count += 1
+        super().process_request(request, client_address)
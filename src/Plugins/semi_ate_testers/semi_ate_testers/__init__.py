@@ -228,7 +228,7 @@ class Plugin:
     def get_general_purpose_function(func_name: str, logger: Logger):
         print(f"Get General Purpose Function: {func_name}")
         if func_name == f"{Plugin.prefix()} Flatcache":
-            return Flatcache.Flatcache()
+            return Flatcache.Flatcache(logger)
 
     @hookimpl
     def get_configuration_options(object_name):
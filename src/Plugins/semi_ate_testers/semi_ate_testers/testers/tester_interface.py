@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 from ate_common.logger import LogLevel
 
 
@@ -32,6 +33,15 @@ class TesterInterface(ABC):
         self.log_info('tester.do_init_state() only dummy function')
         pass
 
+    # the *_sites methods are used if one test app process tests several sites,
+    # testers that can serve all sites with one operation should override them
+    def do_request_sites(self, site_ids: List[int], timeout: int) -> bool:
+        return all(self.do_request(site_id, timeout) for site_id in site_ids)
+
+    def test_in_progress_sites(self, site_ids: List[int]):
+        for site_id in site_ids:
+            self.test_in_progress(site_id)
+
     def setup(self):
         self.log_info('tester.setup() only dummy function')
         pass
@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+from ate_common.logger import LogLevel
+from semi_ate_testers.Flatcache.Flatcache import Flatcache
+from semi_ate_testers.Flatcache.FlatcacheServer import FlatcacheServer
+
+RECORDS = [
+    {"type": "PIR", "HEAD_NUM": 0, "SITE_NUM": 0},
+    {"type": "PTR", "TEST_TXT": "contact.r", "RESULT": 1.5},
+    {"type": "PTR", "TEST_TXT": "contact.r", "RESULT": 2.5},
+    {"type": "PTR", "TEST_TXT": "leakage.i", "RESULT": 3.5},
+    {"type": "PRR", "HARD_BIN": 1},
+]
+
+
+@pytest.fixture
+def server():
+    server = FlatcacheServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def cache(server):
+    cache = Flatcache()
+    cache.apply_configuration(server.configuration)
+    yield cache
+    cache.close()
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.messages = []
+
+    def log_message(self, type, message):
+        self.messages.append((type, message))
+
+
+def store(server, part_id, document):
+    server.put_document(part_id, {subdoc_id: json.dumps(records) for subdoc_id, records in document.items()})
+
+
+def test_values_are_resolved_from_the_index(server, cache):
+    store(server, '1', {'prog': RECORDS})
+    cache.do_fetch('1')
+
+    assert cache.get_cached_value('prog.contact.r')['RESULT'] == 1.5
+    assert cache.get_cached_value('prog.leakage.i')['RESULT'] == 3.5
+    assert cache.get_cached_value('prog.PIR')['type'] == 'PIR'
+    assert cache.get_cached_value('prog.PRR')['HARD_BIN'] == 1
+    assert cache.get_cached_value('prog.unknown') is None
+    assert cache.get_cached_value('other.contact.r') is None
+
+
+def test_requests_reuse_the_connection(server, cache):
+    for part_id in range(5):
+        store(server, str(part_id), {'prog': RECORDS})
+        cache.do_fetch(str(part_id))
+        cache.publish(str(part_id), 'prog', RECORDS)
+
+    assert server.request_counts == {'GET': 6, 'PUT': 5}
+    assert server.connection_count == 1
+
+
+def test_publish_keeps_the_subdocs_of_other_programs(server, cache):
+    store(server, '1', {'upstream': RECORDS})
+    cache.do_fetch('1')
+    cache.publish('1', 'prog', [{"type": "PTR", "TEST_TXT": "t.p", "RESULT": 4.0}])
+
+    document = server.get_document('1')
+    assert json.loads(document['upstream']) == RECORDS
+    assert json.loads(document['prog'])[0]['RESULT'] == 4.0
+    assert cache.get_cached_value('prog.t.p')['RESULT'] == 4.0
+
+
+def test_publish_of_unknown_part_merges_the_stored_document(server, cache):
+    store(server, '2', {'upstream': RECORDS})
+    cache.publish('2', 'prog', RECORDS)
+
+    assert set(server.get_document('2')) == {'upstream', 'prog'}
+    # only the api version is requested, the stored document is not fetched to publish
+    assert server.request_counts == {'GET': 1, 'PUT': 1}
+
+
+def test_subdocs_are_put_one_by_one(server, cache):
+    cache.config.batch_size = 10
+    cache.publish('1', 'prog', RECORDS)
+    cache.publish('1', 'retest', RECORDS[:1])
+    cache.flush()
+
+    assert server.request_counts['PUT'] == 2
+    assert json.loads(server.get_document('1')['retest']) == RECORDS[:1]
+
+
+def test_writes_are_batched_until_flush(server, cache):
+    cache.config.batch_size = 3
+    for part_id in ('1', '2'):
+        cache.publish(part_id, 'prog', RECORDS)
+    assert server.documents == {}
+
+    cache.publish('3', 'prog', RECORDS)
+    assert set(server.documents) == {'1', '2', '3'}
+
+    cache.publish('4', 'prog', RECORDS)
+    cache.flush()
+    assert '4' in server.documents
+
+
+def test_fetch_sees_pending_writes(server, cache):
+    cache.config.batch_size = 10
+    cache.publish('1', 'prog', RECORDS)
+    cache.do_fetch('1')
+
+    assert cache.get_cached_value('prog.leakage.i')['RESULT'] == 3.5
+
+
+def test_prefetched_parts_are_not_fetched_again(server, cache):
+    for part_id in ('1', '2'):
+        store(server, part_id, {'prog': RECORDS})
+    cache.prefetch(['1', '2'])
+    cache.do_fetch('2')
+    cache.do_fetch('1')
+
+    assert server.request_counts['GET'] == 3
+    assert cache.get_value('1', 'prog.contact.r')['RESULT'] == 1.5
+
+
+def test_drop_part(server, cache):
+    store(server, '1', {'prog': RECORDS})
+    cache.do_fetch('1')
+    cache.drop_part('1')
+
+    assert server.documents == {}
+    assert cache.last_part_id == ''
+
+
+def test_close_sends_the_pending_writes(server, cache):
+    cache.config.batch_size = 10
+    cache.prefetch(['1'])
+    cache.publish('2', 'prog', RECORDS)
+    cache.close()
+
+    assert set(server.documents) == {'2'}
+    assert cache._prefetch_pool is None
+
+
+def test_failed_fetch_is_logged(server):
+    logger = RecordingLogger()
+    cache = Flatcache(logger)
+    cache.apply_configuration(server.configuration)
+    server.put_subdoc('1', 'prog', 'no json')
+    cache.do_fetch('1')
+
+    assert cache.last_part_id == ''
+    assert [level for level, _ in logger.messages] == [LogLevel.Error()]
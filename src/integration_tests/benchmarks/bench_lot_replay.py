@@ -0,0 +1,462 @@
+"""
+Replays a lot through the complete stack to measure its throughput: the
+master application, a control application per site that starts the test
+program, and the dummy handler that drives the lot. They talk through the
+in-process MQTT broker stand-in (see mqtt_broker.py), so no broker has to
+be installed. The test program is generated by sammy from the integration
+test project, extended by tests with the given number of PTRs.
+
+Reported are the touchdown latency percentiles seen by the handler (from its
+start test command to the end of test response), the CPU time the master
+spends per part, the bytes on the wire and the time the master spends
+writing STDF.
+
+The tests take the given test time, the master releases the sites of a
+touchdown while their tests run and does not follow test apps that are done
+before the other sites started testing.
+
+usage: python bench_lot_replay.py [--sites 2] [--parts 200] [--tests 10] [--ptrs 10] [--test-time 5] [--retest-rate 0.05]
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as tree
+from argparse import Namespace
+from pathlib import Path
+from typing import List
+
+from ate_apps_common.stdf_aggregator import StdfTestResultAggregator
+from ate_common.logger import LogLevel
+from ate_control_app.launch_control import launch_control
+from ate_master_app import master_application
+from ate_master_app.launch_master import launch_master
+from ate_sammy.sammy import run as run_sammy
+from dummy_handler_app.handler_runner import HandlerRunner
+
+# setup the include path manually as the integration tests are not a package
+sys.path.append(str(Path(__file__).parents[1]))
+from DummySerial import DummySerialGeringer  # noqa: E402
+from mqtt_broker import MqttBroker  # noqa: E402
+
+CURRENT_DIR = Path(__file__).parent
+SOURCE_PROJECT = CURRENT_DIR.parent.joinpath('projects', 'project_version_10')
+PROGRAM_NAME = 'project_version_10_HW0_PR_asdf_checker_trog'
+XML_TEMPLATE = CURRENT_DIR.parents[1].joinpath('Apps', 'master_app', 'tests', 'le306426001_template.xml')
+CONFIG_DIR = CURRENT_DIR.parents[1].joinpath('Apps', 'development')
+
+DEVICE_ID = 'lot_replay'
+HANDLER_ID = 'HTO92-20F'
+TESTER = 'Semi_ATE Parallel Tester'
+MASTER_TESTER = 'Semi_ATE Master Parallel Tester'
+JOB_FILE_NAME = 'le306426001.xml'  # lot number of the load command of DummySerialGeringer
+
+STARTUP_TIMEOUT = 30.0
+LOAD_TIMEOUT = 60.0
+TOUCHDOWN_TIMEOUT = 30.0
+UNLOAD_TIMEOUT = 30.0
+SERIAL_READ_TIMEOUT = 0.001
+FIRST_PART_ID = 100000
+
+
+def sammy(project_path: Path, verb: str, noun: str = ''):
+    run_sammy(Namespace(verb=verb, noun=noun, params=[], jobs=1), str(project_path))
+
+
+def read_definition(path: Path) -> list:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_definition(path: Path, definition: list):
+    with open(path, 'w') as f:
+        json.dump(definition, f, indent=4)
+
+
+def set_parallelism(project_path: Path, num_sites: int):
+    hardware_file = project_path.joinpath('definitions', 'hardware', 'hardwareHW0.json')
+    hardware = read_definition(hardware_file)
+    definition = hardware[0]['definition']
+    # the tester of the project is not provided by the installed tester plugin
+    definition['tester'] = TESTER
+    definition['PCB']['MaxParallelism'] = num_sites
+
+    parallelism = definition['Parallelism']['PR'][0]
+    parallelism['sites'] = [[site, 0] for site in range(num_sites)]
+    parallelism['configs'][0]['stages'] = [[str(site) for site in range(num_sites)]]
+    write_definition(hardware_file, hardware)
+
+
+def add_tests(project_path: Path, num_tests: int, num_ptrs: int) -> List[str]:
+    test_dir = project_path.joinpath('definitions', 'test')
+    sequence_file = project_path.joinpath('definitions', 'sequence', f'sequence{PROGRAM_NAME}.json')
+    test_target_file = next(project_path.joinpath('definitions', 'testtarget').glob('testtarget*.json'))
+    test_template = read_definition(test_dir.joinpath('testfae.json'))[0]
+    sequence_template = read_definition(sequence_file)[0]
+    test_targets = read_definition(test_target_file)
+
+    names = []
+    sequence = []
+    for index in range(num_tests):
+        name = f'bench{index}'
+        test_num = (index + 1) * 1000
+        names.append(name)
+
+        test = json.loads(json.dumps(test_template))
+        test['name'] = name
+        test['definition']['name'] = name
+        output_parameter = test['definition']['output_parameters']['new_parameter1']
+        test['definition']['output_parameters'] = {f'ptr{ptr}': dict(output_parameter, nom=float(ptr)) for ptr in range(num_ptrs)}
+        write_definition(test_dir.joinpath(f'test{name}.json'), [test])
+
+        entry = json.loads(json.dumps(sequence_template))
+        entry['test'] = name
+        entry['test_order'] = index
+        entry['definition']['name'] = name
+        entry['definition']['description'] = f'{name}_1'
+        entry['definition']['test_num'] = test_num
+        output_parameter = entry['definition']['output_parameters']['new_parameter1']
+        entry['definition']['output_parameters'] = {f'ptr{ptr}': dict(output_parameter, test_num=test_num + ptr + 1) for ptr in range(num_ptrs)}
+        sequence.append(entry)
+
+        test_targets.append(dict(test_targets[0], test=name))
+
+    write_definition(sequence_file, sequence)
+    write_definition(test_target_file, test_targets)
+    return names
+
+
+def implement_test(test_file: Path, num_ptrs: int, test_time: float):
+    # the benchmark tests take the test time and measure their nominal values
+    with open(test_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    head, _, _ = content.partition('    def do(self):')
+    head = head.replace('\nimport ', '\nimport time\nimport ', 1)
+    body = f'        time.sleep({test_time})\n' + ''.join(f'        self.op.ptr{ptr}.default()\n' for ptr in range(num_ptrs))
+    with open(test_file, 'w', encoding='utf-8') as f:
+        f.write(f'{head}    def do(self):\n{body}')
+
+
+def generate_program(workspace: Path, num_sites: int, num_tests: int, num_ptrs: int, test_time: float) -> Path:
+    project_path = workspace.joinpath(SOURCE_PROJECT.name)
+    shutil.copytree(SOURCE_PROJECT, project_path)
+
+    # the output of sammy itself is not of interest here
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            sammy(project_path, 'migrate')
+            set_parallelism(project_path, num_sites)
+            names = add_tests(project_path, num_tests, num_ptrs)
+            sammy(project_path, 'generate', 'all')
+
+    base_path = project_path.joinpath(project_path.name, 'HW0', 'PR')
+    for name in names:
+        implement_test(base_path.joinpath(name, f'{name}.py'), num_ptrs, test_time)
+
+    return base_path.joinpath(f'{PROGRAM_NAME}.py')
+
+
+def create_job_file(workspace: Path, program_path: Path):
+    et = tree.parse(XML_TEMPLATE)
+    root = et.getroot()
+    for cl in root.findall('CLUSTER'):
+        item = cl.find('TESTER1')
+        if item is not None:
+            item.text = DEVICE_ID
+
+    for st in root.findall('STATION'):
+        item = st.find('STATION1')
+        item.find('TESTER1').text = DEVICE_ID
+        item.find('PROGRAM_DIR1').text = str(program_path)
+
+    et.write(workspace.joinpath(JOB_FILE_NAME))
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class TimedStdfTestResultAggregator(StdfTestResultAggregator):
+    """
+    Accumulates the time the master spends writing stdf records. The master
+    creates the aggregator when a lot is loaded and writes the footer records
+    after it is unloaded, from there the statistics of the lot are reported.
+    """
+    statistics_queue = None
+
+    def __init__(self, *args, **kwargs):
+        self.write_time = 0.0
+        self.cpu_start = time.process_time()
+        super().__init__(*args, **kwargs)
+
+    def _timed(self, write, *args):
+        start = time.perf_counter()
+        try:
+            return write(*args)
+        finally:
+            self.write_time += time.perf_counter() - start
+
+    def write_header_records(self):
+        self._timed(super().write_header_records)
+
+    def append_test_results(self, test_results):
+        self._timed(super().append_test_results, test_results)
+
+    def append_stdf_part(self, data: bytes, test_results: list):
+        self._timed(super().append_stdf_part, data, test_results)
+
+    def append_test_summary(self, tests_summary: list):
+        self._timed(super().append_test_summary, tests_summary)
+
+    def append_soft_and_hard_bin_record(self, bin_informations: dict):
+        self._timed(super().append_soft_and_hard_bin_record, bin_informations)
+
+    def append_part_count_infos(self, part_infos: list):
+        self._timed(super().append_part_count_infos, part_infos)
+
+    def write_footer_records(self):
+        self._timed(super().write_footer_records)
+        self.statistics_queue.put({'stdf_write_time': self.write_time,
+                                   'cpu_time': time.process_time() - self.cpu_start})
+
+
+# executed in own process with multiprocessing, no references to the state of the replay
+def run_master(workspace: Path, config: dict, statistics_queue):
+    os.chdir(workspace)
+    TimedStdfTestResultAggregator.statistics_queue = statistics_queue
+    master_application.StdfTestResultAggregator = TimedStdfTestResultAggregator
+    launch_master(config_file_path=str(CONFIG_DIR.joinpath('master_config_file_template.json')),
+                  user_config_dict=config)
+
+
+# executed in own process with multiprocessing, no references to the state of the replay
+def run_control(workspace: Path, config: dict):
+    os.chdir(workspace)
+    launch_control(config_file_path=str(CONFIG_DIR.joinpath('control_config_file_template.json')),
+                   user_config_dict=config)
+
+
+class ReplaySerial(DummySerialGeringer):
+    """
+    Serial port of the handler: the replay puts the start test commands, the
+    end of test responses of the master are timestamped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.end_of_test = asyncio.Queue()
+
+    def put_start_test(self, part_ids: List[str]):
+        message = f'ST|{len(part_ids):02d}|' + ''.join(f'1|{part_id}|-01|002|000|' for part_id in part_ids)
+        check_sum = sum(ord(char) for char in message) & 0xff
+        self._message_queue.put_nowait(f'{message}{check_sum}\n'.encode('ASCII'))
+
+    def readline(self):
+        line = super().readline()
+        if not line:
+            # a serial port blocks until its read timeout expires instead of spinning on an empty buffer
+            time.sleep(SERIAL_READ_TIMEOUT)
+        return line
+
+    def write(self, message):
+        if message.startswith(b'ET|'):
+            self.end_of_test.put_nowait(time.perf_counter())
+
+
+class MasterState:
+    """
+    Follows the state the master publishes, on_publish is called in the
+    thread of the broker.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.state = None
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    def on_publish(self, topic: str, payload: bytes):
+        if topic == f'ate/{DEVICE_ID}/Master/status':
+            self._loop.call_soon_threadsafe(self._set_state, json.loads(payload)['payload']['state'])
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._changed.set()
+
+    async def wait_for(self, state: str, timeout: float):
+        async def wait():
+            while self.state != state:
+                if self.state in ('softerror', 'crash'):
+                    raise RuntimeError(f'master is in state {self.state} while waiting for state {state}')
+                self._changed.clear()
+                await self._changed.wait()
+
+        await asyncio.wait_for(wait(), timeout)
+
+
+def plan_lot(num_sites: int, num_parts: int, retest_rate: float, seed: int) -> List[List[str]]:
+    # every touchdown tests a part on each site, either a new one or, with
+    # the retest rate, one of the parts tested before
+    rng = random.Random(seed)
+    touchdowns = []
+    tested = []
+    next_part = 0
+    while next_part < num_parts:
+        part_ids = []
+        for _ in range(num_sites):
+            candidates = [part_id for part_id in tested if part_id not in part_ids]
+            if candidates and (next_part >= num_parts or rng.random() < retest_rate):
+                part_ids.append(rng.choice(candidates))
+            else:
+                part_ids.append(str(FIRST_PART_ID + next_part))
+                next_part += 1
+
+        tested.extend(part_id for part_id in part_ids if part_id not in tested)
+        touchdowns.append(part_ids)
+
+    return touchdowns
+
+
+async def replay(workspace: Path, touchdowns: List[List[str]], num_sites: int) -> dict:
+    loop = asyncio.get_running_loop()
+    master_state = MasterState(loop)
+    broker = MqttBroker(on_publish=master_state.on_publish)
+    broker_port = broker.start()
+
+    sites = [str(site) for site in range(num_sites)]
+    site_layout = [[site, 0] for site in range(num_sites)]
+    master_config = {'Handler': HANDLER_ID,
+                     'broker_host': broker.host,
+                     'broker_port': broker_port,
+                     'device_id': DEVICE_ID,
+                     'sites': sites,
+                     'webui_port': get_free_port(),
+                     'skip_jobdata_verification': False,
+                     'filesystemdatasource_path': str(workspace),
+                     'filesystemdatasource_jobpattern': JOB_FILE_NAME,
+                     'user_settings_filepath': 'master_user_settings.json',
+                     'site_layout': site_layout,
+                     'tester_type': MASTER_TESTER,
+                     'loglevel': LogLevel.Warning()}
+
+    # important: use 'spawn' also on linux, because 'fork' does not work properly with asyncio (see test_integrate)
+    mp_ctx = mp.get_context('spawn')
+    statistics_queue = mp_ctx.Queue()
+    processes = [mp_ctx.Process(target=run_master, args=(workspace, master_config, statistics_queue))]
+    processes.extend(mp_ctx.Process(target=run_control,
+                                    args=(workspace, {'broker_host': broker.host,
+                                                      'broker_port': broker_port,
+                                                      'device_id': DEVICE_ID,
+                                                      'site_id': site_id,
+                                                      'loglevel': LogLevel.Warning()}))
+                     for site_id in sites)
+
+    serial = ReplaySerial()
+    handler = HandlerRunner({'handler_type': 'geringer',
+                             'handler_id': HANDLER_ID,
+                             'broker_host': broker.host,
+                             'broker_port': broker_port,
+                             'device_ids': [DEVICE_ID],
+                             'site_layout': site_layout,
+                             'loglevel': LogLevel.Warning()},
+                            serial)
+    handler.start()
+    try:
+        for process in processes:
+            process.start()
+
+        await master_state.wait_for('initialized', STARTUP_TIMEOUT)
+        serial.put('load')
+        await master_state.wait_for('ready', LOAD_TIMEOUT)
+
+        broker.reset_statistics()
+        latencies = []
+        start = time.perf_counter()
+        for part_ids in touchdowns:
+            serial.put_start_test(part_ids)
+            sent = time.perf_counter()
+            latencies.append(await asyncio.wait_for(serial.end_of_test.get(), TOUCHDOWN_TIMEOUT) - sent)
+
+        duration = time.perf_counter() - start
+        wire = broker.get_statistics()
+
+        serial.put('unload')
+        master = await loop.run_in_executor(None, statistics_queue.get, True, UNLOAD_TIMEOUT)
+    finally:
+        handler.task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await handler.task
+
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        broker.stop()
+
+    return {'latencies': latencies, 'duration': duration, 'wire': wire, 'master': master}
+
+
+def percentile(values: List[float], percent: int) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def report(args, touchdowns: List[List[str]], result: dict):
+    num_parts = sum(len(part_ids) for part_ids in touchdowns)
+    num_retests = num_parts - len(set(itertools.chain.from_iterable(touchdowns)))
+    latencies = result['latencies']
+    master = result['master']
+    wire = result['wire']
+    wire_bytes = wire['bytes_received'] + wire['bytes_sent']
+
+    print(f'sites: {args.sites}, parts: {num_parts} ({num_retests} retests), tests: {args.tests}, ptrs per test: {args.ptrs}, test time: {args.test_time} ms')
+    print(f'    parts per hour:       {num_parts / result["duration"] * 3600:.0f}')
+    print('    touchdown latency:    ' + ', '.join(f'p{percent} {percentile(latencies, percent) * 1000:.1f} ms' for percent in (50, 90, 99))
+          + f', max {max(latencies) * 1000:.1f} ms')
+    print(f'    master cpu per part:  {master["cpu_time"] / num_parts * 1000:.2f} ms')
+    print(f'    stdf write time:      {master["stdf_write_time"] * 1000:.1f} ms ({master["stdf_write_time"] / num_parts * 1000:.3f} ms per part)')
+    print(f'    bytes on the wire:    {wire_bytes} ({wire_bytes / num_parts:.0f} per part, {wire["messages_received"]} messages)')
+    topics = sorted(wire['topics'].items(), key=lambda item: item[1]['bytes_received'] + item[1]['bytes_delivered'], reverse=True)
+    for kind, counters in topics:
+        print(f'        {kind:<28} {counters["bytes_received"] + counters["bytes_delivered"]:>12}')
+
+
+def run(args):
+    touchdowns = plan_lot(args.sites, args.parts, args.retest_rate, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        program_path = generate_program(workspace, args.sites, args.tests, args.ptrs, args.test_time / 1000)
+        create_job_file(workspace, program_path)
+        result = asyncio.run(replay(workspace, touchdowns, args.sites))
+
+    report(args, touchdowns, result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=2)
+    parser.add_argument('--parts', type=int, default=200)
+    parser.add_argument('--tests', type=int, default=10, help='tests per part')
+    parser.add_argument('--ptrs', type=int, default=10, help='PTRs per test')
+    parser.add_argument('--test-time', type=float, default=5.0, help='time per test in ms')
+    parser.add_argument('--retest-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
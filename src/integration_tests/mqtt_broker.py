@@ -0,0 +1,361 @@
+"""
+Minimal MQTT 3.1.1 broker that runs in a background thread of the calling
+process. It is a stand-in for mosquitto when running the applications
+against each other locally (benchmarks, tests), it does not persist
+sessions and does not retransmit messages.
+
+Supported: CONNECT with will message, SUBSCRIBE/UNSUBSCRIBE with '+' and '#'
+wildcards, PUBLISH with qos 0, 1 and 2, retained messages, PINGREQ and
+DISCONNECT. All traffic is counted, see MqttBroker.get_statistics.
+"""
+import asyncio
+import struct
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+START_TIMEOUT = 5.0
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    filter_levels = topic_filter.split('/')
+    topic_levels = topic.split('/')
+    for index, level in enumerate(filter_levels):
+        if level == '#':
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level != '+' and level != topic_levels[index]:
+            return False
+
+    return len(filter_levels) == len(topic_levels)
+
+
+def topic_kind(topic: str) -> str:
+    # ate/<device_id>/<app>/<kind>/... : the traffic is accounted per app and kind
+    levels = topic.split('/')
+    return '/'.join(levels[2:4]) if len(levels) > 2 else topic
+
+
+def encode_remaining_length(length: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def encode_string(value: bytes) -> bytes:
+    return struct.pack('!H', len(value)) + value
+
+
+def encode_packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    return bytes([packet_type << 4 | flags]) + encode_remaining_length(len(body)) + body
+
+
+class Message:
+    __slots__ = ['topic', 'payload', 'qos', 'retain']
+
+    def __init__(self, topic: str, payload: bytes, qos: int, retain: bool):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+
+class ClientSession:
+    def __init__(self, broker: 'MqttBroker', reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.broker = broker
+        self.reader = reader
+        self.writer = writer
+        self.client_id = ''
+        self.will: Optional[Message] = None
+        self.subscriptions: Dict[str, int] = {}
+        self._packet_id = 0
+
+    def next_packet_id(self) -> int:
+        self._packet_id = self._packet_id % 0xFFFF + 1
+        return self._packet_id
+
+    def send(self, packet: bytes):
+        if self.writer.is_closing():
+            return
+
+        self.broker.count_sent(len(packet))
+        self.writer.write(packet)
+
+    def send_message(self, message: Message, qos: int, retain: bool):
+        topic = encode_string(message.topic.encode('utf-8'))
+        packet_id = struct.pack('!H', self.next_packet_id()) if qos else b''
+        packet = encode_packet(PUBLISH, qos << 1 | int(retain), topic + packet_id + message.payload)
+        self.broker.count_delivered(message.topic, len(packet))
+        self.send(packet)
+
+    def close(self):
+        self.writer.close()
+
+    async def read_packet(self) -> Tuple[int, int, bytes]:
+        header = await self.reader.readexactly(1)
+        length = 0
+        multiplier = 1
+        num_bytes = 1
+        while True:
+            byte = (await self.reader.readexactly(1))[0]
+            num_bytes += 1
+            length += (byte & 0x7F) * multiplier
+            multiplier *= 128
+            if not byte & 0x80:
+                break
+
+        body = await self.reader.readexactly(length) if length else b''
+        self.broker.count_received(num_bytes + length)
+        return header[0] >> 4, header[0] & 0x0F, body
+
+
+class MqttBroker:
+    """
+    usage:
+        broker = MqttBroker()
+        port = broker.start()
+        ...
+        broker.stop()
+
+    on_publish is called in the thread of the broker with the topic and the
+    payload of every message published by a client.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, on_publish: Optional[Callable[[str, bytes], None]] = None):
+        self.host = host
+        self.port = port
+        self.on_publish = on_publish
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server = None
+        self._started = threading.Event()
+        self._sessions: Dict[str, ClientSession] = {}
+        self._retained: Dict[str, Message] = {}
+        self._reset_statistics()
+
+    def start(self) -> int:
+        self._thread = threading.Thread(target=self._run, name='mqtt-broker', daemon=True)
+        self._thread.start()
+        if not self._started.wait(START_TIMEOUT) or self._server is None:
+            raise RuntimeError(f'mqtt broker could not be started on {self.host}:{self.port}')
+
+        return self.port
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def get_statistics(self) -> dict:
+        return self._call_in_loop(self._get_statistics)
+
+    def reset_statistics(self):
+        self._call_in_loop(self._reset_statistics)
+
+    def _call_in_loop(self, function: Callable):
+        async def call():
+            return function()
+
+        return asyncio.run_coroutine_threadsafe(call(), self._loop).result()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._handle_client, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        finally:
+            self._started.set()
+
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        for session in list(self._sessions.values()):
+            session.close()
+        await self._server.wait_closed()
+
+    def _reset_statistics(self):
+        self._bytes_received = 0
+        self._bytes_sent = 0
+        self._messages_received = 0
+        self._messages_delivered = 0
+        self._topics = defaultdict(lambda: {'messages_received': 0, 'bytes_received': 0, 'messages_delivered': 0, 'bytes_delivered': 0})
+
+    def _get_statistics(self) -> dict:
+        return {'bytes_received': self._bytes_received,
+                'bytes_sent': self._bytes_sent,
+                'messages_received': self._messages_received,
+                'messages_delivered': self._messages_delivered,
+                'topics': {kind: dict(counters) for kind, counters in self._topics.items()}}
+
+    def count_received(self, num_bytes: int):
+        self._bytes_received += num_bytes
+
+    def count_sent(self, num_bytes: int):
+        self._bytes_sent += num_bytes
+
+    def count_delivered(self, topic: str, num_bytes: int):
+        self._messages_delivered += 1
+        counters = self._topics[topic_kind(topic)]
+        counters['messages_delivered'] += 1
+        counters['bytes_delivered'] += num_bytes
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = ClientSession(self, reader, writer)
+        clean_disconnect = False
+        try:
+            packet_type, _, body = await session.read_packet()
+            if packet_type != CONNECT:
+                return
+
+            self._connect(session, body)
+            while True:
+                packet_type, flags, body = await session.read_packet()
+                if packet_type == DISCONNECT:
+                    clean_disconnect = True
+                    break
+
+                self._dispatch(session, packet_type, flags, body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self._sessions.get(session.client_id) is session:
+                del self._sessions[session.client_id]
+                if not clean_disconnect and session.will is not None:
+                    self._publish(session.will)
+            session.close()
+
+    def _connect(self, session: ClientSession, body: bytes):
+        # protocol name and level are not checked, paho connects with 3.1 and 3.1.1
+        _, offset = self._decode_string(body, 0)
+        connect_flags = body[offset + 1]
+        offset += 4  # protocol level, connect flags and keep alive
+        client_id, offset = self._decode_string(body, offset)
+        session.client_id = client_id.decode('utf-8')
+
+        if connect_flags & 0x04:
+            will_topic, offset = self._decode_string(body, offset)
+            will_payload, offset = self._decode_string(body, offset)
+            session.will = Message(will_topic.decode('utf-8'), will_payload, connect_flags >> 3 & 0x03, bool(connect_flags & 0x20))
+
+        # a client that connects with the id of a connected client takes its place
+        previous = self._sessions.get(session.client_id)
+        if previous is not None:
+            previous.close()
+        self._sessions[session.client_id] = session
+
+        session.send(encode_packet(CONNACK, 0, b'\x00\x00'))
+
+    def _dispatch(self, session: ClientSession, packet_type: int, flags: int, body: bytes):
+        if packet_type == PUBLISH:
+            self._on_publish(session, flags, body)
+        elif packet_type == PUBREL:
+            session.send(encode_packet(PUBCOMP, 0, body[:2]))
+        elif packet_type == PUBREC:
+            session.send(encode_packet(PUBREL, 0x02, body[:2]))
+        elif packet_type == SUBSCRIBE:
+            self._on_subscribe(session, body)
+        elif packet_type == UNSUBSCRIBE:
+            self._on_unsubscribe(session, body)
+        elif packet_type == PINGREQ:
+            session.send(encode_packet(PINGRESP, 0, b''))
+        # PUBACK and PUBCOMP of delivered messages need no answer
+
+    def _on_publish(self, session: ClientSession, flags: int, body: bytes):
+        qos = flags >> 1 & 0x03
+        topic, offset = self._decode_string(body, 0)
+        packet_id = body[offset:offset + 2] if qos else b''
+        message = Message(topic.decode('utf-8'), body[offset + len(packet_id):], qos, bool(flags & 0x01))
+
+        if qos == 1:
+            session.send(encode_packet(PUBACK, 0, packet_id))
+        elif qos == 2:
+            # the message is routed right away, there is no retransmission
+            # the broker would have to detect duplicates of
+            session.send(encode_packet(PUBREC, 0, packet_id))
+
+        counters = self._topics[topic_kind(message.topic)]
+        counters['messages_received'] += 1
+        counters['bytes_received'] += len(body)
+        self._messages_received += 1
+        self._publish(message)
+
+    def _publish(self, message: Message):
+        if message.retain:
+            if message.payload:
+                self._retained[message.topic] = message
+            else:
+                self._retained.pop(message.topic, None)
+
+        for session in list(self._sessions.values()):
+            qos = self._get_subscribed_qos(session, message.topic)
+            if qos is not None:
+                session.send_message(message, min(qos, message.qos), False)
+
+        if self.on_publish is not None:
+            self.on_publish(message.topic, message.payload)
+
+    @staticmethod
+    def _get_subscribed_qos(session: ClientSession, topic: str) -> Optional[int]:
+        granted = [qos for topic_filter, qos in session.subscriptions.items() if topic_matches(topic_filter, topic)]
+        return max(granted) if granted else None
+
+    def _on_subscribe(self, session: ClientSession, body: bytes):
+        packet_id = body[:2]
+        offset = 2
+        topic_filters = []
+        while offset < len(body):
+            topic_filter, offset = self._decode_string(body, offset)
+            qos = body[offset] & 0x03
+            offset += 1
+            session.subscriptions[topic_filter.decode('utf-8')] = qos
+            topic_filters.append((topic_filter.decode('utf-8'), qos))
+
+        session.send(encode_packet(SUBACK, 0, packet_id + bytes(qos for _, qos in topic_filters)))
+
+        for topic_filter, qos in topic_filters:
+            for message in list(self._retained.values()):
+                if topic_matches(topic_filter, message.topic):
+                    session.send_message(message, min(qos, message.qos), True)
+
+    def _on_unsubscribe(self, session: ClientSession, body: bytes):
+        packet_id = body[:2]
+        offset = 2
+        while offset < len(body):
+            topic_filter, offset = self._decode_string(body, offset)
+            session.subscriptions.pop(topic_filter.decode('utf-8'), None)
+
+        session.send(encode_packet(UNSUBACK, 0, packet_id))
+
+    @staticmethod
+    def _decode_string(body: bytes, offset: int) -> Tuple[bytes, int]:
+        length = struct.unpack_from('!H', body, offset)[0]
+        offset += 2
+        return body[offset:offset + length], offset + length
@@ -0,0 +1,108 @@
+import socket
+import struct
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from mqtt_broker import CONNECT, MqttBroker, encode_packet, encode_string, topic_matches
+
+TIMEOUT = 5.0
+
+
+class Subscriber:
+    def __init__(self, port, topics):
+        self.messages = []
+        self._received = threading.Condition()
+        self._subscribed = threading.Event()
+        self.client = mqtt.Client('subscriber')
+        self.client.on_message = self._on_message
+        self.client.on_subscribe = lambda client, userdata, mid, granted_qos: self._subscribed.set()
+        self.client.connect('127.0.0.1', port)
+        self.client.loop_start()
+        self.client.subscribe(topics)
+        assert self._subscribed.wait(TIMEOUT)
+
+    def _on_message(self, client, userdata, message):
+        with self._received:
+            self.messages.append((message.topic, message.payload, message.qos, bool(message.retain)))
+            self._received.notify_all()
+
+    def wait_for_messages(self, count):
+        with self._received:
+            assert self._received.wait_for(lambda: len(self.messages) >= count, TIMEOUT)
+        return self.messages
+
+    def stop(self):
+        self.client.disconnect()
+        self.client.loop_stop()
+
+
+@pytest.fixture
+def broker():
+    broker = MqttBroker()
+    broker.start()
+    yield broker
+    broker.stop()
+
+
+@pytest.fixture
+def publisher(broker):
+    client = mqtt.Client('publisher')
+    client.connect('127.0.0.1', broker.port)
+    client.loop_start()
+    yield client
+    client.disconnect()
+    client.loop_stop()
+
+
+def test_topic_matches():
+    assert topic_matches('ate/+/Master/#', 'ate/dev/Master/status')
+    assert topic_matches('ate/dev/#', 'ate/dev')
+    assert not topic_matches('ate/+/Master', 'ate/dev/Master/status')
+    assert not topic_matches('ate/+/Control/#', 'ate/dev/Master/status')
+
+
+def test_messages_are_routed_to_subscribers(broker, publisher):
+    publisher.publish('ate/dev/Master/status', 'initialized', qos=2, retain=True).wait_for_publish()
+    subscriber = Subscriber(broker.port, [('ate/+/Master/#', 2)])
+    try:
+        # the retained message is delivered after the subscription, wait for it to keep the order of the check
+        subscriber.wait_for_messages(1)
+        for qos in (0, 1, 2):
+            publisher.publish('ate/dev/Master/cmd', f'qos{qos}', qos=qos).wait_for_publish()
+        publisher.publish('ate/dev/Control/status/site0', 'idle', qos=2).wait_for_publish()
+
+        assert subscriber.wait_for_messages(4) == [('ate/dev/Master/status', b'initialized', 2, True),
+                                                   ('ate/dev/Master/cmd', b'qos0', 0, False),
+                                                   ('ate/dev/Master/cmd', b'qos1', 1, False),
+                                                   ('ate/dev/Master/cmd', b'qos2', 2, False)]
+    finally:
+        subscriber.stop()
+
+    statistics = broker.get_statistics()
+    assert statistics['messages_received'] == 5
+    assert statistics['topics']['Master/cmd']['messages_delivered'] == 3
+    assert statistics['bytes_received'] > 0 and statistics['bytes_sent'] > 0
+
+    broker.reset_statistics()
+    assert broker.get_statistics()['bytes_received'] == 0
+
+
+def test_will_is_published_when_connection_is_lost(broker):
+    published = []
+    broker.on_publish = lambda topic, payload: published.append((topic, payload))
+
+    # connect with the will message 'crash' (qos 2, retained) and drop the connection
+    connect = encode_string(b'MQTT') + bytes([4, 0x04 | 0x10 | 0x20]) + struct.pack('!H', 60) \
+        + encode_string(b'control') + encode_string(b'ate/dev/Control/status/site0') + encode_string(b'crash')
+    with socket.create_connection(('127.0.0.1', broker.port)) as connection:
+        connection.sendall(encode_packet(CONNECT, 0, connect))
+        assert connection.recv(4) == b'\x20\x02\x00\x00'
+
+    deadline = time.monotonic() + TIMEOUT
+    while not published and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert published == [('ate/dev/Control/status/site0', b'crash')]